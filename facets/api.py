@@ -1,5 +1,8 @@
 """
 Exports the symbols defined by the facets.core and facets.ui packages.
+
+The facets.core symbols are imported immediately, but each facets.ui symbol is
+only imported the first time it is accessed (see facets.ui.api).
 """
 
 #-------------------------------------------------------------------------------
@@ -13,7 +16,16 @@ Exports the symbols defined by the facets.core and facets.ui packages.
 from facets.core.api \
     import *
 
-from facets.ui.api \
-    import *
+from facets.lib.util.lazy_module \
+    import LazyModule as _LazyModule
+
+import facets.ui.api as _ui_api
+
+#-------------------------------------------------------------------------------
+#  Define the lazily imported facets.ui symbols:
+#-------------------------------------------------------------------------------
+
+_LazyModule.install( __name__,
+                     { 'facets.ui.api': ' '.join( _ui_api.__all__ ) } )
 
-#-- EOF ------------------------------------------------------------------------
\ No newline at end of file
+#-- EOF ------------------------------------------------------------------------
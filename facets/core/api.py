@@ -70,7 +70,7 @@ from facet_handlers                                                            \
     import BaseFacetHandler, FacetType, FacetHandler, FacetCoerceType,         \
            FacetCastType, ThisClass, FacetPrefixList, FacetMap,                \
            FacetPrefixMap, FacetCompound, NO_COMPARE, OBJECT_IDENTITY_COMPARE, \
-           RICH_COMPARE
+           RICH_COMPARE, HANDLER_COMPARE
 
 from facet_collections                                                         \
     import FacetListObject, FacetListEvent, FacetDictObject, FacetDictEvent,   \
@@ -10,6 +10,13 @@
 #include "structmember.h"
 #include "stdio.h"
 
+#ifdef MS_WINDOWS
+#include <windows.h>
+#else
+#include <time.h>
+#include <sys/time.h>
+#endif
+
 //-----------------------------------------------------------------------------
 //  Constants:
 //-----------------------------------------------------------------------------
@@ -158,6 +165,13 @@ PyDoc_STRVAR( cfacets__doc__,
 // a facet:
 #define HASFACETS_VETO_NOTIFY 0x00000004
 
+// The remaining high order flag bits contain the (1-based) index of the
+// instance counter the object was counted in (0 = not counted):
+#define HASFACETS_COUNTER_SHIFT 8
+#define HASFACETS_COUNTER_MAX   0x007FFFFF
+#define HASFACETS_COUNTER(obj) \
+    (((unsigned int) (obj)->flags) >> HASFACETS_COUNTER_SHIFT)
+
 //-----------------------------------------------------------------------------
 //  'CHasFacets' instance definition:
 //
@@ -216,6 +230,10 @@ static int call_notifiers ( PyListObject *, PyListObject *,
 // notifications?
 #define FACET_NO_VALUE_TEST               0x00000100
 
+// Should the facet handler's 'values_differ' method be used to compare the
+// old and new values (instead of a rich compare)?
+#define FACET_HANDLER_COMPARE             0x00000200
+
 // The mask and shift values used to extract the CFacetNotification type:
 #define FACET_NOTIFY_SHIFT                16
 #define FACET_NOTIFY_MASK                 0x0000000F
@@ -324,6 +342,36 @@ raise_facet_error ( facet_object * facet, has_facets_object * obj,
     return NULL;
 }
 
+//-----------------------------------------------------------------------------
+//  Returns whether the old and new values of a facet differ, as determined by
+//  the facet's handler:
+//-----------------------------------------------------------------------------
+
+static int
+handler_compare ( facet_object * facet, PyObject * old_value,
+                  PyObject * new_value ) {
+
+    int changed;
+
+    PyObject * result = PyObject_CallMethod( facet->handler,
+                              "values_differ", "(OO)", old_value, new_value );
+    if ( result == NULL ) {
+        PyErr_Clear();
+
+        return 1;
+    }
+
+    changed = PyObject_IsTrue( result );
+    Py_DECREF( result );
+    if ( changed == -1 ) {
+        PyErr_Clear();
+
+        return 1;
+    }
+
+    return changed;
+}
+
 //-----------------------------------------------------------------------------
 //  Raise a fatal facet error:
 //-----------------------------------------------------------------------------
@@ -902,6 +950,101 @@ has_facets_setattro ( has_facets_object * obj,
     return facet->setattr( facet, facet, obj, name, value );
 }
 
+//-----------------------------------------------------------------------------
+//  HasFacets instance counting:
+//
+//  When enabled (via '_instance_counting'), the number of live, total and peak
+//  instances of each HasFacets subclass are maintained directly by
+//  'has_facets_new' and 'has_facets_dealloc' without calling any Python code.
+//  Each counted object records the index of its counter in its 'flags', so
+//  that it is correctly uncounted even if counting has since been disabled.
+//-----------------------------------------------------------------------------
+
+typedef struct {
+    PyObject * type;            // The class being counted
+    Py_ssize_t live;            // Number of currently live instances
+    Py_ssize_t total;           // Total number of instances created
+    Py_ssize_t peak;            // Maximum number of live instances
+} instance_counter;
+
+static instance_counter * instance_counters = NULL; // Counters (by index)
+static Py_ssize_t instance_counters_size     = 0;    // Number of counters used
+static Py_ssize_t instance_counters_capacity = 0;    // Number allocated
+static PyObject * instance_counter_index = NULL;     // Maps type -> index
+static int instance_counting = 0;                    // Is counting enabled?
+
+//-----------------------------------------------------------------------------
+//  Returns the (1-based) index of the instance counter for a specified type,
+//  creating it if necessary (returns 0 if the counter could not be created):
+//-----------------------------------------------------------------------------
+
+static Py_ssize_t
+instance_counter_for ( PyTypeObject * type ) {
+
+    Py_ssize_t index, capacity;
+    PyObject * value;
+    instance_counter * counters;
+
+    value = PyDict_GetItem( instance_counter_index, (PyObject *) type );
+    if ( value != NULL )
+        return PyInt_AS_LONG( value );
+
+    if ( instance_counters_size >= HASFACETS_COUNTER_MAX )
+        return 0;
+
+    if ( instance_counters_size >= instance_counters_capacity ) {
+        capacity = (instance_counters_capacity == 0)?
+                   64: (2 * instance_counters_capacity);
+        counters = instance_counters;
+        PyMem_Resize( counters, instance_counter, capacity );
+        if ( counters == NULL )
+            return 0;
+
+        instance_counters          = counters;
+        instance_counters_capacity = capacity;
+    }
+
+    index = instance_counters_size + 1;
+    value = PyInt_FromSsize_t( index );
+    if ( (value == NULL) ||
+         (PyDict_SetItem( instance_counter_index, (PyObject *) type, value )
+          < 0) ) {
+        Py_XDECREF( value );
+        PyErr_Clear();
+
+        return 0;
+    }
+    Py_DECREF( value );
+
+    instance_counters[ index - 1 ].type  = (PyObject *) type;
+    instance_counters[ index - 1 ].live  = 0;
+    instance_counters[ index - 1 ].total = 0;
+    instance_counters[ index - 1 ].peak  = 0;
+    Py_INCREF( type );
+    instance_counters_size = index;
+
+    return index;
+}
+
+//-----------------------------------------------------------------------------
+//  Counts a newly created HasFacets object:
+//-----------------------------------------------------------------------------
+
+static void
+instance_count_new ( has_facets_object * obj ) {
+
+    instance_counter * counter;
+    Py_ssize_t index = instance_counter_for( obj->ob_type );
+
+    if ( index > 0 ) {
+        obj->flags |= (int) (index << HASFACETS_COUNTER_SHIFT);
+        counter     = instance_counters + (index - 1);
+        counter->total++;
+        if ( ++counter->live > counter->peak )
+            counter->peak = counter->live;
+    }
+}
+
 //-----------------------------------------------------------------------------
 //  Allocates a CFacet instance:
 //-----------------------------------------------------------------------------
@@ -917,6 +1060,8 @@ has_facets_new ( PyTypeObject * type, PyObject * args, PyObject * kwds ) {
         assert( obj->cfacet_dict != NULL );
         assert( PyDict_Check( (PyObject *) obj->cfacet_dict ) );
         Py_INCREF( obj->cfacet_dict );
+        if ( instance_counting )
+            instance_count_new( obj );
     }
 
     return (PyObject *) obj;
@@ -1025,6 +1170,11 @@ has_facets_clear ( has_facets_object * obj ) {
 static void
 has_facets_dealloc ( has_facets_object * obj ) {
 
+    unsigned int index = HASFACETS_COUNTER( obj );
+
+    if ( index > 0 )
+        instance_counters[ index - 1 ].live--;
+
     has_facets_clear( obj );
     obj->ob_type->tp_free( (PyObject *) obj );
 }
@@ -2242,6 +2392,179 @@ setattr_generic ( facet_object      * faceto,
     return PyObject_GenericSetAttr( (PyObject *) obj, name, value );
 }
 
+//-----------------------------------------------------------------------------
+//  Notification profiler:
+//
+//  When enabled (via '_facet_profiler'), each notifier call made by
+//  'call_notifiers' is timed and recorded in a fixed size ring buffer. Each
+//  record contains the notifier called, the type of the object notified, the
+//  name of the facet that changed, the total elapsed time of the call (in
+//  nanoseconds), the time spent in nested notifier calls made by the notifier
+//  and the nesting depth of the call. Records are appended when a call
+//  completes, so nested calls always precede the call containing them.
+//
+//  Sampling is performed on top-level (depth 0) notifications only, so that
+//  all nested notifications of a sampled notification are also recorded.
+//-----------------------------------------------------------------------------
+
+// The maximum notification nesting depth tracked by the profiler:
+#define PROFILE_MAX_DEPTH 256
+
+typedef struct {
+    PyObject   * notifier;     // The notifier that was called
+    PyObject   * type;         // The type of the object that was notified
+    PyObject   * name;         // The name of the facet that changed
+    PY_LONG_LONG elapsed;      // Total elapsed time of the call (in ns)
+    PY_LONG_LONG child;        // Time spent in nested notifier calls (in ns)
+    int          depth;        // Notification nesting depth of the call
+} profile_record;
+
+static profile_record * profile_records = NULL; // The ring buffer
+static Py_ssize_t profile_capacity = 0;  // Number of records in ring buffer
+static Py_ssize_t profile_next     = 0;  // Index of next record to write
+static Py_ssize_t profile_count    = 0;  // Number of valid records in buffer
+static PY_LONG_LONG profile_total  = 0;  // Total number of records written
+static long profile_sample_rate    = 1;  // Record 1 of every N notifications
+static long profile_sample_count   = 0;  // Notifications since last sample
+static int  profile_depth          = 0;  // Current notification nesting depth
+static int  profile_sampled        = 0;  // Is the current notification sampled?
+static PY_LONG_LONG profile_child[ PROFILE_MAX_DEPTH + 1 ]; // Nested times
+
+//-----------------------------------------------------------------------------
+//  Returns the current value of a monotonic clock (in nanoseconds):
+//-----------------------------------------------------------------------------
+
+static PY_LONG_LONG
+profile_clock ( void ) {
+
+#ifdef MS_WINDOWS
+    static LARGE_INTEGER frequency = { 0 };
+    LARGE_INTEGER counter;
+
+    if ( frequency.QuadPart == 0 )
+        QueryPerformanceFrequency( &frequency );
+
+    QueryPerformanceCounter( &counter );
+
+    return (PY_LONG_LONG) ((((double) counter.QuadPart) * 1.0e9) /
+                           ((double) frequency.QuadPart));
+#else
+#ifdef CLOCK_MONOTONIC
+    struct timespec ts;
+
+    clock_gettime( CLOCK_MONOTONIC, &ts );
+
+    return (((PY_LONG_LONG) ts.tv_sec) * 1000000000) + ts.tv_nsec;
+#else
+    struct timeval tv;
+
+    gettimeofday( &tv, NULL );
+
+    return (((PY_LONG_LONG) tv.tv_sec) * 1000000000) +
+           (((PY_LONG_LONG) tv.tv_usec) * 1000);
+#endif
+#endif
+}
+
+//-----------------------------------------------------------------------------
+//  Releases all records contained in the profiler ring buffer:
+//-----------------------------------------------------------------------------
+
+static void
+profile_clear ( void ) {
+
+    Py_ssize_t i;
+    profile_record * record;
+
+    for ( i = 0; i < profile_capacity; i++ ) {
+        record = profile_records + i;
+        Py_CLEAR( record->notifier );
+        Py_CLEAR( record->type );
+        Py_CLEAR( record->name );
+    }
+
+    profile_next  = 0;
+    profile_count = 0;
+    profile_total = 0;
+}
+
+//-----------------------------------------------------------------------------
+//  Calls a notifier, recording the call in the profiler ring buffer if the
+//  notification profiler is enabled:
+//-----------------------------------------------------------------------------
+
+static PyObject *
+profile_call ( PyObject          * callable,
+               PyObject          * args,
+               PyObject          * notifier,
+               has_facets_object * obj,
+               PyObject          * name ) {
+
+    int depth;
+    PY_LONG_LONG start, elapsed;
+    PyObject * result, * type, * value, * traceback;
+    profile_record * record;
+
+    if ( profile_records == NULL )
+        return PyObject_Call( callable, args, NULL );
+
+    depth = profile_depth;
+    if ( depth == 0 ) {
+        profile_sampled = (++profile_sample_count >= profile_sample_rate);
+        if ( profile_sampled )
+            profile_sample_count = 0;
+    }
+
+    if ( (!profile_sampled) || (depth >= PROFILE_MAX_DEPTH) ) {
+        profile_depth++;
+        result = PyObject_Call( callable, args, NULL );
+        profile_depth--;
+
+        return result;
+    }
+
+    profile_child[ depth + 1 ] = 0;
+    profile_depth++;
+    start   = profile_clock();
+    result  = PyObject_Call( callable, args, NULL );
+    elapsed = profile_clock() - start;
+    profile_depth--;
+
+    // The profiler may have been disabled by the notifier:
+    if ( profile_records == NULL )
+        return result;
+
+    profile_child[ depth ] += elapsed;
+
+    if ( result == NULL )
+        PyErr_Fetch( &type, &value, &traceback );
+
+    record = profile_records + profile_next;
+    Py_XDECREF( record->notifier );
+    Py_XDECREF( record->type );
+    Py_XDECREF( record->name );
+    record->notifier = notifier;
+    record->type     = (PyObject *) Py_TYPE( obj );
+    record->name     = name;
+    record->elapsed  = elapsed;
+    record->child    = profile_child[ depth + 1 ];
+    record->depth    = depth;
+    Py_INCREF( notifier );
+    Py_INCREF( record->type );
+    Py_INCREF( name );
+
+    profile_next = (profile_next + 1) % profile_capacity;
+    if ( profile_count < profile_capacity )
+        profile_count++;
+
+    profile_total++;
+
+    if ( result == NULL )
+        PyErr_Restore( type, value, traceback );
+
+    return result;
+}
+
 //-----------------------------------------------------------------------------
 //  Call all notifiers for a specified facet:
 //-----------------------------------------------------------------------------
@@ -2329,11 +2652,11 @@ call_notifiers ( PyListObject      * tnotifiers,
                 arg_temp = PyList_GET_ITEM( tnotifiers, i );
                 Py_INCREF( arg_temp );
                 PyTuple_SET_ITEM( user_args, 0, arg_temp );
-                result = PyObject_Call( _facet_notification_handler,
-                                        user_args, NULL );
+                result = profile_call( _facet_notification_handler,
+                                       user_args, arg_temp, obj, name );
             } else {
-                result = PyObject_Call( PyList_GET_ITEM( tnotifiers, i ),
-                                        args, NULL );
+                item   = PyList_GET_ITEM( tnotifiers, i );
+                result = profile_call( item, args, item, obj, name );
             }
             if ( result == NULL ) {
                 rc = -1;
@@ -2371,11 +2694,11 @@ call_notifiers ( PyListObject      * tnotifiers,
                 arg_temp = PyList_GET_ITEM( onotifiers, i );
                 Py_INCREF( arg_temp );
                 PyTuple_SET_ITEM( user_args, 0, arg_temp );
-                result = PyObject_Call( _facet_notification_handler,
-                                        user_args, NULL );
+                result = profile_call( _facet_notification_handler,
+                                       user_args, arg_temp, obj, name );
             } else {
-                result = PyObject_Call( PyList_GET_ITEM( onotifiers, i ),
-                                        args, NULL );
+                item   = PyList_GET_ITEM( onotifiers, i );
+                result = profile_call( item, args, item, obj, name );
             }
             if ( result == NULL ) {
                 rc = -1;
@@ -2488,6 +2811,10 @@ notify:
                     if ( !changed ) {
                         changed = (old_value != value );
                         if ( changed &&
+                             (facetd->flags & FACET_HANDLER_COMPARE) ) {
+                            changed = handler_compare( facetd, old_value,
+                                                       value );
+                        } else if ( changed &&
                              ((facetd->flags & FACET_OBJECT_IDENTITY) == 0) ) {
                             changed = PyObject_RichCompareBool( old_value,
                                                                 value, Py_NE );
@@ -2612,7 +2939,9 @@ notify:
 
         if ( !changed ) {
             changed = (old_value != value);
-            if ( changed &&
+            if ( changed && (facetd->flags & FACET_HANDLER_COMPARE) ) {
+                changed = handler_compare( facetd, old_value, value );
+            } else if ( changed &&
                  ((facetd->flags & FACET_OBJECT_IDENTITY) == 0) ) {
                 changed = PyObject_RichCompareBool( old_value, value, Py_NE );
                 if ( changed == -1 ) {
@@ -4441,7 +4770,8 @@ _facet_rich_comparison ( facet_object * facet, PyObject * args ) {
     if ( !PyArg_ParseTuple( args, "i", &compare_type ) )
         return NULL;
 
-    facet->flags &= (~(FACET_NO_VALUE_TEST | FACET_OBJECT_IDENTITY));
+    facet->flags &= (~(FACET_NO_VALUE_TEST | FACET_OBJECT_IDENTITY |
+                       FACET_HANDLER_COMPARE));
     if ( compare_type == 0 )
         facet->flags |= FACET_OBJECT_IDENTITY;
 
@@ -4461,11 +4791,14 @@ _facet_comparison_mode ( facet_object * facet, PyObject * args ) {
     if ( !PyArg_ParseTuple( args, "i", &comparison_mode ) )
         return NULL;
 
-    facet->flags &= (~(FACET_NO_VALUE_TEST | FACET_OBJECT_IDENTITY));
+    facet->flags &= (~(FACET_NO_VALUE_TEST | FACET_OBJECT_IDENTITY |
+                       FACET_HANDLER_COMPARE));
     switch ( comparison_mode ) {
         case 0:  facet->flags |= FACET_NO_VALUE_TEST;
                  break;
         case 1:  facet->flags |= FACET_OBJECT_IDENTITY;
+                 break;
+        case 3:  facet->flags |= FACET_HANDLER_COMPARE;
         default: break;
     }
 
@@ -5401,6 +5734,167 @@ _cfacets_facet_notification_handler ( PyObject * self, PyObject * args ) {
     return result;
 }
 
+//-----------------------------------------------------------------------------
+//  Enables or disables the notification profiler. A 'capacity' of 0 disables
+//  the profiler, otherwise it specifies the number of records in the profiler
+//  ring buffer. Any previously recorded profiler data is discarded:
+//-----------------------------------------------------------------------------
+
+static PyObject *
+_cfacets_facet_profiler ( PyObject * self, PyObject * args ) {
+
+    Py_ssize_t capacity;
+    long sample_rate = 1;
+    profile_record * records;
+
+    if ( !PyArg_ParseTuple( args, "n|l", &capacity, &sample_rate ) )
+        return NULL;
+
+    if ( (capacity < 0) || (sample_rate < 1) ) {
+        PyErr_SetString( PyExc_ValueError,
+            "capacity must be >= 0 and sample_rate must be >= 1" );
+
+        return NULL;
+    }
+
+    records = NULL;
+    if ( capacity > 0 ) {
+        records = PyMem_New( profile_record, capacity );
+        if ( records == NULL )
+            return PyErr_NoMemory();
+
+        memset( records, 0, capacity * sizeof( profile_record ) );
+    }
+
+    if ( profile_records != NULL ) {
+        profile_clear();
+        PyMem_Free( profile_records );
+    }
+
+    profile_records      = records;
+    profile_capacity     = capacity;
+    profile_next         = 0;
+    profile_count        = 0;
+    profile_total        = 0;
+    profile_sample_rate  = sample_rate;
+    profile_sample_count = sample_rate - 1;
+
+    Py_INCREF( Py_None );
+    return Py_None;
+}
+
+//-----------------------------------------------------------------------------
+//  Returns a tuple of the form: ( total, records ), where 'total' is the total
+//  number of notifier calls recorded since the profiler was enabled (or last
+//  cleared) and 'records' is a list of the records currently contained in the
+//  profiler ring buffer (oldest first). Each record is a tuple of the form:
+//  ( notifier, object_type, facet_name, elapsed_ns, nested_ns, depth ). If
+//  'clear' is true, the ring buffer is emptied after the records are returned:
+//-----------------------------------------------------------------------------
+
+static PyObject *
+_cfacets_facet_profiler_records ( PyObject * self, PyObject * args ) {
+
+    int clear = 0;
+    Py_ssize_t i, first;
+    PyObject * records, * item, * result;
+    profile_record * record;
+
+    if ( !PyArg_ParseTuple( args, "|i", &clear ) )
+        return NULL;
+
+    records = PyList_New( profile_count );
+    if ( records == NULL )
+        return NULL;
+
+    first = profile_next - profile_count;
+    if ( first < 0 )
+        first += profile_capacity;
+
+    for ( i = 0; i < profile_count; i++ ) {
+        record = profile_records + ((first + i) % profile_capacity);
+        item   = Py_BuildValue( "(OOOLLi)", record->notifier, record->type,
+                                record->name, record->elapsed, record->child,
+                                record->depth );
+        if ( item == NULL ) {
+            Py_DECREF( records );
+
+            return NULL;
+        }
+        PyList_SET_ITEM( records, i, item );
+    }
+
+    result = Py_BuildValue( "(LN)", profile_total, records );
+    if ( (result != NULL) && clear && (profile_records != NULL) )
+        profile_clear();
+
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+//  Enables or disables counting of HasFacets instances by class and returns
+//  the previous state:
+//-----------------------------------------------------------------------------
+
+static PyObject *
+_cfacets_instance_counting ( PyObject * self, PyObject * args ) {
+
+    int enabled;
+    PyObject * result = instance_counting? Py_True: Py_False;
+
+    if ( !PyArg_ParseTuple( args, "i", &enabled ) )
+        return NULL;
+
+    instance_counting = (enabled != 0);
+
+    Py_INCREF( result );
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+//  Returns a list of tuples of the form: ( class, live, total, peak ) for each
+//  HasFacets subclass that has been counted. If 'reset' is true, the total
+//  and peak counts for each class are reset after the list is created:
+//-----------------------------------------------------------------------------
+
+static PyObject *
+_cfacets_instance_counts ( PyObject * self, PyObject * args ) {
+
+    int reset = 0;
+    Py_ssize_t i;
+    PyObject * result, * item;
+    instance_counter * counter;
+
+    if ( !PyArg_ParseTuple( args, "|i", &reset ) )
+        return NULL;
+
+    result = PyList_New( instance_counters_size );
+    if ( result == NULL )
+        return NULL;
+
+    for ( i = 0; i < instance_counters_size; i++ ) {
+        counter = instance_counters + i;
+        item    = Py_BuildValue( "(Onnn)", counter->type, counter->live,
+                                 counter->total, counter->peak );
+        if ( item == NULL ) {
+            Py_DECREF( result );
+
+            return NULL;
+        }
+        PyList_SET_ITEM( result, i, item );
+    }
+
+    if ( reset ) {
+        for ( i = 0; i < instance_counters_size; i++ ) {
+            counter        = instance_counters + i;
+            counter->total = 0;
+            counter->peak  = counter->live;
+        }
+    }
+
+    return result;
+}
+
 //-----------------------------------------------------------------------------
 //  Performs an HLSA image transform on a specified image buffer and returns the
 //  transformed image buffer (or None, if no transform is specified).
@@ -6118,6 +6612,18 @@ static PyMethodDef cfacets_methods[] = {
 	{ "_facet_notification_handler",
         (PyCFunction) _cfacets_facet_notification_handler,  METH_VARARGS,
         PyDoc_STR( "_facet_notification_handler(handler)" ) },
+	{ "_instance_counting",
+        (PyCFunction) _cfacets_instance_counting,  METH_VARARGS,
+        PyDoc_STR( "_instance_counting(enabled)" ) },
+	{ "_instance_counts",
+        (PyCFunction) _cfacets_instance_counts,  METH_VARARGS,
+        PyDoc_STR( "_instance_counts([reset])" ) },
+	{ "_facet_profiler",
+        (PyCFunction) _cfacets_facet_profiler,  METH_VARARGS,
+        PyDoc_STR( "_facet_profiler(capacity[,sample_rate])" ) },
+	{ "_facet_profiler_records",
+        (PyCFunction) _cfacets_facet_profiler_records,  METH_VARARGS,
+        PyDoc_STR( "_facet_profiler_records([clear])" ) },
 	{ "hlsa_transform",
         (PyCFunction) _cfacets_hlsa_transform,  METH_VARARGS,
         PyDoc_STR( "hlsa_transform(buffer,width,height,hue_shift,lightness_shift,saturation_shift,alpha_shift,hue_range,lightness_range,saturation_range,alpha_range)" ) },
@@ -6827,6 +7333,11 @@ initcfacets ( void ) {
 
 	_HasFacets_monitors = tmp;
 
+    // Create the instance counter index (maps type -> counter index):
+    instance_counter_index = PyDict_New();
+    if ( instance_counter_index == NULL )
+        return;
+
     // Predefine a Python string == "__class_facets__":
     class_facets = PyString_FromString( "__class_facets__" );
 
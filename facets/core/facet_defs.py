@@ -663,6 +663,9 @@ def Facet ( *value_type, **metadata ):
             2 (RICH_COMPARE): A facet change notification is generated if the
                 old and new values are not equal using Python's
                 'rich comparison' operator. This is the default.
+            3 (HANDLER_COMPARE): A facet change notification is generated if
+                the old and new values are not the same object and the facet
+                handler's 'values_differ' method returns True for them.
     rich_compare : Boolean (DEPRECATED: Use comparison_mode instead)
         Indicates whether the basis for considering a facet attribute value to
         have changed is a "rich" comparison (True, the default), or simple
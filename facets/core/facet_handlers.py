@@ -53,6 +53,7 @@ logger = logging.getLogger( __name__ )
 NO_COMPARE              = 0
 OBJECT_IDENTITY_COMPARE = 1
 RICH_COMPARE            = 2
+HANDLER_COMPARE         = 3
 
 RangeTypes    = ( int, long, float )
 
@@ -162,6 +163,15 @@ class BaseFacetHandler ( object ):
             return True
 
 
+    def values_differ ( self, old, new ):
+        """ Returns True if the *old* and *new* values of a facet whose
+            'comparison_mode' is HANDLER_COMPARE are different (i.e. a facet
+            change notification should be generated). It is only called when
+            *old* and *new* are not the same object.
+        """
+        return (old != new)
+
+
     def error ( self, object, name, value ):
         """ Raises a FacetError exception.
 
@@ -19,7 +19,7 @@ from facet_errors \
     import FacetError
 
 from facet_handlers \
-    import FacetType, OBJECT_IDENTITY_COMPARE
+    import FacetType, OBJECT_IDENTITY_COMPARE, HANDLER_COMPARE
 
 from facet_types \
     import Str, Any, Int as TInt, Float as TFloat
@@ -28,8 +28,31 @@ from facet_types \
 #  Deferred imports from numpy:
 #-------------------------------------------------------------------------------
 
-ndarray = None
-asarray = None
+ndarray     = None
+asarray     = None
+array_equal = None
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The ways of detecting that the value of an array facet has changed:
+ChangeDetectionModes = ( 'identity', 'shape', 'content' )
+
+# The number of blocks of elements, and the number of elements in each block,
+# compared when detecting whether the content of a large array has changed:
+SampleBlocks    = 16
+SampleBlockSize = 256
+
+# The maximum number of array sizes whose sample indices are cached:
+MaxSampleSizes = 32
+
+#-------------------------------------------------------------------------------
+#  Global Data:
+#-------------------------------------------------------------------------------
+
+# The cache of sample indices (indexed by array size):
+sample_cache = {}
 
 #-------------------------------------------------------------------------------
 #  numpy dtype mapping:
@@ -53,6 +76,27 @@ def dtype2facet ( dtype ):
     else:
         return Any
 
+
+def sample_indices ( size ):
+    """ Returns the array of the (flat) indices of the elements compared when
+        detecting whether the content of an array containing *size* elements
+        has changed.
+    """
+    indices = sample_cache.get( size )
+    if indices is None:
+        import numpy
+
+        if len( sample_cache ) >= MaxSampleSizes:
+            sample_cache.clear()
+
+        starts  = numpy.linspace( 0, size - SampleBlockSize,
+                                  SampleBlocks ).astype( int )
+        indices = (starts[ :, None ] +
+                   numpy.arange( SampleBlockSize )).ravel()
+        sample_cache[ size ] = indices
+
+    return indices
+
 #-------------------------------------------------------------------------------
 #  'AbstractArray' facet base class:
 #-------------------------------------------------------------------------------
@@ -64,10 +108,12 @@ class AbstractArray ( FacetType ):
     #-- Public Methods ---------------------------------------------------------
 
     def __init__ ( self, dtype = None, shape = None, value = None,
-                         coerce = False, typecode = None, **metadata ):
+                         coerce = False, typecode = None,
+                         change_detection = 'identity', copy_on_write = False,
+                         **metadata ):
         """ Returns an AbstractArray facet.
         """
-        global ndarray, asarray
+        global ndarray, asarray, array_equal
 
         try:
             import numpy
@@ -77,13 +123,23 @@ class AbstractArray ( FacetType ):
                 'to be installed.'
             )
 
-        from numpy import ndarray, zeros
+        from numpy import ndarray, asarray, array_equal, zeros
 
         # Mark this as being an 'array' facet:
         metadata[ 'array' ] = True
 
-        # Normally use object identity to detect array values changing:
-        metadata.setdefault( 'comparison_mode', OBJECT_IDENTITY_COMPARE )
+        # Normally use object identity to detect array values changing, and
+        # otherwise have the 'values_differ' method decide:
+        if change_detection not in ChangeDetectionModes:
+            raise FacetError(
+                'change_detection should be one of: %s' %
+                ', '.join( ChangeDetectionModes )
+            )
+
+        if change_detection == 'identity':
+            metadata.setdefault( 'comparison_mode', OBJECT_IDENTITY_COMPARE )
+        else:
+            metadata[ 'comparison_mode' ] = HANDLER_COMPARE
 
         if typecode is not None:
             warnings.warn( 'typecode is a deprecated argument; use dtype '
@@ -145,9 +201,14 @@ class AbstractArray ( FacetType ):
                     size.append( item )
                 value = zeros( size, dt )
 
-        self.dtype  = dtype
-        self.shape  = shape
-        self.coerce = coerce
+        self.dtype            = dtype
+        self.shape            = shape
+        self.coerce           = coerce
+        self.change_detection = change_detection
+        self.copy_on_write    = copy_on_write
+
+        # The most recent array shape found to be valid (if any):
+        self.valid_shape = None
 
         super( AbstractArray, self ).__init__( value, **metadata )
 
@@ -155,6 +216,16 @@ class AbstractArray ( FacetType ):
     def validate ( self, object, name, value ):
         """ Validates that the value is a valid array.
         """
+        # Accept an array already having the right type and a valid shape as
+        # is, without any conversion or shape checking:
+        if (isinstance( value, ndarray )                                 and
+            ((self.dtype is None) or (value.dtype == self.dtype))        and
+            ((self.shape is None) or (value.shape == self.valid_shape))):
+            if self.copy_on_write:
+                value = self.read_only( value )
+
+            return value
+
         try:
             # Make sure the value is an array:
             type_value = type( value )
@@ -178,6 +249,9 @@ class AbstractArray ( FacetType ):
             # If no shape requirements, then return the value:
             facet_shape = self.shape
             if facet_shape is None:
+                if self.copy_on_write:
+                    value = self.read_only( value )
+
                 return value
 
             # Else make sure that the value's shape is compatible:
@@ -193,6 +267,10 @@ class AbstractArray ( FacetType ):
                               ((item[1] is not None) and (dim > item[1]))):
                             break
                 else:
+                    self.valid_shape = value_shape
+                    if self.copy_on_write:
+                        value = self.read_only( value )
+
                     return value
         except:
             pass
@@ -200,6 +278,48 @@ class AbstractArray ( FacetType ):
         self.error( object, name, value )
 
 
+    def read_only ( self, value ):
+        """ Returns a read-only version of the array *value* for use as the
+            value of a copy on write facet. An array owning its data is made
+            read-only in place, but a view of a writable array is copied
+            first, since it could still be modified through that array.
+        """
+        if not value.flags.owndata:
+            base = value.base
+            if (not isinstance( base, ndarray )) or base.flags.writeable:
+                value = value.copy()
+
+        value.flags.writeable = False
+
+        return value
+
+
+    def values_differ ( self, old, new ):
+        """ Returns True if the *old* and *new* array values of the facet are
+            different, based on the facet's change detection mode: 'shape'
+            only compares their shape and type, while 'content' also compares
+            their elements (although for a large array, only a sample of
+            blocks of elements spread across the array are compared).
+        """
+        try:
+            if (old.shape != new.shape) or (old.dtype != new.dtype):
+                return True
+
+            if self.change_detection == 'shape':
+                return False
+
+            size = old.size
+            if size <= (SampleBlocks * SampleBlockSize):
+                return (not array_equal( old, new ))
+
+            indices = sample_indices( size )
+
+            return (not array_equal( old.flat[ indices ],
+                                     new.flat[ indices ] ))
+        except:
+            return True
+
+
     def info ( self ):
         """ Returns descriptive information about the facet.
         """
@@ -252,6 +372,10 @@ class AbstractArray ( FacetType ):
         """ Returns a copy of the default value (called from the C code on
             first reference to a facet with no current value).
         """
+        if self.copy_on_write:
+            # The default value is read-only, so it can be safely shared:
+            return value
+
         return value.copy()
 
 #-------------------------------------------------------------------------------
@@ -287,6 +411,23 @@ class Array ( AbstractArray ):
                 must be at least 2.)
             value : numpy array
                 A default value for the array
+            change_detection : 'identity', 'shape' or 'content'
+                How assigning a new array is detected as changing the value of
+                the facet (and so generates a facet change notification).
+                'identity' (the default) treats any array which is not the
+                same object as the current value as a change. 'shape' only
+                treats an array with a different shape or dtype as a change.
+                'content' also treats an array with different elements as a
+                change, but for large arrays only compares a sample of blocks
+                of elements spread across the array.
+            copy_on_write : boolean
+                If True, each array assigned to the facet is made read-only,
+                so that the facet value (and any reference to it held
+                elsewhere) can be used as a snapshot without making a copy.
+                Note that an assigned array owning its data is made read-only
+                in place (including for the code that assigned it), while a
+                view of a writable array is copied. The value is changed by
+                assigning a modified copy of it.
 
             Default Value
             -------------
@@ -337,6 +478,23 @@ class CArray ( AbstractArray ):
                 must be at least 2.)
             value : numpy array
                 A default value for the array
+            change_detection : 'identity', 'shape' or 'content'
+                How assigning a new array is detected as changing the value of
+                the facet (and so generates a facet change notification).
+                'identity' (the default) treats any array which is not the
+                same object as the current value as a change. 'shape' only
+                treats an array with a different shape or dtype as a change.
+                'content' also treats an array with different elements as a
+                change, but for large arrays only compares a sample of blocks
+                of elements spread across the array.
+            copy_on_write : boolean
+                If True, each array assigned to the facet is made read-only,
+                so that the facet value (and any reference to it held
+                elsewhere) can be used as a snapshot without making a copy.
+                Note that an assigned array owning its data is made read-only
+                in place (including for the code that assigned it), while a
+                view of a writable array is copied. The value is changed by
+                assigning a modified copy of it.
 
             Default Value
             -------------
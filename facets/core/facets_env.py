@@ -71,6 +71,12 @@ class FacetsEnv ( SingletonHasFacets ):
     # The user interface initialization mode:
     init = Str( initial = 'app' )
 
+    # Should the pages of all 'tabbed' and 'fold' groups be created lazily?
+    lazy = Bool( initial = False, kind = as_bool )
+
+    # The default maximum number of idle views kept by each UI pool:
+    pool = Int( initial = 4, kind = int )
+
     # The DockWindow default theme to use:
     theme = Any
 
@@ -89,6 +95,8 @@ class FacetsEnv ( SingletonHasFacets ):
     def _fbi_default    ( self ): return self._env_var_for( 'fbi'    )
     def _image_default  ( self ): return self._env_var_for( 'images' )
     def _init_default   ( self ): return self._env_var_for( 'init'   )
+    def _lazy_default   ( self ): return self._env_var_for( 'lazy'   )
+    def _pool_default   ( self ): return self._env_var_for( 'pool'   )
     def _theme_default  ( self ): return self._env_var_for( 'theme'  )
     def _ui_default     ( self ): return self._env_var_for( 'ui'     )
     def _menu_default   ( self ): return self._env_var_for( 'menu'   )
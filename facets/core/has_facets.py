@@ -15,8 +15,15 @@ import sys
 import copy as copy_module
 import weakref
 import re
+import atexit
 import facet_types
 
+from os \
+    import environ
+
+from timeit \
+    import default_timer
+
 from cPickle \
     import Pickler, Unpickler
 
@@ -30,7 +37,8 @@ from facets_version \
     import __version__ as FacetsVersion
 
 from cfacets \
-    import CHasFacets, CFacetMethod, _HasFacets_monitors
+    import CHasFacets, CFacetMethod, _HasFacets_monitors, _instance_counting, \
+           _instance_counts
 
 from facet_defs \
     import Facet, CFacet, FacetFactory, facet_factory, \
@@ -137,6 +145,10 @@ extended_facet_pat = re.compile( r'.*[ :\+\-,\.\*\?\[\]]' )
 # Generic 'Any' facet:
 any_facet = Any().as_cfacet()
 
+# Matches a simple, statically bindable 'on_facet_set' name (e.g. 'name' or
+# 'name?'):
+static_name_pat = re.compile( r'^([A-Za-z_]\w*)\??$' )
+
 #-------------------------------------------------------------------------------
 #  Global Data:
 #-------------------------------------------------------------------------------
@@ -144,6 +156,23 @@ any_facet = Any().as_cfacet()
 # The global cache mapping listener strings to parsed ListenerBase objects:
 FacetsListeners = {}
 
+# The class creation profile, which is only recorded if the
+# FACETS_PROFILE_CLASSES environment variable is set. It is a list of tuples of
+# the form: ( class_name, time, { phase_name: phase_time } ), one for each
+# HasFacets subclass created, where all times are in seconds:
+ClassCreationProfile = None
+
+# Enable class creation profiling if requested. If the environment variable is
+# not '1', it specifies the name of a file that the class creation report is
+# written to when the process exits:
+_profile_classes = environ.get( 'FACETS_PROFILE_CLASSES', '' )
+if _profile_classes != '':
+    ClassCreationProfile = []
+    if _profile_classes != '1':
+        atexit.register(
+            lambda: _write_class_creation_report( _profile_classes )
+        )
+
 # Mapping from 'dispatch' type to notification wrapper class type:
 OnFacetChangeWrappers = {
     'same':     FacetSetWrapper,
@@ -313,6 +342,49 @@ def _listener_for ( name ):
     return listener.clone()
 
 
+def class_creation_report ( limit = 30 ):
+    """ Returns a text report of the *limit* HasFacets subclasses which took
+        the longest time to create, along with the total time spent in each
+        metaclass processing phase. Returns an empty string if class creation
+        profiling is not enabled (i.e. the FACETS_PROFILE_CLASSES environment
+        variable was not set when Facets was imported).
+    """
+    if ClassCreationProfile is None:
+        return ''
+
+    total  = 0.0
+    phases = {}
+    for class_name, elapsed, phase_times in ClassCreationProfile:
+        total += elapsed
+        for phase, phase_time in phase_times.iteritems():
+            phases[ phase ] = phases.get( phase, 0.0 ) + phase_time
+
+    lines = [ '%d HasFacets classes created in %.3f seconds' %
+              ( len( ClassCreationProfile ), total ), '',
+              '%10s  %s' % ( 'Time (ms)', 'Phase' ) ]
+    for phase, phase_time in sorted( phases.iteritems(),
+                                     key = lambda item: -item[1] ):
+        lines.append( '%10.3f  %s' % ( phase_time * 1000.0, phase ) )
+
+    lines.extend( [ '', '%10s  %s' % ( 'Time (ms)', 'Class' ) ] )
+    for class_name, elapsed, phase_times in sorted( ClassCreationProfile,
+        key = lambda item: -item[1] )[ : limit ]:
+        lines.append( '%10.3f  %s' % ( elapsed * 1000.0, class_name ) )
+
+    return '\n'.join( lines )
+
+
+def _write_class_creation_report ( file_name ):
+    """ Writes the class creation profiling report to the specified file.
+    """
+    fh = open( file_name, 'wb' )
+    try:
+        fh.write( class_creation_report( limit = len( ClassCreationProfile ) ) )
+        fh.write( '\n' )
+    finally:
+        fh.close()
+
+
 def _facet_for ( facet ):
     """ Returns the facet corresponding to a specified value.
     """
@@ -649,6 +721,9 @@ class MetaHasFacets ( type ):
     #-- Public Methods ---------------------------------------------------------
 
     def __new__ ( cls, class_name, bases, class_dict ):
+        if ClassCreationProfile is not None:
+            start = default_timer()
+
         mhfo = MetaHasFacetsObject( cls, class_name, bases, class_dict, False )
 
         # Finish building the class using the updated class dictionary:
@@ -674,6 +749,11 @@ class MetaHasFacets ( type ):
         for listener in MetaHasFacets._listeners.get( '', [] ):
             listener( klass )
 
+        if ClassCreationProfile is not None:
+            ClassCreationProfile.append(
+                ( name, default_timer() - start, mhfo.profile )
+            )
+
         return klass
 
 
@@ -752,6 +832,42 @@ class MetaHasFacetsObject ( object ):
         subclass of HasFacets into a well-formed facets class.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The processing phases performed (in order) on each new class:
+    phases = (
+        # Initialize information about HasFacets base classes for this class:
+        '_process_base_info',
+
+        # Move all facet definitions from the class dictionary to the
+        # appropriate facet class dictionaries:
+        '_process_facet_definitions',
+
+        # Process all HasFacets base classes:
+        '_process_base_classes',
+
+        # Process the prefix facet information:
+        '_process_prefix_facets',
+
+        # Create the list of all possible 'Instance'/'List(Instance)' handlers:
+        '_process_instance_handlers',
+
+        # Process all of the static decorator information:
+        '_process_static_decorators',
+
+        # Process all 'anyfacet' related information:
+        '_process_anyfacets',
+
+        # Process any implicitly fired event definitions:
+        '_process_events',
+
+        # Process all of the static and default value handlers:
+        '_process_static_handlers',
+
+        # Issue any possibly useful diagnostic messages:
+        '_process_warnings'
+    )
+
     #-- Public Methods ---------------------------------------------------------
 
     def __init__ ( self, cls, class_name, bases, class_dict, is_category ):
@@ -774,37 +890,19 @@ class MetaHasFacetsObject ( object ):
         self.fired_events          = set()
         self.event_handlers        = {}
         self.implements            = []
+        self.profile               = None
 
-        # Initialize information about HasFacets base classes for this class:
-        self._process_base_info()
-
-        # Move all facet definitions from the class dictionary to the
-        # appropriate facet class dictionaries:
-        self._process_facet_definitions()
-
-        # Process all HasFacets base classes:
-        self._process_base_classes()
-
-        # Process the prefix facet information:
-        self._process_prefix_facets()
-
-        # Create the list of all possible 'Instance'/'List(Instance)' handlers:
-        self._process_instance_handlers()
-
-        # Process all of the static decorator information:
-        self._process_static_decorators()
-
-        # Process all 'anyfacet' related information:
-        self._process_anyfacets()
-
-        # Process any implicitly fired event definitions:
-        self._process_events()
-
-        # Process all of the static and default value handlers:
-        self._process_static_handlers()
-
-        # Issue any possibly useful diagnostic messages:
-        self._process_warnings()
+        # Perform each of the class processing phases (timing each phase if
+        # class creation profiling is enabled):
+        if ClassCreationProfile is None:
+            for phase in self.phases:
+                getattr( self, phase )()
+        else:
+            self.profile = profile = {}
+            for phase in self.phases:
+                start = default_timer()
+                getattr( self, phase )()
+                profile[ phase ] = default_timer() - start
 
         # Add the facets meta-data to the class:
         self.add_facets_meta_data(
@@ -839,10 +937,15 @@ class MetaHasFacetsObject ( object ):
             if base.__dict__.get( ClassFacets ) is not None
         ]
 
-        # Create a dictionary of all inherited facets:
-        self.inherited_class_facets = icf = {}
-        for i in xrange( len( hfb ) - 1, -1, -1 ):
-            icf.update( hfb[ i ].__dict__.get( ClassFacets ) )
+        # Create a dictionary of all inherited facets. Since the dictionary is
+        # only used for look ups, the base class's own class facets dictionary
+        # can be used directly in the (most common) single base class case:
+        if len( hfb ) == 1:
+            self.inherited_class_facets = hfb[0].__dict__.get( ClassFacets )
+        else:
+            self.inherited_class_facets = icf = {}
+            for i in xrange( len( hfb ) - 1, -1, -1 ):
+                icf.update( hfb[ i ].__dict__.get( ClassFacets ) )
 
 
     def _process_facet_definitions ( self ):
@@ -916,6 +1019,15 @@ class MetaHasFacetsObject ( object ):
         implements          = self.implements
         migrated_properties = {}
 
+        # Only inherited properties whose getter, setter or validator is
+        # overridden by this class need to be migrated, so determine the
+        # potentially overridden names up front:
+        overridden = set()
+        for name in class_dict.iterkeys():
+            for prefix in ( '_get_', '_set_', '_validate_' ):
+                if name.startswith( prefix ):
+                    overridden.add( name[ len( prefix ): ] )
+
         for base in self.hasfacets_bases:
             base_dict = base.__dict__
 
@@ -927,11 +1039,13 @@ class MetaHasFacetsObject ( object ):
             # Merge base facets:
             for name, value in base_dict.get( BaseFacets ).iteritems():
                 if name not in base_facets:
-                    property_info = value.property()
-                    if property_info is not None:
-                        key = id( value )
-                        migrated_properties[ key ] = value = \
-                            self._migrate_property( name, value, property_info )
+                    if name in overridden:
+                        property_info = value.property()
+                        if property_info is not None:
+                            key = id( value )
+                            migrated_properties[ key ] = value = \
+                                self._migrate_property( name, value,
+                                                        property_info )
 
                     base_facets[ name ] = value
 
@@ -948,14 +1062,15 @@ class MetaHasFacetsObject ( object ):
             for name, value in base_dict.get( ClassFacets ).iteritems():
                 if ((name not in class_facets) and
                     (name.strip() not in class_dict)):
-                    property_info = value.property()
-                    if property_info is not None:
-                        new_value = migrated_properties.get( id( value ) )
-                        if new_value is not None:
-                            value = new_value
-                        else:
-                            value = self._migrate_property( name, value,
-                                                            property_info )
+                    if name in overridden:
+                        property_info = value.property()
+                        if property_info is not None:
+                            new_value = migrated_properties.get( id( value ) )
+                            if new_value is not None:
+                                value = new_value
+                            else:
+                                value = self._migrate_property( name, value,
+                                                                property_info )
 
                     class_facets[ name ] = value
 
@@ -1376,17 +1491,16 @@ class MetaHasFacetsObject ( object ):
             # the decorator information to it:
             self.class_facets[ ' ' + name ] = facet = _clone_facet( any_facet )
 
-            simple, rest = listener.extract_static()
-            if len( simple ) > 0:
+            names, rest = listener.extract_static()
+            if len( names ) > 0:
                 facet._static   = static = {}
-                wrapped_handler = OnFacetChangeWrappers[ simple[0].dispatch ](
+                wrapped_handler = OnFacetChangeWrappers[ listener.dispatch ](
                                                                   method, None )
-                for simple_item in simple:
-                    static[ simple_item.name ] = wrapped_handler
+                for simple_name in names:
+                    static[ simple_name ] = wrapped_handler
 
             if rest is not None:
-                rest._post_init = listener._post_init
-                facet._dynamic  = ( 'method', rest )
+                facet._dynamic = ( 'method', rest )
 
         # fixme: This checks for a facets method, an unused feature...
         _check_method( self.class_dict, name, method )
@@ -1606,6 +1720,120 @@ def implements ( *interfaces ):
     # Request that we be called back at class construction time:
     addClassAdvisor( callback )
 
+#-------------------------------------------------------------------------------
+#  'DeferredListener' class:
+#-------------------------------------------------------------------------------
+
+class DeferredListener ( object ):
+    """ Stands in for the parsed listener for the dynamic (i.e. non-static)
+        portion of an 'on_facet_set' decorator's name pattern. The pattern is
+        not parsed until the listener is first needed, which is normally when
+        the first instance of the decorated method's class is created.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, pattern, post_init, dispatch ):
+        """ Initializes the object.
+        """
+        self.pattern    = pattern
+        self.dispatch   = dispatch
+        self._post_init = post_init
+        self._listener  = None
+
+
+    @property
+    def listener ( self ):
+        """ Returns the parsed listener for the pattern.
+        """
+        if self._listener is None:
+            self._listener = _listener_for( self.pattern ).set(
+                dispatch   = self.dispatch,
+                _post_init = self._post_init
+            )
+
+        return self._listener
+
+
+    @property
+    def wrapper_class ( self ):
+        """ Returns the wrapper class used by the parsed listener.
+        """
+        return self.listener.wrapper_class
+
+
+    def clone ( self ):
+        """ Returns a clone of the parsed listener.
+        """
+        return self.listener.clone()
+
+#-------------------------------------------------------------------------------
+#  'OnFacetSetInfo' class:
+#-------------------------------------------------------------------------------
+
+class OnFacetSetInfo ( object ):
+    """ Describes the facet change listener specified by an 'on_facet_set'
+        method decorator.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, pattern, post_init, dispatch ):
+        """ Initializes the object.
+        """
+        self.pattern    = pattern
+        self.dispatch   = dispatch
+        self._post_init = post_init
+        self._static    = None
+
+
+    def extract_static ( self ):
+        """ Returns a tuple of the form: ( [ name, ... ], rest ), where each
+            *name* is the name of a facet the decorated method can be
+            statically attached to, and *rest* is None or the listener for
+            the remaining dynamic portion of the pattern.
+
+            Simple comma separated lists of facet names (the most common
+            case) are handled without invoking the listener parser, and any
+            remaining dynamic portion of the pattern is not parsed until the
+            first instance of the class is created.
+        """
+        if self._static is None:
+            pattern, post_init, dispatch = ( self.pattern, self._post_init,
+                                             self.dispatch )
+            if '[' in pattern:
+                listener     = _listener_for( pattern ).set(
+                                   dispatch = dispatch, _post_init = post_init )
+                simple, rest = listener.extract_static()
+                if rest is not None:
+                    rest._post_init = post_init
+
+                self._static = ( [ item.name for item in simple ], rest )
+            else:
+                names  = []
+                others = []
+                for item in pattern.split( ',' ):
+                    item  = item.strip()
+                    match = static_name_pat.match( item )
+                    if match is not None:
+                        names.append( match.group( 1 ) )
+                    elif item == '-':
+                        # A bare '-' matches any facet, and is attached
+                        # statically using an empty name, just as the
+                        # listener parser would:
+                        names.append( '' )
+                    elif item != '':
+                        others.append( item )
+
+                rest = None
+                if len( others ) > 0:
+                    rest = DeferredListener( ','.join( others ), post_init,
+                                             dispatch )
+
+                self._static = ( names, rest )
+
+        return self._static
+
 #-- 'HasFacets' Decorators -----------------------------------------------------
 
 def on_facet_set ( name, post_init = False, dispatch = 'same', *names ):
@@ -1628,11 +1856,7 @@ def on_facet_set ( name, post_init = False, dispatch = 'same', *names ):
     data = ( name, post_init, dispatch )
 
     def decorator ( function ):
-        name, post_init, dispatch = data
-        function.on_facet_set  = _listener_for( name ).set(
-            dispatch   = dispatch,
-            _post_init = post_init
-        )
+        function.on_facet_set = OnFacetSetInfo( *data )
 
         return function
 
@@ -1812,6 +2036,91 @@ class HasFacets ( CHasFacets ):
             _HasFacets_monitors.append( ( cls, handler ) )
 
 
+    @classmethod
+    def facet_counting ( cls, enabled = True ):
+        """ Enables or disables the counting of live, total and peak instances
+            of each HasFacets subclass, and returns the previous counting state.
+
+            Parameters
+            ----------
+            enabled : boolean
+                Flag indicating whether instance counting should be enabled
+                (True) or disabled (False).
+
+            Description
+            -----------
+            Instance counting is maintained by the C layer as objects are
+            created and destroyed, without any per-instance Python callback,
+            so it is cheap enough to leave enabled in long running
+            applications. Only objects created while counting is enabled are
+            counted, although such objects are always uncounted when they are
+            destroyed, even if counting has since been disabled. Note that
+            counting is global, and not limited to the class it is invoked on.
+        """
+        return _instance_counting( enabled )
+
+
+    @classmethod
+    def facet_counts ( cls, reset = False ):
+        """ Returns a snapshot of the current instance counts for this class
+            and all of its subclasses.
+
+            Parameters
+            ----------
+            reset : boolean
+                Flag indicating whether the total and peak counts of all
+                classes should be reset after the snapshot is taken.
+
+            Description
+            -----------
+            The result is a dictionary mapping each counted class to a tuple
+            of the form: ( live, total, peak ), where *live* is the number of
+            currently live instances, *total* is the total number of instances
+            created and *peak* is the maximum number of live instances. See
+            **facet_counting** for information on enabling instance counting.
+        """
+        result = {}
+        for klass, live, total, peak in _instance_counts( reset ):
+            if issubclass( klass, cls ):
+                result[ klass ] = ( live, total, peak )
+
+        return result
+
+
+    @classmethod
+    def facet_counts_delta ( cls, snapshot, current = None ):
+        """ Returns the changes in instance counts between two snapshots.
+
+            Parameters
+            ----------
+            snapshot : dictionary
+                An earlier snapshot returned by **facet_counts**.
+            current : dictionary
+                A later snapshot returned by **facet_counts**. If omitted, a
+                new snapshot of this class and its subclasses is used.
+
+            Description
+            -----------
+            The result is a dictionary mapping each class whose counts changed
+            to a tuple of the form: ( live_delta, total_delta ).
+        """
+        if current is None:
+            current = cls.facet_counts()
+
+        result = {}
+        for klass, counts in current.iteritems():
+            live, total, peak = snapshot.get( klass, ( 0, 0, 0 ) )
+            delta = ( counts[0] - live, counts[1] - total )
+            if delta != ( 0, 0 ):
+                result[ klass ] = delta
+
+        for klass, counts in snapshot.iteritems():
+            if (klass not in current) and (counts[0] != 0):
+                result[ klass ] = ( -counts[0], -counts[1] )
+
+        return result
+
+
     @classmethod
     def add_class_facet ( cls, name, *facet ):
         """ Adds a named facet attribute to this class.
@@ -0,0 +1,124 @@
+"""
+Measures the cold import time and resident memory used by the Facets api
+modules.
+
+Each measurement is made in a fresh Python interpreter so that nothing has
+already been imported. The scenarios measured are:
+
+  - core:    'import facets.core.api' (the core object model only).
+  - api:     'import facets.api' (core plus the lazy UI exports).
+  - ui:      'import facets.api' followed by accessing a representative set of
+             UI symbols (View, Item, Group and several editor factories).
+  - all:     'from facets.api import *' (resolves every exported symbol).
+
+Usage:
+
+    python -m facets.extra.benchmarks.import_benchmark [repeat [toolkit]]
+
+where *repeat* is the number of times each scenario is run (the best time is
+reported) and *toolkit* is the Facets GUI toolkit to use (defaults to 'null').
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import sys
+import os
+
+from subprocess \
+    import Popen, PIPE
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The code executed for each scenario:
+Scenarios = [
+    ( 'core', 'import facets.core.api' ),
+    ( 'api',  'import facets.api' ),
+    ( 'ui',   'import facets.api as api\n'
+              'for name in ( "View", "Item", "Group", "TextEditor", '
+              '"EnumEditor", "ButtonEditor", "ListEditor" ):\n'
+              '    getattr( api, name )' ),
+    ( 'all',  'from facets.api import *' )
+]
+
+# The script run in the child interpreter to measure a scenario:
+Measure = """
+import sys, resource
+from timeit import default_timer
+start = default_timer()
+exec compile( %r, '<benchmark>', 'exec' ) in {}
+elapsed = default_timer() - start
+modules = len( [ name for name in sys.modules.keys()
+                 if name.startswith( 'facets' ) and
+                    (sys.modules[ name ] is not None) ] )
+rss = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024
+print elapsed, rss, modules
+"""
+
+#-------------------------------------------------------------------------------
+#  Functions:
+#-------------------------------------------------------------------------------
+
+def measure ( code, toolkit = 'null' ):
+    """ Runs the specified scenario *code* in a new Python interpreter and
+        returns a tuple of the form: ( seconds, max_rss_kb, facets_modules ).
+    """
+    env = dict( os.environ )
+    env[ 'FACETS_UI' ] = toolkit
+    env[ 'PYTHONPATH' ] = os.pathsep.join(
+        [ os.path.dirname( os.path.dirname( os.path.dirname(
+              os.path.dirname( os.path.abspath( __file__ ) ) ) ) ) ] +
+        [ path for path in [ env.get( 'PYTHONPATH' ) ] if path ]
+    )
+    process = Popen( [ sys.executable, '-c', Measure % code ],
+                     stdout = PIPE, stderr = PIPE, env = env )
+    output, errors = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError( errors )
+
+    seconds, rss, modules = output.split()[-3:]
+
+    return ( float( seconds ), int( rss ), int( modules ) )
+
+
+def benchmark ( repeat = 5, toolkit = 'null' ):
+    """ Runs each scenario *repeat* times and returns a list of tuples of the
+        form: ( name, best_seconds, max_rss_kb, facets_modules ).
+    """
+    results = []
+    for name, code in Scenarios:
+        runs = [ measure( code, toolkit ) for i in xrange( repeat ) ]
+        results.append( ( name, min( [ run[0] for run in runs ] ),
+                          min( [ run[1] for run in runs ] ), runs[0][2] ) )
+
+    return results
+
+
+def report ( results ):
+    """ Returns a text report for the specified benchmark *results*.
+    """
+    lines = [ '%-8s %12s %12s %10s' % ( 'Scenario', 'Time (ms)', 'RSS (KB)',
+                                         'Modules' ) ]
+    for name, seconds, rss, modules in results:
+        lines.append( '%-8s %12.1f %12d %10d' % (
+                      name, seconds * 1000.0, rss, modules ) )
+
+    return '\n'.join( lines )
+
+#-- Run as a stand-alone program (if invoked from the command line) ------------
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    print report( benchmark( int( ( args + [ 5 ] )[0] ),
+                             ( args[1:] + [ 'null' ] )[0] ) )
+
+#-- EOF ------------------------------------------------------------------------
@@ -0,0 +1,190 @@
+"""
+Measures the time taken to convert a large markdown document to HTML after
+each of a series of small edits, both by converting the entire document (the
+way the markdown editor originally did) and by using an IncrementalMarkdown
+converter (which only converts the blocks which have changed).
+
+The document is a synthetic corpus built from a fixed set of sections, each
+containing headers, paragraphs with inline markup, tight and loose lists, a
+block quote, a fenced and an indented code block, a raw HTML block and
+reference style links, so that each kind of block the incremental converter
+handles specially is represented. Each edit appends a character to a line of
+a different section, the way a user typing in a live preview would. The
+benchmark also checks that both converters produce the same HTML.
+
+Usage:
+
+    python -m facets.extra.benchmarks.markdown_benchmark [sections [edits]]
+
+where *sections* is the number of sections in the corpus (each is about 50
+lines long) and *edits* is the number of edits timed.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import sys
+
+from timeit \
+    import default_timer
+
+from facets.extra.markdown.markdown2 \
+    import markdown
+
+from facets.extra.markdown.markdown \
+    import MarkdownExtras
+
+from facets.extra.markdown.incremental \
+    import IncrementalMarkdown
+
+from facets.extra.markdown.html_cache \
+    import HTMLCache
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The template for each section of the corpus:
+SectionTemplate = """
+Section %(n)d
+==========
+
+This is the *first* paragraph of section %(n)d. It contains **strong** text,
+`inline code`, an [inline link](http://example.com/%(n)d) and a reference
+style link to the [facets project][facets].
+
+Subsection %(n)d.1
+--------------
+
+* A tight list item
+* Another tight list item with `code`
+* The last tight list item
+
+1. A loose list item
+
+2. Another loose list item, which has
+   a second line.
+
+    An indented paragraph inside the second item.
+
+3. The last loose list item
+
+> A block quote in section %(n)d.
+>
+> Its second paragraph.
+
+```python
+def function_%(n)d ( value ):
+
+    return value * %(n)d
+```
+
+    # An indented code block:
+    x = %(n)d
+
+<div class="note">
+A raw HTML block.
+
+Still inside the HTML block.
+</div>
+
+### A smaller header
+
+A paragraph with an image: ![icon](images/icon_%(n)d.png "Icon %(n)d").
+
+* * *
+"""[1:]
+
+# The link definitions appended to the corpus:
+Definitions = """
+[facets]: http://example.com/facets "Facets"
+"""
+
+#-------------------------------------------------------------------------------
+#  Functions:
+#-------------------------------------------------------------------------------
+
+def corpus ( sections ):
+    """ Returns the list of lines of a corpus with the specified number of
+        *sections*.
+    """
+    text = ''.join( [ SectionTemplate % { 'n': n }
+                      for n in xrange( sections ) ] ) + Definitions
+
+    return text.split( '\n' )
+
+
+def edits ( lines, count ):
+    """ Returns a list of *count* versions of the document *lines*, each one
+        an edit of the previous one.
+    """
+    result = []
+    lines  = lines[:]
+    step   = max( 1, len( lines ) // max( 1, count ) )
+    for i in xrange( count ):
+        j = (i * step) % len( lines )
+        if lines[ j ].strip()[:3] in ( '', '```', '* *' ):
+            j = (j + 1) % len( lines )
+
+        lines[ j ] += 'x'
+        result.append( '\n'.join( lines ) )
+
+    return result
+
+
+def run ( documents, convert ):
+    """ Converts each of the *documents* using *convert* and returns a tuple
+        of the form: ( elapsed_seconds, html_list ).
+    """
+    start = default_timer()
+    html  = [ convert( document ) for document in documents ]
+
+    return ( default_timer() - start, html )
+
+
+def benchmark ( sections = 100, count = 20 ):
+    """ Runs the benchmark and returns a tuple of the form: ( lines, results,
+        identical ), where *results* is a list of tuples of the form:
+        ( scenario, seconds, count ), and *identical* is True if both
+        converters produced the same HTML.
+    """
+    lines     = corpus( sections )
+    documents = edits( lines, count )
+    full      = lambda text: markdown( text, extras = MarkdownExtras )
+    full_time, full_html = run( documents, full )
+    incremental          = IncrementalMarkdown( MarkdownExtras, HTMLCache() )
+    first_time, first    = run( [ '\n'.join( lines ) ], incremental.convert )
+    inc_time, inc_html   = run( documents, incremental.convert )
+
+    return ( len( lines ), [
+        ( 'full',        full_time,  count ),
+        ( 'incr (cold)', first_time, 1     ),
+        ( 'incr (edit)', inc_time,   count )
+    ], full_html == inc_html )
+
+
+def report ( lines, results, identical ):
+    """ Returns a text report for the specified benchmark *results*.
+    """
+    report = [ 'Corpus: %d lines (HTML identical: %s)' % ( lines, identical ),
+               '%-12s %12s %14s' % ( 'Scenario', 'Time (ms)',
+                                     'Per edit (ms)' ) ]
+    for name, seconds, count in results:
+        report.append( '%-12s %12.1f %14.3f' % (
+                       name, seconds * 1000.0, ( seconds * 1000.0 ) / count ) )
+
+    return '\n'.join( report )
+
+#-- Run as a stand-alone program (if invoked from the command line) ------------
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    print report( *benchmark( int( ( args + [ 100 ] )[0] ),
+                              int( ( args[1:] + [ 20 ] )[0] ) ) )
+
+#-- EOF ------------------------------------------------------------------------
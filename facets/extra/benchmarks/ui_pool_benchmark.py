@@ -0,0 +1,126 @@
+"""
+Measures the time taken to repeatedly open and close the same View for a
+series of different objects, both with and without a UIPool.
+
+The View used contains a representative mix of text, boolean, range and
+enumeration editors, and is displayed as an embedded 'editor' kind user
+interface (the way an InstanceEditor or an object inspector displays it). Each
+iteration opens the View for the next object in a list of objects of the same
+class and then closes it again.
+
+Usage:
+
+    python -m facets.extra.benchmarks.ui_pool_benchmark [count [repeat]]
+
+where *count* is the number of open/close cycles timed in each run and
+*repeat* is the number of runs (the best time is reported). The benchmark
+uses the 'null' toolkit, unless another toolkit is selected by the FACETS_UI
+environment variable.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import sys
+import os
+
+os.environ.setdefault( 'FACETS_UI', 'null' )
+
+from timeit \
+    import default_timer
+
+from facets.api \
+    import HasFacets, Str, Int, Float, Bool, Range, Enum, View, VGroup, \
+           Item, toolkit
+
+from facets.ui.ui_pool \
+    import UIPool
+
+#-------------------------------------------------------------------------------
+#  'Person' class:
+#-------------------------------------------------------------------------------
+
+class Person ( HasFacets ):
+    """ The class of object edited by the benchmark.
+    """
+
+    name    = Str
+    address = Str
+    age     = Int
+    weight  = Float
+    married = Bool
+    rating  = Range( 0, 10 )
+    gender  = Enum( 'female', 'male' )
+
+    view = View(
+        VGroup(
+            'name', 'address', 'age', 'weight', 'married', 'rating', 'gender',
+            Item( 'name', style = 'readonly', enabled_when = 'married' )
+        )
+    )
+
+#-------------------------------------------------------------------------------
+#  Functions:
+#-------------------------------------------------------------------------------
+
+def run ( count, pool = None ):
+    """ Opens and closes the Person view *count* times (using the specified
+        *pool*, if any) and returns the elapsed time in seconds.
+    """
+    parent  = toolkit().create_panel( None )
+    view    = Person.class_facet_view()
+    objects = [ Person( name = 'Person %d' % i, age = i ) for i in xrange( 8 ) ]
+    start   = default_timer()
+    for i in xrange( count ):
+        context = objects[ i % len( objects ) ].facet_context()
+        if pool is None:
+            view.ui( context, parent, 'editor' ).dispose()
+        else:
+            pool.dispose( pool.ui( view, context, parent, 'editor' ) )
+
+    elapsed = default_timer() - start
+    if pool is not None:
+        pool.clear()
+
+    parent.destroy()
+
+    return elapsed
+
+
+def benchmark ( count = 200, repeat = 3 ):
+    """ Runs the benchmark *repeat* times with and without a pool and returns a
+        list of tuples of the form: ( scenario, best_seconds, count ).
+    """
+    results = []
+    for name, factory in ( ( 'no pool', lambda: None ),
+                           ( 'pool',    lambda: UIPool( size = 4 ) ) ):
+        best = min( [ run( count, factory() ) for i in xrange( repeat ) ] )
+        results.append( ( name, best, count ) )
+
+    return results
+
+
+def report ( results ):
+    """ Returns a text report for the specified benchmark *results*.
+    """
+    lines = [ '%-8s %12s %14s' % ( 'Scenario', 'Time (ms)',
+                                   'Per cycle (ms)' ) ]
+    for name, seconds, count in results:
+        lines.append( '%-8s %12.1f %14.3f' % (
+                      name, seconds * 1000.0, ( seconds * 1000.0 ) / count ) )
+
+    return '\n'.join( lines )
+
+#-- Run as a stand-alone program (if invoked from the command line) ------------
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    print report( benchmark( int( ( args + [ 200 ] )[0] ),
+                             int( ( args[1:] + [ 3 ] )[0] ) ) )
+
+#-- EOF ------------------------------------------------------------------------
@@ -61,7 +61,14 @@ class Bdb:
     """
 
     def __init__ ( self ):
-        self.fncache = {}
+        self.fncache  = {}
+
+        # Indexed by code object, the tuple: ( canonic_file_name,
+        # break_point_lines ), where 'break_point_lines' is the set of lines in
+        # the code object's file containing break points (or None if none of
+        # them are within the code object):
+        self.bpcache  = {}
+        self.bpchange = -1
 
 
     def trace_dispatch ( self, frame, event, arg ):
@@ -102,6 +109,15 @@ class Bdb:
 
             return self.trace_dispatch
 
+        # While continuing, most calls are to code containing no break points,
+        # so check for that (using the cached break point information) first:
+        stopframe = self.stopframe
+        if ((stopframe is self.botframe) and (frame is not stopframe) and
+            (self.bpchange == Breakpoint.changes)):
+            result = self.bpcache.get( frame.f_code )
+            if (result is not None) and (result[1] is None):
+                return # None
+
         if not (self.stop_here( frame ) or self.break_anywhere( frame )):
             # No need to trace this function
             return # None
@@ -138,11 +154,18 @@ class Bdb:
         """
         # (CT) stopframe may now also be None, see dispatch_call.
         # (CT) the former test for None is therefore removed from here.
-        if frame is self.stopframe:
+        stopframe = self.stopframe
+        if frame is stopframe:
             return True
 
-        while (frame is not None) and (frame is not self.stopframe):
-            if frame is self.botframe:
+        # When continuing, the search below always stops at the stop frame
+        # without finding the bottom frame, so there is no need to do it:
+        botframe = self.botframe
+        if stopframe is botframe:
+            return False
+
+        while (frame is not None) and (frame is not stopframe):
+            if frame is botframe:
                 return True
 
             frame = frame.f_back
@@ -151,18 +174,44 @@ class Bdb:
 
 
     def break_here ( self, frame ):
-        line = frame.f_lineno
-        bps  = Breakpoint.bp_map.get(
-                   ( self.canonic( frame.f_code.co_filename ), line ) )
-        if bps is None:
+        file_name, lines = self.breaks_for( frame.f_code )
+        line             = frame.f_lineno
+        if (lines is None) or (line not in lines):
             return False
 
-        return effective( bps, line, frame )
+        return effective( Breakpoint.bp_map[ ( file_name, line ) ], line,
+                          frame )
 
 
     def break_anywhere ( self, frame ):
-        return ( Breakpoint.bp_list.get(
-                    self.canonic( frame.f_code.co_filename ) ) is not None )
+        return (self.breaks_for( frame.f_code )[1] is not None)
+
+
+    def breaks_for ( self, code ):
+        """ Returns a tuple of the form: ( canonic_file_name, lines ) for the
+            specified *code* object, where *lines* is the set of lines in the
+            code's file containing break points, or None if none of them are
+            within the code (so that its frames do not need to be traced).
+        """
+        if self.bpchange != Breakpoint.changes:
+            self.bpchange = Breakpoint.changes
+            self.bpcache.clear()
+
+        result = self.bpcache.get( code )
+        if result is None:
+            canonic = self.canonic( code.co_filename )
+            lines   = Breakpoint.bp_lines.get( canonic )
+            if lines is not None:
+                first, last = code_lines( code )
+                for line in lines:
+                    if first <= line <= last:
+                        break
+                else:
+                    lines = None
+
+            self.bpcache[ code ] = result = ( canonic, lines )
+
+        return result
 
     #-- Derived classes should override the user_* methods to gain control -----
 
@@ -432,6 +481,19 @@ class Bdb:
 def set_trace ( ):
     Bdb().set_trace()
 
+
+def code_lines ( code ):
+    """ Returns a tuple of the form: ( first_line, last_line ) containing the
+        range of source lines the specified *code* object was compiled from.
+    """
+    first  = last = line = code.co_firstlineno
+    lnotab = code.co_lnotab
+    for i in xrange( 1, len( lnotab ), 2 ):
+        line += ord( lnotab[ i ] )
+        last  = max( last, line )
+
+    return ( first, last )
+
 #-------------------------------------------------------------------------------
 #  'Breakpoint' class:
 #-------------------------------------------------------------------------------
@@ -447,6 +509,13 @@ class Breakpoint ( HasPrivateFacets ):
     bp_start = {}
     bp_map   = {}
 
+    # Indexed by file name, the set of lines containing break points:
+    bp_lines = {}
+
+    # The number of times the set of break point lines has changed (used to
+    # invalidate any information cached by a debugger):
+    changes  = 0
+
     #-- Facet Definitions ------------------------------------------------------
 
     # The owner of this break point:
@@ -503,8 +572,12 @@ class Breakpoint ( HasPrivateFacets ):
         Breakpoint.bp_list.setdefault( self.file, set() ).add( self )
         Breakpoint.bp_start.setdefault( ( self.file, self.line ),
                                         set() ).add( self )
+        lines = Breakpoint.bp_lines.setdefault( self.file, set() )
         for i in xrange( self.line, self.end_line ):
             Breakpoint.bp_map.setdefault( ( self.file, i ), set() ).add( self )
+            lines.add( i )
+
+        Breakpoint.changes += 1
 
 
     def source_for ( self, line ):
@@ -630,12 +703,19 @@ class Breakpoint ( HasPrivateFacets ):
             del Breakpoint.bp_start[ index ]
 
         bp_map = Breakpoint.bp_map
+        lines  = Breakpoint.bp_lines[ self.file ]
         for i in xrange( self.line, self.end_line ):
             index = ( self.file, i )
             value = bp_map[ index ]
             value.remove( self )
             if not value:
                 del bp_map[ index ]
+                lines.discard( i )
+
+        if not lines:
+            del Breakpoint.bp_lines[ self.file ]
+
+        Breakpoint.changes += 1
 
 #-------------------------------------------------------------------------------
 #  Returns whether there is an effective (active) breakpoint at this line of
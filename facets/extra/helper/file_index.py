@@ -0,0 +1,354 @@
+"""
+Defines the FileIndex class, a compact, persistent index of all of the files
+contained in a directory tree, which can be rescanned incrementally.
+
+The index holds one DirEntry per directory, which records the directory's
+modification time, the names of its subdirectories, and the names, sizes and
+modification times of its files (with the sizes and times kept in compact
+arrays rather than as one object per file).
+
+Scanning the tree is done by a pool of threads, each of which lists and stats
+the contents of one directory at a time, so that the (blocking) file system
+calls for several directories are in progress at once. When a tree which has
+already been indexed is rescanned, a directory whose modification time has not
+changed is not listed again (only its files are restated), and the scan only
+reports the files which have been added, removed or changed since the previous
+scan.
+
+An index can be saved in, and later reloaded from, the Facets application data
+directory, so that the files in a tree are available immediately in a new
+session, while a rescan of the tree brings them up to date.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+from array \
+    import array
+
+from os \
+    import listdir, stat, lstat
+
+from os.path \
+    import join
+
+from stat \
+    import S_ISDIR, S_ISLNK
+
+from threading \
+    import Thread, Event
+
+from Queue \
+    import Queue
+
+from facets.core.facet_db \
+    import facet_db
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The number of threads used to scan a directory tree:
+ScanThreads = 8
+
+# The name of the facet database file indices are saved in:
+IndexDB = 'file_index'
+
+# The version of the saved index format:
+IndexVersion = 1
+
+#-------------------------------------------------------------------------------
+#  'DirEntry' class:
+#-------------------------------------------------------------------------------
+
+class DirEntry ( object ):
+    """ The index entry for a single directory.
+    """
+
+    __slots__ = ( 'mtime', 'dirs', 'names', 'sizes', 'mtimes' )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, mtime = -1.0, dirs = None, names = None ):
+        """ Initializes the object.
+        """
+        self.mtime  = mtime
+        self.dirs   = dirs  or []
+        self.names  = names or []
+        self.sizes  = array( 'd' )
+        self.mtimes = array( 'd' )
+
+
+    def add ( self, name, size, mtime ):
+        """ Adds a file with the specified *name*, *size* and modification time
+            (*mtime*) to the directory.
+        """
+        self.names.append( name )
+        self.sizes.append( size )
+        self.mtimes.append( mtime )
+
+
+    def get_state ( self ):
+        """ Returns the (compact) saved form of the entry.
+        """
+        return ( self.mtime, self.dirs, self.names, self.sizes.tostring(),
+                 self.mtimes.tostring() )
+
+
+    def set_state ( self, state ):
+        """ Restores the entry from the saved form specified by *state*.
+        """
+        self.mtime, self.dirs, self.names, sizes, mtimes = state
+        self.sizes.fromstring( sizes )
+        self.mtimes.fromstring( mtimes )
+
+        return self
+
+#-------------------------------------------------------------------------------
+#  'FileIndex' class:
+#-------------------------------------------------------------------------------
+
+class FileIndex ( object ):
+    """ A compact, persistent index of the files contained in a directory tree.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, root, threads = ScanThreads ):
+        """ Initializes the object.
+        """
+        self.root    = root
+        self.threads = threads
+        self.dirs    = {}
+
+
+    def __len__ ( self ):
+        """ Returns the number of files in the index.
+        """
+        return sum( [ len( entry.names )
+                      for entry in self.dirs.itervalues() ] )
+
+
+    def files ( self ):
+        """ Returns an iterator over all files in the index, returning a tuple
+            of the form: ( path, size, mtime ) for each file.
+        """
+        root = self.root
+        for dir, entry in self.dirs.iteritems():
+            path = join( root, dir )
+            for name, size, mtime in zip( entry.names, entry.sizes,
+                                          entry.mtimes ):
+                yield ( join( path, name ), size, mtime )
+
+
+    def load ( self ):
+        """ Loads the previously saved index for the root directory (if any).
+            Returns True if a saved index was loaded, and False otherwise.
+        """
+        db = facet_db( IndexDB )
+        if db is None:
+            return False
+
+        try:
+            data = db.get( self._key() )
+        finally:
+            db.close()
+
+        if (data is None) or (data[0] != IndexVersion):
+            return False
+
+        self.dirs = dict( [ ( dir, DirEntry().set_state( state ) )
+                            for dir, state in data[1].iteritems() ] )
+
+        return True
+
+
+    def save ( self ):
+        """ Saves the index for the root directory, so that it can be reloaded
+            in a later session.
+        """
+        db = facet_db( IndexDB, 'c' )
+        if db is not None:
+            try:
+                db[ self._key() ] = ( IndexVersion, dict(
+                    [ ( dir, entry.get_state() )
+                      for dir, entry in self.dirs.iteritems() ] ) )
+            finally:
+                db.close()
+
+
+    def scan ( self, abort = None ):
+        """ Rescans the directory tree, updating the index, and returning an
+            iterator which returns a tuple of the form: ( added, removed,
+            changed ) for each directory whose contents differ from the
+            index. *added* and *changed* are lists of ( path, size, mtime )
+            tuples, and *removed* is a list of paths. If *abort* is not None,
+            it is a callable which returns True if the scan should stop early.
+        """
+        dirs     = self.dirs
+        requests = Queue()
+        results  = Queue()
+        stopped  = Event()
+        workers  = [ Thread( target = self._worker,
+                             args   = ( requests, results, stopped ) )
+                     for i in xrange( max( 1, self.threads ) ) ]
+        for worker in workers:
+            worker.setDaemon( True )
+            worker.start()
+
+        try:
+            requests.put( ( '', dirs.get( '' ) ) )
+            pending = 1
+            while pending > 0:
+                if (abort is not None) and abort():
+                    return
+
+                dir, entry, added, removed, changed = results.get()
+                pending -= 1
+                old      = dirs.get( dir )
+                if entry is None:
+                    dirs.pop( dir, None )
+                    removed = self._remove( dir, old )
+                else:
+                    dirs[ dir ] = entry
+                    if old is not None:
+                        subdirs = set( entry.dirs )
+                        for name in old.dirs:
+                            if name not in subdirs:
+                                removed.extend(
+                                    self._remove( join( dir, name ) ) )
+
+                    for name in entry.dirs:
+                        subdir = join( dir, name )
+                        requests.put( ( subdir, dirs.get( subdir ) ) )
+                        pending += 1
+
+                if (len( added ) + len( removed ) + len( changed )) > 0:
+                    yield ( added, removed, changed )
+        finally:
+            stopped.set()
+            for worker in workers:
+                requests.put( None )
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _key ( self ):
+        """ Returns the database key for the index.
+        """
+        root = self.root
+        if isinstance( root, unicode ):
+            root = root.encode( 'utf-8' )
+
+        return root
+
+
+    def _remove ( self, dir, entry = None ):
+        """ Removes the directory *dir* (whose index entry is *entry*, if
+            already removed) and all of its subdirectories from the index, and
+            returns the list of paths of all files removed.
+        """
+        dirs = self.dirs
+        if entry is None:
+            entry = dirs.pop( dir, None )
+
+        if entry is None:
+            return []
+
+        path    = join( self.root, dir )
+        removed = [ join( path, name ) for name in entry.names ]
+        for name in entry.dirs:
+            removed.extend( self._remove( join( dir, name ) ) )
+
+        return removed
+
+
+    def _worker ( self, requests, results, stopped ):
+        """ Scans each directory requested until a None request is received.
+        """
+        while True:
+            request = requests.get()
+            if request is None:
+                return
+
+            if not stopped.isSet():
+                results.put( self._scan_dir( *request ) )
+
+
+    def _scan_dir ( self, dir, old ):
+        """ Scans the directory *dir*, whose previous index entry is *old* (or
+            None), and returns a tuple of the form: ( dir, entry, added,
+            removed, changed ), where *entry* is the new index entry for the
+            directory (or None if it no longer exists).
+        """
+        path = join( self.root, dir )
+        try:
+            mtime = stat( path ).st_mtime
+        except OSError:
+            return ( dir, None, [], [], [] )
+
+        if (old is not None) and (old.mtime == mtime):
+            # The directory listing has not changed, so only the files need to
+            # be checked:
+            entry = DirEntry( mtime, old.dirs[:] )
+            names = old.names
+        else:
+            entry = DirEntry( mtime )
+            try:
+                names = listdir( path )
+            except OSError:
+                return ( dir, None, [], [], [] )
+
+        add = entry.add
+        for name in names:
+            try:
+                info = lstat( join( path, name ) )
+                if S_ISLNK( info.st_mode ):
+                    info = stat( join( path, name ) )
+                    if S_ISDIR( info.st_mode ):
+                        # Do not follow symbolic links to directories:
+                        continue
+                elif S_ISDIR( info.st_mode ):
+                    entry.dirs.append( name )
+
+                    continue
+            except OSError:
+                continue
+
+            add( name, info.st_size, info.st_mtime )
+
+        return ( ( dir, entry ) + self._diff( path, old, entry ) )
+
+
+    def _diff ( self, path, old, new ):
+        """ Returns a tuple of the form: ( added, removed, changed ) describing
+            the differences between the *old* and *new* index entries for the
+            directory *path*.
+        """
+        names = new.names
+        if old is None:
+            return ( [ ( join( path, name ), size, mtime )
+                       for name, size, mtime in zip( names, new.sizes,
+                                                     new.mtimes ) ], [], [] )
+
+        if ((old.names == names) and (old.sizes == new.sizes) and
+            (old.mtimes == new.mtimes)):
+            return ( [], [], [] )
+
+        index   = dict( [ ( name, i ) for i, name in enumerate( old.names ) ] )
+        added   = []
+        changed = []
+        for name, size, mtime in zip( names, new.sizes, new.mtimes ):
+            i = index.pop( name, None )
+            if i is None:
+                added.append( ( join( path, name ), size, mtime ) )
+            elif (size != old.sizes[ i ]) or (mtime != old.mtimes[ i ]):
+                changed.append( ( join( path, name ), size, mtime ) )
+
+        return ( added, [ join( path, name ) for name in index ], changed )
+
+#-- EOF ------------------------------------------------------------------------
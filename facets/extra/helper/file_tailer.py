@@ -0,0 +1,260 @@
+"""
+Defines the FileTailer class, which follows the contents of a growing file
+(such as a log file) on a background thread, in the manner of 'tail -F'.
+
+The tailer polls the file for new data, backing off exponentially (from
+'min_delay' up to 'max_delay' seconds) while the file is idle, so that an
+unchanging file costs almost no CPU time. It detects the file being rotated
+(replaced by a new file with the same name) or truncated, and reopens or
+rewinds it as needed.
+
+New data is delivered to subclasses as lists of complete lines, each list
+being tagged with the byte offset of its first line within the file. Partial
+lines are held back until they are completed. Once all of the currently
+available data has been processed, the 'batch_complete' method is called, so
+that subclasses can publish the results of each batch at once, rather than
+line by line.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import os
+
+from threading \
+    import Thread, Event
+
+from facets.core_api \
+    import HasPrivateFacets, Any, Str, Long, Float, Int, Bool
+
+#-------------------------------------------------------------------------------
+#  'FileTailer' class:
+#-------------------------------------------------------------------------------
+
+class FileTailer ( HasPrivateFacets ):
+    """ Follows the contents of a growing file on a background thread.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The name of the file being followed:
+    file_name = Str
+
+    # The byte offset within the file up to which data has been processed:
+    offset = Long
+
+    # The minimum delay (in seconds) between polls for new data:
+    min_delay = Float( 0.05 )
+
+    # The maximum delay (in seconds) between polls for new data:
+    max_delay = Float( 1.0 )
+
+    # The maximum number of bytes read from the file at one time:
+    chunk_size = Int( 1 << 20 )
+
+    # Is the tailer currently running?
+    running = Bool( False )
+
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # Should the tailer start over with a (possibly) new file?
+    _restart = Bool( True )
+
+    # The unprocessed partial last line read from the file:
+    _partial = Str
+
+    # The event used to wake the background thread:
+    _wakeup = Any
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def start ( self ):
+        """ Starts the background thread following the file.
+        """
+        if not self.running:
+            self.running = True
+            self._wakeup = Event()
+            thread       = Thread( target = self._run )
+            thread.setDaemon( True )
+            thread.start()
+
+
+    def stop ( self ):
+        """ Stops the background thread following the file.
+        """
+        if self.running:
+            self.running = False
+            self._wakeup.set()
+
+
+    def wakeup ( self ):
+        """ Requests that the file be checked for new data immediately.
+        """
+        if self.running:
+            self._wakeup.set()
+
+    #-- Overridable Methods ----------------------------------------------------
+
+    def process_lines ( self, lines, offset ):
+        """ Processes a list of new complete *lines* read from the file, where
+            *offset* is the byte offset of the first line within the file.
+        """
+
+
+    def batch_complete ( self ):
+        """ Called after all currently available data has been processed.
+        """
+
+
+    def reset ( self, rotated ):
+        """ Called when reading starts over at the beginning of a file, either
+            because a new file is being followed or *rotated* is True (the
+            file has been replaced), or because the file was truncated.
+        """
+
+    #-- Facet Event Handlers ---------------------------------------------------
+
+    def _file_name_set ( self ):
+        """ Handles the 'file_name' facet being changed.
+        """
+        self._restart = True
+        self.wakeup()
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _run ( self ):
+        """ Follows the file until the tailer is stopped.
+        """
+        fh    = None
+        delay = self.min_delay
+        try:
+            while self.running:
+                if self._restart:
+                    self._restart = False
+                    fh            = self._close( fh )
+                    self.reset( False )
+
+                if fh is None:
+                    fh = self._open()
+                else:
+                    fh = self._check( fh )
+
+                if (fh is not None) and self._read( fh ):
+                    self.batch_complete()
+                    delay = self.min_delay
+                else:
+                    delay = min( delay * 2.0, self.max_delay )
+
+                self._wakeup.wait( delay )
+                self._wakeup.clear()
+        finally:
+            self._close( fh )
+
+
+    def _open ( self ):
+        """ Attempts to open the file, returning the file handle if successful
+            and None otherwise.
+        """
+        file_name = self.file_name
+        if file_name == '':
+            return None
+
+        try:
+            fh = open( file_name, 'rb' )
+        except IOError:
+            return None
+
+        self.offset   = 0
+        self._partial = ''
+
+        return fh
+
+
+    def _check ( self, fh ):
+        """ Checks whether the file has been rotated or truncated, and returns
+            the file handle to continue reading from (or None if a rotated file
+            could not be reopened).
+        """
+        try:
+            stat = os.stat( self.file_name )
+        except OSError:
+            # The file has been removed, but may still contain unread data, so
+            # keep reading from it until it is replaced:
+            return fh
+
+        if stat.st_ino != os.fstat( fh.fileno() ).st_ino:
+            # The file has been rotated, so finish reading the old file
+            # (including any unterminated last line), then start reading the
+            # new one from the beginning:
+            self._read( fh )
+            self._flush()
+            self._close( fh )
+            self.reset( True )
+
+            return self._open()
+
+        if stat.st_size < fh.tell():
+            # The file has been truncated, so start over at the beginning:
+            fh.seek( 0 )
+            self.offset   = 0
+            self._partial = ''
+            self.reset( False )
+
+        return fh
+
+
+    def _read ( self, fh ):
+        """ Reads and processes all data currently available from the file
+            specified by *fh*. Returns True if any complete lines were read.
+        """
+        result = False
+        while self.running:
+            data = fh.read( self.chunk_size )
+            if data == '':
+                return result
+
+            data = self._partial + data
+            col  = data.rfind( '\n' )
+            if col < 0:
+                self._partial = data
+
+                continue
+
+            self._partial = data[ col + 1: ]
+            offset        = self.offset
+            self.offset   = offset + col + 1
+            self.process_lines( data[ : col ].split( '\n' ), offset )
+            result = True
+
+        return result
+
+
+    def _flush ( self ):
+        """ Processes the partial last line (if any) of a file which will not
+            be read any further.
+        """
+        partial = self._partial
+        if partial != '':
+            self._partial = ''
+            offset        = self.offset
+            self.offset   = offset + len( partial )
+            self.process_lines( [ partial ], offset )
+
+
+    def _close ( self, fh ):
+        """ Closes the file specified by *fh* (if any).
+        """
+        if fh is not None:
+            try:
+                fh.close()
+            except:
+                pass
+
+        return None
+
+#-- EOF ------------------------------------------------------------------------
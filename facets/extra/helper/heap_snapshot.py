@@ -0,0 +1,408 @@
+"""
+Defines the HeapSnapshot class, a compact record of the contents of the Python
+object heap at a particular moment, used by the heap browser tool.
+
+A snapshot describes every object tracked by the garbage collector using three
+parallel arrays (sorted by object id): the object ids, the index of each
+object's (fully-qualified class) name in the snapshot's list of names, and the
+size of each object in bytes. The number and total size of the objects of each
+type are computed from these arrays when the snapshot is created, so that two
+snapshots can be compared type by type (in time proportional to the number of
+types, rather than the number of objects) without keeping any of the objects
+themselves alive.
+
+A snapshot can also contain a reverse reference index, which records, for each
+reference from one object in the heap to another, the ids of the referring and
+referred to objects (as a pair of arrays sorted by the id of the referred to
+object). It is built using a single pass over the heap when the snapshot is
+taken, after which finding all of the referrers of an object is a binary
+search, rather than a scan of the entire heap.
+
+Since a snapshot only contains arrays of numbers and a list of names, it can be
+dumped to a file and loaded again later (e.g. in another process), so that the
+heap of a large application can be analyzed offline.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import gc
+
+from cPickle \
+    import dump, load
+
+from array \
+    import array
+
+from itertools \
+    import imap
+
+from sys \
+    import getsizeof
+
+from time \
+    import time
+
+from types \
+    import InstanceType
+
+from numpy \
+    import bincount, concatenate, fromiter, frombuffer, repeat, zeros, \
+           unique, int32, int64, uint64
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The version of the dumped snapshot format:
+SnapshotVersion = 1
+
+# The number of reference ids collected before they are added to the index:
+ChunkSize = 1 << 16
+
+# The names of the built-in container types:
+DictName = '__builtin__.dict'
+SequenceNames = ( '__builtin__.list', '__builtin__.tuple' )
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def object_name ( object ):
+    """ Returns the 'name' of a specified object (based on its class and module
+        name.
+    """
+    try:
+        if isinstance( object, type ):
+            return '.<new-style class>'
+
+        return '%s.%s' % ( object.__class__.__module__,
+                           object.__class__.__name__ )
+    except:
+        return '.' + str( type( object ) )
+
+
+def live_objects ( ids, limit = None ):
+    """ Returns a dictionary mapping each object id in *ids* (any iterable of
+        ids) to the corresponding object, for all such objects which are still
+        tracked by the garbage collector. If *limit* is not None, at most
+        *limit* objects are returned.
+    """
+    wanted  = set( [ int( object_id ) for object_id in ids ] )
+    objects = {}
+    if len( wanted ) > 0:
+        for object in gc.get_objects():
+            object_id = id( object )
+            if object_id in wanted:
+                objects[ object_id ] = object
+                if len( objects ) == limit:
+                    break
+
+    return objects
+
+#-------------------------------------------------------------------------------
+#  'HeapSnapshot' class:
+#-------------------------------------------------------------------------------
+
+class HeapSnapshot ( object ):
+    """ A compact record of the contents of the Python object heap.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, names, ids, kinds, sizes, targets = None,
+                         sources = None, taken = None ):
+        """ Initializes the object from the list of type *names*, and the
+            arrays of object *ids* (sorted), the corresponding indices into
+            *names* (*kinds*) and object *sizes*, and (optionally) the reverse
+            reference index arrays *targets* (sorted) and *sources*.
+        """
+        self.names   = names
+        self.ids     = ids
+        self.kinds   = kinds
+        self.sizes   = sizes
+        self.targets = targets
+        self.sources = sources
+        self.taken   = time() if taken is None else taken
+
+        # Were the objects described by the snapshot in this process's heap
+        # (i.e. the snapshot was not loaded from a file)?
+        self.live = True
+
+        n                = len( names )
+        self.type_counts = bincount( kinds, minlength = n )[ : n ]
+        self.type_sizes  = bincount( kinds, sizes, minlength = n )[
+                                     : n ].astype( int64 )
+
+
+    @classmethod
+    def take ( cls, ignored = (), referrers = True ):
+        """ Returns a new snapshot of the current contents of the heap,
+            excluding any object whose name is in *ignored*. If *referrers* is
+            True, the snapshot also contains a reverse reference index.
+        """
+        gc.collect()
+
+        objects  = gc.get_objects()
+        names    = []
+        kind_for = {}
+        kinds    = array( 'l' )
+        sizes    = array( 'l' )
+        for object in objects:
+            key = type( object )
+            if key is InstanceType:
+                key = object.__class__
+
+            kind = kind_for.get( key )
+            if kind is None:
+                name = object_name( object )
+                kind = -1
+                if name not in ignored:
+                    kind = len( names )
+                    names.append( name )
+
+                kind_for[ key ] = kind
+
+            kinds.append( kind )
+            sizes.append( getsizeof( object ) )
+
+        ids   = fromiter( imap( id, objects ), uint64, len( objects ) )
+        kinds = frombuffer( kinds, int ).astype( int32 )
+        sizes = frombuffer( sizes, int ).astype( int64 )
+        keep  = (kinds >= 0)
+        if not keep.all():
+            objects = [ object for object, kept in zip( objects, keep )
+                               if kept ]
+            ids, kinds, sizes = ids[ keep ], kinds[ keep ], sizes[ keep ]
+
+        targets = sources = None
+        if referrers:
+            targets, sources = cls._reference_index( objects, ids )
+
+        del objects
+
+        order = ids.argsort()
+
+        return cls( names, ids[ order ], kinds[ order ], sizes[ order ],
+                    targets, sources )
+
+
+    @classmethod
+    def load ( cls, file_name ):
+        """ Returns the snapshot previously dumped to the file *file_name*.
+        """
+        fh = open( file_name, 'rb' )
+        try:
+            data = load( fh )
+        finally:
+            fh.close()
+
+        if data[0] != SnapshotVersion:
+            raise ValueError( "'%s' is not a supported heap snapshot file." %
+                              file_name )
+
+        snapshot      = cls( *data[1:] )
+        snapshot.live = False
+
+        return snapshot
+
+
+    def dump ( self, file_name ):
+        """ Dumps the snapshot to the file *file_name*, so that it can be
+            loaded again later (possibly by another process).
+        """
+        fh = open( file_name, 'wb' )
+        try:
+            dump( ( SnapshotVersion, self.names, self.ids, self.kinds,
+                    self.sizes, self.targets, self.sources, self.taken ),
+                  fh, 2 )
+        finally:
+            fh.close()
+
+
+    def __len__ ( self ):
+        """ Returns the number of objects in the snapshot.
+        """
+        return len( self.ids )
+
+
+    @property
+    def has_referrers ( self ):
+        """ Returns True if the snapshot contains a reverse reference index.
+        """
+        return (self.targets is not None)
+
+
+    def drop_referrers ( self ):
+        """ Discards the snapshot's reverse reference index (if any) to free
+            the memory it uses.
+        """
+        self.targets = self.sources = None
+
+
+    def counts ( self ):
+        """ Returns a dictionary mapping the name of each type in the snapshot
+            to a tuple of the form: ( count, size ), containing the number and
+            total size (in bytes) of its objects.
+        """
+        return dict( [ ( name, ( int( count ), int( size ) ) )
+                       for name, count, size in zip( self.names,
+                           self.type_counts, self.type_sizes )
+                       if count > 0 ] )
+
+
+    def diff ( self, other ):
+        """ Returns a dictionary mapping the name of each type in either this
+            snapshot or the *other* (earlier) snapshot to a tuple of the form:
+            ( count, size, count_change, size_change ), describing the objects
+            of that type in this snapshot, and how they have changed since the
+            *other* snapshot.
+        """
+        old    = {} if other is None else other.counts()
+        result = {}
+        for name, ( count, size ) in self.counts().iteritems():
+            old_count, old_size = old.pop( name, ( 0, 0 ) )
+            result[ name ] = ( count, size, count - old_count,
+                               size - old_size )
+
+        for name, ( old_count, old_size ) in old.iteritems():
+            result[ name ] = ( 0, 0, -old_count, -old_size )
+
+        return result
+
+
+    def ids_of ( self, name ):
+        """ Returns the array of ids of the objects whose type is *name*.
+        """
+        try:
+            kind = self.names.index( name )
+        except ValueError:
+            return self.ids[ : 0 ]
+
+        return self.ids[ self.kinds == kind ]
+
+
+    def contains ( self, ids ):
+        """ Returns a boolean array indicating which of the object *ids* (an
+            array) are contained in the snapshot.
+        """
+        own = self.ids
+        if len( own ) == 0:
+            return zeros( len( ids ), bool )
+
+        i = own.searchsorted( ids ).clip( 0, len( own ) - 1 )
+
+        return (own[ i ] == ids)
+
+
+    def added ( self, other ):
+        """ Returns a new snapshot containing only those objects which are not
+            contained in the *other* (earlier) snapshot.
+        """
+        if other is None:
+            return self._subset( None )
+
+        return self._subset( ~other.contains( self.ids ) )
+
+
+    def remaining ( self, other ):
+        """ Returns a new snapshot containing only those objects which are
+            still contained in the *other* (later) snapshot.
+        """
+        return self._subset( other.contains( self.ids ) )
+
+
+    def name_of ( self, object_id ):
+        """ Returns the type name of the object whose id is *object_id*, or
+            None if it is not contained in the snapshot.
+        """
+        ids = self.ids
+        i   = ids.searchsorted( object_id )
+        if (i < len( ids )) and (ids[ i ] == object_id):
+            return self.names[ self.kinds[ i ] ]
+
+        return None
+
+
+    def referrers_of ( self, object_ids ):
+        """ Returns the array of (unique) ids of all objects which refer to any
+            of the objects whose ids are in *object_ids* (an id or an iterable
+            of ids).
+        """
+        targets = self.targets
+        if (targets is None) or (len( targets ) == 0):
+            return zeros( 0, uint64 )
+
+        if isinstance( object_ids, ( int, long ) ):
+            object_ids = [ object_ids ]
+
+        object_ids = fromiter( object_ids, uint64 )
+        starts     = targets.searchsorted( object_ids, 'left' )
+        ends       = targets.searchsorted( object_ids, 'right' )
+        sources    = self.sources
+
+        return unique( concatenate( [ sources[ start: end ]
+                                      for start, end in zip( starts, ends ) ]
+                                    + [ zeros( 0, uint64 ) ] ) )
+
+    #-- Private Methods --------------------------------------------------------
+
+    @classmethod
+    def _reference_index ( cls, objects, ids ):
+        """ Returns a tuple of the form: ( targets, sources ) containing the
+            reverse reference index for the specified *objects* (whose ids are
+            *ids*), which only contains references to the objects themselves.
+        """
+        get_referents = gc.get_referents
+        counts        = array( 'l' )
+        chunks        = []
+        chunk         = []
+        for object in objects:
+            referents = get_referents( object )
+            counts.append( len( referents ) )
+            chunk.extend( imap( id, referents ) )
+            if len( chunk ) >= ChunkSize:
+                chunks.append( fromiter( chunk, uint64, len( chunk ) ) )
+                chunk = []
+
+        chunks.append( fromiter( chunk, uint64, len( chunk ) ) )
+        targets = concatenate( chunks )
+        sources = repeat( ids, frombuffer( counts, int ) )
+        del chunks, chunk
+
+        # Only keep references to objects in the snapshot:
+        known = ids.copy()
+        known.sort()
+        if len( known ) > 0:
+            i    = known.searchsorted( targets ).clip( 0, len( known ) - 1 )
+            keep = (known[ i ] == targets)
+            targets, sources = targets[ keep ], sources[ keep ]
+
+        order = targets.argsort( kind = 'mergesort' )
+
+        return ( targets[ order ], sources[ order ] )
+
+
+    def _subset ( self, mask ):
+        """ Returns a new snapshot (without a reverse reference index)
+            containing only those objects selected by the boolean array *mask*
+            (or all objects if *mask* is None).
+        """
+        if mask is None:
+            snapshot = self.__class__( self.names, self.ids, self.kinds,
+                                       self.sizes, taken = self.taken )
+        else:
+            snapshot = self.__class__( self.names, self.ids[ mask ],
+                                       self.kinds[ mask ], self.sizes[ mask ],
+                                       taken = self.taken )
+
+        snapshot.live = self.live
+
+        return snapshot
+
+#-- EOF ------------------------------------------------------------------------
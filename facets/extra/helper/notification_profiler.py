@@ -0,0 +1,380 @@
+"""
+Defines the NotificationProfiler class, a low overhead profiler for Facets
+change notification handlers.
+
+The profiler is built on the notification profiler contained in the cfacets C
+extension, which times each notifier call and records it in a fixed size ring
+buffer without calling any Python code. The recorded data can then be
+summarized into per-handler statistics (call counts, cumulative and self
+times, and a histogram of call durations), or exported in pstats format (for
+use with the standard Python 'pstats' module or any pstats viewer) or in the
+'folded stack' text format used by flame graph tools.
+
+A typical use is:
+
+    profiler = NotificationProfiler( sample_rate = 10 ).start()
+    ... perform some slow interaction ...
+    profiler.stop()
+    print profiler.report()
+    profiler.dump_stats( 'notifications.prof' )
+    profiler.dump_flamegraph( 'notifications.folded' )
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import marshal
+
+from types \
+    import MethodType, FunctionType
+
+from facets.core.cfacets \
+    import _facet_profiler, _facet_profiler_records
+
+from facets.core_api \
+    import HasPrivateFacets, Int, Long, Range, Bool, Dict, Property
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The number of buckets in each handler's call duration histogram. Bucket 'i'
+# counts the calls whose duration was less than 2**i microseconds (the last
+# bucket counts all calls not counted by any other bucket):
+HistogramBuckets = 24
+
+#-------------------------------------------------------------------------------
+#  Helper functions:
+#-------------------------------------------------------------------------------
+
+def handler_for ( notifier ):
+    """ Returns the callable handler wrapped by a specified facet notifier (or
+        the notifier itself if it does not appear to be a wrapper).
+    """
+    handler = getattr( notifier, 'handler', None )
+    if handler is None:
+        get_handler = getattr( notifier, 'notifier', None )
+        if callable( get_handler ):
+            try:
+                handler = get_handler()
+            except:
+                pass
+
+    if callable( handler ):
+        return handler
+
+    return notifier
+
+
+def handler_key ( notifier ):
+    """ Returns a pstats style ( file_name, line, function_name ) tuple
+        describing the handler associated with a specified facet notifier.
+    """
+    handler = handler_for( notifier )
+    name    = getattr( handler, '__name__', None )
+    if isinstance( handler, MethodType ):
+        self = handler.im_self
+        if self is not None:
+            name = '%s.%s' % ( self.__class__.__name__, name )
+
+        handler = handler.im_func
+
+    if isinstance( handler, FunctionType ):
+        code = handler.func_code
+
+        return ( code.co_filename, code.co_firstlineno, name )
+
+    return ( '~', 0, '<%s>' % handler.__class__.__name__ )
+
+#-------------------------------------------------------------------------------
+#  'HandlerStats' class:
+#-------------------------------------------------------------------------------
+
+class HandlerStats ( object ):
+    """ Accumulates the profiling statistics for a single notification handler.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, key ):
+        """ Initializes the object.
+        """
+        self.key       = key
+        self.calls     = 0
+        self.total     = 0
+        self.self_time = 0
+        self.maximum   = 0
+        self.histogram = [ 0 ] * HistogramBuckets
+        self.callers   = {}
+        self.facets    = {}
+
+
+    def add ( self, elapsed, self_time, caller, facet_name ):
+        """ Adds the results of a single call to the handler statistics.
+        """
+        self.calls     += 1
+        self.total     += elapsed
+        self.self_time += self_time
+        self.maximum    = max( self.maximum, elapsed )
+
+        bucket = min( HistogramBuckets - 1, (elapsed // 1000).bit_length() )
+        self.histogram[ bucket ] += 1
+
+        self.facets[ facet_name ] = self.facets.get( facet_name, 0 ) + 1
+
+        if caller is not None:
+            info = self.callers.get( caller )
+            if info is None:
+                self.callers[ caller ] = info = [ 0, 0, 0 ]
+
+            info[0] += 1
+            info[1] += self_time
+            info[2] += elapsed
+
+    @property
+    def name ( self ):
+        """ Returns a short description of the handler.
+        """
+        file_name, line, name = self.key
+
+        return name
+
+#-------------------------------------------------------------------------------
+#  'NotificationProfiler' class:
+#-------------------------------------------------------------------------------
+
+class NotificationProfiler ( HasPrivateFacets ):
+    """ A low overhead profiler for Facets change notification handlers.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The number of notifier calls the profiler ring buffer can hold:
+    capacity = Range( 1, 10000000, 100000 )
+
+    # Record one out of every 'sample_rate' top-level notifications (and all
+    # notifications nested within it):
+    sample_rate = Range( 1, 1000000, 1 )
+
+    # Is the profiler currently running?
+    running = Bool( False )
+
+    # The total number of notifier calls recorded:
+    total = Long
+
+    # The number of recorded notifier calls lost due to ring buffer overflow:
+    lost = Long
+
+    # The statistics for each profiled handler (keyed by pstats style
+    # ( file_name, line, function_name ) tuple):
+    stats = Dict
+
+    # The folded call stacks seen (mapping a tuple of handler keys to the total
+    # self time spent in the innermost handler, in nanoseconds):
+    stacks = Dict
+
+    # The number of handlers profiled:
+    handlers = Property
+
+    # The number of records processed so far:
+    processed = Int
+
+    #-- Property Implementations -----------------------------------------------
+
+    def _get_handlers ( self ):
+        return len( self.stats )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def start ( self ):
+        """ Starts (or restarts) the profiler, discarding any previously
+            collected data. Returns the profiler.
+        """
+        self.reset()
+        _facet_profiler( self.capacity, self.sample_rate )
+        self.running = True
+
+        return self
+
+
+    def stop ( self ):
+        """ Stops the profiler after collecting all pending profiler data.
+            Returns the profiler.
+        """
+        if self.running:
+            self.collect()
+            _facet_profiler( 0 )
+            self.running = False
+
+        return self
+
+
+    def reset ( self ):
+        """ Discards all collected profiler data.
+        """
+        self.stats     = {}
+        self.stacks    = {}
+        self.total     = 0
+        self.lost      = 0
+        self.processed = 0
+
+
+    def collect ( self ):
+        """ Collects all data currently contained in the profiler ring buffer
+            and adds it to the accumulated handler statistics. This should be
+            called periodically when profiling long running interactions to
+            prevent the ring buffer from overflowing.
+        """
+        if not self.running:
+            return
+
+        total, records = _facet_profiler_records( True )
+        self._keys      = {}
+        self.lost      += max( 0, total - len( records ) )
+        self.total     += total
+        self.processed += len( records )
+
+        # Reconstruct the notification call trees from the records. Since a
+        # record is written when its call completes, each record is preceded by
+        # the records for all of the calls nested within it:
+        pending = {}
+        roots   = []
+        for record in records:
+            depth = record[5]
+            node  = ( record, pending.pop( depth + 1, [] ) )
+            if depth == 0:
+                roots.append( node )
+            else:
+                pending.setdefault( depth, [] ).append( node )
+
+        # Any nodes still pending belong to calls which had not completed when
+        # the records were collected, so treat them as roots:
+        for depth in sorted( pending.keys() ):
+            roots.extend( pending[ depth ] )
+
+        for node in roots:
+            self._add_node( node, (), None )
+
+
+    def report ( self, sort = 'self', limit = 30 ):
+        """ Returns a text report of the most expensive handlers, sorted by
+            'self' (time), 'total' (time), 'calls' or 'maximum' (time).
+        """
+        attr  = { 'self': 'self_time' }.get( sort, sort )
+        stats = sorted( self.stats.values(),
+                        key = lambda hs: getattr( hs, attr ), reverse = True )
+        lines = [
+            'Notifier calls: %d recorded, %d lost, %d handlers' %
+            ( self.total, self.lost, len( stats ) ),
+            '',
+            '%10s %12s %12s %12s %12s  %s' %
+            ( 'Calls', 'Total (ms)', 'Self (ms)', 'Per Call (us)',
+              'Max (us)', 'Handler' )
+        ]
+        for hs in stats[ : limit ]:
+            file_name, line, name = hs.key
+            lines.append( '%10d %12.3f %12.3f %12.3f %12.3f  %s (%s:%d)' % (
+                hs.calls, hs.total / 1.0e6, hs.self_time / 1.0e6,
+                hs.total / (1.0e3 * hs.calls), hs.maximum / 1.0e3, name,
+                file_name, line ) )
+
+        return '\n'.join( lines )
+
+
+    def pstats ( self ):
+        """ Returns the handler statistics in the format expected by the
+            standard Python 'pstats' module.
+        """
+        result = {}
+        for key, hs in self.stats.iteritems():
+            result[ key ] = (
+                hs.calls, hs.calls, hs.self_time / 1.0e9, hs.total / 1.0e9,
+                dict( [ ( caller, ( info[0], info[0], info[1] / 1.0e9,
+                                    info[2] / 1.0e9 ) )
+                        for caller, info in hs.callers.iteritems() ] )
+            )
+
+        return result
+
+
+    def dump_stats ( self, file_name ):
+        """ Writes the handler statistics to the specified file in a format
+            which can be loaded using 'pstats.Stats( file_name )'.
+        """
+        fh = open( file_name, 'wb' )
+        try:
+            marshal.dump( self.pstats(), fh )
+        finally:
+            fh.close()
+
+
+    def flamegraph ( self ):
+        """ Returns the profiled notification call stacks as text in the
+            'folded stack' format used by flame graph tools. Each line contains
+            a semicolon separated list of handler names followed by the self
+            time (in microseconds) spent in the last handler of the list.
+        """
+        lines = []
+        for stack, self_time in self.stacks.iteritems():
+            us = int( round( self_time / 1.0e3 ) )
+            if us > 0:
+                lines.append( '%s %d' % (
+                    ';'.join( [ self._frame_name( key ) for key in stack ] ),
+                    us ) )
+
+        lines.sort()
+
+        return '\n'.join( lines )
+
+
+    def dump_flamegraph ( self, file_name ):
+        """ Writes the profiled notification call stacks to the specified file
+            in the 'folded stack' format used by flame graph tools.
+        """
+        fh = open( file_name, 'wb' )
+        try:
+            fh.write( self.flamegraph() )
+            fh.write( '\n' )
+        finally:
+            fh.close()
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _add_node ( self, node, stack, caller ):
+        """ Adds the statistics for a specified notification call tree node
+            (and all of its nested calls) to the accumulated statistics.
+        """
+        record, children = node
+        notifier, object_type, facet_name, elapsed, nested, depth = record
+        key = self._keys.get( id( notifier ) )
+        if key is None:
+            self._keys[ id( notifier ) ] = key = handler_key( notifier )
+
+        hs = self.stats.get( key )
+        if hs is None:
+            self.stats[ key ] = hs = HandlerStats( key )
+
+        self_time = max( 0, elapsed - nested )
+        hs.add( elapsed, self_time, caller, facet_name )
+
+        stack = stack + ( key, )
+        self.stacks[ stack ] = self.stacks.get( stack, 0 ) + self_time
+
+        for child in children:
+            self._add_node( child, stack, key )
+
+
+    def _frame_name ( self, key ):
+        """ Returns the flame graph frame name for a specified handler key.
+        """
+        file_name, line, name = key
+
+        return ('%s:%d' % ( name, line )).replace( ';', ':' ).replace( ' ',
+                                                                       '_' )
+
+#-- EOF ------------------------------------------------------------------------
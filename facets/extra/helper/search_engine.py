@@ -0,0 +1,405 @@
+"""
+Defines the SearchEngine class, which searches the contents of a set of text
+files for a string using a pool of worker processes.
+
+Each search is performed by a SearchJob, which runs on a background thread and
+streams its results back in batches (as its 'results' event), so that a user
+interface can display the matches found so far while the search continues. A
+job can be cancelled at any time (e.g. because the user has changed the search
+string), in which case no further work for it is started, and no further
+results are reported.
+
+To avoid reading files which cannot possibly match, the engine maintains a
+TrigramIndex, which records the (case folded) three character strings
+contained in each file it has searched, as a compact sorted array of integer
+codes. Any file which does not contain every trigram in the search string is
+skipped without being read. The index is built as a side effect of searching
+(a file is indexed the first time it is read), and is kept up to date by
+checking each file's modification time at the start of each search.
+
+The files which remain are divided into small chunks, which are searched in
+parallel by the worker processes. Each worker memory maps the files it
+searches and finds the matching lines using a regular expression, returning
+only the matching lines to the engine.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import re
+
+from mmap \
+    import mmap, ACCESS_READ
+
+from os \
+    import stat
+
+from threading \
+    import Thread, Lock
+
+from multiprocessing \
+    import Pool, cpu_count
+
+from numpy \
+    import array, frombuffer, unique, uint8, uint32
+
+from facets.core_api \
+    import HasPrivateFacets, Any, Str, Int, Bool, List, Event, Instance
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The number of files searched by a worker process at one time:
+ChunkSize = 32
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def trigrams_of ( data ):
+    """ Returns the sorted array of the (24-bit integer codes of the) unique,
+        case folded trigrams contained in *data* (a string or memory mapped
+        file).
+    """
+    codes = frombuffer( data, uint8 )
+    if len( codes ) < 3:
+        return array( [], uint32 )
+
+    codes = codes.astype( uint32 )
+
+    # Fold ASCII upper case letters to lower case (the same as 'str.lower'):
+    codes[ (codes >= 65) & (codes <= 90) ] += 32
+
+    return unique( (codes[ :-2 ] << 16) | (codes[ 1: -1 ] << 8) | codes[ 2: ] )
+
+
+def matching_lines ( data, pattern ):
+    """ Returns a list of tuples of the form: ( line, text ) for each line in
+        *data* (a string or memory mapped file) containing a match for the
+        compiled regular expression *pattern*, where *line* is the (1-based)
+        line number and *text* is the text of the line.
+    """
+    result = []
+    line   = 1
+    last   = 0
+    n      = len( data )
+    while True:
+        match = pattern.search( data, last )
+        if match is None:
+            return result
+
+        start = match.start()
+        line += data[ last: start ].count( '\n' )
+        end   = data.find( '\n', start )
+        if end < 0:
+            end = n
+
+        result.append( ( line, data[ data.rfind( '\n', 0, start ) + 1: end ] ) )
+        if end >= n:
+            return result
+
+        line += 1
+        last  = end + 1
+
+
+def search_files ( tasks, find, case_sensitive ):
+    """ Searches the files described by *tasks* (a list of tuples of the form:
+        ( path, mtime, index )) for *find*, and returns a list of tuples of the
+        form: ( path, mtime, trigrams, lines ), where *trigrams* is the array
+        of trigrams in the file if *index* is True (and None otherwise), and
+        *lines* is the list of matching lines returned by 'matching_lines'.
+
+        This function runs in the worker processes.
+    """
+    pattern = re.compile( re.escape( find ),
+                          0 if case_sensitive else re.IGNORECASE )
+    result  = []
+    for path, mtime, index in tasks:
+        try:
+            fh = open( path, 'rb' )
+        except IOError:
+            continue
+
+        try:
+            try:
+                data = mmap( fh.fileno(), 0, access = ACCESS_READ )
+            except ( ValueError, EnvironmentError ):
+                # Empty files cannot be mapped:
+                data = fh.read()
+
+            trigrams = None
+            if index:
+                trigrams = trigrams_of( data )
+
+            result.append( ( path, mtime, trigrams,
+                             matching_lines( data, pattern ) ) )
+            if not isinstance( data, str ):
+                data.close()
+        finally:
+            fh.close()
+
+    return result
+
+#-------------------------------------------------------------------------------
+#  'TrigramIndex' class:
+#-------------------------------------------------------------------------------
+
+class TrigramIndex ( object ):
+    """ Records the set of trigrams contained in each of a set of files.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self ):
+        """ Initializes the object.
+        """
+        self.files = {}
+        self.lock  = Lock()
+
+
+    def check ( self, paths ):
+        """ Returns a list of tuples of the form: ( path, mtime, indexed ) for
+            each file in *paths* which still exists, where *indexed* is True if
+            the index entry for the file is up to date.
+        """
+        files  = self.files
+        result = []
+        for path in paths:
+            try:
+                mtime = stat( path ).st_mtime
+            except OSError:
+                continue
+
+            entry = files.get( path )
+            result.append( ( path, mtime,
+                             (entry is not None) and (entry[0] == mtime) ) )
+
+        return result
+
+
+    def may_contain ( self, path, trigrams ):
+        """ Returns True if the indexed file *path* contains all of the
+            specified (sorted array of) *trigrams*, and so may contain the
+            string they were taken from.
+        """
+        codes = self.files[ path ][1]
+        i     = codes.searchsorted( trigrams )
+
+        return bool( (i < len( codes )).all() and
+                     (codes[ i ] == trigrams).all() )
+
+
+    def update ( self, path, mtime, trigrams ):
+        """ Sets the (sorted array of) trigrams contained in the file *path*
+            whose modification time is *mtime*.
+        """
+        self.lock.acquire()
+        try:
+            self.files[ path ] = ( mtime, trigrams )
+        finally:
+            self.lock.release()
+
+#-------------------------------------------------------------------------------
+#  'SearchJob' class:
+#-------------------------------------------------------------------------------
+
+class SearchJob ( HasPrivateFacets ):
+    """ A search of a set of files for a string, performed by a SearchEngine.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The engine performing the search:
+    engine = Instance( 'SearchEngine' )
+
+    # The paths of the files being searched:
+    paths = List # ( Str )
+
+    # The string being searched for:
+    find = Str
+
+    # Is the search case sensitive?
+    case_sensitive = Bool( True )
+
+    # Event fired with each batch of results, as a list of tuples of the form:
+    # ( path, lines ), where *lines* is a list of ( line, text ) tuples:
+    results = Event
+
+    # The number of files searched so far:
+    searched = Int
+
+    # The number of files skipped because they could not contain a match:
+    skipped = Int
+
+    # Has the job completed?
+    done = Bool( False )
+
+    # Has the job been cancelled?
+    cancelled = Bool( False )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def start ( self ):
+        """ Starts the search on a background thread.
+        """
+        if (self.find == '') or ('\n' in self.find):
+            self.done = True
+        else:
+            thread = Thread( target = self.engine.run,
+                             args   = ( self, self.engine.pool() ) )
+            thread.setDaemon( True )
+            thread.start()
+
+
+    def cancel ( self ):
+        """ Cancels the job.
+        """
+        self.cancelled = True
+
+#-------------------------------------------------------------------------------
+#  'SearchEngine' class:
+#-------------------------------------------------------------------------------
+
+class SearchEngine ( HasPrivateFacets ):
+    """ Searches the contents of a set of text files using a pool of worker
+        processes.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The number of worker processes to use (a negative value uses one per CPU,
+    # and 0 searches on the job's own thread):
+    processes = Int( -1 )
+
+    # The index of the trigrams contained in each file searched:
+    index = Instance( TrigramIndex, () )
+
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The pool of worker processes (if any):
+    _pool = Any
+
+    # The number of worker processes in the pool:
+    _processes = Int
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def search ( self, paths, find, case_sensitive = True, start = True ):
+        """ Returns a SearchJob for searching the files specified by *paths*
+            for the string *find*. If *start* is False, the caller must call
+            the job's 'start' method to start the search (which allows
+            listeners to be added to the job first).
+        """
+        job = SearchJob( engine         = self,
+                         paths          = list( paths ),
+                         find           = find,
+                         case_sensitive = case_sensitive )
+        if start:
+            job.start()
+
+        return job
+
+
+    def pool ( self ):
+        """ Returns the pool of worker processes, or None if searches should
+            be performed on the job's own thread.
+        """
+        if (self._pool is None) and (self.processes != 0):
+            processes = self.processes
+            if processes < 0:
+                processes = cpu_count()
+
+            try:
+                self._pool      = Pool( processes )
+                self._processes = processes
+            except ( OSError, ImportError ):
+                self.processes = 0
+
+        return self._pool
+
+
+    def run ( self, job, pool = None ):
+        """ Performs the search for the specified *job* on the calling thread,
+            using the specified *pool* of worker processes (if any).
+        """
+        find, case_sensitive = job.find, job.case_sensitive
+        paths                = job.paths
+        if isinstance( find, unicode ):
+            # The files are searched (and indexed) as raw bytes, so search for
+            # the UTF-8 encoding of the string:
+            find = find.encode( 'utf-8' )
+
+        trigrams             = trigrams_of( find )
+        index                = self.index
+        may_contain          = index.may_contain
+        tasks                = []
+        skipped              = 0
+        for path, mtime, indexed in index.check( paths ):
+            if indexed and (not may_contain( path, trigrams )):
+                skipped += 1
+            else:
+                tasks.append( ( path, mtime, not indexed ) )
+
+        job.skipped = skipped
+        chunks      = [ tasks[ i: i + ChunkSize ]
+                        for i in xrange( 0, len( tasks ), ChunkSize ) ]
+        chunks.reverse()
+        if pool is None:
+            while (len( chunks ) > 0) and (not job.cancelled):
+                self._process( job, search_files( chunks.pop(), find,
+                                                  case_sensitive ) )
+        else:
+            # Keep only a limited number of chunks queued at once, so that
+            # cancelling the job wastes as little work as possible:
+            pending = []
+            limit   = 2 * self._processes
+            while not job.cancelled:
+                while (len( chunks ) > 0) and (len( pending ) < limit):
+                    pending.append( pool.apply_async( search_files, (
+                        chunks.pop(), find, case_sensitive ) ) )
+
+                if len( pending ) == 0:
+                    break
+
+                self._process( job, pending.pop( 0 ).get() )
+
+        job.done = True
+
+
+    def close ( self ):
+        """ Closes the pool of worker processes (if any). Any work already
+            queued is completed (so that the threads of any jobs still running
+            are not left waiting for it), after which the worker processes
+            exit.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _process ( self, job, results ):
+        """ Updates the index with the specified search *results* for *job*,
+            and reports any matches found.
+        """
+        update  = self.index.update
+        matches = []
+        for path, mtime, trigrams, lines in results:
+            if trigrams is not None:
+                update( path, mtime, trigrams )
+
+            if len( lines ) > 0:
+                matches.append( ( path, lines ) )
+
+        if not job.cancelled:
+            job.searched += len( results )
+            if len( matches ) > 0:
+                job.results = matches
+
+#-- EOF ------------------------------------------------------------------------
@@ -3,15 +3,13 @@
 #-------------------------------------------------------------------------------
 
 import re
-
-from cPickle \
-    import load, dump
+import shelve
 
 from cStringIO \
     import StringIO
 
 from os \
-    import walk, remove
+    import walk, stat
 
 from os.path \
     import join, splitext, basename, exists
@@ -19,6 +17,9 @@ from os.path \
 from threading \
     import Thread
 
+from multiprocessing \
+    import Pool, cpu_count
+
 from tokenize \
     import generate_tokens, ENDMARKER, NAME, OP
 
@@ -30,12 +31,30 @@ from facets.api \
 from facets.core.facet_base \
     import read_file
 
+from facets.extra.helper.text_buffer \
+    import TextBuffer
+
 #-------------------------------------------------------------------------------
 #  Constants:
 #-------------------------------------------------------------------------------
 
-# The name of the file cross-reference data is saved in:
-XRefFile = 'xref.data'
+# The name of the database cross-reference data is saved in:
+XRefFile = 'xref.db'
+
+# The version of the cross-reference database format:
+XRefVersion = 2
+
+# The database keys used for the format version, the ( mtime, size ) of each
+# indexed file, and the merged cross-reference data for all files:
+VersionKey = '#version'
+FilesKey   = '#files'
+XRefKey    = '#xref'
+
+# The prefix of the database key for each file's ( refs, defs ) index entry:
+FileKey = 'file:'
+
+# The minimum number of changed files which are indexed using a process pool:
+MinPoolFiles = 64
 
 # The template used for constructing 'from ... import ...' regex expressions:
 ImportTemplate = r'^\s*from\s+%s.+?\s+import\s+(.*?[^\\])$'
@@ -58,6 +77,111 @@ PythonKeywords = set( [
 # Name style to use for RefFile and DefFile 'short_name' values:
 NameStyle = Enum( 'demo', 'base', 'partial', 'full' )
 
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+# Cache of compiled 'from ... import ...' regular expressions by package:
+import_regexes = {}
+
+def import_regex ( package ):
+    """ Returns the compiled regular expression matching 'from ... import ...'
+        statements for the specified *package* prefix.
+    """
+    regex = import_regexes.get( package )
+    if regex is None:
+        prefix = package
+        if prefix != '':
+            prefix += '\.'
+
+        import_regexes[ package ] = regex = re.compile(
+            ImportTemplate % prefix, re.MULTILINE | re.DOTALL )
+
+    return regex
+
+
+def find_references ( source, package ):
+    """ Returns all of the symbols imported from the specified *package* by
+        the specified Python *source* text. The result is a dictionary mapping
+        imported symbol names to tuples of the form: ( line, column ), where
+        'line' and 'column' are the file line and column (1 based origin) of
+        the first 'from ...' statement importing the symbol.
+    """
+    buffer = TextBuffer( source )
+    names  = {}
+    for match in import_regex( package ).finditer( source ):
+        line = buffer.line_at( source.find( 'from', match.start() ) ) + 1
+        text = match.group( 1 ).replace( '\\', '' )
+        for c in '#;':
+            text = text.split( c, 1 )[0]
+
+        for name in text.split( ',' ):
+            name = name.split()[0].strip()
+            names.setdefault( name, ( line, 1 ) )
+
+    return names
+
+
+def find_definitions ( source ):
+    """ Returns all the top-level definitions contained in the specified
+        Python *source* text. The result is a dictionary mapping defined
+        symbol names to tuples of the form: ( line, column ), where 'line'
+        and 'column' are the file line and column (1 based origin) where
+        the associated symbol is defined.
+    """
+    definitions = {}
+    def_pending = assign_pending = False
+    tokenizer   = generate_tokens( StringIO( source ).readline )
+    try:
+        for type, token, first, last, line in tokenizer:
+            if type == ENDMARKER:
+                break
+
+            if assign_pending:
+                assign_pending = False
+                if (type == OP) and (token == '='):
+                    name, line, column  = saved_def
+                    definitions[ name ] = ( line, column + 1 )
+
+            if type == NAME:
+                line, column = first
+                if def_pending:
+                    def_pending          = False
+                    definitions[ token ] = ( line, column + 1 )
+                elif column == 0:
+                    if token in DefinitionKeywords:
+                        def_pending = True
+                    elif token not in PythonKeywords:
+                        assign_pending = True
+                        saved_def      = ( token, line, column )
+    except:
+        pass
+
+    return definitions
+
+
+def index_file ( task ):
+    """ Returns the index entry for the Python source file described by *task*
+        (a tuple of the form: ( root, short_name, package )) as a tuple of the
+        form: ( short_name, refs, defs ), where *refs* and *defs* are the
+        results of 'find_references' and 'find_definitions' for the file.
+
+        This function can be run in a worker process.
+    """
+    root, short_name, package = task
+    try:
+        source = read_file( join( root, short_name ) )
+    except:
+        source = None
+
+    if source is None:
+        return ( short_name, {}, {} )
+
+    source = source.replace( '\r\n', '\n' ).replace( '\r', '\n' )
+
+    return ( short_name, find_references( source, package ),
+             find_definitions( source ) )
+
 #-------------------------------------------------------------------------------
 #  'XRef' class:
 #-------------------------------------------------------------------------------
@@ -289,9 +413,6 @@ class SourceXRef ( HasPrivateFacets ):
     def _refresh_set ( self ):
         """ Handles the 'refresh' button being clicked.
         """
-        if exists( self.xref_file ):
-            remove( self.xref_file )
-
         self.dirty = True
 
 
@@ -321,9 +442,7 @@ class SourceXRef ( HasPrivateFacets ):
         while self.dirty:
             self.dirty = False
             xref_file  = self.xref_file
-            if not exists( xref_file ):
-                self._save_xref( xref_file )
-
+            self._save_xref( xref_file )
             self._load_xref( xref_file )
 
         self.busy = False
@@ -357,134 +476,159 @@ class SourceXRef ( HasPrivateFacets ):
         )
 
 
+    def _save_xref ( self, xref_file ):
+        """ Brings the cross-reference data saved in the database specified by
+            *xref_file* up to date with the Python source files in the current
+            'root' directory. Only files which have been added or changed
+            (based on their modification time and size) since the last update
+            are indexed again.
+
+            The list of indexed files is removed while the database is being
+            updated and only written again once everything else has been
+            saved, so if the update is interrupted, the database is rebuilt
+            from scratch the next time.
+        """
+        db = shelve.open( xref_file, protocol = -1 )
+        if (db.get( VersionKey ) != XRefVersion) or (FilesKey not in db):
+            db.close()
+            db = shelve.open( xref_file, 'n', protocol = -1 )
+            db[ VersionKey ] = XRefVersion
+
+        try:
+            old_files = db.get( FilesKey, {} )
+            files     = self._source_files()
+            changed   = [ name for name, info in files.iteritems()
+                          if old_files.get( name ) != info ]
+            removed   = [ name for name in old_files if name not in files ]
+            if (len( changed ) + len( removed )) == 0:
+                return
+
+            if FilesKey in db:
+                del db[ FilesKey ]
+                db.sync()
+
+            # Remove the old index entries of all removed or changed files from
+            # the merged cross-reference data:
+            xrefs = db.get( XRefKey, {} )
+            for name in (removed + changed):
+                key = FileKey + name
+                if key in db:
+                    refs, defs = db[ key ]
+                    del db[ key ]
+                    self._unmerge( xrefs, name, refs, defs )
+
+            # Index all added or changed files, and merge the new entries:
+            for name, refs, defs in self._index( changed ):
+                db[ FileKey + name ] = ( refs, defs )
+                self._merge( xrefs, name, refs, defs )
+
+            db[ XRefKey ] = xrefs
+            db.sync()
+            db[ FilesKey ] = files
+        finally:
+            db.close()
+
+
     def _load_xref ( self, xref_file ):
-        """ Load the data from the cross_reference file specified by
+        """ Load the data from the cross_reference database specified by
             *xref_file*.
         """
-        # Unpickle the data from the cross-reference save file:
-        fh        = open( xref_file, 'rb' )
-        xref_data = load( fh )
-        fh.close()
+        # Only the merged cross-reference data is needed, not the individual
+        # file entries:
+        db = shelve.open( xref_file, 'r' )
+        try:
+            xrefs = db.get( XRefKey, {} )
+        finally:
+            db.close()
+
+        # Sort all cross-reference symbols which have references case
+        # insensitively:
+        names = [ name for name, entry in xrefs.iteritems()
+                       if len( entry[1] ) > 0 ]
+        names.sort( lambda l, r: cmp( l.lower(), r.lower() ) )
 
         # Convert the data into an XRef object:
         xref_for   = self._xref_for
-        self.names = [ xref_for( name, defs, refs )
-                       for name, defs, refs in xref_data ]
+        self.names = [ xref_for( name, sorted( xrefs[ name ][0] ),
+                                       sorted( xrefs[ name ][1] ) )
+                       for name in names ]
 
 
-    def _save_xref ( self, xref_file ):
-        """ Build the cross-reference data for the current 'root' directory and
-            save it in the file specified by *xref_file*.
+    def _source_files ( self ):
+        """ Returns a dictionary mapping the location independent name of each
+            Python source file in the current 'root' directory to a tuple of
+            the form: ( mtime, size ).
         """
-        # Create the regex pattern used to match 'from ...' statements:
-        package = self.package
-        if package != '':
-            package += '\.'
-
-        regex = re.compile( ImportTemplate % package,
-                            re.MULTILINE | re.DOTALL )
         n     = len( self.root ) + 1
-        xrefs = {}
-        for path, dirs, files in walk( self.root ):
+        files = {}
+        for path, dirs, file_names in walk( self.root ):
             # Don't process any .svn directories:
-            for i, dir in enumerate( dirs ):
-                if dir == '.svn':
-                    del dirs[ i ]
-
-                    break
-
-            # Process each file in the directory:
-            for file in files:
-                file_name = join( path, file )
+            if '.svn' in dirs:
+                dirs.remove( '.svn' )
 
+            for file_name in file_names:
                 # Only handle Python files:
                 if splitext( file_name )[1] == '.py':
-                    # Create a location independent file name:
-                    short_file_name = file_name[ n: ]
-
-                    # Find each 'from package.xxx import ...' statement in file:
-                    source = read_file( file_name ).replace( '\r\n', '\n'
-                                                  ).replace( '\r',   '\n' )
-                    names  = {}
-                    for match in regex.finditer( source ):
-                        line = (len( source[ : match.start() ].split( '\n' ) )
-                                + 1)
-                        text = match.group( 1 ).replace( '\\', '' )
-                        for c in '#;':
-                            text = text.split( c, 1 )[0]
-
-                        for name in text.split( ',' ):
-                            name = name.split()[0].strip()
-                            names.setdefault( name, ( line, 1 ) )
-
-                    # For each unique symbol, add a cross-reference entry to
-                    # the current file:
-                    for name, location in names.iteritems():
-                        entry = xrefs.get( name )
-                        if entry is None:
-                            xrefs[ name ] = entry = ( [], [] )
-
-                        entry[1].append( ( short_file_name, ) + location )
-
-                    # Add all top-level definitions contained in the file:
-                    file_defs = self._find_definitions( source )
-                    for name, location in file_defs.iteritems():
-                        entry = xrefs.get( name )
-                        if entry is None:
-                            xrefs[ name ] = entry = ( [], [] )
-
-                        entry[0].append( ( short_file_name, ) + location )
-
-        # Eliminate any entries which have no references:
-        for name in xrefs.keys():
-            if len( xrefs[ name ][1] ) == 0:
-                del xrefs[ name ]
-
-        # Sort all cross-reference symbols case insensitively:
-        names = xrefs.keys()
-        names.sort( lambda l, r: cmp( l.lower(), r.lower() ) )
+                    file_name = join( path, file_name )
+                    try:
+                        info = stat( file_name )
+                    except OSError:
+                        continue
+
+                    files[ file_name[ n: ] ] = ( info.st_mtime, info.st_size )
 
-        # Pickle the cross-reference data to a save file:
-        fh = open( xref_file, 'wb' )
-        dump( [ ( name, ) + xrefs[ name ] for name in names ], fh, -1 )
-        fh.close()
+        return files
 
 
-    def _find_definitions ( self, source ):
-        """ Returns all the top-level definitions contained in the specified
-            Python *source* text. The result is a dictionary mapping defined
-            symbol names to tuples of the form: ( line, column ), where 'line'
-            and 'column' are the file line and column (1 based origin) where
-            the associated symbol is defined.
+    def _index ( self, names ):
+        """ Returns the index entries for the source files whose location
+            independent names are specified by *names*, indexing them in
+            parallel using a process pool if there are enough of them.
         """
-        definitions = {}
-        def_pending = assign_pending = False
-        tokenizer   = generate_tokens( StringIO( source ).readline )
+        tasks = [ ( self.root, name, self.package ) for name in names ]
+        if len( tasks ) < MinPoolFiles:
+            return [ index_file( task ) for task in tasks ]
+
+        pool = Pool( cpu_count() )
         try:
-            for type, token, first, last, line in tokenizer:
-                if type == ENDMARKER:
-                    break
-
-                if assign_pending:
-                    assign_pending = False
-                    if (type == OP) and (token == '='):
-                        name, line, column  = saved_def
-                        definitions[ name ] = ( line, column + 1 )
-
-                if type == NAME:
-                    line, column = first
-                    if def_pending:
-                        def_pending          = False
-                        definitions[ token ] = ( line, column + 1 )
-                    elif column == 0:
-                        if token in DefinitionKeywords:
-                            def_pending = True
-                        elif token not in PythonKeywords:
-                            assign_pending = True
-                            saved_def      = ( token, line, column )
-        except:
-            pass
-
-        return definitions
+            return pool.map( index_file, tasks,
+                             max( 1, len( tasks ) // (8 * cpu_count()) ) )
+        finally:
+            pool.close()
+            pool.join()
+
+
+    def _merge ( self, xrefs, name, refs, defs ):
+        """ Merges the references (*refs*) and definitions (*defs*) of the
+            source file *name* into the cross-reference data *xrefs*.
+        """
+        for symbol, location in refs.iteritems():
+            entry = xrefs.get( symbol )
+            if entry is None:
+                xrefs[ symbol ] = entry = ( [], [] )
+
+            entry[1].append( ( name, ) + location )
+
+        for symbol, location in defs.iteritems():
+            entry = xrefs.get( symbol )
+            if entry is None:
+                xrefs[ symbol ] = entry = ( [], [] )
+
+            entry[0].append( ( name, ) + location )
+
+
+    def _unmerge ( self, xrefs, name, refs, defs ):
+        """ Removes the references (*refs*) and definitions (*defs*) of the
+            source file *name* from the cross-reference data *xrefs*.
+        """
+        for symbol in set( refs ) | set( defs ):
+            entry = xrefs.get( symbol )
+            if entry is not None:
+                entry = ( [ item for item in entry[0] if item[0] != name ],
+                          [ item for item in entry[1] if item[0] != name ] )
+                if (len( entry[0] ) + len( entry[1] )) > 0:
+                    xrefs[ symbol ] = entry
+                else:
+                    del xrefs[ symbol ]
 
 #-- EOF ------------------------------------------------------------------------
@@ -0,0 +1,320 @@
+"""
+Defines the TextBuffer class, a line indexed model of a (possibly very large)
+text string shared by the text editing and searching tools.
+
+A TextBuffer keeps the list of lines in its text, along with the offset at
+which each line starts, so that any line can be retrieved in O(1) time and
+any text offset can be mapped to its line in O(log n) time. When the text is
+replaced by an edited version of itself (which is how editors normally report
+changes), only the lines between the first and last changed characters are
+split again, and the line start offsets are only recomputed (lazily) from the
+first changed line onwards.
+
+For case insensitive searching, the buffer also maintains a case-folded
+shadow copy of the text, which is patched (rather than recomputed) after each
+edit. The set of lines matching the most recent search string is cached, so
+that as a search string is extended (e.g. as the user types it), only the
+lines which matched the shorter string are searched again.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+from bisect \
+    import bisect_right
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The size of the blocks compared when looking for the common prefix/suffix of
+# two versions of the text:
+BlockSize = 1 << 16
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def common_prefix ( a, b ):
+    """ Returns the length of the longest common prefix of strings *a* and *b*.
+    """
+    n = min( len( a ), len( b ) )
+    i = 0
+    while (i < n) and (a[ i: i + BlockSize ] == b[ i: i + BlockSize ]):
+        i += BlockSize
+
+    if i >= n:
+        return n
+
+    # Binary search within the first mismatched block:
+    lo, hi = i, min( i + BlockSize, n )
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[ lo: mid ] == b[ lo: mid ]:
+            lo = mid
+        else:
+            hi = mid - 1
+
+    return lo
+
+
+def common_suffix ( a, b, limit ):
+    """ Returns the length of the longest common suffix of strings *a* and *b*,
+        up to a maximum of *limit* characters.
+    """
+    na, nb = len( a ), len( b )
+    i      = 0
+    while ((i < limit) and
+           (a[ max( na - i - BlockSize, na - limit ): na - i ] ==
+            b[ max( nb - i - BlockSize, nb - limit ): nb - i ])):
+        i += BlockSize
+
+    if i >= limit:
+        return limit
+
+    lo, hi = i, min( i + BlockSize, limit )
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[ na - mid: na - lo ] == b[ nb - mid: nb - lo ]:
+            lo = mid
+        else:
+            hi = mid - 1
+
+    return lo
+
+#-------------------------------------------------------------------------------
+#  'TextBuffer' class:
+#-------------------------------------------------------------------------------
+
+class TextBuffer ( object ):
+    """ A line indexed model of a text string.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, text = '' ):
+        """ Initializes the object.
+        """
+        self.text     = text
+        self.lines    = text.split( '\n' )
+        self.version  = 0
+        self._starts  = [ 0 ]
+        self._folded  = None
+        self._matches = None
+        self._count   = None
+
+
+    def set_text ( self, text ):
+        """ Replaces the contents of the buffer with *text*, updating the line
+            index incrementally based upon the portion of the text that has
+            changed.
+        """
+        old = self.text
+        if (text is old) or (text == old):
+            return
+
+        n_old, n_new = len( old ), len( text )
+        prefix       = common_prefix( old, text )
+        suffix       = common_suffix( old, text,
+                                      min( n_old, n_new ) - prefix )
+        end_old      = n_old - suffix
+        end_new      = n_new - suffix
+
+        # Find the range of lines [first, last] containing the changed text
+        # (avoiding extending the line start index just to find them):
+        starts = self._starts
+        if prefix <= starts[-1]:
+            first = bisect_right( starts, prefix ) - 1
+        else:
+            first = (len( starts ) - 1) + old.count( '\n', starts[-1], prefix )
+
+        last  = first + old.count( '\n', prefix, end_old )
+        start = old.rfind( '\n', 0, prefix ) + 1
+        end   = old.find( '\n', end_old )
+        if end < 0:
+            end = n_old
+
+        self.lines[ first: last + 1 ] = text[
+            start: end + n_new - n_old ].split( '\n' )
+        del self._starts[ first + 1: ]
+
+        if self._folded is not None:
+            self._folded = (self._folded[ : prefix ]         +
+                            text[ prefix: end_new ].lower() +
+                            self._folded[ end_old: ])
+
+        self.text     = text
+        self.version += 1
+
+
+    def line ( self, index ):
+        """ Returns the text of the line with the specified (0-based) *index*,
+            or the empty string if there is no such line.
+        """
+        if 0 <= index < len( self.lines ):
+            return self.lines[ index ]
+
+        return ''
+
+
+    def line_count ( self ):
+        """ Returns the number of lines in the buffer.
+        """
+        return len( self.lines )
+
+
+    def line_start ( self, index ):
+        """ Returns the text offset at which the line with the specified
+            (0-based) *index* starts.
+        """
+        return self._line_starts( index )[ index ]
+
+
+    def line_at ( self, offset ):
+        """ Returns the (0-based) index of the line containing the specified
+            text *offset*.
+        """
+        starts = self._starts
+        if offset > starts[-1]:
+            index = len( starts ) - 1
+            if offset > (starts[-1] + len( self.lines[ index ] )):
+                starts = self._line_starts( len( self.lines ) - 1 )
+
+        return (bisect_right( starts, offset ) - 1)
+
+
+    def count ( self, find, case_sensitive = True ):
+        """ Returns the number of non-overlapping occurrences of *find* in the
+            buffer.
+        """
+        if find == '':
+            return 0
+
+        text, find = self._search_text( find, case_sensitive )
+        key        = ( self.version, find, case_sensitive )
+        if (self._count is None) or (self._count[0] != key):
+            self._count = ( key, text.count( find ) )
+
+        return self._count[1]
+
+
+    def matching_lines ( self, find, case_sensitive = True ):
+        """ Returns the sorted list of the (0-based) indices of all lines
+            containing *find*.
+        """
+        if (find == '') or ('\n' in find):
+            return []
+
+        text, find = self._search_text( find, case_sensitive )
+        matches    = self._matches
+        if ((matches is not None)           and
+            (matches[0] == self.version)    and
+            (matches[2] == case_sensitive)  and
+            (matches[1] in find)):
+            if matches[1] == find:
+                return matches[3]
+
+            # Only lines matching the previous search string can match the
+            # new search string, since it contains the previous one:
+            starts  = self._line_starts( len( self.lines ) - 1 )
+            lines   = self.lines
+            indices = [ i for i in matches[3]
+                        if text.find( find, starts[ i ],
+                                      starts[ i ] + len( lines[ i ] ) ) >= 0 ]
+        else:
+            starts  = self._line_starts( len( self.lines ) - 1 )
+            n       = len( starts )
+            indices = []
+            col     = text.find( find )
+            while col >= 0:
+                i = bisect_right( starts, col ) - 1
+                indices.append( i )
+                i += 1
+                if i >= n:
+                    break
+
+                col = text.find( find, starts[ i ] )
+
+        self._matches = ( self.version, find, case_sensitive, indices )
+
+        return indices
+
+
+    def find ( self, find, line, column, case_sensitive = True ):
+        """ Returns the location of the first occurrence of *find* at or after
+            the specified (0-based) *line* and *column* as a tuple of the form:
+            ( line, column ), or None if there is no such occurrence.
+        """
+        if (find == '') or ('\n' in find) or (line >= len( self.lines )):
+            return None
+
+        text, find = self._search_text( find, case_sensitive )
+        col        = text.find( find, self.line_start( line ) + column )
+        if col < 0:
+            return None
+
+        line = self.line_at( col )
+
+        return ( line, col - self.line_start( line ) )
+
+
+    def rfind ( self, find, line, column, case_sensitive = True ):
+        """ Returns the location of the last occurrence of *find* ending at or
+            before the specified (0-based) *line* and *column* as a tuple of
+            the form: ( line, column ), or None if there is no such occurrence.
+            If *column* is negative, the entire line is searched.
+        """
+        if (find == '') or ('\n' in find) or (line < 0):
+            return None
+
+        line = min( line, len( self.lines ) - 1 )
+        if column < 0:
+            column = len( self.lines[ line ] )
+
+        text, find = self._search_text( find, case_sensitive )
+        col        = text.rfind( find, 0, self.line_start( line ) + column )
+        if col < 0:
+            return None
+
+        line = self.line_at( col )
+
+        return ( line, col - self.line_start( line ) )
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _line_starts ( self, index ):
+        """ Returns the list of line start offsets, making sure that it is
+            valid up to and including the line with the specified *index*.
+        """
+        starts = self._starts
+        n      = len( starts )
+        if index >= n:
+            lines  = self.lines
+            offset = starts[-1]
+            append = starts.append
+            for i in xrange( n - 1, index ):
+                offset += len( lines[ i ] ) + 1
+                append( offset )
+
+        return starts
+
+
+    def _search_text ( self, find, case_sensitive ):
+        """ Returns a tuple of the form: ( text, find ) containing the text to
+            search and the string to search for, taking case sensitivity into
+            account.
+        """
+        if case_sensitive:
+            return ( self.text, find )
+
+        if self._folded is None:
+            self._folded = self.text.lower()
+
+        return ( self._folded, find.lower() )
+
+#-- EOF ------------------------------------------------------------------------
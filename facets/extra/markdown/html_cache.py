@@ -0,0 +1,110 @@
+"""
+Defines the HTMLCache class, a cache of the HTML generated from marked up text
+(e.g. markdown or restructured text), along with the html_cache object shared
+by the markdown editor and the tutor.
+
+Each entry in the cache is keyed by a hash of the kind of conversion performed
+(which should include any options affecting the HTML generated) and the text
+being converted, so that converting text which has already been converted
+(e.g. an unchanged block of a markdown document being edited, or a tutor
+lesson being revisited) simply returns the previously generated HTML. The
+cache holds at most a fixed number of characters of HTML, discarding the
+least recently used entries first.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See section (A) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+from hashlib \
+    import sha1
+
+from collections \
+    import OrderedDict
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The default maximum number of characters of HTML held by a cache:
+CacheSize = 8000000
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def text_key ( kind, text ):
+    """ Returns the cache key for converting *text* using the conversion
+        described by *kind*.
+    """
+    if isinstance( text, unicode ):
+        text = text.encode( 'utf-8' )
+
+    return sha1( '%s\0%s' % ( kind, text ) ).digest()
+
+#-------------------------------------------------------------------------------
+#  'HTMLCache' class:
+#-------------------------------------------------------------------------------
+
+class HTMLCache ( object ):
+    """ A least recently used cache of the HTML generated from marked up text.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, size = CacheSize ):
+        """ Initializes the object to hold at most *size* characters of HTML.
+        """
+        self.size    = size
+        self.used    = 0
+        self.hits    = 0
+        self.misses  = 0
+        self.entries = OrderedDict()
+
+
+    def __len__ ( self ):
+        """ Returns the number of entries in the cache.
+        """
+        return len( self.entries )
+
+
+    def html_for ( self, kind, text, convert ):
+        """ Returns the HTML generated from *text* using the conversion
+            described by *kind*, calling *convert* with *text* to generate it
+            if it is not already in the cache.
+        """
+        key     = text_key( kind, text )
+        entries = self.entries
+        html    = entries.pop( key, None )
+        if html is None:
+            self.misses += 1
+            html         = convert( text )
+            self.used   += len( html )
+        else:
+            self.hits += 1
+
+        entries[ key ] = html
+        while (self.used > self.size) and (len( entries ) > 1):
+            self.used -= len( entries.popitem( False )[1] )
+
+        return html
+
+
+    def clear ( self ):
+        """ Discards all entries in the cache.
+        """
+        self.entries.clear()
+        self.used = 0
+
+#-------------------------------------------------------------------------------
+#  Global Data:
+#-------------------------------------------------------------------------------
+
+# The cache shared by the markdown editor and the tutor:
+html_cache = HTMLCache()
+
+#-- EOF ------------------------------------------------------------------------
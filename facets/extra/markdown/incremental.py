@@ -0,0 +1,293 @@
+"""
+Defines the IncrementalMarkdown class, which converts markdown text to HTML one
+top-level block at a time, so that after an edit only the blocks which have
+actually changed need to be converted again.
+
+The text is split into blocks at blank lines, except where a blank line does
+not end a top-level block: inside a fenced code block or a raw HTML block, or
+before an indented line, a list item continuing a list, or a block quote
+continuing a block quote (in which case the blocks are kept together and
+converted as one). Since markdown converts each such block independently of
+the rest of the document, the HTML for the whole document is just the HTML for
+each of its blocks joined together.
+
+The only exception is reference style links, whose definitions may appear
+anywhere in the document. So all of the link definitions in the document are
+appended to any block containing a possible link reference before it is
+converted (which also means that such blocks are converted again whenever a
+link definition changes).
+
+Raw HTML is only recognized as a block of its own when it starts a block. If
+raw HTML (including an HTML comment) appears anywhere else, markdown may treat
+it in ways that depend on the rest of the document, so the text is not split
+into blocks, and the whole document is converted at once instead.
+
+The HTML for each block is kept in the shared html_cache, keyed by the block's
+content, so unchanged blocks (even if they have moved) are not converted again.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See section (A) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import re
+
+from markdown2 \
+    import Markdown
+
+from html_cache \
+    import html_cache
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The start of a fenced code block:
+fence_start = re.compile( r'```[\w+-]*[ \t]*$' ).match
+
+# The end of a fenced code block:
+fence_end = re.compile( r'```[ \t]*$' ).match
+
+# The start of a raw HTML block (or comment):
+html_start = re.compile(
+    r'<(p|div|h[1-6]|blockquote|pre|table|dl|ol|ul|script|noscript|form|'
+    r'fieldset|iframe|math|ins|del|article|aside|header|hgroup|footer|nav|'
+    r'section|figure|figcaption)\b|<(!--)'
+).match
+
+# A list item:
+list_item = re.compile( r'[ ]{0,3}(?:[*+-]|\d+\.)[ \t]+' ).match
+
+# A block quote:
+block_quote = re.compile( r'[ \t]*>' ).match
+
+# A link definition (the same as the one markdown2 uses):
+link_definition = re.compile( r"""
+    ^[ ]{0,3}\[(.+)\]:
+      [ \t]*
+      \n?
+      [ \t]*
+    <?(.+?)>?
+      [ \t]*
+    (?:
+        \n?
+        [ \t]*
+        (?<=\s)
+        ['"(]
+        ([^\n]*)
+        ['")]
+        [ \t]*
+    )?
+    (?:\n+|\Z)
+    """, re.X | re.M | re.U ).sub
+
+# A line containing only white space:
+white_space_line = re.compile( r'^[ \t]+$', re.M ).sub
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def comment_end ( line, pos = 0 ):
+    """ Returns True if the first end of an HTML comment in *line* (starting at
+        *pos*) ends the line, False if it is followed by anything else, and
+        None if *line* does not end a comment at all.
+    """
+    col = line.find( '-->', pos )
+    if col < 0:
+        return None
+
+    return (line[ col + 3: ].strip( ' \t' ) == '')
+
+
+def html_end_for ( match ):
+    """ Returns a function which checks if a line ends the raw HTML block whose
+        start is described by *match*.
+    """
+    if match.group( 1 ) is None:
+        return comment_end
+
+    return re.compile( r'.*</%s>[ \t]*$' % match.group( 1 ) ).match
+
+
+def irregular_html ( text, positions ):
+    """ Returns whether the raw HTML in *text* prevents it from being split
+        into blocks once its link definitions (which start at the line start
+        *positions*) have been removed. This is the case if a link definition
+        is inside a raw HTML block, or an HTML comment is not followed by a
+        blank line.
+    """
+    offset     = 0
+    html_end   = None
+    need_blank = False
+    for line in text.split( '\n' ):
+        if need_blank and (line != ''):
+            return True
+
+        need_blank = False
+        if html_end is not None:
+            if offset in positions:
+                return True
+
+            if html_end( line ):
+                need_blank = (html_end is comment_end)
+                html_end   = None
+        else:
+            match = html_start( line )
+            if match is not None:
+                html_end = html_end_for( match )
+                if html_end( line, match.end() ):
+                    need_blank = (html_end is comment_end)
+                    html_end   = None
+
+        offset += (len( line ) + 1)
+
+    return False
+
+
+def markdown_blocks ( text ):
+    """ Returns a tuple of the form: ( blocks, definitions ), where *blocks* is
+        the list of the top-level blocks of the markdown *text* (or None if
+        the text contains raw HTML which markdown may not treat as a block of
+        its own, and so can not be split into blocks), and *definitions* is the
+        text of all of the link definitions it contains.
+    """
+    # Prepare the text and remove its link definitions the same way markdown
+    # does before converting the rest of the text:
+    definitions = []
+    text        = white_space_line( '', text.replace( '\r\n', '\n' ).replace(
+                                            '\r', '\n' ) + '\n\n' )
+    positions   = set()
+    stripped    = link_definition(
+        lambda match: definitions.append( match.group( 0 ) ) or
+                      positions.add( match.start() ) or '', text
+    )
+
+    # Markdown finds raw HTML before link definitions, so a link definition
+    # inside a raw HTML block is not a link definition at all, and an HTML
+    # comment is only a block of its own if it is followed by a blank line:
+    if irregular_html( text, positions ):
+        return ( None, ''.join( definitions ) )
+
+    text = stripped
+
+    blocks   = []
+    block    = []
+    in_list  = in_quote = closed = after_html = False
+    fence    = html_end = None
+    for line in text.split( '\n' ):
+        if html_end is not None:
+            block.append( line )
+            ended = html_end( line )
+            if ended is False:
+                return ( None, ''.join( definitions ) )
+
+            if ended:
+                html_end   = None
+                after_html = True
+
+            continue
+
+        if fence is None:
+            if line == '':
+                if len( block ) > 0:
+                    block.append( '' )
+
+                continue
+
+            if (len( block ) > 0) and ((block[-1] == '') or after_html):
+                # The line follows a blank line (or a raw HTML block, which
+                # markdown always puts into a block of its own), so check if it
+                # starts a new block. Note that markdown does not start a fenced
+                # code block separated from the end of the previous one by only
+                # a single blank line, so the two are kept together:
+                if ((line[:1] not in ' \t')                    and
+                    (not (in_list and list_item( line )))     and
+                    (not (in_quote and block_quote( line )))  and
+                    (not (closed and (block[-2] != '') and
+                          fence_start( line )))):
+                    blocks.append( '\n'.join( block ).rstrip( '\n' ) )
+                    block   = []
+                    in_list = in_quote = False
+
+            if (len( block ) == 0) and fence_start( line ):
+                fence = line
+
+            closed = after_html = False
+            in_list  |= (list_item( line ) is not None)
+            in_quote |= (block_quote( line ) is not None)
+        elif fence_end( line ):
+            fence  = None
+            closed = True
+
+        # Raw HTML is found before anything else (even inside a fenced code
+        # block), and continues up to a line ending with its end tag. Any raw
+        # HTML not starting a block means the text can not be split:
+        match = html_start( line )
+        if len( block ) > 0:
+            if (match is not None) or ('<!--' in line):
+                return ( None, ''.join( definitions ) )
+        elif match is not None:
+            html_end = html_end_for( match )
+            ended    = html_end( line, match.end() )
+            if ended is False:
+                return ( None, ''.join( definitions ) )
+
+            if ended:
+                html_end   = None
+                after_html = True
+        elif '<!--' in line:
+            return ( None, ''.join( definitions ) )
+
+        block.append( line )
+
+    if len( block ) > 0:
+        blocks.append( '\n'.join( block ).rstrip( '\n' ) )
+
+    return ( blocks, ''.join( definitions ) )
+
+#-------------------------------------------------------------------------------
+#  'IncrementalMarkdown' class:
+#-------------------------------------------------------------------------------
+
+class IncrementalMarkdown ( object ):
+    """ Converts markdown text to HTML one top-level block at a time.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, extras = None, cache = None ):
+        """ Initializes the object to convert text using the markdown *extras*
+            specified, caching the HTML for each block in *cache* (which
+            defaults to the shared html_cache).
+        """
+        self.extras    = extras or []
+        self.cache     = html_cache if cache is None else cache
+        self.converter = Markdown( extras = self.extras )
+        self.kind      = 'markdown:%s' % ','.join( sorted( self.extras ) )
+
+
+    def convert ( self, text ):
+        """ Returns the HTML for the markdown *text*.
+        """
+        blocks, definitions = markdown_blocks( text )
+        html_for            = self.cache.html_for
+        kind                = self.kind
+        convert             = self.converter.convert
+        if blocks is None:
+            return html_for( kind, text, convert )
+
+        html = []
+        for block in (blocks or [ '' ]):
+            if (definitions != '') and ('[' in block):
+                block = '%s\n\n%s' % ( block, definitions )
+
+            html.append( html_for( kind, block, convert ) )
+
+        return '\n'.join( html )
+
+#-- EOF ------------------------------------------------------------------------
@@ -14,8 +14,8 @@ formatted strings as rendered HTML.
 from os.path \
     import abspath
 
-from markdown2 \
-    import markdown
+from incremental \
+    import IncrementalMarkdown
 
 from facets.api \
     import Str, Bool, File, View, UItem, CodeEditor, HTMLEditor, UIEditor, \
@@ -50,6 +50,10 @@ HTMLTemplate = ("""
 # The CSS <style> template to use when CSS rules are provided:
 CSSStyleTemplate = '<style type="text/css">\n%s\n</style>'
 
+# The converter used to convert markdown to HTML (which only converts the parts
+# of a document which have changed since it was last converted):
+converter = IncrementalMarkdown( MarkdownExtras )
+
 #-------------------------------------------------------------------------------
 #  'Markdown' facet definition:
 #-------------------------------------------------------------------------------
@@ -126,7 +130,7 @@ class _MarkdownEditor ( UIEditor ):
 
             md = self.markdown
 
-        html      = markdown( md, extras = MarkdownExtras )
+        html      = converter.convert( md )
         self.html = (html if self.factory.show_raw else
                      (HTMLTemplate % ( self.css, html )))
 
@@ -23,7 +23,7 @@ from facets.api \
     import HasFacets, File, Directory, Str, Bool, Button, Int, Float, List,    \
            Enum, Event, Instance, Property, Any, View, VGroup, VSplit, HGroup, \
            Item, UItem, GridEditor, CodeEditor, HistoryEditor, DNDEditor,      \
-           ThemedCheckboxEditor, property_depends_on, on_facet_set
+           ThemedCheckboxEditor, Handler, property_depends_on, on_facet_set
 
 from facets.core.facet_base \
     import plural_of
@@ -37,6 +37,12 @@ from facets.ui.i_filter \
 from facets.ui.pyface.timer.api \
     import do_later
 
+from facets.extra.helper.text_buffer \
+    import TextBuffer
+
+from facets.extra.helper.search_engine \
+    import SearchEngine
+
 from tools \
     import Tool
 
@@ -149,12 +155,7 @@ class FileSearchFilter ( Filter ):
     #-- IFilter Interface ------------------------------------------------------
 
     def filter ( self, object ):
-        if len( self.search ) == 0:
-            return True
-
-        object.update = True
-
-        return (len( object.matches ) > 0)
+        return ((len( self.search ) == 0) or (len( object.matches ) > 0))
 
 #-------------------------------------------------------------------------------
 #  'MatchIndices' class:
@@ -216,14 +217,12 @@ class SourceFile ( HasFacets ):
     # The portion of the file path beyond the root search path:
     ext_path = Str
 
-    # The contents of the source file:
-    contents = List # ( Str )
-
-    # The list of matches for the current search criteria:
-    matches = Property # List( Str )
+    # The line indexed contents of the source file:
+    buffer = Any # TextBuffer
 
-    # Event fired when the current set of matches should be recomputed:
-    update = Event
+    # The list of matches for the current search criteria (set by the search
+    # engine):
+    matches = List # ( Str )
 
     #-- Facet View Definitions -------------------------------------------------
 
@@ -235,35 +234,15 @@ class SourceFile ( HasFacets ):
         return dirname( self.full_name )[ len( self.root ): ]
 
 
-    def _contents_default ( self ):
+    def _buffer_default ( self ):
         try:
             fh = open( self.full_name, 'rb' )
-            contents = fh.readlines()
+            contents = fh.read()
             fh.close()
 
-            return contents
+            return TextBuffer( contents )
         except:
-            return ''
-
-    #-- Property Implementations -----------------------------------------------
-
-    @property_depends_on( 'update' )
-    def _get_matches ( self ):
-        search = self.live_search.search
-        if search == '':
-            return []
-
-        case_sensitive = self.live_search.case_sensitive
-        if case_sensitive:
-            return [ '%5d: %s' % ( (i + 1), line.strip() )
-                     for i, line in enumerate( self.contents )
-                     if line.find( search ) >= 0 ]
-
-        search = search.lower()
-
-        return [ '%5d: %s' % ( (i + 1), line.strip() )
-                 for i, line in enumerate( self.contents )
-                 if line.lower().find( search ) >= 0 ]
+            return TextBuffer()
 
 #-------------------------------------------------------------------------------
 #  'FindSourceFiles' class:
@@ -333,6 +312,23 @@ class FindSourceFiles ( HasFacets ):
                         full_name   = join( root, file_name )
                     )
 
+#-------------------------------------------------------------------------------
+#  'FileSearchHandler' class:
+#-------------------------------------------------------------------------------
+
+class FileSearchHandler ( Handler ):
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def closed ( self, info, is_ok ):
+        """ Handles the FileSearch view being closed.
+        """
+        fs = info.object
+        for job in fs._jobs:
+            job.cancel()
+
+        fs.engine.close()
+
 #-------------------------------------------------------------------------------
 #  'FileSearch' class:
 #-------------------------------------------------------------------------------
@@ -393,6 +389,23 @@ class FileSearch ( Tool ):
     # Event fired when user wants to go to next match in selected file:
     next = Button( '@icons2:ArrowLargeDown' )
 
+    # The engine used to search the contents of the source files:
+    engine = Instance( SearchEngine, () )
+
+    # Event fired when the search results have been updated:
+    results_updated = Event
+
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The search jobs currently in progress for the current search criteria:
+    _jobs = List # ( SearchJob )
+
+    # Mapping from full file name to SourceFile for all source files:
+    _source_files = Any # Dict( Str, SourceFile )
+
+    # The source files containing matches for the current search criteria:
+    _matched = List # ( SourceFile )
+
     #-- Facets View Definitions ------------------------------------------------
 
     view = View(
@@ -468,7 +481,8 @@ class FileSearch ( Tool ):
         id        = 'facets.extra.tools.file_search',
         width     = 0.75,
         height    = 0.67,
-        resizable = True
+        resizable = True,
+        handler   = FileSearchHandler
     )
 
     #-- HasFacets Method Overrides ---------------------------------------------
@@ -484,10 +498,10 @@ class FileSearch ( Tool ):
     def _get_selected_contents ( self ):
         selected = self.selected
 
-        return ('' if selected is None else ''.join( selected.contents))
+        return ('' if selected is None else selected.buffer.text)
 
 
-    @property_depends_on( 'selected' )
+    @property_depends_on( 'selected.matches' )
     def _get_mark_lines ( self ):
         selected = self.selected
 
@@ -496,7 +510,7 @@ class FileSearch ( Tool ):
                   for match in selected.matches ])
 
 
-    @property_depends_on( 'selected, selected_match' )
+    @property_depends_on( 'selected.matches, selected_match' )
     def _get_selected_line ( self ):
         selected = self.selected
 
@@ -512,31 +526,29 @@ class FileSearch ( Tool ):
         return ('' if selected is None else selected.full_name)
 
 
-    @property_depends_on( 'source_files[], filter:[search, case_sensitive]' )
+    @property_depends_on( 'source_files[], filter:[search, case_sensitive], '
+                          'results_updated' )
     def _get_summary ( self ):
         source_files = self.source_files
         search       = self.filter.search
         if search == '':
             return plural_of( len( source_files ), 'A total of %s file%s.', -1 )
 
-        files   = 0
+        matched = self._matched
         matches = 0
-        for source_file in source_files:
-            source_file.update = True
-            n = len( source_file.matches )
-            if n > 0:
-                files   += 1
-                matches += n
-
-        return ('A total of %s found with %s containing %d match%s.' % (
+        for source_file in matched:
+            matches += len( source_file.matches )
+
+        return ('A total of %s found with %s containing %d match%s%s.' % (
             plural_of( len( source_files ), '%s file%s', -1 ),
-            plural_of( files, '%s file%s', -1 ),
+            plural_of( len( matched ), '%s file%s', -1 ),
             matches,
-            '' if matches == 1 else 'es'
+            '' if matches == 1 else 'es',
+            ' (searching...)' if len( self._jobs ) > 0 else ''
         ))
 
 
-    @property_depends_on( 'selected, selected_match' )
+    @property_depends_on( 'selected.matches, selected_match' )
     def _get_current_match ( self ):
         selected = self.selected
 
@@ -574,10 +586,20 @@ class FileSearch ( Tool ):
             recursive   = self.recursive,
             live_search = self.filter
         )
-        self.selected     = None
-        self.source_files = []
+        self.selected      = None
+        self.source_files  = []
+        self._source_files = {}
+        self._search()
         do_later( self._get_source_files )
 
+
+    @on_facet_set( 'filter:[search, case_sensitive]' )
+    def _search_modified ( self ):
+        """ Handles the search criteria being changed by starting a new search
+            of all current source files.
+        """
+        self._search( self.source_files )
+
     #-- Private Methods --------------------------------------------------------
 
     def _get_source_files ( self ):
@@ -585,9 +607,73 @@ class FileSearch ( Tool ):
         """
         files = self.find_source_files.source_files()
         if len( files ) > 0:
+            source_files = self._source_files
+            for file in files:
+                source_files[ file.full_name ] = file
+
             self.source_files.extend( files )
+            self._start_job( files )
             do_later( self._get_source_files )
 
+
+    def _search ( self, files = () ):
+        """ Cancels any search in progress, clears the current matches, and
+            starts searching the specified source *files* using the current
+            search criteria.
+        """
+        for job in self._jobs:
+            job.cancel()
+
+        del self._jobs[:]
+        for source_file in self._matched:
+            source_file.matches = []
+
+        self._matched = []
+        self._start_job( files )
+        self.results_updated = True
+
+
+    def _start_job ( self, files ):
+        """ Starts a new search job for the specified source *files* using the
+            current search criteria (if any).
+        """
+        filter = self.filter
+        if (filter.search != '') and (len( files ) > 0):
+            job = self.engine.search( [ file.full_name for file in files ],
+                                      filter.search, filter.case_sensitive,
+                                      start = False )
+            self._jobs.append( job )
+            job.on_facet_set( self._job_results, 'results', dispatch = 'ui' )
+            job.on_facet_set( self._job_done, 'done', dispatch = 'ui' )
+            job.start()
+
+
+    def _job_results ( self, object, new ):
+        """ Handles a new batch of results being reported by a search job.
+        """
+        if not object.cancelled:
+            source_files = self._source_files
+            for path, lines in new:
+                source_file = source_files.get( path )
+                if source_file is not None:
+                    source_file.matches = [ '%5d: %s' % ( line, text.strip() )
+                                            for line, text in lines ]
+                    self._matched.append( source_file )
+
+            self.filter.changed  = True
+            self.results_updated = True
+
+
+    def _job_done ( self, object ):
+        """ Handles a search job completing.
+        """
+        job = object
+        job.on_facet_set( self._job_results, 'results', remove = True )
+        job.on_facet_set( self._job_done, 'done', remove = True )
+        if job in self._jobs:
+            self._jobs.remove( job )
+            self.results_updated = True
+
 #-------------------------------------------------------------------------------
 #  Run a stand-alone version of the tool (if invoked from the command line):
 #-------------------------------------------------------------------------------
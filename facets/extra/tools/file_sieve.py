@@ -16,17 +16,11 @@ from threading \
 from time \
     import sleep, time, localtime, strftime
 
-from os \
-    import walk, stat
-
 from os.path \
-    import abspath, dirname, basename, splitext, isdir, split, join
-
-from stat \
-    import ST_SIZE, ST_MTIME
+    import abspath, dirname, basename, splitext, isdir, split
 
 from facets.api \
-    import HasPrivateFacets, Str, Int, Long, Enum, List, Float, Bool, \
+    import HasPrivateFacets, Str, Int, Long, Enum, List, Float, Bool, Any, \
            Property, Button, Instance, Directory, FacetType, FacetError, \
            cached_property, property_depends_on, View, VGroup, HGroup, \
            Item, GridEditor, TitleEditor, DirectoryEditor, Handler
@@ -40,6 +34,9 @@ from facets.ui.i_filter \
 from facets.ui.helper \
     import commatize
 
+from facets.extra.helper.file_index \
+    import FileIndex
+
 from tools \
     import Tool
 
@@ -50,6 +47,10 @@ from tools \
 # How many files need to be processed before adding to files list:
 BatchSize = 100
 
+# The maximum number of files added to the files list at once (the batch size
+# doubles with each batch, up to this limit):
+MaxBatchSize = 25600
+
 # How long to sleep (in seconds) before rebuilding the file list:
 SleepInterval = 600
 
@@ -491,16 +492,6 @@ class File ( HasPrivateFacets ):
     def _get_ext ( self ):
         return splitext( self.name )[1][1:]
 
-    #-- Facet Event Handlers ---------------------------------------------------
-
-    def _path_set ( self, path ):
-        try:
-            info           = stat( path )
-            self.size      = info[ ST_SIZE ]
-            self.date      = info[ ST_MTIME ]
-            self.read_only = False  # fixme: Implement this...
-        except:
-            pass
 
 #-------------------------------------------------------------------------------
 #  'FileWorker' class:
@@ -525,6 +516,20 @@ class FileWorker ( HasPrivateFacets ):
     # Should the thread be aborted?
     abort = Bool( False )
 
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The file extension being processed (in normalized form):
+    _ext = Str
+
+    # The length of the common path prefix:
+    _prefix = Int
+
+    # The time stamp of the current scan:
+    _now = Float
+
+    # Mapping from file path to the File object in the sieve for the file:
+    _files = Any # Dict( Str, File )
+
     #-- Event Handlers ---------------------------------------------------------
 
     def _path_set ( self ):
@@ -538,45 +543,34 @@ class FileWorker ( HasPrivateFacets ):
         """ Process all of the files contained in the specified path.
         """
         path, ext, sieve = self.path, self.ext, self.sieve
-        prefix = len( path )
+        self._prefix     = len( path )
 
         # Delete all current files (if any):
         del sieve.files[:]
+        self._files = {}
 
         # Make sure the extension (if any) is in the correct format:
         if (ext != '') and (ext[:1] != '.'):
             ext = '.' + ext
 
-        # Get the current time stamp:
-        now = time()
-
-        # Make the initial pass, emitting the file in small batches so that the
-        # user gets some immediate feedback:
-        files = []
-        for dir, dir_names, file_names in walk( path ):
-            for file_name in file_names:
-                # Exit if the user has aborted us:
-                if self.abort:
-                    return
-
-                # Add the file to the current batch if the extension matches:
-                if (ext == '') or (ext == splitext( file_name )[1]):
-                    files.append( File( path   = join( dir, file_name ),
-                                        prefix = prefix,
-                                        now    = now ) )
-
-                # If we've reached the batch size, add to files to the sieve
-                # object, and start a new batch:
-                if len( files ) >= BatchSize:
-                    sieve.files.extend( files )
-                    del files[:]
-
-        # Make sure we emit the last partial batch (may be empty):
-        sieve.files.extend( files )
+        self._ext = ext
+
+        # Start with the files in the index saved by a previous session (if
+        # any), then bring the index up to date. The initial scan emits the
+        # files in (growing) batches so that the user gets some immediate
+        # feedback:
+        self._now = time()
+        index     = FileIndex( path )
+        if index.load():
+            self._add( list( index.files() ) )
+            self._rescan( index )
+        else:
+            self._scan( index )
 
-        # Continue to rebuild the list periodically as long as the user has not
+        # Continue to rescan the files periodically as long as the user has not
         # aborted us:
         while not self.abort:
+            index.save()
 
             # Sleep for a while:
             for i in range( SleepInterval ):
@@ -585,28 +579,113 @@ class FileWorker ( HasPrivateFacets ):
                     self.sieve = None
                     return
 
-            # Get the current time stamp:
-            now = time()
-
-            # Iterate over the files again, this time just building a single,
-            # large list:
-            files = []
-            for dir, dir_names, file_names in walk( path ):
-                for file_name in file_names:
-                    # Exit if the user has aborted us:
-                    if self.abort:
-                        self.sieve = None
-                        return
-
-                    # Add the file to the list if the extension matches:
-                    if (ext == '') or (ext == splitext( file_name )[1]):
-                        files.append( File( path   = join( dir, file_name ),
-                                            prefix = prefix,
-                                            now    = now ) )
-
-            # Finally, send all files to the sieve at once, so that the user
-            # just sees a single update:
-            self.sieve.files = files
+            self._rescan( index )
+
+        self.sieve = None
+
+
+    def _scan ( self, index ):
+        """ Performs the initial scan of the files in *index*, adding the files
+            found to the sieve in batches.
+        """
+        files      = []
+        batch_size = BatchSize
+        for added, removed, changed in index.scan( self._aborted ):
+            files.extend( added )
+            if len( files ) >= batch_size:
+                self._add( files )
+                files      = []
+                batch_size = min( 2 * batch_size, MaxBatchSize )
+
+        # Make sure we emit the last partial batch:
+        self._add( files )
+
+
+    def _rescan ( self, index ):
+        """ Rescans the files in *index*, applying all of the files added,
+            removed or changed since the previous scan to the sieve at once,
+            so that the user just sees a single update.
+        """
+        self._now = time()
+        all_added, all_removed, all_changed = [], [], []
+        for added, removed, changed in index.scan( self._aborted ):
+            all_added.extend( added )
+            all_removed.extend( removed )
+            all_changed.extend( changed )
+
+        if not self.abort:
+            self._remove( all_removed )
+            self._change( all_changed )
+            self._add( all_added )
+
+
+    def _aborted ( self ):
+        """ Returns whether the user has aborted us.
+        """
+        return self.abort
+
+
+    def _file_for ( self, path, size, mtime ):
+        """ Returns the File object for the specified file information, or None
+            if the file does not have the correct extension.
+        """
+        if (self._ext != '') and (self._ext != splitext( path )[1]):
+            return None
+
+        file = File( path   = path,
+                     prefix = self._prefix,
+                     size   = long( size ),
+                     date   = long( mtime ),
+                     now    = self._now )
+        self._files[ path ] = file
+
+        return file
+
+
+    def _add ( self, added ):
+        """ Adds the files described by the list of ( path, size, mtime )
+            tuples specified by *added* to the end of the sieve files.
+        """
+        file_for = self._file_for
+        files    = [ file for file in [ file_for( *info ) for info in added ]
+                     if file is not None ]
+        if len( files ) > 0:
+            self.sieve.files.extend( files )
+
+
+    def _remove ( self, removed ):
+        """ Removes the files whose paths are specified by *removed* from the
+            sieve files, deleting each contiguous run of files at once.
+        """
+        objects = self._files
+        removed = set( [ id( objects.pop( path ) ) for path in removed
+                         if path in objects ] )
+        if len( removed ) > 0:
+            files   = self.sieve.files
+            indices = [ i for i, file in enumerate( files )
+                        if id( file ) in removed ]
+            while len( indices ) > 0:
+                last  = indices.pop()
+                first = last
+                while (len( indices ) > 0) and (indices[-1] == (first - 1)):
+                    first = indices.pop()
+
+                del files[ first: last + 1 ]
+
+
+    def _change ( self, changed ):
+        """ Replaces the File objects for the files described by the list of
+            ( path, size, mtime ) tuples specified by *changed*.
+        """
+        objects = self._files
+        old     = dict( [ ( id( objects[ info[0] ] ), info )
+                          for info in changed if info[0] in objects ] )
+        if len( old ) > 0:
+            files = self.sieve.files
+            for i, file in enumerate( files ):
+                info = old.get( id( file ) )
+                if info is not None:
+                    files[ i ] = self._file_for( *info )
 
 #-------------------------------------------------------------------------------
 #  'FileSieveHandler' class:
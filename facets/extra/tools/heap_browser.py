@@ -34,6 +34,9 @@ from facets.ui.key_bindings \
 from facets.ui.helper \
     import commatize
 
+from facets.extra.helper.heap_snapshot \
+    import HeapSnapshot, object_name, live_objects, DictName, SequenceNames
+
 from tools \
     import Tool
 
@@ -65,18 +68,14 @@ ignored_classes = set( [
 #  Helper Functions:
 #-------------------------------------------------------------------------------
 
-def object_name ( object ):
-    """ Returns the 'name' of a specified object (based on its class and module
-        name.
+def refers_to ( object, instance ):
+    """ Returns True if *object* (still) refers directly to *instance*.
     """
-    try:
-        if isinstance( object, type ):
-            return '.<new-style class>'
+    for referent in gc.get_referents( object ):
+        if referent is instance:
+            return True
 
-        return '%s.%s' % ( object.__class__.__module__,
-                           object.__class__.__name__ )
-    except:
-        return '.' + str( type( object ) )
+    return False
 
 
 def commatize_column ( adapter ):
@@ -218,9 +217,11 @@ class DetailGridEventHandler ( GridEventHandler ):
     def left_dclick ( self ):
         """ Handles a left double click on the column.
         """
-        self.object.owner.referrers.append( HB_Referrers(
+        owner = self.object.owner
+        owner.referrers.append( HB_Referrers(
             name = self.item.title,
-            root = HB_Referrer( ref = weakref.ref( self.item.object ) )
+            root = HB_Referrer( ref      = weakref.ref( self.item.object ),
+                                snapshot = owner.snapshot )
         ) )
 
 #-------------------------------------------------------------------------------
@@ -290,9 +291,9 @@ class BaselineCountGridEventHandler ( GridEventHandler ):
         """ Handles a left double click on the column.
         """
         self.object.owner.details.append( HB_Detail(
-            name       = self.item.name,
-            owner      = self.object.owner,
-            object_ids = self.object.object_ids
+            name     = self.item.name,
+            owner    = self.object.owner,
+            baseline = self.object.remaining
         ) )
 
 #-------------------------------------------------------------------------------
@@ -435,6 +436,7 @@ class CountsGridAdapter ( GridAdapter ):
         ( 'Module Name',                'module_name' ),
         ( '# Instances',                'instances'   ),
         ( 'Change',                     'change'      ),
+        ( 'Size',                       'size'        ),
        #( 'Fully Qualified Class Name', 'name' ),
     ]
 
@@ -446,21 +448,24 @@ class CountsGridAdapter ( GridAdapter ):
     handler              = CountsGridEventHandler()
 
     # Column widths:
-    class_name_width     = Float( 0.25 )
-    module_name_width    = Float( 0.45 )
-    instances_width      = Float( 0.15 )
-    change_width         = Float( 0.15 )
+    class_name_width     = Float( 0.22 )
+    module_name_width    = Float( 0.38 )
+    instances_width      = Float( 0.13 )
+    change_width         = Float( 0.13 )
+    size_width           = Float( 0.14 )
     name_width           = Float( 0.70 )
 
     # Column alignments:
     instances_alignment  = Str( 'right' )
     change_alignment     = Str( 'right' )
+    size_alignment       = Str( 'right' )
 
     # Column text:
     class_name_text      = Property
     module_name_text     = Property
     instances_text       = Property
     change_text          = Property
+    size_text            = Property
 
     # Column sorters:
     class_name_sorter    = Callable( cmp_class_name )
@@ -484,6 +489,10 @@ class CountsGridAdapter ( GridAdapter ):
         return commatize_column( self )
 
 
+    def _get_size_text ( self ):
+        return commatize_column( self )
+
+
 counts_grid_editor = GridEditor(
     adapter        = CountsGridAdapter,
     operations     = [ 'sort' ],
@@ -513,6 +522,9 @@ class HB_ClassCount ( HasPrivateFacets ):
     # The net change in active instances since the last refresh:
     change = Int
 
+    # The total size (in bytes) of the active instances:
+    size = Int
+
     #-- Property Implementations -----------------------------------------------
 
     @cached_property
@@ -606,7 +618,7 @@ class HB_Referrer ( HasPrivateFacets ):
     facet_name = Str
 
     # The objects that refer to this object:
-    referrers = Property( depends_on = 'update' )
+    referrers = Property( depends_on = 'update, snapshot' )
 
     # Event fired when the list of referrers should be updated:
     update = Event
@@ -614,6 +626,10 @@ class HB_Referrer ( HasPrivateFacets ):
     # The name space for all objects in this referrer graph:
     name_space = Any( {} )
 
+    # The heap snapshot whose reverse reference index is used to find the
+    # referrers:
+    snapshot = Any # None or HeapSnapshot
+
     #-- Facets View Definitions ------------------------------------------------
 
     view = View(
@@ -653,60 +669,59 @@ class HB_Referrer ( HasPrivateFacets ):
     @cached_property
     def _get_referrers ( self ):
         instance = self.object
-        if isinstance( instance, FrameType ):
+        snapshot = self.snapshot
+        if ((instance is None) or isinstance( instance, FrameType ) or
+            (snapshot is None) or (not snapshot.live) or
+            (not snapshot.has_referrers)):
             return []
 
-        referrers  = []
-        dicts      = set()
-        seqs       = set()
-        name_space = self.name_space
-        for object in gc.get_referrers( instance ):
+        referrer_ids = snapshot.referrers_of( id( instance ) )
+        objects      = self._objects_for( referrer_ids )
+        referrers    = []
+        dicts        = []
+        seqs         = []
+        for referrer_id in referrer_ids:
+            object = objects.get( referrer_id )
+            if (object is None) or (not refers_to( object, instance )):
+                continue
+
             try:
-                referrers.append( HB_Referrer(
-                    ref        = weakref.ref( object, self._instance_gone ),
-                    name_space = name_space ) )
-            except:
+                weakref.ref( object )
+            except TypeError:
                 if isinstance( object, dict ):
-                    dicts.add( id( object ) )
-                elif isinstance( object, SequenceTypes ):
-                    seqs.add( id( object ) )
-                else:
-                    referrers.append( HB_Referrer(
-                        ref        = lambda object = object: object,
-                        name_space = name_space ) )
-
-        len_dicts = len( dicts )
-        len_seqs  = len( seqs )
-        if (len_dicts > 0) or (len_seqs > 0):
-            for object in gc.get_objects():
-                try:
-                    object_dict = object.__dict__
-                    if ( len_dicts > 0 ) and ( id( object_dict ) in dicts ):
-                        referrers.extend( [
-                            HB_Referrer(
-                                ref = weakref.ref( object, self._instance_gone ),
-                                facet_name = name,
-                                name_space = name_space )
-                            for name, value in object_dict.iteritems()
-                            if instance is value ] )
-
-                    elif len_seqs > 0:
-                        isect = seqs.intersect( [ id( value )
-                                        for value in object_dict.itervalues() ] )
-                        seqs.difference_update( isect )
-                        for seq in isect:
-                            seqs.remove( seq )
-                            for name, value in object_dict.iteritems():
-                                if seq == id( value ):
-                                    referrers.append( HB_Referrer(
-                                        ref = weakref.ref( object,
-                                                       self._instance_gone ),
-                                        facet_name = name,
-                                        name_space = name_space ) )
-
-                                    break
-                except:
-                    pass
+                    dicts.append( object )
+
+                    continue
+
+                if isinstance( object, SequenceTypes ):
+                    seqs.append( object )
+
+                    continue
+
+            referrers.append( self._referrer_for( object ) )
+
+        # Replace each dictionary referrer by the objects whose '__dict__' it
+        # is, using the name each refers to the instance by:
+        for object_dict in dicts:
+            for owner in self._owners_of( object_dict, objects ):
+                referrers.extend( [
+                    self._referrer_for( owner, name )
+                    for name, value in object_dict.iteritems()
+                    if instance is value ] )
+
+        # Replace each sequence referrer by the objects which contain it in
+        # their '__dict__', using the name each refers to the sequence by:
+        for seq in seqs:
+            for object_dict in [ objects.get( dict_id ) for dict_id in
+                                 snapshot.referrers_of( id( seq ) ) ]:
+                if isinstance( object_dict, dict ):
+                    for owner in self._owners_of( object_dict, objects ):
+                        for name, value in object_dict.iteritems():
+                            if seq is value:
+                                referrers.append(
+                                    self._referrer_for( owner, name ) )
+
+                                break
 
         return referrers
 
@@ -718,6 +733,56 @@ class HB_Referrer ( HasPrivateFacets ):
         """
         self.update = True
 
+
+    def _referrer_for ( self, object, facet_name = '' ):
+        """ Returns a new HB_Referrer for the specified *object*, which refers
+            to this object by *facet_name*.
+        """
+        try:
+            ref = weakref.ref( object, self._instance_gone )
+        except TypeError:
+            # The object cannot be weakly referenced, so hold on to it:
+            ref = lambda object = object: object
+
+        return HB_Referrer( ref        = ref,
+                            facet_name = facet_name,
+                            snapshot   = self.snapshot,
+                            name_space = self.name_space )
+
+
+    def _objects_for ( self, referrer_ids ):
+        """ Returns a dictionary mapping object ids to objects for the live
+            objects with the specified *referrer_ids*, along with those for the
+            owners of any dictionary referrers and the owners of any sequence
+            referrers (found using a single pass over the heap).
+        """
+        snapshot = self.snapshot
+        name_of  = snapshot.name_of
+        dict_ids = [ referrer_id for referrer_id in referrer_ids
+                     if name_of( referrer_id ) == DictName ]
+        seq_ids  = [ referrer_id for referrer_id in referrer_ids
+                     if name_of( referrer_id ) in SequenceNames ]
+        seq_dict_ids = [ dict_id
+                         for dict_id in snapshot.referrers_of( seq_ids )
+                         if name_of( dict_id ) == DictName ]
+        ids = set( referrer_ids )
+        ids.update( snapshot.referrers_of( dict_ids ) )
+        ids.update( seq_dict_ids )
+        ids.update( snapshot.referrers_of( seq_dict_ids ) )
+
+        return live_objects( ids )
+
+
+    def _owners_of ( self, object_dict, objects ):
+        """ Returns the list of objects (from the *objects* dictionary) whose
+            '__dict__' is *object_dict*.
+        """
+        return [ owner for owner in [
+                     objects.get( owner_id ) for owner_id in
+                     self.snapshot.referrers_of( id( object_dict ) ) ]
+                 if (owner is not None) and
+                    (getattr( owner, '__dict__', None ) is object_dict) ]
+
 #-------------------------------------------------------------------------------
 #  Tree editor definitions:
 #-------------------------------------------------------------------------------
@@ -842,8 +907,8 @@ class HB_Detail ( HasPrivateFacets ):
     # The fully qualified name of the class:
     name = Str
 
-    # Optional dictionary of object ids the objects must come from:
-    object_ids = Any # None or a dictionary with object ids as keys
+    # Optional baseline snapshot the objects must come from:
+    baseline = Any # None or HeapSnapshot
 
     # Event fired when the instances should be updated:
     update = Event
@@ -900,17 +965,19 @@ class HB_Detail ( HasPrivateFacets ):
     def _name_modified ( self ):
         """ Rebuilds the list of instances when an update occurs.
         """
-        name       = self.name
-        object_ids = self.object_ids
-        instances  = [ ]
-        for object in gc.get_objects():
-            if ((name == object_name( object )) and
-                ((object_ids is None) or (id( object ) in object_ids))):
-                instances.append( HB_InstanceDetail(
-                    ref = weakref.ref( object, self._instance_gone ) ) )
-
-                if len( instances ) >= MAX_DETAILS:
-                    break
+        name     = self.name
+        snapshot = self.baseline
+        if snapshot is None:
+            snapshot = self.owner.snapshot
+
+        instances = []
+        if (snapshot is not None) and snapshot.live:
+            objects = live_objects( snapshot.ids_of( name ), MAX_DETAILS )
+            for object_id, object in sorted( objects.iteritems() ):
+                # Make sure the id has not been reused by a different object:
+                if name == object_name( object ):
+                    instances.append( HB_InstanceDetail(
+                        ref = weakref.ref( object, self._instance_gone ) ) )
 
         self.instances = instances
 
@@ -918,10 +985,12 @@ class HB_Detail ( HasPrivateFacets ):
     def _show_referrers_set ( self, info = None ):
         """ Handles the 'Show Referrers' button being clicked.
         """
+        snapshot = self.owner.snapshot
         self.owner.referrers.extend( [
             HB_Referrers(
                 name = instance.title,
-                root = HB_Referrer( ref = weakref.ref( instance.object ) ) )
+                root = HB_Referrer( ref      = weakref.ref( instance.object ),
+                                    snapshot = snapshot ) )
             for instance in self.selected_instances
         ] )
 
@@ -933,7 +1002,8 @@ class HB_Detail ( HasPrivateFacets ):
         instance, column = event
         self.owner.referrers.append( HB_Referrers(
             name = instance.title,
-            root = HB_Referrer( ref = weakref.ref( instance.object ) ) ) )
+            root = HB_Referrer( ref      = weakref.ref( instance.object ),
+                                snapshot = self.owner.snapshot ) ) )
 
     #-- Private Methods --------------------------------------------------------
 
@@ -978,8 +1048,11 @@ class HB_Baseline ( HasPrivateFacets ):
     # The owner of this view object:
     owner = Instance( 'HB_HeapBrowser' )
 
-    # The current set of objects in the baseline set:
-    object_ids = Any # ( { id(object): class_name } )
+    # The snapshot of the objects in the baseline set:
+    snapshot = Any # HeapSnapshot
+
+    # The snapshot of the baseline objects which still remain:
+    remaining = Any # HeapSnapshot
 
     # The list of baseline object classes/counts:
     items = List( HB_BaselineCount )
@@ -997,7 +1070,7 @@ class HB_Baseline ( HasPrivateFacets ):
     filter_current = Int
 
     # The event fired when the heap statistics have been updated:
-    update = Event # set( id( object ) )
+    update = Event # HeapSnapshot
 
     # Event fired after the heap statistics have been re-analyzed:
     update_done = Event
@@ -1093,32 +1166,26 @@ class HB_Baseline ( HasPrivateFacets ):
                                      if item in items ]
 
 
-    def _object_ids_set ( self, object_ids ):
-        """ Handles the dictionary of object ids being set.
+    def _snapshot_set ( self, snapshot ):
+        """ Handles the baseline snapshot being set.
         """
-        items = {}
-        for object_id, name in object_ids.iteritems():
-            item = items.get( name )
-            if item is None:
-                items[ name ] = item = HB_BaselineCount( name = name )
-
-            item.baseline_count    += 1
-            item.current_count     += 1
-            object_ids[ object_id ] = item
-
-        items = items.values()
+        self.remaining = snapshot
+        items          = [ HB_BaselineCount( name           = name,
+                                             baseline_count = count,
+                                             current_count  = count )
+                           for name, ( count, size ) in
+                               snapshot.counts().iteritems() ]
         items.sort( lambda l, r: cmp( l.baseline_count, r.baseline_count ) )
         self.items = items
 
 
-    def _update_set ( self, new_ids ):
+    def _update_set ( self, snapshot ):
         """ Handles a heap update.
         """
-        object_ids = self.object_ids
-        for object_id in object_ids.keys():
-            if object_id not in new_ids:
-                object_ids[ object_id ].current_count -= 1
-                del object_ids[ object_id ]
+        self.remaining = remaining = self.remaining.remaining( snapshot )
+        counts         = remaining.counts()
+        for item in self.items:
+            item.current_count = counts.get( item.name, ( 0, 0 ) )[0]
 
         # fixme: This is a hack to get the GridEditor to re-sort the data (if
         # sorting is in effect) by appearing to cause a change to the data list:
@@ -1131,11 +1198,11 @@ class HB_Baseline ( HasPrivateFacets ):
     def _show_details_set ( self, info = None ):
         """ Handles the 'Show Details' button being clicked.
         """
-        owner      = self.owner
-        object_ids = self.object_ids
-        owner.details.extend( [ HB_Detail( name       = item.name,
-                                           owner      = owner,
-                                           object_ids = object_ids )
+        owner     = self.owner
+        remaining = self.remaining
+        owner.details.extend( [ HB_Detail( name     = item.name,
+                                           owner    = owner,
+                                           baseline = remaining )
                                 for item in self.selected_items ] )
 
 
@@ -1144,9 +1211,9 @@ class HB_Baseline ( HasPrivateFacets ):
             details.
         """
         item, column = event
-        self.owner.details.append( HB_Detail( name       = item.name,
-                                              owner      = self.owner,
-                                              object_ids = self.object_ids ) )
+        self.owner.details.append( HB_Detail( name     = item.name,
+                                              owner    = self.owner,
+                                              baseline = self.remaining ) )
 
 #-------------------------------------------------------------------------------
 #  'HB_HeapBrowser' class:
@@ -1186,14 +1253,12 @@ class HB_HeapBrowser ( Tool ):
     # Indicates whether or not the selection set is empty or not:
     has_counts = Property
 
-    # The set of all current active object ids:
-    current_ids = Any( set() )
+    # The current heap snapshot:
+    snapshot = Any # None or HeapSnapshot
 
-    # Current heap statistics:
-    current_heap = Any( {} )
-
-    # Previous heap statistics:
-    previous_heap = Any( {} )
+    # The previous heap snapshot (used to compute the changes since the last
+    # refresh):
+    previous_snapshot = Any # None or HeapSnapshot
 
     # Event fired when anything changes that affects the heap statistics view:
     heap_updated = Event
@@ -1387,19 +1452,25 @@ class HB_HeapBrowser ( Tool ):
         if no_show:
             ignored = ignored_classes.union( self.ignored_classes )
 
-        old              = self.previous_heap
+        heap = {}
+        if self.snapshot is not None:
+            heap = self.snapshot.diff( self.previous_snapshot )
+
         filter_name      = self.filter_name.lower()
         filter_instances = self.filter_instances
         filter_change    = self.filter_change
         counts = [ HB_ClassCount( name      = name,
                                   instances = instances,
-                                  change    = instances - old.get( name, 0 ) )
-                   for name, instances in self.current_heap.iteritems()
+                                  size      = size,
+                                  change    = change )
+                   for name, ( instances, size, change, size_change )
+                       in heap.iteritems()
                    if (name not in ignored)                   and
                       (no_show or (name in shown))            and
                       (name.lower().find( filter_name ) >= 0) and
+                      (instances > 0)                         and
                       (instances >= filter_instances)         and
-                      (abs( instances - old.get( name, 0 ) ) >= filter_change)
+                      (abs( change ) >= filter_change)
         ]
         counts.sort( lambda l, r: cmp( l.lower_name, r.lower_name ) )
         self.current_counts = counts
@@ -1492,18 +1563,40 @@ class HB_HeapBrowser ( Tool ):
     def update ( self ):
         """ Updates the heap statistics.
         """
-        self.previous_heap = old = self.current_heap
-        self.current_heap  = new = {}
-        self.current_ids   = ids = set()
+        previous = self.snapshot
+        if previous is not None:
+            # Only the per-type counts of the previous snapshot are needed, so
+            # free its reverse reference index before taking the new one:
+            previous.drop_referrers()
+
+        self.previous_snapshot = previous
+        self.snapshot          = HeapSnapshot.take( ignored_classes )
+        self._snapshot_updated()
 
-        gc.collect()
 
-        for object in gc.get_objects():
-            name = object_name( object )
-            if name not in ignored_classes:
-                new[ name ] = new.setdefault( name, 0 ) + 1
-                ids.add( id( object ) )
+    def save_snapshot ( self, file_name ):
+        """ Saves the current heap snapshot to the file *file_name*, so that it
+            can be analyzed later.
+        """
+        if self.snapshot is not None:
+            self.snapshot.dump( file_name )
+
 
+    def load_snapshot ( self, file_name ):
+        """ Loads a heap snapshot previously saved to the file *file_name*
+            (possibly by another process) and makes it the current snapshot,
+            so that it can be compared with the previous snapshot.
+        """
+        self.previous_snapshot = self.snapshot
+        self.snapshot          = HeapSnapshot.load( file_name )
+        self._snapshot_updated()
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _snapshot_updated ( self ):
+        """ Updates all views after the current heap snapshot has changed.
+        """
+        snapshot          = self.snapshot
         self.heap_updated = True
 
         # Indicate that each class detail should update its instance
@@ -1513,37 +1606,38 @@ class HB_HeapBrowser ( Tool ):
 
         # Indicate that each referrer should update its instance information:
         for referrer in self.referrers:
-            referrer.root.update = True
+            referrer.root.snapshot = snapshot
+            referrer.root.update   = True
 
         # Indicate that each baseline view should update its contents:
         for baseline in self.baselines:
-            baseline.update = ids
+            baseline.update = snapshot
 
-    #-- Private Methods --------------------------------------------------------
 
     def _create_baseline ( self ):
         """ Creates a new baseline object.
         """
-        current_ids = self.current_ids
-        object_ids  = {}
-
-        gc.collect()
-
-        for object in gc.get_objects():
-            if id( object ) not in current_ids:
-                name = object_name( object )
-                if name not in ignored_classes:
-                    object_ids[ id( object ) ] = name
+        snapshot = HeapSnapshot.take( ignored_classes, referrers = False )
 
-        return HB_Baseline( object_ids = object_ids, owner = self )
+        return HB_Baseline( snapshot = snapshot.added( self.snapshot ),
+                            owner    = self )
 
 #-------------------------------------------------------------------------------
 #  Run the tool (if invoked from the command line):
 #-------------------------------------------------------------------------------
 
 if __name__ == '__main__':
+    import sys
+
     hb = HB_HeapBrowser()
-    hb.update()
+    if len( sys.argv ) > 1:
+        # Analyze one or more previously saved snapshots (the changes shown
+        # are those between the last two snapshots):
+        for file_name in sys.argv[1:]:
+            hb.load_snapshot( file_name )
+    else:
+        hb.update()
+
     hb.edit_facets()
 
 #-- EOF ------------------------------------------------------------------------
\ No newline at end of file
@@ -11,7 +11,7 @@ from weakref \
     import ref
 
 from gc \
-    import get_referrers, collect
+    import get_referrers, get_objects, collect
 
 from collections \
     import Counter
@@ -72,6 +72,11 @@ def monotonic ( values ):
 class InstanceTracker ( HasFacets ):
     """ Tracks various counts about the number of instances of HasFacets
         subclasses.
+
+        The counts are maintained by the HasFacets C layer (see
+        HasFacets.facet_counting), so tracking does not add any per-instance
+        overhead beyond incrementing and decrementing a counter. Call the
+        'update' method to refresh the tracker's counts.
     """
 
     #-- Facet Definitions ------------------------------------------------------
@@ -86,50 +91,57 @@ class InstanceTracker ( HasFacets ):
     # [ class_name, total_created, maximum_live, current_live ]:
     counts = Any( {} )
 
-    # Mapping from weak references to live instances to their class:
-    instances = Any( {} )
+    # Mapping from id(HasFacets subclass) to the subclass:
+    classes = Any( {} )
 
     # Is the instance counter active (True) or not (False)?
     active = Bool( False )
 
-    #-- Facet Event Handlers ---------------------------------------------------
+    #-- Public Methods ---------------------------------------------------------
 
-    def _active_set ( self, active ):
-        """ Handles the 'active' facet being changed.
+    def update ( self ):
+        """ Updates the tracker's counts from the current HasFacets instance
+            counts.
         """
-        HasFacets.facet_monitor( self._increment, not active )
+        counts      = {}
+        classes     = {}
+        total_count = count = 0
+        for klass, ( live, total, peak ) in \
+            HasFacets.facet_counts().iteritems():
+            id_class = id( klass )
+            if issubclass( klass, IgnoredClasses ):
+                total = -1
+            else:
+                total_count += total
+
+            count              += live
+            classes[ id_class ] = klass
+            counts[ id_class ]  = [ klass.__name__, total, peak, live ]
+
+        self.counts      = counts
+        self.classes     = classes
+        self.total_count = total_count
+        self.count       = count
 
-    #-- Private Methods --------------------------------------------------------
 
-    def _increment ( self, object ):
-        """ Increments the count for a HasFacets class when a new instance is
-            created.
+    def instances ( self ):
+        """ Returns a list of weak references to all currently live instances of
+            the tracked classes.
         """
-        klass    = object.__class__
-        id_class = id( klass )
-        self.instances[ ref( object, self._decrement ) ] = id_class
-        counts = self.counts.get( id_class )
-        if counts is None:
-            self.counts[ id_class ] = counts = [
-                klass.__name__,
-                (-1 if issubclass( klass, IgnoredClasses ) else 0), 0, 0
-            ]
-
-        if counts[1] >= 0:
-            counts[1]        += 1
-            self.total_count += 1
-
-        self.count += 1
-        counts[3]  += 1
-        counts[2]   = max( counts[2], counts[3] )
-
-
-    def _decrement ( self, ref ):
-        """ Decrements the count for a HasFacets class when an instance is
-            garbage collected.
+        classes = self.classes
+        objects = get_objects()
+        result  = [ ref( object ) for object in objects
+                    if id( object.__class__ ) in classes ]
+        del objects
+
+        return result
+
+    #-- Facet Event Handlers ---------------------------------------------------
+
+    def _active_set ( self, active ):
+        """ Handles the 'active' facet being changed.
         """
-        self.count -= 1
-        self.counts[ self.instances.pop( ref ) ][3] -= 1
+        HasFacets.facet_counting( active )
 
 #-------------------------------------------------------------------------------
 #  'ReferrerAdapter' class:
@@ -385,6 +397,7 @@ class InstanceMonitor ( UIView ):
         selected_class   = None if selected is None else selected[0]
         last_counts      = self.last_counts
         monitor          = self.monitor
+        monitor.update()
         self.total_count = monitor.total_count
         self.count       = monitor.count
         items            = []
@@ -420,12 +433,14 @@ class InstanceMonitor ( UIView ):
         """
         sources = {}
         objects = []
-        mcounts = self.monitor.counts
-        for object_ref, object_class in self.monitor.instances.iteritems():
-            object                           = object_ref()
-            sources[ id( object.__dict__ ) ] = mcounts[ object_class ][0]
-            if object_class == id_class:
-                objects.append( object_ref )
+        for object_ref in self.monitor.instances():
+            object = object_ref()
+            if object is not None:
+                sources[ id( object.__dict__ ) ] = object.__class__.__name__
+                if id( object.__class__ ) == id_class:
+                    objects.append( object_ref )
+
+        object = None
 
         counts = Counter()
         for i in xrange( len( objects ) ):
@@ -1,5 +1,12 @@
 """
 Display log messages gleaned from a log file plugin.
+
+The log file is followed by a LogTailer on a background thread. Only the most
+recent 'max_records' log records are kept in memory (in a ring buffer), and
+the display is updated once per batch of new data rather than once per record.
+Older records can still be paged through using a sparse index of the file
+offsets at which records start, so that even very large log files never need
+to be loaded completely into memory.
 """
 
 #-------------------------------------------------------------------------------
@@ -11,15 +18,18 @@ Display log messages gleaned from a log file plugin.
 #-------------------------------------------------------------------------------
 
 from threading \
-    import Thread
+    import Lock
 
-from time \
-    import sleep
+from collections \
+    import deque
 
 from facets.api \
-    import HasPrivateFacets, Any, Enum, Instance, List, Range, Str, Float, \
-           File, Delegate, Button, View, HGroup, Item, GridEditor, CodeEditor, \
-           FileEditor, spring
+    import HasPrivateFacets, Any, Enum, Instance, Int, List, Range, Str, \
+           Float, File, Delegate, Button, View, HGroup, Item, GridEditor, \
+           CodeEditor, FileEditor, spring
+
+from facets.extra.helper.file_tailer \
+    import FileTailer
 
 from facets.ui.grid_adapter \
     import GridAdapter
@@ -57,6 +67,9 @@ TextColorMap = {
     'Critical': ( 255, 255, 255 )
 }
 
+# The number of log records between consecutive entries in a LogIndex:
+IndexStride = 256
+
 # Mapping from log type to log level:
 LogLevel = {
     'Debug':    0,
@@ -66,6 +79,32 @@ LogLevel = {
     'Critical': 4
 }
 
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def is_header ( line ):
+    """ Returns True if the specified log file *line* is the first line of a
+        new log record.
+    """
+    col = line.find( '|' )
+
+    return ((col > 0) and (line[ : col ] in LogTypes))
+
+
+def log_record_for ( lines ):
+    """ Returns the LogRecord corresponding to the specified list of log file
+        *lines*, the first of which is the record's header line.
+    """
+    type, date_time, info = (lines[0].split( '|', 2 ) + [ '', '' ])[ : 3 ]
+    date, time            = (date_time.split() + [ '', '' ])[ : 2 ]
+
+    return LogRecord( type  = type.capitalize(),
+                      date  = date,
+                      time  = time,
+                      info  = info.strip(),
+                      extra = '\n'.join( lines[ 1: ] ) )
+
 #-------------------------------------------------------------------------------
 #  Facet definitions:
 #-------------------------------------------------------------------------------
@@ -164,6 +203,238 @@ class LogRecord ( HasPrivateFacets ):
     # The extra (expanded) information associated with the log record:
     extra = Str
 
+#-------------------------------------------------------------------------------
+#  'LogIndex' class:
+#-------------------------------------------------------------------------------
+
+class LogIndex ( object ):
+    """ A sparse index of the file offsets at which the log records in a log
+        file start, which allows any range of log records to be read from the
+        file without reading the records preceding it.
+    """
+
+    __slots__ = ( 'offsets', 'count' )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self ):
+        """ Initializes the object.
+        """
+        self.offsets = []
+        self.count   = 0
+
+
+    def add ( self, offset ):
+        """ Adds the log record starting at file offset *offset* to the index.
+        """
+        if (self.count % IndexStride) == 0:
+            self.offsets.append( offset )
+
+        self.count += 1
+
+
+    def read ( self, file_name, start, count ):
+        """ Returns the lines of the *count* log records starting with log
+            record number *start* contained in the file specified by
+            *file_name* as a list of lists of lines.
+        """
+        records = []
+        if count <= 0:
+            return records
+
+        fh = open( file_name, 'rb' )
+        try:
+            fh.seek( self.offsets[ start // IndexStride ] )
+            skip    = start % IndexStride
+            pending = None
+            for line in fh:
+                if line[ -1: ] == '\n':
+                    line = line[ : -1 ]
+
+                if is_header( line ):
+                    if pending is not None:
+                        if skip > 0:
+                            skip -= 1
+                        else:
+                            records.append( pending )
+                            if len( records ) >= count:
+                                return records
+
+                    pending = [ line ]
+                elif pending is not None:
+                    pending.append( line )
+
+            if (pending is not None) and (skip == 0):
+                records.append( pending )
+        finally:
+            fh.close()
+
+        return records
+
+#-------------------------------------------------------------------------------
+#  'LogTailer' class:
+#-------------------------------------------------------------------------------
+
+class LogTailer ( FileTailer ):
+    """ Follows a log file, keeping the most recent log records in a ring
+        buffer and maintaining a LogIndex of all log records in the file.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The LogFile tool the tailer is reading log records for:
+    log_file = Any # Instance( LogFile )
+
+    # The index of all complete log records in the log file:
+    index = Any # LogIndex
+
+    # Log files do not need to be updated more often than this:
+    min_delay = 0.25
+
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The ring buffer of the most recent log records. Each entry is a list of
+    # the form: [ lines, LogRecord ], where the LogRecord is only created when
+    # the entry is first displayed:
+    _ring = Any
+
+    # The lines of the (possibly incomplete) last log record read:
+    _pending = Any( [] )
+
+    # The file offset of the last log record read:
+    _pending_offset = Any( 0 )
+
+    # Lock used to synchronize access to the ring buffer and pending lines:
+    _lock = Any
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, max_records, **facets ):
+        """ Initializes the object.
+        """
+        super( LogTailer, self ).__init__( **facets )
+
+        self.index = LogIndex()
+        self._ring = deque( maxlen = max_records )
+        self._lock = Lock()
+
+
+    def records ( self ):
+        """ Returns the list of LogRecords in the ring buffer, from most to
+            least recent. The last log record read is included even though
+            more lines may still be added to it.
+        """
+        self._lock.acquire()
+        try:
+            entries = list( self._ring )
+            pending = list( self._pending )
+            maxlen  = self._ring.maxlen
+        finally:
+            self._lock.release()
+
+        entries.reverse()
+        for entry in entries:
+            if entry[1] is None:
+                entry[1] = log_record_for( entry[0] )
+
+        records = [ entry[1] for entry in entries ]
+        if len( pending ) > 0:
+            records = ([ log_record_for( pending ) ] + records)[ : maxlen ]
+
+        return records
+
+
+    def count ( self ):
+        """ Returns the total number of log records read from the log file
+            (including the last one read, which may still be incomplete).
+        """
+        self._lock.acquire()
+        try:
+            return (self.index.count + (len( self._pending ) > 0))
+        finally:
+            self._lock.release()
+
+
+    def clear ( self ):
+        """ Removes all log records from the ring buffer.
+        """
+        self._lock.acquire()
+        try:
+            self._ring.clear()
+        finally:
+            self._lock.release()
+
+
+    def resize ( self, max_records ):
+        """ Changes the capacity of the ring buffer to *max_records* log
+            records, discarding the oldest records if necessary.
+        """
+        self._lock.acquire()
+        try:
+            self._ring = deque( self._ring, maxlen = max_records )
+        finally:
+            self._lock.release()
+
+    #-- FileTailer Method Overrides --------------------------------------------
+
+    def process_lines ( self, lines, offset ):
+        """ Processes a list of new complete *lines* read from the file, where
+            *offset* is the byte offset of the first line within the file.
+        """
+        self._lock.acquire()
+        try:
+            pending = self._pending
+            for line in lines:
+                if is_header( line ):
+                    if len( pending ) > 0:
+                        self._add( pending, self._pending_offset )
+
+                    pending              = [ line ]
+                    self._pending        = pending
+                    self._pending_offset = offset
+                elif len( pending ) > 0:
+                    pending.append( line )
+
+                offset += len( line ) + 1
+        finally:
+            self._lock.release()
+
+
+    def batch_complete ( self ):
+        """ Called after all currently available data has been processed.
+        """
+        self.log_file.records_added()
+
+
+    def reset ( self, rotated ):
+        """ Called when reading starts over at the beginning of a file.
+        """
+        self._lock.acquire()
+        try:
+            # The last log record of a rotated file is complete, so keep it:
+            if rotated and (len( self._pending ) > 0):
+                self._add( self._pending, self._pending_offset )
+
+            self.index    = LogIndex()
+            self._pending = []
+        finally:
+            self._lock.release()
+
+        if not rotated:
+            self.clear()
+
+        self.log_file.records_added()
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _add ( self, lines, offset ):
+        """ Adds the log record with the specified *lines* starting at file
+            offset *offset* to the ring buffer and index. The caller must hold
+            the ring buffer lock.
+        """
+        self.index.add( offset )
+        self._ring.append( [ lines, None ] )
+
 #-------------------------------------------------------------------------------
 #  'LogFile' class:
 #-------------------------------------------------------------------------------
@@ -196,12 +467,20 @@ class LogFile ( Tool ):
     # The current set of log records:
     log_records = List( LogRecord, transient = True )
 
+    # The page of older log records being displayed (0 = the most recent log
+    # records, which are updated as new log records are added):
+    page = Range( 0, 'pages', transient = True )
+
+    # The number of pages of older log records available:
+    pages = Int( transient = True )
+
     # Button used to clear all current log records:
     clear = Button( 'Clear' )
 
     #-- Private Facets ---------------------------------------------------------
 
-    _lines = Any( [] )
+    # The tailer used to read log records from the log file:
+    _tailer = Any # Instance( LogTailer )
 
     #-- Facets View Definitions ------------------------------------------------
 
@@ -214,6 +493,11 @@ class LogFile ( Tool ):
             ),
             '_',
             Item( 'logging_level' ),
+            '_',
+            Item( 'page',
+                  tooltip = 'The page of older log records to display (0 = '
+                            'most recent)'
+            )
         ),
         '_',
         Item( 'log_records',
@@ -234,16 +518,6 @@ class LogFile ( Tool ):
         resizable = True
     )
 
-    #-- 'object' Method Overrides ----------------------------------------------
-
-    def __init__ ( self, **facets ):
-        """ Initializes the object and starts the background log processing
-            thread running.
-        """
-        self._start_thread()
-
-        super( LogFile, self ).__init__( **facets )
-
     #-- HasFacets Method Overrides ---------------------------------------------
 
     def copyable_facet_names ( self, **metadata ):
@@ -251,106 +525,78 @@ class LogFile ( Tool ):
         """
         return [ 'log_filter', 'max_records' ]
 
+    #-- Public Methods ---------------------------------------------------------
+
+    def records_added ( self ):
+        """ Handles a new batch of log records being read from the log file.
+        """
+        self._update( self.page == 0 )
+
     #-- Facet Event Handlers ---------------------------------------------------
 
+    def _file_name_set ( self, file_name ):
+        """ Handles the 'file_name' facet being changed.
+        """
+        if self._tailer is None:
+            self._tailer = LogTailer( self.max_records, log_file = self )
+            self._tailer.start()
+
+        self.page              = 0
+        self._tailer.file_name = file_name
+
+
     def _clear_set ( self ):
         """ Handles the 'Clear' button being clicked.
         """
+        if self._tailer is not None:
+            self._tailer.clear()
+
         self.log_records = []
 
-    #-- Private Methods --------------------------------------------------------
 
-    def _start_thread ( self ):
-        """ Starts the background log processing thread running.
+    def _max_records_set ( self, max_records ):
+        """ Handles the 'max_records' facet being changed.
         """
-        thread = Thread( target = self._process_log )
-        thread.setDaemon( True )
-        thread.start()
+        if self._tailer is not None:
+            self._tailer.resize( max_records )
+            self._update()
 
 
-    def _process_log ( self ):
-        """ Processes the current log file.
-        """
-        file_name = ''
-        fh        = None
-        while True:
-            if file_name != self.file_name:
-                file_name = self.file_name
-
-                try:
-                    if fh is not None:
-                        fh.close()
-                except:
-                    pass
-
-                fh   = None
-                data = ''
-                self.log_records = []
-                try:
-                    fh = open( file_name, 'rb' )
-                except:
-                    pass
-
-            if fh is not None:
-                new_data = fh.read()
-                if new_data == '':
-                    continue
-
-                data += new_data
-                col   = data.rfind( '\n' )
-                if col < 0:
-                    continue
-
-                self._lines.extend( data[ : col ].split( '\n' ) )
-                data = data[ col + 1: ].lstrip()
-
-                records = []
-                while True:
-                    record = self._next_record()
-                    if record is None:
-                        break
-
-                    records.insert( 0, record )
-
-                if len( records ) > 0:
-                    self.log_records = \
-                        (records + self.log_records)[ : self.max_records ]
-
-            sleep( 1 )
-
-
-    def _next_record ( self ):
-        """ Returns the next LogRecord or None if no complete log record is
-            found.
+    def _page_set ( self ):
+        """ Handles the 'page' facet being changed.
         """
-        lines = self._lines
-        if len( lines ) == 0:
-            return None
-
-        type, date_time, info = lines[0].split( '|', 2 )
-        type       = type.capitalize()
-        date, time = date_time.split()
-        info       = info.strip()
-        extra      = ''
-        for i in range( 1, len( lines ) ):
-            line = lines[ i ]
-            col  = line.find( '|' )
-            if (col > 0) and (line[ : col ] in LogTypes):
-                extra = '\n'.join( lines[ 1: i ] )
-                del lines[ 0: i ]
-                break
-        else:
-            return None
-
-        return LogRecord( type  = type, date = date, time = time, info = info,
-                          extra = extra )
+        self._update()
 
-    #-- Facet Event Handlers ---------------------------------------------------
+    #-- Private Methods --------------------------------------------------------
 
-    def _max_records_set ( self, max_records ):
-        """ Handles the 'max_records' facet being changed.
+    def _update ( self, records = True ):
+        """ Updates the number of pages of log records available and, if
+            *records* is True, the log records currently being displayed.
         """
-        self.log_records = self.log_records[ -max_records: ]
+        tailer = self._tailer
+        if tailer is None:
+            return
+
+        count       = tailer.count()
+        max_records = self.max_records
+        self.pages  = max( 0, (count - 1) // max_records )
+        if self.page > self.pages:
+            self.page = self.pages
+
+            return
+
+        if records:
+            page = self.page
+            if page == 0:
+                self.log_records = tailer.records()
+            else:
+                end   = count - (page * max_records)
+                start = max( 0, end - max_records )
+                lines = tailer.index.read( tailer.file_name, start,
+                                           end - start )
+                lines.reverse()
+                self.log_records = [ log_record_for( record )
+                                     for record in lines ]
 
 #-------------------------------------------------------------------------------
 #  Run the tool (if invoked from the command line):
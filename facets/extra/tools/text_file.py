@@ -10,9 +10,9 @@ from os.path \
    import basename
 
 from facets.api                                                               \
-   import File, Property, Code, Bool, Int, Str, List, Instance, Button, View, \
-          HToolbar, UItem, CodeEditor, ThemedCheckboxEditor, HistoryEditor,   \
-          property_depends_on, on_facet_set
+   import File, Property, Code, Bool, Int, Str, List, Instance, Any, Button,  \
+          View, HToolbar, UItem, CodeEditor, ThemedCheckboxEditor,            \
+          HistoryEditor, property_depends_on, on_facet_set
 
 from facets.core.facet_base \
     import read_file, write_file, save_file
@@ -26,6 +26,9 @@ from facets.ui.pyface.timer.api \
 from facets.extra.api \
     import file_watch
 
+from facets.extra.helper.text_buffer \
+    import TextBuffer
+
 from tools \
     import Tool
 
@@ -103,6 +106,9 @@ class TextFile ( Tool ):
     # The currently selected text:
     selected_text = Str
 
+    # The line indexed buffer containing the current text:
+    text_buffer = Property
+
     # The list of text lines in the file:
     text_lines = Property
 
@@ -163,6 +169,11 @@ class TextFile ( Tool ):
     # Should auto-update ignore the next reload request?
     ignore_reload = Bool( False )
 
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The line indexed buffer used to cache information about the text:
+    _text_buffer = Any # TextBuffer
+
     #-- Facet View Definitions -------------------------------------------------
 
     def default_facets_view ( self ):
@@ -201,28 +212,35 @@ class TextFile ( Tool ):
         return basename( self.file_name )
 
 
+    def _get_text_buffer ( self ):
+        buffer = self._text_buffer
+        if buffer is None:
+            self._text_buffer = buffer = TextBuffer( self.text )
+        else:
+            buffer.set_text( self.text )
+
+        return buffer
+
+
     @property_depends_on( 'text' )
     def _get_text_lines ( self ):
-        return self.text.split( '\n' )
+        # Return a copy, so that the text buffer's own lines can not be
+        # modified behind its back:
+        return list( self.text_buffer.lines )
 
 
     @property_depends_on( 'text, line' )
     def _get_text_line ( self ):
-        lines = self.text.split( '\n' )
-        index = self.line - 1
-        if 0 <= index < len( lines ):
-            return lines[ index ]
-
-        return ''
+        return self.text_buffer.line( self.line - 1 )
 
 
     def _get_file_text ( self ):
-        return '\n'.join( [ line.rstrip() for line in self.text_lines ] )
+        return self._file_text_for( self.text_lines )
 
 
-    @property_depends_on( 'text_lines' )
+    @property_depends_on( 'text' )
     def _get_lines ( self ):
-        return len( self.text_lines )
+        return self.text_buffer.line_count()
 
 
     @property_depends_on( 'line, column' )
@@ -244,19 +262,7 @@ class TextFile ( Tool ):
         if find == '':
             return ''
 
-        count = col = 0
-        n     = len( find )
-        text  = self.find_case( self.text )
-        find  = self.find_case( find )
-
-        while True:
-            col = text.find( find, col )
-            if col < 0:
-                break
-
-            count += 1
-            col   += n
-
+        count = self.text_buffer.count( find, self.case_sensitive )
         if count == 0:
             return 'No matches'
 
@@ -272,23 +278,21 @@ class TextFile ( Tool ):
         if (find == '') or (not self.show_find):
             return []
 
-        text_lines = self.text_lines
-        find_case  = self.find_case
-        find       = find_case( find )
-        return [ (i + 1) for i in xrange( len( text_lines ) )
-                         if find_case( text_lines[ i ] ).find( find ) >= 0 ]
+        return [ (i + 1) for i in self.text_buffer.matching_lines(
+                                           find, self.case_sensitive ) ]
 
     #-- Public Methods ---------------------------------------------------------
 
     def insert_line ( self ):
         """ Inserts a new, blank line below the current line.
         """
-        line   = self.line - 1
-        text   = self.text_lines[ line ]
-        column = len( text ) - len( text.lstrip() )
-        self.text_lines.insert( line + 1, ' ' * column )
+        line       = self.line - 1
+        text_lines = self.text_lines[:]
+        text       = text_lines[ line ]
+        column     = len( text ) - len( text.lstrip() )
+        text_lines.insert( line + 1, ' ' * column )
         self.column = 1
-        self.text   = '\n'.join( self.text_lines )
+        self.text   = '\n'.join( text_lines )
         self.line  += 1
         self.column = column + 1
 
@@ -298,10 +302,10 @@ class TextFile ( Tool ):
         """
         line = self.line - 1
         if line > 0:
-            text_lines = self.text_lines
+            text_lines = self.text_lines[:]
             text_lines.insert( line - 1, text_lines[ line ] )
             del text_lines[ line + 1 ]
-            self.text = self.file_text
+            self.text = self._file_text_for( text_lines )
             self.line = line
 
 
@@ -309,11 +313,11 @@ class TextFile ( Tool ):
         """ Moves the current text line down one.
         """
         line       = self.line - 1
-        text_lines = self.text_lines
+        text_lines = self.text_lines[:]
         if line < (len( text_lines ) - 1):
             text_lines.insert( line + 2, text_lines[ line ] )
             del text_lines[ line ]
-            self.text  = self.file_text
+            self.text  = self._file_text_for( text_lines )
             self.line += 1
 
 
@@ -331,29 +335,21 @@ class TextFile ( Tool ):
             self.status = 'No search string specified'
         else:
             find_case    = self.find_case
-            find         = find_case( find )
             line, column = self.line - 1, self.column - 1
-            text_lines   = self.text_lines
+            text         = self.text_line
             if (skip and
-                (find_case( text_lines[ line ][ column: column + len( find ) ] )
-                 == find)):
+                (find_case( text[ column: column + len( find ) ] ) ==
+                 find_case( find ))):
                 column += len( find )
 
-            end = len( text_lines )
-            while line < end:
-                column = find_case( text_lines[ line ] ).find( find, column )
-                if column >= 0:
-                    self.line, self.column = line + 1, column + 1
-                    self.selected_line     = self.line
-                    self.status            = ''
-
-                    break
-
-                column = 0
-                line  += 1
-            else:
-                if skip:
-                    self.status = 'No match found'
+            location = self.text_buffer.find( find, line, column,
+                                              self.case_sensitive )
+            if location is not None:
+                self.line, self.column = location[0] + 1, location[1] + 1
+                self.selected_line     = self.line
+                self.status            = ''
+            elif skip:
+                self.status = 'No match found'
 
 
     def find_previous ( self ):
@@ -363,24 +359,13 @@ class TextFile ( Tool ):
         if find == '':
             self.status = 'No search string specified'
         else:
-            find_case    = self.find_case
-            find         = find_case( find )
-            line, column = self.line - 1, self.column - 1
-            text_lines   = self.text_lines
-            while line >= 0:
-                text = text_lines[ line ]
-                if column >= 0:
-                    text = text[ : column ]
-
-                column = find_case( text ).rfind( find )
-                if column >= 0:
-                    self.line, self.column = line + 1, column + 1
-                    self.selected_line     = self.line
-                    self.status            = ''
-
-                    break
-
-                line -= 1
+            location = self.text_buffer.rfind(
+                find, self.line - 1, self.column - 1, self.case_sensitive
+            )
+            if location is not None:
+                self.line, self.column = location[0] + 1, location[1] + 1
+                self.selected_line     = self.line
+                self.status            = ''
             else:
                 self.status = 'No match found'
 
@@ -478,6 +463,13 @@ class TextFile ( Tool ):
 
     #-- Private Methods --------------------------------------------------------
 
+    def _file_text_for ( self, text_lines ):
+        """ Returns the text as it is saved to a file for the specified list of
+            *text_lines*.
+        """
+        return '\n'.join( [ line.rstrip() for line in text_lines ] )
+
+
     def _toolbar_items ( self ):
         """ Returns the list of Item objects to be displayed in the editor's
             toolbar.
@@ -30,6 +30,9 @@ from facets.ui.menu \
 from facets.ui.tree_node \
     import TreeNode
 
+from facets.extra.markdown.html_cache \
+    import html_cache
+
 try:
     from facets.ui.wx.editors.extra.windows.ie_html_editor \
         import IEHTMLEditor
@@ -1487,9 +1490,19 @@ class SectionFactory ( HasPrivateFacets ):
             settings[ 'embed_stylesheet' ] = True
             settings[ 'stylesheet' ]       = None
 
-        # Convert it from restructured text to HTML:
-        html = publish_string( content, writer_name        = 'html',
-                                        settings_overrides = settings )
+        # Convert it from restructured text to HTML (reusing the HTML from a
+        # previous conversion of the same content if possible):
+        kind = 'rest:%s' % css_path
+        if css_path != '':
+            try:
+                kind += ':%s' % os.path.getmtime( css_path )
+            except OSError:
+                pass
+
+        html = html_cache.html_for( kind, content,
+            lambda content: publish_string( content,
+                                            writer_name        = 'html',
+                                            settings_overrides = settings ) )
 
         # Choose the right HTML renderer:
         if IEHTMLEditor is not None:
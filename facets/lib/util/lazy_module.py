@@ -0,0 +1,205 @@
+"""
+Defines the LazyModule class, used to create 'api' style modules which export
+a large number of symbols defined in other modules, but which only import the
+module defining a symbol the first time the symbol is accessed.
+
+An api module is converted into a lazy module by replacing its own entry in
+sys.modules with a LazyModule containing a table mapping each module to the
+names it exports. For example:
+
+    LazyModule.install( __name__, {
+        'facets.ui.view':  'View',
+        'facets.ui.group': 'Group HGroup VGroup'
+    } )
+
+Since the module's __all__ lists all of the exported names, 'from module
+import *' continues to work as before (although it resolves, and therefore
+imports, every exported symbol).
+
+The export table for an existing module written as a series of 'from module
+import name, ...' statements can be generated using the 'generate_exports'
+function, or by running this module as a script:
+
+    python -m facets.lib.util.lazy_module path/to/api.py
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import sys
+
+from os.path \
+    import abspath, dirname, splitext
+
+from types \
+    import ModuleType
+
+#-------------------------------------------------------------------------------
+#  'LazyModule' class:
+#-------------------------------------------------------------------------------
+
+class LazyModule ( ModuleType ):
+    """ A module whose exported symbols are only imported from their defining
+        modules the first time they are accessed.
+    """
+
+    #-- Class Methods ----------------------------------------------------------
+
+    @classmethod
+    def install ( cls, name, exports ):
+        """ Replaces the module called *name* in sys.modules with a LazyModule
+            that exports the symbols described by *exports*, and returns the
+            new LazyModule. *exports* is a dictionary mapping fully qualified
+            module names to a string containing the whitespace separated names
+            of the symbols exported from that module. Any public names already
+            defined by the original module are also exported.
+        """
+        module = sys.modules[ name ]
+        lazy   = cls( name, module.__doc__ )
+
+        # Keep a reference to the original module, since its globals are
+        # cleared when it is garbage collected:
+        lazy.__original__ = module
+        lazy.__file__     = module.__file__
+        if hasattr( module, '__path__' ):
+            lazy.__path__ = module.__path__
+
+        symbols = {}
+        for module_name, names in exports.iteritems():
+            for symbol in names.split():
+                symbols[ symbol ] = module_name
+
+        lazy.__symbols__ = symbols
+        eager            = [ symbol for symbol in module.__dict__.keys()
+                             if symbol[:1] != '_' ]
+        for symbol in eager:
+            setattr( lazy, symbol, getattr( module, symbol ) )
+
+        lazy.__all__ = sorted( set( symbols.keys() + eager ) )
+
+        sys.modules[ name ] = lazy
+
+        return lazy
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def resolve ( self ):
+        """ Imports all of the modules defining the symbols exported by the
+            module.
+        """
+        for symbol in self.__symbols__.keys():
+            getattr( self, symbol )
+
+    #-- Python Method Overrides ------------------------------------------------
+
+    def __getattr__ ( self, name ):
+        """ Imports the module defining a specified symbol the first time the
+            symbol is accessed.
+        """
+        if name[:2] != '__':
+            module_name = self.__dict__.get( '__symbols__', {} ).get( name )
+            if module_name is not None:
+                __import__( module_name )
+                value = getattr( sys.modules[ module_name ], name )
+                setattr( self, name, value )
+
+                return value
+
+        raise AttributeError( "'%s' module has no attribute '%s'" %
+                              ( self.__name__, name ) )
+
+
+    def __dir__ ( self ):
+        """ Returns the list of names defined by the module, including all
+            exported symbols which have not been imported yet.
+        """
+        return sorted( set( self.__dict__.keys() + self.__all__ ) )
+
+#-------------------------------------------------------------------------------
+#  Export table generation:
+#-------------------------------------------------------------------------------
+
+def generate_exports ( file_name, package = None ):
+    """ Returns the source code for the LazyModule export table equivalent to
+        all of the top-level 'from module import name, ...' statements
+        contained in the Python source file specified by *file_name*. Relative
+        module names are resolved relative to *package* (which defaults to the
+        package containing the file).
+    """
+    import ast
+
+    if package is None:
+        package = _package_for( file_name )
+
+    fh = open( file_name, 'rb' )
+    try:
+        tree = ast.parse( fh.read(), file_name )
+    finally:
+        fh.close()
+
+    exports = []
+    for node in tree.body:
+        if isinstance( node, ast.ImportFrom ) and (node.module is not None):
+            names = [ alias.name for alias in node.names
+                      if (alias.asname is None) and (alias.name != '*') ]
+            if len( names ) > 0:
+                module_name = node.module
+                if (node.level > 0) or ('.' not in module_name):
+                    module_name = _resolve( package, module_name, node.level )
+
+                exports.append( ( module_name, names ) )
+
+    lines = [ '{' ]
+    for module_name, names in exports:
+        lines.append( "    '%s':" % module_name )
+        line = "        '"
+        for name in names:
+            if (len( line ) + len( name )) > 76:
+                lines.append( line + "'" )
+                line = "        '"
+
+            line += name + ' '
+
+        lines.append( line.rstrip() + "'," )
+
+    lines[-1] = lines[-1][:-1]
+    lines.append( '}' )
+
+    return '\n'.join( lines )
+
+#-- Private Helper Functions ---------------------------------------------------
+
+def _package_for ( file_name ):
+    """ Returns the name of the package containing the specified source file.
+    """
+    import facets
+
+    root = dirname( dirname( abspath( facets.__file__ ) ) )
+    path = splitext( abspath( file_name ) )[0]
+    if path.startswith( root ):
+        path = path[ len( root ) + 1: ]
+
+    return '.'.join( path.replace( '\\', '/' ).split( '/' )[:-1] )
+
+
+def _resolve ( package, module_name, level ):
+    """ Resolves a relative (or implicitly relative) module name.
+    """
+    parts = package.split( '.' )
+    if level > 1:
+        parts = parts[ : 1 - level ]
+
+    return '.'.join( parts + [ module_name ] )
+
+#-- Run as a stand-alone program (if invoked from the command line) ------------
+
+if __name__ == '__main__':
+    for file_name in sys.argv[1:]:
+        print generate_exports( file_name )
+
+#-- EOF ------------------------------------------------------------------------
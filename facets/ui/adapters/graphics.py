@@ -167,9 +167,34 @@ class Graphics ( HasPrivateFacets ):
         raise NotImplementedError
 
 
+    def draw_lines ( self, lines ):
+        """ Draws each of the lines specified by *lines*, a sequence (or n x 4
+            array) of (x1,y1,x2,y2) values, using a single call where the GUI
+            toolkit allows it.
+
+            Can be overridden by a subclass.
+        """
+        draw_line = self.draw_line
+        for x1, y1, x2, y2 in lines:
+            draw_line( x1, y1, x2, y2 )
+
+
+    def draw_rectangles ( self, rectangles ):
+        """ Draws each of the rectangles specified by *rectangles*, a sequence
+            (or n x 4 array) of (x,y,dx,dy) values, using a single call where
+            the GUI toolkit allows it.
+
+            Can be overridden by a subclass.
+        """
+        draw_rectangle = self.draw_rectangle
+        for x, y, dx, dy in rectangles:
+            draw_rectangle( x, y, dx, dy )
+
+
     def draw_polygon ( self, points ):
         """ Draws the closed polygon specified by *points*. *points* can either
-            be a list of Point objects or a Polygon object.
+            be a list of Point objects or a Polygon object (whose 'xy' facet is
+            an n x 2 array of point coordinates).
         """
         raise NotImplementedError
 
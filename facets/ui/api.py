@@ -1,5 +1,10 @@
 """
 Exports the symbols defined by the facets.ui packages.
+
+This is a lazy module: each symbol is only imported from the module defining
+it the first time it is accessed (see facets.lib.util.lazy_module), so that
+applications which only use part of the UI (or none of it) do not pay the cost
+of importing all of it.
 """
 
 #-------------------------------------------------------------------------------
@@ -16,6 +21,9 @@ from view_element \
 from view_elements \
     import ViewElements
 
+from facets.lib.util.lazy_module \
+    import LazyModule as _LazyModule
+
 #-------------------------------------------------------------------------------
 #  Patch the main facets module with the correct definition for the ViewElement
 #  and ViewElements class:
@@ -26,118 +34,95 @@ import facets.core.has_facets
 facets.core.has_facets.ViewElement  = ViewElement
 facets.core.has_facets.ViewElements = ViewElements
 
-from handler \
-    import Handler, Controller, ModelView, ViewHandler, UIView, default_handler
-
-from view \
-    import View
-
-from group \
-    import Group, HGroup, VGroup, VGrid, HFlow, VFlow, VFold, HSplit, VSplit, \
-           HToolbar, VToolbar, Tabbed, StatusBar
-
-from ui \
-    import UI
-
-from ui_info \
-    import UIInfo
-
-from ui_facets \
-    import Border, Margin, HasMargin, HasBorder, StatusItem, Image, ATheme, \
-           image_for
-
-from help \
-    import on_help_call
-
-from include \
-    import Include
-
-from item \
-    import Item, UItem, Custom, UCustom, Readonly, UReadonly, Label, Heading, \
-           Spring, Status, spring
-
-from editor_factory \
-    import EditorFactory, EditorWithListFactory
-
-from basic_editor_factory \
-    import BasicEditorFactory
-
-from context_value \
-    import ContextValue, CV, CVInt, CVFloat, CVStr, CVType
-
-from editor \
-    import Editor, EditorWithList
-
-from ui_editor \
-    import UIEditor
-
-from undo \
-    import UndoHistory, AbstractUndoItem, UndoItem, ListUndoItem, \
-           UndoHistoryUndoItem
-
-from help_template \
-    import help_template
-
-from message \
-    import message, error, auto_close_message
-
-from theme \
-    import Theme, default_theme
-
-from tree_node \
-    import TreeNode, ObjectTreeNode, TreeNodeObject, MultiTreeNode, \
-           ITreeNode, ITreeNodeAdapter
-
-from core_editors \
-    import ArrayEditor, ArrayViewEditor, ASTEditor, BooleanEditor,             \
-           ButtonEditor, CheckListEditor, CodeEditor, CollageEditor,           \
-           ColorEditor, ColorPaletteEditor, ColorFacet, CompoundEditor,        \
-           ControlGrabberEditor, CustomEditor, CustomFileDialogEditor,         \
-           DirectoryEditor, DNDEditor, DrawableCanvasEditor, DropEditor,       \
-           EnumEditor, FileEditor, FileStackEditor, FileSystemEditor,          \
-           FilmStripEditor, FilteredSetEditor, FontEditor, FontFacet,          \
-           GridEditor, HistogramEditor, HistoryEditor, HLSADerivedImageEditor, \
-           HLSColorEditor, HTMLBrowserEditor, HTMLEditor, ImageEditor,         \
-           ImageEnumEditor, ImageLibraryEditor, ImageTilerEditor,              \
-           ImageZoomEditor, InstanceEditor, JSONEditor, KeyBindingEditor,      \
-           LightTableEditor, ListEditor, ListStrEditor, ListViewEditor,        \
-           MultipleInstanceEditor, NotebookEditor, NullEditor, PopupEditor,    \
-           PresentationEditor, ProgressBarEditor, PropertyListEditor,          \
-           PropertySheetEditor, RangeEditor, RangeSliderEditor, RGBColorFacet, \
-           ScrubberEditor, SetEditor, ShellEditor, SlideshowEditor,            \
-           StackEditor, StringGridEditor, TemplateEditor, TextEditor,          \
-           ThemedButtonEditor, ThemedCheckboxEditor, ThemedSliderEditor,       \
-           ThemedTextEditor, ThemeEditor, ThemeLayoutEditor, TokenEditor,      \
-           VerticalNotebookEditor, TitleEditor, ToolbarEditor, TreeEditor,     \
-           TupleEditor, UniversalEditor, ValueEditor, VIPShellEditor
-
-from facets.ui.adapters.cell \
-    import Cell
-
-from facets.ui.adapters.clipboard \
-    import Clipboard
-
-from facets.ui.adapters.control \
-    import Control
-
-from facets.ui.adapters.drag \
-    import Drag
-
-from facets.ui.adapters.ui_event \
-    import UIEvent
-
-from facets.ui.adapters.graphics \
-    import Graphics
-
-from facets.ui.adapters.layout \
-    import Layout
-
-from facets.ui.adapters.layout_item \
-    import LayoutItem
-
 import view_elements
 
-from toolkit \
-    import toolkit
+#-------------------------------------------------------------------------------
+#  Define the lazily imported symbols (generated from the original import
+#  statements using: python -m facets.lib.util.lazy_module):
+#-------------------------------------------------------------------------------
 
-#-- EOF ------------------------------------------------------------------------
\ No newline at end of file
+_LazyModule.install( __name__, {
+    'facets.ui.handler':
+        'Handler Controller ModelView ViewHandler UIView default_handler',
+    'facets.ui.view':
+        'View',
+    'facets.ui.group':
+        'Group HGroup VGroup VGrid HFlow VFlow VFold HSplit VSplit HToolbar '
+        'VToolbar Tabbed StatusBar',
+    'facets.ui.ui':
+        'UI',
+    'facets.ui.ui_info':
+        'UIInfo',
+    'facets.ui.ui_facets':
+        'Border Margin HasMargin HasBorder StatusItem Image ATheme image_for',
+    'facets.ui.help':
+        'on_help_call',
+    'facets.ui.include':
+        'Include',
+    'facets.ui.item':
+        'Item UItem Custom UCustom Readonly UReadonly Label Heading Spring '
+        'Status spring',
+    'facets.ui.editor_factory':
+        'EditorFactory EditorWithListFactory',
+    'facets.ui.basic_editor_factory':
+        'BasicEditorFactory',
+    'facets.ui.context_value':
+        'ContextValue CV CVInt CVFloat CVStr CVType',
+    'facets.ui.editor':
+        'Editor EditorWithList',
+    'facets.ui.ui_editor':
+        'UIEditor',
+    'facets.ui.undo':
+        'UndoHistory AbstractUndoItem UndoItem ListUndoItem '
+        'UndoHistoryUndoItem',
+    'facets.ui.help_template':
+        'help_template',
+    'facets.ui.message':
+        'message error auto_close_message',
+    'facets.ui.theme':
+        'Theme default_theme',
+    'facets.ui.tree_node':
+        'TreeNode ObjectTreeNode TreeNodeObject MultiTreeNode ITreeNode '
+        'ITreeNodeAdapter',
+    'facets.ui.core_editors':
+        'ArrayEditor ArrayViewEditor ASTEditor BooleanEditor ButtonEditor '
+        'CheckListEditor CodeEditor CollageEditor ColorEditor '
+        'ColorPaletteEditor ColorFacet CompoundEditor ControlGrabberEditor '
+        'CustomEditor CustomFileDialogEditor DirectoryEditor DNDEditor '
+        'DrawableCanvasEditor DropEditor EnumEditor FileEditor '
+        'FileStackEditor FileSystemEditor FilmStripEditor FilteredSetEditor '
+        'FontEditor FontFacet GridEditor HistogramEditor HistoryEditor '
+        'HLSADerivedImageEditor HLSColorEditor HTMLBrowserEditor HTMLEditor '
+        'ImageEditor ImageEnumEditor ImageLibraryEditor ImageTilerEditor '
+        'ImageZoomEditor InstanceEditor JSONEditor KeyBindingEditor '
+        'LightTableEditor ListEditor ListStrEditor ListViewEditor '
+        'MultipleInstanceEditor NotebookEditor NullEditor PopupEditor '
+        'PresentationEditor ProgressBarEditor PropertyListEditor '
+        'PropertySheetEditor RangeEditor RangeSliderEditor RGBColorFacet '
+        'ScrubberEditor SetEditor ShellEditor SlideshowEditor StackEditor '
+        'StringGridEditor TemplateEditor TextEditor ThemedButtonEditor '
+        'ThemedCheckboxEditor ThemedSliderEditor ThemedTextEditor '
+        'ThemeEditor ThemeLayoutEditor TokenEditor VerticalNotebookEditor '
+        'TitleEditor ToolbarEditor TreeEditor TupleEditor UniversalEditor '
+        'ValueEditor VIPShellEditor',
+    'facets.ui.adapters.cell':
+        'Cell',
+    'facets.ui.adapters.clipboard':
+        'Clipboard',
+    'facets.ui.adapters.control':
+        'Control',
+    'facets.ui.adapters.drag':
+        'Drag',
+    'facets.ui.adapters.ui_event':
+        'UIEvent',
+    'facets.ui.adapters.graphics':
+        'Graphics',
+    'facets.ui.adapters.layout':
+        'Layout',
+    'facets.ui.adapters.layout_item':
+        'LayoutItem',
+    'facets.ui.toolkit':
+        'toolkit'
+} )
+
+#-- EOF ------------------------------------------------------------------------
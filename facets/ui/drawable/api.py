@@ -12,6 +12,7 @@ Exports the symbols defined by the facets.ui.drawable package.
 
 from drawable \
     import Point, OwnedObject, Drawable, Text, ThemedText, Line, Circle, \
-           Rectangle, Polygon, Polyline, DrawableCanvas, Value2D
+           Rectangle, Polygon, Polyline, LineSet, RectangleSet, \
+           DrawableCanvas, Value2D
 
 #-- EOF ------------------------------------------------------------------------
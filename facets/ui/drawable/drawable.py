@@ -16,9 +16,13 @@ from math \
 from itertools \
     import ifilter
 
+from numpy \
+    import array, zeros
+
 from facets.api \
     import HasFacets, HasPrivateFacets, List, Event, Instance, Str, Int, Any, \
-           Float, Tuple, Bool, Range, Font, ATheme, Image, on_facet_set, inn
+           Float, Tuple, Bool, Range, Font, ATheme, Image, CArray, \
+           on_facet_set, inn
 
 from facets.ui.ui_facets \
     import Alignment
@@ -30,6 +34,44 @@ from facets.ui.ui_facets \
 # A 2D quantity:
 Value2D = Tuple( Float, Float )
 
+#-------------------------------------------------------------------------------
+#  Helper functions:
+#-------------------------------------------------------------------------------
+
+def union_bounds ( bounds1, bounds2 ):
+    """ Returns the smallest bounds (x,y,dx,dy) containing both *bounds1* and
+        *bounds2*, either of which may be None.
+    """
+    if bounds1 is None:
+        return bounds2
+
+    if bounds2 is None:
+        return bounds1
+
+    x1, y1, dx1, dy1 = bounds1
+    x2, y2, dx2, dy2 = bounds2
+    x, y             = min( x1, x2 ), min( y1, y2 )
+
+    return ( x, y, max( x1 + dx1, x2 + dx2 ) - x,
+                   max( y1 + dy1, y2 + dy2 ) - y )
+
+
+def normalized_rectangles ( rectangles ):
+    """ Returns a copy of *rectangles* (an n x 4 array of (x,y,dx,dy) values)
+        with any rectangle having a negative width or height adjusted to have
+        a positive one, and any empty rectangle removed (the same as
+        Rectangle.stroke).
+    """
+    rectangles = array( rectangles, float ).reshape( -1, 4 )
+    rectangles = rectangles[ (rectangles[ :, 2 ] != 0.0) &
+                             (rectangles[ :, 3 ] != 0.0) ]
+    for i in ( 0, 1 ):
+        negative                     = rectangles[ :, i + 2 ] < 0.0
+        rectangles[ negative, i ]   += rectangles[ negative, i + 2 ]
+        rectangles[ negative, i + 2 ] = -rectangles[ negative, i + 2 ]
+
+    return rectangles
+
 #-------------------------------------------------------------------------------
 #  'Point' class:
 #-------------------------------------------------------------------------------
@@ -141,6 +183,16 @@ class Drawable ( OwnedObject ):
         """
         raise NotImplementedError
 
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the object,
+            or None if the area is not known (in which case the entire canvas
+            containing the object is repainted whenever it is modified).
+
+            Can be overridden by a subclass.
+        """
+        return None
+
     #-- Facet Event Handlers ---------------------------------------------------
 
     def _notify_owner_set ( self ):
@@ -268,6 +320,18 @@ class ThemedText ( Drawable ):
         return (self if (x0 <= x < (x0 + dx)) and (y0 <= y < (y0 + dy)) else
                 None)
 
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the object.
+        """
+        if self.size is None:
+            return None
+
+        x,  y  = self.origin
+        dx, dy = self.size
+
+        return ( int( x ), int( y ), int( dx ) + 1, int( dy ) + 1 )
+
 #-------------------------------------------------------------------------------
 #  'Penable' class:
 #-------------------------------------------------------------------------------
@@ -307,6 +371,19 @@ class Penable ( Drawable ):
         """
         raise NotImplementedError
 
+    #-- Private Methods --------------------------------------------------------
+
+    def _extent_for ( self, x0, y0, x1, y1 ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted when stroking
+            the region from (x0,y0) to (x1,y1) with the object's pen.
+        """
+        pad = getattr( self.pen, 'width', 1 ) + 2
+        x   = int( min( x0, x1 ) ) - pad
+        y   = int( min( y0, y1 ) ) - pad
+
+        return ( x, y, int( max( x0, x1 ) ) + pad + 2 - x,
+                       int( max( y0, y1 ) ) + pad + 2 - y )
+
 #-------------------------------------------------------------------------------
 #  'Line' class:
 #-------------------------------------------------------------------------------
@@ -341,6 +418,12 @@ class Line ( Penable ):
         # fixme: implement this...
         return None
 
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the line.
+        """
+        return self._extent_for( *(self.p0 + self.p1) )
+
 #-------------------------------------------------------------------------------
 #  'Circle' class:
 #-------------------------------------------------------------------------------
@@ -377,6 +460,15 @@ class Circle ( Penable ):
 
         return (self if sqrt( (dx * dx) + (dy * dy) ) <= self.radius else None)
 
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the circle.
+        """
+        x, y = self.origin
+        r    = self.radius
+
+        return self._extent_for( x - r, y - r, x + r, y + r )
+
 #-------------------------------------------------------------------------------
 #  'Rectangle' class:
 #-------------------------------------------------------------------------------
@@ -455,21 +547,56 @@ class Rectangle ( Penable ):
 
         return (self if sqrt( (xr * xr) + (yr * yr) ) <= r else None)
 
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the
+            rectangle.
+        """
+        x,  y  = self.origin
+        dx, dy = self.size
+
+        return self._extent_for( x, y, x + dx, y + dy )
+
 #-------------------------------------------------------------------------------
 #  'Polygon' class:
 #-------------------------------------------------------------------------------
 
 class Polygon ( Penable ):
     """ Draws a closed polygon.
+
+        The coordinates of the polygon's points are held in a single n x 2
+        array ('xy'), which can be assigned directly (e.g. when animating or
+        plotting a large number of points). For compatibility, the points can
+        also be specified as a list of Point objects ('points'), in which case
+        'xy' is kept in sync with them.
     """
 
     #-- Facet Definitions ------------------------------------------------------
 
-    # The points forming the polygon:
+    # The (x,y) coordinates of the points forming the polygon:
+    xy = CArray( float, ( None, 2 ), value = zeros( ( 0, 2 ) ) )
+
+    # The (optional) Point objects forming the polygon:
     points = List # ( Point )
 
     #-- Facet Event Handlers ---------------------------------------------------
 
+    def _xy_set ( self ):
+        """ Handles the 'xy' facet being changed.
+        """
+        self.modified = self
+
+
+    def _modified_set ( self, item ):
+        """ Handles the 'modified' facet being changed.
+        """
+        if isinstance( item, Point ):
+            # Update the coordinates of the modified point in place:
+            self.xy[ self.points.index( item ) ] = item.xy
+
+        super( Polygon, self )._modified_set()
+
+
     @on_facet_set( 'points[]' )
     def _points_modified ( self, removed, added ):
         """ Handles points being added to or removed from the polygon.
@@ -480,7 +607,8 @@ class Polygon ( Penable ):
         for point in added:
             point.owner = self
 
-        self._modified_set()
+        self.xy = array( [ point.xy for point in self.points ],
+                         float ).reshape( -1, 2 )
 
     #-- Penable Method Overrides -----------------------------------------------
 
@@ -505,6 +633,19 @@ class Polygon ( Penable ):
         # fixme: implement this...
         return None
 
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the polygon.
+        """
+        xy = self.xy
+        if len( xy ) == 0:
+            return None
+
+        x0, y0 = xy.min( 0 )
+        x1, y1 = xy.max( 0 )
+
+        return self._extent_for( x0, y0, x1, y1 )
+
 #-------------------------------------------------------------------------------
 #  'Polyline' class:
 #-------------------------------------------------------------------------------
@@ -528,6 +669,104 @@ class Polyline ( Polygon ):
         # fixme: implement this...
         return None
 
+#-------------------------------------------------------------------------------
+#  'LineSet' class:
+#-------------------------------------------------------------------------------
+
+class LineSet ( Penable ):
+    """ Draws a set of lines using the same pen with a single graphics call.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The lines to draw, as an n x 4 array of (x1,y1,x2,y2) values:
+    lines = CArray( float, ( None, 4 ), value = zeros( ( 0, 4 ) ),
+                    event = 'notify_owner' )
+
+    # Should the object be rendered using anti-aliasing (override)?
+    anti_alias = False
+
+    #-- Penable Method Overrides -----------------------------------------------
+
+    def stroke ( self, g ):
+        """ Draws the lines in the graphics context specified by *g*.
+        """
+        g.draw_lines( self.lines )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def item_at ( self, x, y ):
+        """ Returns the item if it contains the point specified by (*x*,*y*) and
+            None if it does not.
+        """
+        return None
+
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the lines.
+        """
+        lines = self.lines
+        if len( lines ) == 0:
+            return None
+
+        xy     = lines.reshape( -1, 2 )
+        x0, y0 = xy.min( 0 )
+        x1, y1 = xy.max( 0 )
+
+        return self._extent_for( x0, y0, x1, y1 )
+
+#-------------------------------------------------------------------------------
+#  'RectangleSet' class:
+#-------------------------------------------------------------------------------
+
+class RectangleSet ( Penable ):
+    """ Draws a set of rectangles using the same pen and brush with a single
+        graphics call.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The rectangles to draw, as an n x 4 array of (x,y,dx,dy) values:
+    rectangles = CArray( float, ( None, 4 ), value = zeros( ( 0, 4 ) ),
+                         event = 'notify_owner' )
+
+    # Should the object be rendered using anti-aliasing (override)?
+    anti_alias = False
+
+    #-- Penable Method Overrides -----------------------------------------------
+
+    def stroke ( self, g ):
+        """ Draws the rectangles in the graphics context specified by *g*.
+        """
+        g.draw_rectangles( normalized_rectangles( self.rectangles ) )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def item_at ( self, x, y ):
+        """ Returns the item if it contains the point specified by (*x*,*y*) and
+            None if it does not.
+        """
+        rectangles = normalized_rectangles( self.rectangles )
+        x0, y0     = rectangles[ :, 0 ], rectangles[ :, 1 ]
+        inside     = ((x0 <= x) & (x < (x0 + rectangles[ :, 2 ])) &
+                      (y0 <= y) & (y < (y0 + rectangles[ :, 3 ])))
+
+        return (self if inside.any() else None)
+
+
+    def extent ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area painted by the
+            rectangles.
+        """
+        rectangles = normalized_rectangles( self.rectangles )
+        if len( rectangles ) == 0:
+            return None
+
+        x0, y0 = rectangles[ :, :2 ].min( 0 )
+        x1, y1 = (rectangles[ :, :2 ] + rectangles[ :, 2: ]).max( 0 )
+
+        return self._extent_for( x0, y0, x1, y1 )
+
 #-------------------------------------------------------------------------------
 #  'DrawableCanvas' class:
 #-------------------------------------------------------------------------------
@@ -535,6 +774,16 @@ class Polyline ( Polygon ):
 class DrawableCanvas ( Drawable ):
     """ Defines a DrawableCanvas class for managing and drawing drawable
         objects.
+
+        The canvas paints its content using a cached display list, in which
+        each run of consecutive, fully opaque Line (or square cornered
+        Rectangle) items sharing the same pen (and brush) is drawn using a
+        single 'draw_lines' (or 'draw_rectangles') graphics call. The display
+        list is rebuilt only after the content has been modified.
+
+        The canvas also tracks the area painted by each item, so that when an
+        item is modified, only the area it covered before and after the change
+        needs to be repainted (see 'dirty_bounds').
     """
 
     #-- Facet Definitions ------------------------------------------------------
@@ -566,8 +815,29 @@ class DrawableCanvas ( Drawable ):
         """ Paints the contents of the canvas in the graphics context specified
             by *g*.
         """
-        for item in self.content:
-            item.draw( g )
+        display_list = self._display_list
+        if display_list is None:
+            self._display_list = display_list = self._build_display_list()
+
+        for item in display_list:
+            if isinstance( item, tuple ):
+                method, pen, brush, anti_alias, data = item
+                g.pen        = pen
+                g.brush      = brush
+                g.anti_alias = anti_alias
+                getattr( g, method )( data )
+            else:
+                item.draw( g )
+
+
+    def dirty_bounds ( self ):
+        """ Returns the bounds (x,y,dx,dy) of the area of the canvas which
+            needs to be repainted because of the modifications made since the
+            last call, or None if the entire canvas needs to be repainted.
+        """
+        dirty, self._dirty = self._dirty, None
+
+        return (None if dirty is True else dirty)
 
 
     def item_at ( self, x, y ):
@@ -584,6 +854,28 @@ class DrawableCanvas ( Drawable ):
 
     #-- Facet Event Handlers ---------------------------------------------------
 
+    def _modified_set ( self, item ):
+        """ Handles the 'modified' facet being changed by discarding the
+            current display list and recording the area needing to be
+            repainted.
+        """
+        self._display_list = None
+        if self._dirty is not True:
+            extents = self._extents
+            old     = extents.get( item ) if extents is not None else None
+            new     = None
+            if old is not None:
+                new = item.extent()
+
+            if new is None:
+                self._dirty = True
+            else:
+                self._dirty = union_bounds( self._dirty,
+                                            union_bounds( old, new ) )
+
+        super( DrawableCanvas, self )._modified_set()
+
+
     @on_facet_set( 'content[]' )
     def _content_modified ( self, removed, added ):
         """ Handles the 'content' facet being modified.
@@ -605,4 +897,63 @@ class DrawableCanvas ( Drawable ):
                              self.content ):
             item.bounds = bounds
 
+    #-- Private Methods --------------------------------------------------------
+
+    def _build_display_list ( self ):
+        """ Returns the display list for the current content of the canvas,
+            and records the area painted by each item.
+        """
+        display_list  = []
+        self._extents = extents = {}
+        batch         = None
+        for item in self.content:
+            extents[ item ] = item.extent()
+            if not (item.visible and (item.opacity > 0.0)):
+                continue
+
+            key = self._batch_key( item )
+            if key is None:
+                display_list.append( item )
+                batch = None
+                continue
+
+            if (batch is None) or (batch[0] != key):
+                batch = ( key, [] )
+                display_list.append( batch )
+
+            batch[1].append( item )
+
+        for i, item in enumerate( display_list ):
+            if isinstance( item, tuple ):
+                ( method, pen, brush, anti_alias ), items = item
+                if len( items ) == 1:
+                    display_list[ i ] = items[0]
+                elif method == 'draw_lines':
+                    display_list[ i ] = ( method, pen, brush, anti_alias,
+                        array( [ line.p0 + line.p1 for line in items ] ) )
+                else:
+                    display_list[ i ] = ( method, pen, brush, anti_alias,
+                        normalized_rectangles(
+                            [ rect.origin + rect.size for rect in items ] ) )
+
+        return display_list
+
+
+    def _batch_key ( self, item ):
+        """ Returns the key identifying the batch of primitives that *item*
+            can be drawn as part of, or None if it must be drawn by itself.
+        """
+        if item.opacity < 1.0:
+            return None
+
+        klass = item.__class__
+        if klass is Line:
+            return ( 'draw_lines', item.pen, None, item.anti_alias )
+
+        if (klass is Rectangle) and (item.radius <= 0.0):
+            return ( 'draw_rectangles', item.pen, item.brush,
+                     item.anti_alias )
+
+        return None
+
 #-- EOF ------------------------------------------------------------------------
@@ -63,6 +63,12 @@ class Editor ( HasPrivateFacets ):
     # Is the editor implementation GUI toolkit neutral?
     is_toolkit_neutral = True
 
+    # Can the editor be rebound to a different object (see 'rebind') once it
+    # has been created? Only editors whose 'init' method does not depend on,
+    # or connect to, the object being edited (other than through 'sync_value')
+    # should set this to True:
+    rebindable = False
+
     #-- Facet Definitions ------------------------------------------------------
 
     # The UI (user interface) this editor is part of:
@@ -178,7 +184,7 @@ class Editor ( HasPrivateFacets ):
             return
 
         name = self.extended_name
-        if name != 'None':
+        if (name != 'None') and (not self._unbound):
             self.context_object.on_facet_set( self._update_editor,
                                               name + '[]', remove = True )
 
@@ -198,6 +204,83 @@ class Editor ( HasPrivateFacets ):
         self.adapter = self.label_control  = self.context_object = None
 
 
+    def can_rebind ( self ):
+        """ Returns whether or not the editor can be rebound to the objects
+            contained in its UI's context (see 'rebind').
+        """
+        ui = self.ui
+        if (not self.rebindable) or (ui is None):
+            return False
+
+        # Use the types of the context objects if the UI has released them:
+        context = ui._context_types
+        if context is None:
+            context = ui.context
+
+        return (self.object_name.split( '.', 1 )[0] in context)
+
+
+    def unbind ( self, clear = False ):
+        """ Disconnects the editor from the object it is editing, but leaves
+            the editor (and its control) otherwise intact, so that it can later
+            be rebound to a different object using 'rebind'. If *clear* is
+            True, the editor's references to the objects are released as well.
+        """
+        if clear:
+            self.unbind()
+            self.object = self.context_object = None
+
+            return
+
+        if self._unbound:
+            return
+
+        self._unbound = True
+        name          = self.extended_name
+        if name != 'None':
+            self.context_object.on_facet_set( self._update_editor,
+                                              name + '[]', remove = True )
+
+        if self._user_from is not None:
+            for name, handler in self._user_from:
+                self.on_facet_set( handler, name, remove = True )
+
+            self._user_from = None
+
+        if self._user_to is not None:
+            for object, name, handler in self._user_to:
+                object.on_facet_set( handler, name, remove = True )
+
+            self._user_to = None
+
+
+    def rebind ( self ):
+        """ Rebinds the editor to the objects currently contained in its UI's
+            context. This allows an existing editor to edit an object of the
+            same type as its original object without having to recreate the
+            editor and its control.
+        """
+        self.unbind()
+        self._unbound = False
+
+        context             = self.ui.context
+        self.context_object = context[ self.object_name.split( '.', 1 )[0] ]
+        self.object         = eval( self.object_name, globals(), context )
+
+        name = self.extended_name
+        if name != 'None':
+            if self.is_list:
+                name += '[]'
+
+            self.context_object.on_facet_set( self._update_editor,
+                                              name, dispatch = 'ui' )
+
+        for sync in self._syncs or []:
+            self.sync_value( *sync )
+
+        self.update_editor()
+
+
     def string_value ( self, value, format_func = None ):
         """ Returns the text representation of a specified object facet value.
 
@@ -367,6 +450,15 @@ class Editor ( HasPrivateFacets ):
             object facet.
         """
         if user_name != '':
+            # Record the synchronization, so that it can be recreated if the
+            # editor is rebound to a different object:
+            if self._syncs is None:
+                self._syncs = []
+
+            sync = ( user_name, editor_name, mode, is_list )
+            if sync not in self._syncs:
+                self._syncs.append( sync )
+
             key = '%s:%s' % ( user_name, editor_name )
 
             if self._no_facet_update is None:
@@ -514,7 +606,7 @@ class Editor ( HasPrivateFacets ):
         return getattr( self.object, self.name, Undefined )
 
     def _set_value ( self, value ):
-        if self.name != 'None':
+        if (self.name != 'None') and (not self._unbound):
             self.ui.do_undoable( self.__set_value, value )
 
     def __set_value ( self, value ):
@@ -175,6 +175,11 @@ class SimpleEditor ( Editor ):
         the value.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object:
+    rebindable = True
+
     #-- Facet Definitions ------------------------------------------------------
 
     # Has the left mouse button been pressed:
@@ -234,6 +239,11 @@ class TextEditor ( Editor ):
         field, containing a text representation of the object facet value.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object:
+    rebindable = True
+
     #-- Public Methods ---------------------------------------------------------
 
     def init ( self, parent ):
@@ -279,6 +289,11 @@ class ReadonlyEditor ( Editor ):
         field, containing a text representation of the object facet value.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object:
+    rebindable = True
+
     #-- Public Methods ---------------------------------------------------------
 
     def init ( self, parent ):
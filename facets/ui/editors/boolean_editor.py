@@ -96,6 +96,11 @@ class SimpleEditor ( Editor ):
     """ Simple style of editor for Boolean values, which displays a check box.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object:
+    rebindable = True
+
     #-- Public Methods ---------------------------------------------------------
 
     def init ( self, parent ):
@@ -137,6 +142,11 @@ class ReadonlyEditor ( Editor ):
         of either "True" or "False".
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object:
+    rebindable = True
+
     #-- Public Methods ---------------------------------------------------------
 
     def init ( self, parent ):
@@ -14,12 +14,24 @@ about the selected file that can be passed back to the requesting application.
 #-------------------------------------------------------------------------------
 
 from os \
-    import listdir, getcwd, mkdir, access, R_OK, W_OK
+    import listdir, getcwd, mkdir, access, stat, lstat, R_OK, W_OK
 
 from os.path \
     import abspath, exists, isdir, join, dirname, basename, splitext, getsize, \
            getmtime
 
+from stat \
+    import S_ISDIR, S_ISLNK
+
+from array \
+    import array
+
+from collections \
+    import OrderedDict
+
+from threading \
+    import Thread
+
 from time \
     import strftime, localtime
 
@@ -63,6 +75,19 @@ Megabyte = 1024 * Kilobyte
 Gigabyte = 1024 * Megabyte
 Terabyte = 1024 * Gigabyte
 
+# The number of entries in the first batch of a directory scan (each later
+# batch is twice as large as the one before it, up to 'MaxBatch' entries):
+FirstBatch = 256
+MaxBatch   = 8192
+
+# The maximum number of directory listings kept in the listing cache:
+MaxListings = 16
+
+# The flag bits recorded for each entry of a directory listing:
+IsDir    = 1
+CanRead  = 2
+CanWrite = 4
+
 # Mapping from dialog mode to access mode:
 AccessMap = {
     'open':   'read',
@@ -72,6 +97,13 @@ AccessMap = {
     'select': 'any'
 }
 
+#-------------------------------------------------------------------------------
+#  Global Data:
+#-------------------------------------------------------------------------------
+
+# The cache of the most recently used DirListing objects, keyed by path:
+listings = OrderedDict()
+
 #-------------------------------------------------------------------------------
 #  Helper functions:
 #-------------------------------------------------------------------------------
@@ -84,6 +116,71 @@ def name_sorter ( l, r ):
 
     return cmp( l.ui_name, r.ui_name )
 
+
+def size_text ( size ):
+    """ Returns the user interface text for a file whose size is *size* bytes.
+    """
+    if size < Kilobyte:
+        return ('%d bytes' % size)
+
+    if size < Megabyte:
+        return ('%.1f KB' % (float( size ) / Kilobyte))
+
+    if size < Gigabyte:
+        return ('%.1f MB' % (float( size ) / Megabyte ))
+
+    if size < Terabyte:
+        return ('%.1f GB' % (float( size ) / Gigabyte ))
+
+    return ('%.1f TB' % (float( size ) / Terabyte ))
+
+
+def modified_text ( modified ):
+    """ Returns the user interface text for the last date modified time
+        specified by *modified*.
+    """
+    return strftime( '%m/%d/%Y %I:%M:%S %p', localtime( modified ) )
+
+
+def dir_listing ( path ):
+    """ Returns the DirListing for the local directory specified by *path*. The
+        cached listing for the directory is returned if the directory has not
+        been modified since it was listed. Otherwise a new listing is created,
+        and a scan of the directory started on a background thread.
+    """
+    try:
+        mtime = stat( path ).st_mtime
+    except OSError:
+        mtime = -1.0
+
+    listing = listings.pop( path, None )
+    if (listing is not None) and ((listing.mtime != mtime) or
+                                  listing.cancelled):
+        listing.cancel()
+        listing = None
+
+    if listing is None:
+        listing = DirListing( path, mtime )
+        listing.start()
+
+    # Make the listing the most recently used one, and discard (and stop
+    # scanning) the least recently used ones if the cache is full:
+    listings[ path ] = listing
+    while len( listings ) > MaxListings:
+        listings.popitem( False )[1].cancel()
+
+    return listing
+
+
+def fs_item_for ( row ):
+    """ Returns the FSItem corresponding to the files list entry specified by
+        *row* (which may be either an FSRow or an FSItem).
+    """
+    if isinstance( row, FSRow ):
+        return row.item()
+
+    return row
+
 #-------------------------------------------------------------------------------
 #  'FSItem' class:
 #-------------------------------------------------------------------------------
@@ -199,6 +296,15 @@ class FSItem ( HasPrivateFacets ):
         raise NotImplementedError
 
 
+    def listing ( self ):
+        """ Returns the DirListing describing the contents of the item (if it
+            is a container/folder) which is being built on a background thread,
+            or **None** if the contents of the item are only available using
+            its 'children' facet. Can be overridden by a subclass.
+        """
+        return None
+
+
     def refresh ( self ):
         """ Refreshes the data for the item.
         """
@@ -311,6 +417,26 @@ class LocalFSItem ( BaseFSItem ):
         """
         return self.__class__( abspath( join( self.path, name ) ) )
 
+
+    def listing ( self ):
+        """ Returns the DirListing describing the contents of the item (if it
+            is a directory) which is being built on a background thread.
+        """
+        if self.category == 'dir':
+            return dir_listing( self.path )
+
+        return None
+
+
+    def refresh ( self ):
+        """ Refreshes the data for the item.
+        """
+        listing = listings.pop( self.path, None )
+        if listing is not None:
+            listing.cancel()
+
+        super( LocalFSItem, self ).refresh()
+
     #-- Facet Default Values ---------------------------------------------------
 
     def _category_default ( self ):
@@ -370,15 +496,16 @@ class LocalFSItem ( BaseFSItem ):
                  for drive in system_drives() ]
 
     def _children_dir ( self ):
+        listing = dir_listing( self.path )
+        listing.wait()
         dirs  = []
         files = []
-        path  = self.path
-        for name in listdir( path ):
-            item = self.__class__( join( path, name ), access = self.access )
-            if isdir( item.path ):
-                dirs.append( item )
+        for i in xrange( listing.count ):
+            row = FSRow( self, listing, i )
+            if row.is_folder:
+                dirs.append( row.item() )
             else:
-                files.append( item )
+                files.append( row.item() )
 
         return (dirs + files)
 
@@ -442,20 +569,7 @@ class LocalFSItem ( BaseFSItem ):
         return ''
 
     def _ui_size ( self ):
-        size = self.size
-        if size < Kilobyte:
-            return ('%d bytes' % size)
-
-        if size < Megabyte:
-            return ('%.1f KB' % (float( size ) / Kilobyte))
-
-        if size < Gigabyte:
-            return ('%.1f MB' % (float( size ) / Megabyte ))
-
-        if size < Terabyte:
-            return ('%.1f GB' % (float( size ) / Gigabyte ))
-
-        return ('%.1f TB' % (float( size ) / Terabyte ))
+        return size_text( self.size )
 
 
     def _ui_type_dir ( self ):
@@ -466,7 +580,7 @@ class LocalFSItem ( BaseFSItem ):
 
 
     def _ui_modified ( self ):
-        return strftime( '%m/%d/%Y %I:%M:%S %p', localtime( self.modified ) )
+        return modified_text( self.modified )
 
 
     def _ui_enabled_file ( self ):
@@ -481,6 +595,262 @@ class LocalFSItem ( BaseFSItem ):
     def _ui_enabled ( self ):
         return True
 
+#-------------------------------------------------------------------------------
+#  'DirListing' class:
+#-------------------------------------------------------------------------------
+
+class DirListing ( HasPrivateFacets ):
+    """ A compact listing of the contents of a local directory, which is built
+        by scanning the directory on a background thread.
+
+        The names of the entries are kept in a list, and their sizes,
+        modification times and flags (whether the entry is a directory, and
+        whether it can be read and written) in parallel arrays, all of which
+        are obtained using a single 'lstat' (and 'access') of each entry while
+        the directory is being scanned. Entries are added to the listing in
+        batches, and the 'added' event is fired (on the scanning thread)
+        after each batch, so that a user interface can display the entries
+        found so far while the scan continues.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The path of the directory:
+    path = Str
+
+    # The modification time of the directory when the scan was started:
+    mtime = Float( -1.0 )
+
+    # The names of the entries listed so far:
+    names = Any # List( Str )
+
+    # The sizes (in bytes) of the entries listed so far:
+    sizes = Any # array( 'd' )
+
+    # The modification times of the entries listed so far:
+    mtimes = Any # array( 'd' )
+
+    # The flags (IsDir, CanRead, CanWrite) of the entries listed so far:
+    flags = Any # array( 'B' )
+
+    # The number of entries listed so far:
+    count = Int
+
+    # Event fired (on the scanning thread) after each batch of entries has been
+    # added to the listing:
+    added = Event
+
+    # Has the scan completed?
+    done = Bool( False )
+
+    # Has the scan been cancelled?
+    cancelled = Bool( False )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, path, mtime = -1.0, **facets ):
+        """ Initializes the object.
+        """
+        self.names  = []
+        self.sizes  = array( 'd' )
+        self.mtimes = array( 'd' )
+        self.flags  = array( 'B' )
+
+        super( DirListing, self ).__init__( path = path, mtime = mtime,
+                                            **facets )
+
+
+    def start ( self ):
+        """ Starts scanning the directory on a background thread.
+        """
+        self._thread = thread = Thread( target = self.scan )
+        thread.setDaemon( True )
+        thread.start()
+
+
+    def scan ( self ):
+        """ Scans the directory on the calling thread.
+        """
+        path = self.path
+        try:
+            names = listdir( path )
+        except OSError:
+            names = []
+
+        i, n, batch = 0, len( names ), FirstBatch
+        while (i < n) and (not self.cancelled):
+            self._add( path, names[ i: i + batch ] )
+            i    += batch
+            batch = min( 2 * batch, MaxBatch )
+
+        self.done = True
+
+
+    def wait ( self ):
+        """ Waits for the scan of the directory to complete.
+        """
+        if self._thread is not None:
+            self._thread.join()
+
+
+    def cancel ( self ):
+        """ Cancels the scan of the directory (if it has not completed yet).
+        """
+        if not self.done:
+            self.cancelled = True
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _add ( self, path, names ):
+        """ Adds the directory entries specified by *names* to the listing.
+        """
+        entries = []
+        for name in names:
+            file_name = join( path, name )
+            try:
+                info = lstat( file_name )
+                if S_ISLNK( info.st_mode ):
+                    try:
+                        info = stat( file_name )
+                    except OSError:
+                        # A broken link is listed as a file:
+                        pass
+            except OSError:
+                continue
+
+            if S_ISDIR( info.st_mode ):
+                flags = IsDir
+            else:
+                flags = ((CanRead  * access( file_name, R_OK )) |
+                         (CanWrite * access( file_name, W_OK )))
+
+            entries.append( ( name, info.st_size, info.st_mtime, flags ) )
+
+        if len( entries ) > 0:
+            names, sizes, mtimes, flags = zip( *entries )
+            self.names.extend( names )
+            self.sizes.extend( sizes )
+            self.mtimes.extend( mtimes )
+            self.flags.extend( flags )
+
+            # Only update the count once all of the arrays have been extended,
+            # since the listing may be read by another thread:
+            self.count += len( entries )
+            self.added  = True
+
+#-------------------------------------------------------------------------------
+#  'FSRow' class:
+#-------------------------------------------------------------------------------
+
+class FSRow ( object ):
+    """ A lightweight entry in the files list describing a single entry of a
+        DirListing. It provides the same values as the FSItem which describes
+        the entry, but it is computed from the listing's arrays, and the FSItem
+        itself is only created (using 'item') when it is actually needed (e.g.
+        when the user selects the entry).
+    """
+
+    __slots__ = ( 'parent', 'listing', 'index' )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, parent, listing, index ):
+        """ Initializes the object from the FSItem for the directory containing
+            the entry (*parent*), the DirListing for the directory (*listing*)
+            and the index of the entry within the listing (*index*).
+        """
+        self.parent  = parent
+        self.listing = listing
+        self.index   = index
+
+
+    def item ( self ):
+        """ Returns the FSItem describing the entry.
+        """
+        is_folder = self.is_folder
+
+        return self.parent.__class__(
+            self.path,
+            access   = self.parent.access,
+            category = ( 'file', 'dir' )[ is_folder ],
+            size     = self.size,
+            modified = self.modified
+        )
+
+    #-- Property Implementations -----------------------------------------------
+
+    @property
+    def path ( self ):
+        return join( self.listing.path, self.name )
+
+    @property
+    def name ( self ):
+        return self.listing.names[ self.index ]
+
+    @property
+    def exists ( self ):
+        return True
+
+    @property
+    def is_folder ( self ):
+        return ((self.listing.flags[ self.index ] & IsDir) != 0)
+
+    @property
+    def size ( self ):
+        if self.is_folder:
+            return 0
+
+        return long( self.listing.sizes[ self.index ] )
+
+    @property
+    def type ( self ):
+        if self.is_folder:
+            return ''
+
+        return splitext( self.name )[1][1:]
+
+    @property
+    def modified ( self ):
+        return self.listing.mtimes[ self.index ]
+
+    @property
+    def ui_icon ( self ):
+        if self.is_folder:
+            return self.parent.dir_icon
+
+        return self.parent.file_icon
+
+    @property
+    def ui_name ( self ):
+        return self.name
+
+    @property
+    def ui_size ( self ):
+        if self.is_folder:
+            return ''
+
+        return size_text( self.size )
+
+    @property
+    def ui_type ( self ):
+        if self.is_folder:
+            return 'File Folder'
+
+        return (self.type + ' File')
+
+    @property
+    def ui_modified ( self ):
+        return modified_text( self.modified )
+
+    @property
+    def ui_enabled ( self ):
+        access = self.parent.access
+        flags  = self.listing.flags[ self.index ]
+        if (flags & IsDir) or (access not in ( 'read', 'write' )):
+            return True
+
+        return ((flags & ( CanWrite, CanRead )[ access == 'read' ]) != 0)
+
 #-------------------------------------------------------------------------------
 #  'FSExt' class:
 #-------------------------------------------------------------------------------
@@ -819,7 +1189,7 @@ class FavoritesAdapter ( GridAdapter ):
 #-------------------------------------------------------------------------------
 
 class FilesAdapter ( GridAdapter ):
-    """ Adapts FSItem objects for display in the Files list.
+    """ Adapts FSItem (or FSRow) objects for display in the Files list.
     """
 
     columns = [ ( 'Name',          'ui_name' ),
@@ -856,7 +1226,7 @@ class FilesAdapter ( GridAdapter ):
     def double_clicked ( self ):
         item = self.item
         if item.is_folder:
-            self.object.directory = item
+            self.object.directory = fs_item_for( item )
         elif item.ui_enabled:
             self.object.open_file()
 
@@ -950,7 +1320,10 @@ class _CustomFileDialogEditor ( UIEditor ):
     directory_name = Property
 
     # The list of directories/files in the currently selected directory:
-    files = List # ( FSItem )
+    files = List # ( FSItem or FSRow )
+
+    # The currently selected entry in the list of files (if any):
+    selected_row = Any # ( FSItem or FSRow )
 
     # The currently selected file (if any):
     selected_file = Instance( FSItem )
@@ -1042,7 +1415,7 @@ class _CustomFileDialogEditor ( UIEditor ):
                            operations     = [ 'sort' ],
                            sort_column    = factory.sort_column,
                            sort_ascending = factory.sort_ascending,
-                           selected       = 'selected_file'
+                           selected       = 'selected_row'
                        )
                 ),
                 id = 'splitter'
@@ -1155,6 +1528,14 @@ class _CustomFileDialogEditor ( UIEditor ):
 
         return ui
 
+
+    def dispose ( self ):
+        """ Disposes of the contents of the editor.
+        """
+        self._set_listing( None )
+
+        super( _CustomFileDialogEditor, self ).dispose()
+
     #-- UI preference save/restore interface -----------------------------------
 
     def restore_prefs ( self, prefs ):
@@ -1182,20 +1563,15 @@ class _CustomFileDialogEditor ( UIEditor ):
         """ Attempts to open the currently selected file (if allowed).
         """
         if self.can_open:
-            if self.factory.mode == 'create':
-                name = self.file.name
-                for item in self.directory.children:
-                    if name == item.name:
-                        if not self._check_overwrite():
-                            return
-
-                        break
+            if ((self.factory.mode == 'create') and self.file.exists and
+                (not self._check_overwrite())):
+                return
 
             self._open_done()
 
     #-- Property Implementations -----------------------------------------------
 
-    @property_depends_on( 'file_name, files' )
+    @property_depends_on( 'file_name, files[]' )
     def _get_can_open ( self ):
         file_name = self.file_name.strip()
         if file_name != '':
@@ -1246,7 +1622,7 @@ class _CustomFileDialogEditor ( UIEditor ):
             message = self.directory.create_folder( folder_name )
             if message is None:
                 self.directory.refresh()
-                self.files = self.directory.children
+                self._files_modified()
                 message    = 'Created: ' + folder_name
                 result     = True
 
@@ -1274,16 +1650,30 @@ class _CustomFileDialogEditor ( UIEditor ):
         """ Handles any facet affecting the list of files displayed being
             changed.
         """
-        files = []
-        if self.directory is not None:
-            filter = self.filter
-            files  = [ item for item in self.directory.children
-                            if item.is_folder or filter.is_item_for( item ) ]
-
+        files     = []
+        listing   = None
+        directory = self.directory
+        filter    = self.filter
+        if directory is not None:
+            listing = directory.listing()
+            if listing is None:
+                files = [ item for item in directory.children
+                          if item.is_folder or filter.is_item_for( item ) ]
+
+        self._no_row_update = True
+        self.selected_row   = None
+        self._no_row_update = False
+        self._set_listing( listing )
         self.files = files
-        if self.file not in files:
+        self._rows_added()
+
+        file = self.file
+        if ((file is None) or (file.parent != directory) or
+            (not (file.is_folder or filter.is_item_for( file )))):
             self.selected_file = None
             self._file_name_set()
+        elif listing is None:
+            self._select_row( files )
 
 
     def _recent_set ( self ):
@@ -1304,6 +1694,17 @@ class _CustomFileDialogEditor ( UIEditor ):
             do_later( self.set, selected_directory = self.directory )
 
 
+    def _selected_row_set ( self, row ):
+        """ Handles the 'selected_row' facet being changed.
+        """
+        if not self._no_row_update:
+            selected_file = self.selected_file
+            if row is None:
+                self.selected_file = None
+            elif (selected_file is None) or (row.path != selected_file.path):
+                self.selected_file = fs_item_for( row )
+
+
     def _selected_file_set ( self, selected_file ):
         """ Handles the 'selected_file' facet being changed.
         """
@@ -1416,6 +1817,51 @@ class _CustomFileDialogEditor ( UIEditor ):
 
     #-- Private Methods --------------------------------------------------------
 
+    def _set_listing ( self, listing ):
+        """ Sets the DirListing (if any) whose entries are being displayed in
+            the list of files.
+        """
+        if self._listing is not None:
+            self._listing.on_facet_set( self._rows_added, 'added',
+                                        remove = True )
+
+        self._listing   = listing
+        self._row_count = 0
+        if listing is not None:
+            listing.on_facet_set( self._rows_added, 'added', dispatch = 'ui' )
+
+
+    def _rows_added ( self ):
+        """ Adds any entries which have been added to the current DirListing
+            since the last time it was checked to the list of files.
+        """
+        listing = self._listing
+        if listing is not None:
+            start, end = self._row_count, listing.count
+            if end > start:
+                self._row_count = end
+                directory, filter = self.directory, self.filter
+                rows = [ row for row in [ FSRow( directory, listing, i )
+                                          for i in xrange( start, end ) ]
+                             if row.is_folder or filter.is_item_for( row ) ]
+                self.files.extend( rows )
+                self._select_row( rows )
+
+
+    def _select_row ( self, rows ):
+        """ Selects the entry in *rows* (if any) corresponding to the current
+            selected file, if no entry has been selected yet.
+        """
+        selected_file = self.selected_file
+        if (self.selected_row is None) and (selected_file is not None):
+            path = selected_file.path
+            for row in rows:
+                if row.path == path:
+                    self.selected_row = row
+
+                    break
+
+
     def _update_directories ( self ):
         """ Update the list of directories the user might want to look in using
             the drop down list.
@@ -72,9 +72,14 @@ class DrawableCanvasControl ( ThemedWindow ):
 
 
     def _modified_set ( self ):
-        """ Handles the content of the canvas being changed.
+        """ Handles the content of the canvas being changed by repainting only
+            the area affected by the change (if known).
         """
-        self.refresh()
+        bounds = inn( self.canvas ).dirty_bounds()
+        if bounds is None:
+            self.refresh()
+        else:
+            self.refresh( *bounds )
 
     #-- Control Event Handlers -------------------------------------------------
 
@@ -85,6 +85,12 @@ class BaseEditor ( Editor ):
     """ Base class for enumeration editors.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object (as long as its values
+    # are not obtained from the object being edited):
+    rebindable = True
+
     #-- Facet Definitions ------------------------------------------------------
 
     # Current set of enumeration names:
@@ -127,6 +133,14 @@ class BaseEditor ( Editor ):
         super( BaseEditor, self ).dispose()
 
 
+    def can_rebind ( self ):
+        """ Returns whether or not the editor can be rebound to the objects
+            contained in its UI's context.
+        """
+        return ((self._object is None) and
+                super( BaseEditor, self ).can_rebind())
+
+
     def rebuild_editor ( self ):
         """ Rebuilds the contents of the editor whenever the original factory
             object's **values** facet changes.
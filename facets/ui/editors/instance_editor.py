@@ -12,8 +12,8 @@ editor factory.
 #-------------------------------------------------------------------------------
 
 from facets.api \
-    import HasFacets, Str, List, Property, Enum, Type, Bool, Editor, toolkit, \
-           EditorFactory
+    import HasFacets, Str, List, Property, Enum, Type, Bool, Int, Editor, \
+           toolkit, EditorFactory
 
 from facets.ui.view \
     import View
@@ -27,6 +27,9 @@ from facets.ui.helper \
 from facets.ui.handler \
     import Handler
 
+from facets.ui.ui_pool \
+    import UIPool
+
 from facets.ui.instance_choice \
     import InstanceChoice, InstanceChoiceItem
 
@@ -94,6 +97,11 @@ class InstanceEditor ( EditorFactory ):
     # The ID to use with the view:
     id = Str
 
+    # The maximum number of idle views kept for reuse when the object being
+    # edited changes (0 = do not reuse views, -1 = use the FACETS_POOL
+    # default):
+    pool_size = Int( 0 )
+
     # Kind of pop-up editor (live, modal, nonmodal, wizard, ...):
     kind = AKind( 'popup' )
 
@@ -162,6 +170,9 @@ class CustomEditor ( Editor ):
     # The view to use for displaying the instance:
     view = AView
 
+    # The pool of idle views used to display the object facet's value:
+    pool = Property
+
     #-- Public Methods ---------------------------------------------------------
 
     def init ( self, parent ):
@@ -262,6 +273,9 @@ class CustomEditor ( Editor ):
         if self._ui is not None:
             self._ui.dispose()
 
+        if self._pool is not None:
+            self._pool.clear()
+
         choice = self._choice
         if choice is not None:
             choice.unset_event_handler( choose = self.update_object )
@@ -424,12 +438,16 @@ class CustomEditor ( Editor ):
         self._last_value, self._last_view = value, view
         panel = self._panel
         if panel is not None:
-            # Dispose of the previous contents of the panel:
+            # Dispose of the previous contents of the panel (returning the
+            # previous view to the pool so that it can be reused for other
+            # objects of the same type):
             if self._ui is not None:
-                self._ui.dispose()
+                self.pool.dispose( self._ui )
                 self._ui = None
-            else:
-                panel.destroy_children()
+
+            if self._label is not None:
+                self._label.destroy()
+                self._label = None
 
             panel.layout = None
 
@@ -440,7 +458,8 @@ class CustomEditor ( Editor ):
                 if value is not None:
                     str_value = self.str_value
 
-                control    = toolkit().create_label( panel, str_value )
+                control    = self._label = toolkit().create_label( panel,
+                                                                   str_value )
                 is_control = True
             else:
                 context = value.facet_context()
@@ -450,9 +469,9 @@ class CustomEditor ( Editor ):
 
                 context.setdefault( 'context', self.object )
                 context.setdefault( 'context_handler', self.ui.handler )
-                self._ui = ui = view.ui(
-                    context, panel, 'editor', value.facet_view_elements(),
-                    handler, self.factory.id
+                self._ui = ui = self.pool.ui(
+                    view, context, panel, 'editor',
+                    value.facet_view_elements(), handler, self.factory.id
                 )
                 control         = ui.control
                 is_control      = ui.is_control
@@ -504,6 +523,19 @@ class CustomEditor ( Editor ):
         """
         return (self._choice or self.control)
 
+    #-- Property Implementations -----------------------------------------------
+
+    def _get_pool ( self ):
+        """ Returns the pool of idle views used to display the object facet's
+            value.
+        """
+        if self._pool is None:
+            self._pool = UIPool()
+            if self.factory.pool_size >= 0:
+                self._pool.size = self.factory.pool_size
+
+        return self._pool
+
     #-- Private Methods --------------------------------------------------------
 
     def _get_items ( self ):
@@ -53,6 +53,9 @@ FacetsMap = {
 # The set of simple types handled by the default list view adapter:
 SimpleTypes = ( basestring, int, float, long )
 
+# The maximum number of recycled list view items kept for reuse (per type):
+MaxRecycled = 64
+
 # The set of types having list-like behavior:
 try:
     import numpy
@@ -101,6 +104,160 @@ def short_float ( value ):
     return (result if col < 0 else
             (result[ : col + 2 ] + result[ col + 2: ].rstrip( '0' )))
 
+#-------------------------------------------------------------------------------
+#  'RowHeights' class:
+#-------------------------------------------------------------------------------
+
+class RowHeights ( object ):
+    """ A prefix sum index (i.e. Fenwick tree) of the heights of a list of
+        rows, which maps a row index to its vertical offset, and a vertical
+        offset to the row containing it, in O(log n) time. Changing the height
+        of a row, or adding or deleting the last row, also takes O(log n)
+        time, but inserting or deleting any other row rebuilds the index in
+        O(n) time.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, heights = () ):
+        """ Initializes the object from the list of row *heights*.
+        """
+        self.heights = list( heights )
+        self._build()
+
+
+    def __len__ ( self ):
+        """ Returns the number of rows in the index.
+        """
+        return len( self.heights )
+
+
+    def height ( self, index ):
+        """ Returns the height of the row with the specified *index*.
+        """
+        return self.heights[ index ]
+
+
+    def set_height ( self, index, height ):
+        """ Sets the height of the row with the specified *index* to *height*.
+        """
+        delta = height - self.heights[ index ]
+        if delta != 0:
+            self.heights[ index ] = height
+            tree  = self._tree
+            n     = len( tree )
+            index += 1
+            while index < n:
+                tree[ index ] += delta
+                index         += index & (-index)
+
+
+    def start ( self, index ):
+        """ Returns the vertical offset of the row with the specified *index*
+            (i.e. the sum of the heights of all rows preceding it).
+        """
+        tree   = self._tree
+        result = 0
+        while index > 0:
+            result += tree[ index ]
+            index  -= index & (-index)
+
+        return result
+
+
+    def total ( self ):
+        """ Returns the sum of the heights of all rows.
+        """
+        return self.start( len( self.heights ) )
+
+
+    def index_at ( self, offset ):
+        """ Returns the index of the row containing the vertical *offset*, or
+            the number of rows if *offset* is past the end of the last row.
+        """
+        tree  = self._tree
+        n     = len( tree )
+        index = 0
+        bit   = self._bit
+        while bit > 0:
+            next = index + bit
+            if (next < n) and (tree[ next ] <= offset):
+                index   = next
+                offset -= tree[ next ]
+
+            bit >>= 1
+
+        return index
+
+
+    def insert ( self, index, height ):
+        """ Inserts a new row with the specified *height* before the row with
+            the specified *index*.
+        """
+        heights = self.heights
+        n       = len( heights )
+        if index < n:
+            heights.insert( index, height )
+            self._build()
+
+            return
+
+        # Appending a row only requires adding a new node to the end of the
+        # tree, covering the heights of the rows (n - lowbit, n]:
+        heights.append( height )
+        n += 1
+        self._tree.append(
+            height + self.start( n - 1 ) - self.start( n - (n & (-n)) )
+        )
+        self._set_bit()
+
+
+    def delete ( self, index ):
+        """ Deletes the row with the specified *index*.
+        """
+        heights = self.heights
+        del heights[ index ]
+        if index < len( heights ):
+            self._build()
+        else:
+            # Deleting the last row only requires removing the last node:
+            self._tree.pop()
+            self._set_bit()
+
+
+    def swap ( self, index1, index2 ):
+        """ Swaps the heights of the rows with the specified indices.
+        """
+        heights = self.heights
+        height1 = heights[ index1 ]
+        self.set_height( index1, heights[ index2 ] )
+        self.set_height( index2, height1 )
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _build ( self ):
+        """ Builds the index from the current list of row heights.
+        """
+        self._tree = tree = [ 0 ] + self.heights
+        n          = len( tree )
+        for i in xrange( 1, n ):
+            j = i + (i & (-i))
+            if j < n:
+                tree[ j ] += tree[ i ]
+
+        self._set_bit()
+
+
+    def _set_bit ( self ):
+        """ Sets the highest power of two used when searching the index.
+        """
+        n   = len( self._tree )
+        bit = 1
+        while (bit << 1) < n:
+            bit <<= 1
+
+        self._bit = bit
+
 #-------------------------------------------------------------------------------
 #  'EmptyList' class:
 #-------------------------------------------------------------------------------
@@ -281,6 +438,28 @@ class ListViewItem ( HasPrivateFacets ):
             self.ui = None
 
 
+    def can_recycle ( self ):
+        """ Returns **True** if the item's user interface can be reused to edit
+            another data item of the same type (see 'recycle'), and **False**
+            otherwise.
+
+            Can be overridden by a subclass.
+        """
+        return ((self.ui is not None) and
+                isinstance( self.item, SimpleTypes ) and
+                (self.value == self.item))
+
+
+    def recycle ( self, item ):
+        """ Rebinds the list view item to the data *item* (of the same type as
+            its current data item), reusing its existing user interface.
+
+            Can be overridden by a subclass.
+        """
+        self.item  = item
+        self.value = item
+
+
     def activate ( self ):
         """ Activates an item by making it the top in the editor's z-order.
         """
@@ -453,6 +632,14 @@ class ListViewItem ( HasPrivateFacets ):
 class _ListViewEditor ( ControlEditor ):
     """ Defines the custom control editor used to edit the contents of the
         editor value's list.
+
+        List view items are only created for the rows in or near the visible
+        part of the editor (the current 'window' of rows). The heights of all
+        rows are kept in a RowHeights index (using the height of the first row
+        as the estimated height of each row which has not been created yet),
+        which is used to position the items and to find the item at a given
+        point. Items which are scrolled out of the window are recycled for use
+        by rows scrolled into it where possible, and disposed of otherwise.
     """
 
     #-- Class Constants --------------------------------------------------------
@@ -465,8 +652,10 @@ class _ListViewEditor ( ControlEditor ):
     # The value being edited (defined by the editor):
     # value = List
 
-    # The list of list view items being edited:
-    items = List # ( SetItem )
+    # The list of list view items being edited (containing None for each row
+    # whose item has not been created because it is not near the visible part
+    # of the editor):
+    items = List # ( ListViewItem )
 
     # The current editor mode for the active item ('normal', 'hover', 'add',
     # 'delete', 'move'):
@@ -519,6 +708,10 @@ class _ListViewEditor ( ControlEditor ):
             after the parent editor has finished all initialization of the
             control.
         """
+        self._heights    = RowHeights()
+        self._window     = ( 0, 0 )
+        self._recycled   = {}
+        self._row_height = 0
         self._init_items()
         self.on_facet_set( self._value_modified, 'value[]' )
 
@@ -527,7 +720,11 @@ class _ListViewEditor ( ControlEditor ):
         """ Disposes of the editor when it is no longer needed.
         """
         for item in self.items:
-            item.dispose()
+            inn( item ).dispose()
+
+        for items in self._recycled.itervalues():
+            for item in items:
+                item.dispose()
 
         self.on_facet_set( self._value_modified, 'value[]', remove = True )
 
@@ -657,15 +854,10 @@ class _ListViewEditor ( ControlEditor ):
             self._compute_size( g )
 
         _, vyt, _, vdy = self.control.visible_bounds
-        vyb            = vyt + vdy
+        first, last    = self._materialize( g, vyt, vyt + vdy )
         active_item    = self.active_item
-        for item in self.items:
-            iyt = item.position[1]
-            iyb = iyt + item.size[1]
-            if iyt >= vyb:
-                break
-
-            if (iyb > vyt) and (item is not active_item):
+        for item in self.items[ first: last ]:
+            if (item is not None) and (item is not active_item):
                 item.paint( g )
 
         # If there is an active item, draw it last so that it will be on top of
@@ -833,9 +1025,14 @@ class _ListViewEditor ( ControlEditor ):
         """ Returns the item (if any) containing the point specified by
             (*x*,*y*).
         """
-        for item in self.items:
-            if item.is_in( x, y ):
-                return item
+        y0    = self._layout()[1]
+        items = self.items
+        if y >= y0:
+            index = self._heights.index_at( y - y0 )
+            if index < len( items ):
+                item = items[ index ]
+                if (item is not None) and item.is_in( x, y ):
+                    return item
 
         return None
 
@@ -903,7 +1100,9 @@ class _ListViewEditor ( ControlEditor ):
             # We are replacing the empty list item with a new item, so dispose
             # of the empty list item and completely replace the items list:
             item.dispose()
-            self.items = [ copy_item ]
+            self.items    = [ copy_item ]
+            self._heights = RowHeights( [ 0 ] )
+            self._window  = ( 0, 1 )
             self._rebuild_list()
         else:
             # Make the new item the same size/position as the one it is copied
@@ -920,6 +1119,9 @@ class _ListViewEditor ( ControlEditor ):
 
             # Update the editor's model with the copied item:
             self.items.insert( index, copy_item )
+            self._heights.insert( index, item.size[1] )
+            lo, hi       = self._window
+            self._window = ( lo, hi + 1 )
 
             # Increase the virtual size by the height of the new item:
             self._adjust_size( item.size[1] )
@@ -961,10 +1163,14 @@ class _ListViewEditor ( ControlEditor ):
             item.init()
             item.reset_ui()
             item.size = ( 0, 0 )
+            self._heights.set_height( 0, 0 )
             self._rebuild_list()
         else:
             # Remove the list view item from the editor model:
             del self.items[ index ]
+            self._heights.delete( index )
+            lo, hi       = self._window
+            self._window = ( lo, hi - 1 )
 
             # Decrease the virtual size by the height of the deleted item:
             self._adjust_size( -item.size[1] )
@@ -982,8 +1188,16 @@ class _ListViewEditor ( ControlEditor ):
         """
         _, vyt, _, vdy = self.control.visible_bounds
         vyb            = vyt + vdy
-        y = 0 if self.theme is None else self.theme.bounds( 0, 0, 0, 0 )[1]
-        for item in self.items:
+        y0             = self._layout()[1]
+        start          = self._heights.start
+        items          = self.items
+        lo, hi         = self._window
+        for i in xrange( lo, min( hi, len( items ) ) ):
+            item = items[ i ]
+            if item is None:
+                continue
+
+            y      = y0 + start( i )
             ix, iy = item.position
             if y != iy:
                 item.position = ( ix, y )
@@ -996,8 +1210,6 @@ class _ListViewEditor ( ControlEditor ):
                 else:
                     item.draw_position = ( ix, y )
 
-            y += item.size[1]
-
 
     def _check_delete ( self ):
         """ Checks if we can switch from 'add' to 'delete' mode after a short
@@ -1019,20 +1231,22 @@ class _ListViewEditor ( ControlEditor ):
         items = self.items
         i     = items.index( item )
         if direction > 0:
-            if (i + 1) < len( items ):
+            if ((i + 1) < len( items )) and (items[ i + 1 ] is not None):
                 item2 = items[ i + 1 ]
                 dy2   = item2.size[1]
                 if (y + dy) > (item2.position[1] + (dy2 / 2)):
                     items[ i ], items[ i + 1 ]    = item2, item
                     x, y                          = item.position
                     item.position, item2.position = ( x, y + dy2 ), ( x, y )
+                    self._heights.swap( i, i + 1 )
                     item2.move_to()
-        elif i > 0:
+        elif (i > 0) and (items[ i - 1 ] is not None):
             item2 = items[ i - 1 ]
             if y < (item2.position[1] + (item2.size[1] / 2)):
                 items[ i ], items[ i - 1 ]    = item2, item
                 x, y                          = item2.position
                 item.position, item2.position = ( x, y ), ( x, y + dy )
+                self._heights.swap( i - 1, i )
                 item2.move_to()
 
 
@@ -1052,8 +1266,169 @@ class _ListViewEditor ( ControlEditor ):
 
 
     def _compute_size ( self, g ):
-        """ Computes the sizes of all items and the total virtual size of the
-            control using the graphics context specified by *g*.
+        """ Computes the sizes of all current items and the total virtual size
+            of the control using the graphics context specified by *g*.
+        """
+        x, y, dx, tdy = self._layout()
+        items         = self.items
+        if (self._row_height == 0) and (len( items ) > 0):
+            # Use the height of the first row as the estimated height of all
+            # rows which have not been measured yet:
+            if items[0] is None:
+                items[0]     = self._item_for( 0 )
+                lo, hi       = self._window
+                self._window = ( 0, max( hi, 1 ) )
+
+            self._measure( g, items[0], dx )
+            self._row_height = height = max( items[0].size[1], 1 )
+            self._heights    = RowHeights( [
+                height if item is None else item.size[1] for item in items
+            ] )
+
+        heights = self._heights
+        lo, hi  = self._window
+        for i in xrange( lo, min( hi, len( items ) ) ):
+            item = items[ i ]
+            if item is not None:
+                bdx, bdy = item.size
+                if bdy == 0:
+                    self._measure( g, item, dx )
+                else:
+                    item.size = ( dx, bdy )
+
+                heights.set_height( i, item.size[1] )
+
+        for i in xrange( lo, min( hi, len( items ) ) ):
+            item = items[ i ]
+            if item is not None:
+                item.position = item.draw_position = (
+                    x, y + heights.start( i )
+                )
+
+        self.virtual_size = ( 150, y + heights.total() + tdy )
+        self._retab()
+
+
+    def _materialize ( self, g, yt, yb ):
+        """ Makes sure that list view items exist for all rows in or near the
+            visible vertical range from *yt* to *yb*, recycling any items which
+            are no longer near it, using the graphics context *g* to measure
+            any new items. Returns a tuple of the form: ( first, last ) giving
+            the range of indices of the visible rows.
+        """
+        items = self.items
+        n     = len( items )
+        if n == 0:
+            return ( 0, 0 )
+
+        x, y, dx, tdy = self._layout()
+        heights       = self._heights
+        first         = min( heights.index_at( max( yt - y, 0 ) ), n - 1 )
+        last          = min( heights.index_at( max( yb - y, 0 ) ) + 1, n )
+        margin        = last - first
+        lo, hi        = max( first - margin, 0 ), min( last + margin, n )
+
+        # Recycle the items which are no longer near the visible rows (except
+        # for the active item, which remains part of the window):
+        active_item          = self.active_item
+        old_lo, old_hi       = self._window
+        window_lo, window_hi = lo, hi
+        for i in xrange( old_lo, min( old_hi, n ) ):
+            if (i < lo) or (i >= hi):
+                item = items[ i ]
+                if item is active_item:
+                    window_lo = min( window_lo, i )
+                    window_hi = max( window_hi, i + 1 )
+                elif item is not None:
+                    items[ i ] = None
+                    self._recycle( item )
+
+        # Create the items for any rows which are now near the visible rows:
+        total   = heights.total()
+        created = False
+        for i in xrange( lo, hi ):
+            if items[ i ] is None:
+                items[ i ] = item = self._item_for( i )
+                self._measure( g, item, dx )
+                heights.set_height( i, item.size[1] )
+                item.position = ( x, y + heights.start( i ) )
+                created       = True
+
+        self._window = ( window_lo, window_hi )
+
+        # Make sure the controls of any new items are in the tab order:
+        if created:
+            do_after( 250, self._retab )
+
+        # Move any items whose position has been changed by the height of a
+        # preceding row being different than its estimated height:
+        if heights.total() != total:
+            self._adjust_size( heights.total() - total )
+
+        for i in xrange( window_lo, window_hi ):
+            item = items[ i ]
+            if item is None:
+                continue
+
+            iy = y + heights.start( i )
+            if (item.position[1] != iy) and (item is not active_item):
+                item.position = item.draw_position = ( x, iy )
+            elif item.draw_position == ( -1, -1 ):
+                item.draw_position = item.position
+
+        return ( first, last )
+
+
+    def _measure ( self, g, item, dx ):
+        """ Sets the size of the list view item *item* to its best height
+            (using the graphics context *g*) and the width *dx*.
+        """
+        bdx, bdy = item.best_size( g )
+        if item.min_height < 0:
+            item.min_height = bdy
+
+        item.size = ( dx, bdy )
+
+
+    def _item_for ( self, index ):
+        """ Returns a list view item for the row with the specified *index*,
+            recycling a previously used item if possible.
+        """
+        value    = self.value[ index ]
+        recycled = self._recycled.get( type( value ) )
+        if recycled:
+            item = recycled.pop()
+            item.recycle( value )
+            item.ui.control.visible = True
+
+            return item
+
+        item = self.factory.adapter( value ).set( owner = self )
+        item.init()
+
+        return item
+
+
+    def _recycle ( self, item ):
+        """ Saves the list view item *item*, which is no longer needed, for
+            later reuse if possible, and disposes of it otherwise.
+        """
+        if item.can_recycle():
+            recycled = self._recycled.setdefault( type( item.item ), [] )
+            if len( recycled ) < MaxRecycled:
+                item.ui.control.visible = False
+                item.draw_position      = ( -1, -1 )
+                recycled.append( item )
+
+                return
+
+        item.dispose()
+
+
+    def _layout ( self ):
+        """ Returns a tuple of the form: ( x, y, dx, dy ), where (x,y) is the
+            position of the first item, *dx* is the width of each item, and
+            *dy* is the height of the editor theme's bottom margin.
         """
         dx, dy = self.control.size
         x = y  = tdx = tdy = 0
@@ -1062,19 +1437,7 @@ class _ListViewEditor ( ControlEditor ):
             tdy            = y + tdy
             dx             = self.theme.bounds( 0, 0, dx, dy )[2]
 
-        for item in self.items:
-            bdx, bdy = item.size
-            if bdy == 0:
-                bdx, bdy = item.best_size( g )
-                if item.min_height < 0:
-                    item.min_height = bdy
-
-            item.size     = ( dx, bdy )
-            item.position = item.draw_position = ( x, y )
-            y            += bdy
-
-        self.virtual_size = ( 150, y + tdy )
-        self._retab()
+        return ( x, y, dx, tdy )
 
 
     def _adjust_size ( self, dy ):
@@ -1110,13 +1473,13 @@ class _ListViewEditor ( ControlEditor ):
         """ Recomputes the width of all items based upon the current control
             size.
         """
-        dx, dy = self.control.size
-        if self.theme is not None:
-            dx = self.theme.bounds( 0, 0, dx, dy )[2]
-
-        for item in self.items:
-            idx, idy  = item.size
-            item.size = ( dx, idy )
+        dx     = self._layout()[2]
+        items  = self.items
+        lo, hi = self._window
+        for item in items[ lo: hi ]:
+            if item is not None:
+                idx, idy  = item.size
+                item.size = ( dx, idy )
 
 
     def _rebuild ( self ):
@@ -1130,42 +1493,47 @@ class _ListViewEditor ( ControlEditor ):
         """ Initializes the list of items based on the current editor value.
         """
         if not self._no_update:
-            # Create a mapping of old values to their corresponding item:
-            new = []
-            old = dict(
-                [ ( id( item.item ), item ) for item in self.items ]
-            )
-            n = len( old )
-
-            # Build the list of items from the current editor value:
-            adapter = self.factory.adapter
+            # Create a mapping of old values to their corresponding item (for
+            # those rows whose item currently exists):
+            items = self.items
+            new   = []
+            old   = dict( [ ( id( item.item ), item ) for item in items
+                                                     if item is not None ] )
+            n     = len( items )
+
+            # Build the list of items from the current editor value, reusing
+            # the existing item for a value where possible (items for all other
+            # values are created when they are scrolled into view):
+            estimate = self._row_height
+            heights  = []
+            lo, hi   = n, 0
             for value in self.value:
-                item = old.get( id( value ) )
+                item = old.pop( id( value ), None )
                 if item is None:
-                    # If the value was not already being edited, create a new
-                    # item for it:
-                    item = adapter( value ).set( owner = self )
-                    item.init()
+                    heights.append( estimate )
                 else:
-                    # Else re-use the item and prevent it from being disposed:
-                    del old[ id( value ) ]
+                    lo, hi = min( lo, len( new ) ), len( new ) + 1
+                    heights.append( item.size[1] )
 
-                # Add the resulting item to the new list of items being edited:
                 new.append( item )
 
-            # Dispose of any items that are no longer in use:
+            # Recycle any items that are no longer in use:
             for item in old.values():
-                item.dispose()
+                self._recycle( item )
 
             # If there are no items now, and 'add' operations are allowed, make
             # sure that the list contains a placeholder item:
             if (len( new ) == 0) and ('add' in self.factory.operations):
-                item = adapter( empty_list ).set( owner = self )
+                item = self.factory.adapter( empty_list ).set( owner = self )
                 item.init()
                 new.append( item )
+                heights.append( 0 )
+                lo, hi = 0, 1
 
             # Set the new list of items being edited:
-            self.items = new
+            self.items    = new
+            self._heights = RowHeights( heights )
+            self._window  = ( min( lo, hi ), hi )
 
             if (len( old ) == 0) and (len( new ) == n):
                 # If we reused all old items and didn't add any new ones, then
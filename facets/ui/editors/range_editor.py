@@ -63,6 +63,12 @@ class _RangeEditor ( Editor ):
     """ Facets UI simple, slider-based integer or float value editor.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object (as long as its range is
+    # not obtained from the object being edited):
+    rebindable = True
+
     #-- Facet Definitions ------------------------------------------------------
 
     # The low end of the slider range:
@@ -172,6 +178,14 @@ class _RangeEditor ( Editor ):
         do_later( self.facet_set, _ignore_focus = False )
 
 
+    def can_rebind ( self ):
+        """ Returns whether or not the editor can be rebound to the objects
+            contained in its UI's context.
+        """
+        return ((self._low_name is None) and (self._high_name is None) and
+                super( _RangeEditor, self ).can_rebind())
+
+
     def dispose ( self ):
         """ Disposes of the contents of an editor.
         """
@@ -156,6 +156,9 @@ class SimpleEditor ( Editor ):
     # Are multiple lines of text allowed?
     multi_line = False
 
+    # The editor can be rebound to a different object:
+    rebindable = True
+
     #-- Facet Definitions ------------------------------------------------------
 
     # Function used to evaluate textual user input:
@@ -326,6 +329,11 @@ class ReadonlyTextEditor ( ReadonlyEditor ):
     """ Read-only style of text editor, which displays a read-only text field.
     """
 
+    #-- Class Constants --------------------------------------------------------
+
+    # The editor can be rebound to a different object:
+    rebindable = True
+
     #-- Public Methods ---------------------------------------------------------
 
     def init ( self, parent ):
@@ -22,7 +22,7 @@ from exceptions \
     import Exception
 
 from os \
-    import getcwd
+    import getcwd, times
 
 from os.path \
     import abspath, basename, join, isdir, splitext, exists
@@ -33,6 +33,15 @@ from glob \
 from time \
     import time
 
+from collections \
+    import deque
+
+from threading \
+    import Thread, Lock, current_thread
+
+from ctypes \
+    import pythonapi, py_object, c_long
+
 from rlcompleter \
     import Completer
 
@@ -53,6 +62,9 @@ from facets.core.debug \
 from facets.core.facet_errors \
     import FacetNotificationError
 
+from facets.core.facet_db \
+    import facet_db
+
 from facets.core.facet_base \
     import read_file, write_file
 
@@ -102,6 +114,9 @@ from facets.ui.vip_shell.helper \
     import TypeCodes, ItemSet, trim_margin, remove_color, replace_markers, \
            python_colorize, as_lines, as_string, file_class_for
 
+from facets.ui.vip_shell.history_store \
+    import HistoryStore
+
 from facets.ui.vip_shell.items.api \
     import ShellItem, CommandItem, PersistedCommandItem, GeneratedItem,      \
            ResultItem, OutputItem, ErrorItem, ExceptionItem, CalledFromItem, \
@@ -126,6 +141,22 @@ LineSeparator = '_' * 90
 # Standard sequence types:
 SequenceType = ( list, tuple )
 
+# The number of most recent persisted commands added to the history when the
+# shell is opened:
+HistoryWindow = 200
+
+# The maximum number of older persisted commands matching the history filter
+# text added to the history:
+HistoryMatches = 200
+
+# The name of the persistent history store used by a shell which does not have
+# one yet (the store can be shared by several shells):
+DefaultHistoryLog = 'vip_shell_history'
+
+# The default maximum number of characters of output retained for each block of
+# code executed by a command:
+OutputLimit = 1000000
+
 # The valid characters that can appear in a code context:
 ValidChars = (string.ascii_letters + string.digits + '_.')
 
@@ -212,6 +243,14 @@ def toggle_item ( item ):
     """
     setattr( item.object, item.name, not getattr( item.object, item.name ) )
 
+
+def cpu_time ( ):
+    """ Returns the CPU time (in seconds) used by the process so far.
+    """
+    user, system = times()[:2]
+
+    return (user + system)
+
 #-------------------------------------------------------------------------------
 #  'DebugAdapter' class:
 #-------------------------------------------------------------------------------
@@ -627,6 +666,16 @@ class VIPShellColorTableEditor ( BasicEditorFactory ):
 
 class StdFile ( HasPrivateFacets ):
     """ A pseudo-file used to temporarily override stdout or stderr.
+
+        Only the most recent *limit* characters written to the file are
+        retained (in a list of chunks), so that code producing a huge amount of
+        output does not exhaust memory. Since the file may be written to by a
+        background thread while the UI thread reads its contents, all access to
+        the retained output is synchronized.
+
+        Only output written by the thread specified by *thread* is captured.
+        Output written by any other thread (e.g. the UI thread while a command
+        executes in the background) is passed through to the original file.
     """
 
     #-- Facet Definitions ------------------------------------------------------
@@ -637,8 +686,20 @@ class StdFile ( HasPrivateFacets ):
     # The original handle for stdout/stderr:
     file = Any
 
-    # The output written to the file:
-    output = Any( [] ) # List( Str )
+    # The output written to the file (as a deque of chunks):
+    output = Any # deque( Str )
+
+    # The maximum number of characters of output retained:
+    limit = Int( OutputLimit )
+
+    # The number of characters of output currently retained:
+    size = Int
+
+    # The number of characters of output discarded because of the limit:
+    dropped = Int
+
+    # The number of characters already discarded from the oldest chunk:
+    offset = Int
 
     # Should normal Python 'print' soft spaces be allowed?
     softspace = Any( 0 )
@@ -646,6 +707,31 @@ class StdFile ( HasPrivateFacets ):
     # Flag set when data has been written to the file:
     has_data = Bool( False )
 
+    # Has the original stdout or stderr file handle been restored?
+    closed = Bool( False )
+
+    # The shell item (if any) displaying the output as it is written:
+    item = Any # Instance( ShellItem )
+
+    # The lock used to synchronize access to the output:
+    lock = Any
+
+    # The thread whose output is captured (defaults to the creating thread):
+    thread = Any
+
+    #-- Facet Default Values ---------------------------------------------------
+
+    def _output_default ( self ):
+        return deque()
+
+
+    def _thread_default ( self ):
+        return current_thread()
+
+
+    def _lock_default ( self ):
+        return Lock()
+
     #-- Facet Event Handlers ---------------------------------------------------
 
     def _type_set ( self, type ):
@@ -661,15 +747,76 @@ class StdFile ( HasPrivateFacets ):
             output written to the pseudo-file.
         """
         setattr( sys, self.type, self.file )
+        self.closed = True
+
+        return self.text()
 
-        return ''.join( self.output )
+
+    def text ( self ):
+        """ Returns the output retained by the pseudo-file (preceded by a note
+            if any output has been discarded).
+        """
+        self.lock.acquire()
+        try:
+            output = self.output
+            text   = ''.join( output )[ self.offset: ]
+            if (len( output ) > 1) or (self.offset > 0):
+                # Replace the chunks by the retained output, so that the same
+                # output is not joined again the next time it is requested:
+                output.clear()
+                output.append( text )
+                self.offset = 0
+
+            dropped = self.dropped
+        finally:
+            self.lock.release()
+
+        if dropped > 0:
+            text = ('[... %d characters of output discarded ...]\n%s' %
+                    ( dropped, text ))
+
+        return text
 
     #-- Python 'file' Interface ------------------------------------------------
 
     def write ( self, text ):
         """ Write *text* to the output.
         """
-        self.output.append( text )
+        if current_thread() is not self.thread:
+            self.file.write( text )
+
+            return
+
+        self.lock.acquire()
+        try:
+            limit = max( self.limit, 1 )
+            if len( text ) > limit:
+                self.dropped += len( text ) - limit
+                text          = text[ -limit: ]
+
+            output = self.output
+            output.append( text )
+            size = self.size + len( text )
+
+            # Discard the oldest output until the retained output fits within
+            # the limit:
+            while size > limit:
+                excess = size - limit
+                first  = len( output[0] ) - self.offset
+                if first <= excess:
+                    output.popleft()
+                    self.offset = 0
+                else:
+                    first        = excess
+                    self.offset += excess
+
+                size         -= first
+                self.dropped += first
+
+            self.size = size
+        finally:
+            self.lock.release()
+
         self.has_data = True
 
 
@@ -877,7 +1024,7 @@ class VIPShellAdapter ( PropertySheetAdapter ):
     facets = List( [
         'show_filter', 'show_status', 'show_id', 'show_icon',
         'show_line_numbers', 'theme', 'font', 'threshold', 'max_items',
-        'context', 'expander_zone'
+        'context', 'max_output', 'expander_zone'
     ] )
 
     show_filter_paint           = Str( 'Bool' )
@@ -894,6 +1041,7 @@ class VIPShellAdapter ( PropertySheetAdapter ):
     threshold_label             = Str( 'Maximum lines threshold' )
     max_items_label             = Str( 'Maximum collection items' )
     context_label               = Str( 'Traceback context lines' )
+    max_output_label            = Str( 'Maximum output characters' )
     expander_zone_label         = Str( 'Level of detail expander zone' )
 
     expander_zone_show_children = Bool( False )
@@ -907,6 +1055,7 @@ class VIPShellAdapter ( PropertySheetAdapter ):
     threshold_mode              = Str( 'popout' )
     max_items_mode              = Str( 'popout' )
     context_mode                = Str( 'popout' )
+    max_output_mode             = Str( 'popout' )
     expander_zone_mode          = Str( 'popout' )
 
 #-------------------------------------------------------------------------------
@@ -987,6 +1136,12 @@ class VIPShellHandler ( Handler ):
         self._shell_for( info ).redo_command()
 
 
+    def cancel_command ( self, info ):
+        """ Cancels the command currently executing in the background.
+        """
+        self._shell_for( info ).cancel_command()
+
+
     def edit_options ( self, info ):
         """ Handles a request to edit the editor's user preference options.
         """
@@ -1057,6 +1212,7 @@ ShellKeyBindings = KeyBindings( [
     KeyBinding( binding = 'Ctrl-b',            method = 'undo_command'     ),
     KeyBinding( binding = 'Ctrl-o',            method = 'edit_options'     ),
     KeyBinding( binding = 'Ctrl-Shift-b',      method = 'redo_command'     ),
+    KeyBinding( binding = 'Ctrl-Shift-c',      method = 'cancel_command'   ),
     KeyBinding( binding = 'Ctrl-q',            method = 'delete_code'      ),
     KeyBinding( binding = 'Ctrl-s',            method = 'save_file',
                 alt_binding = 'F2'                                         ),
@@ -1360,6 +1516,37 @@ class vipShellEditor ( UIEditor ):
     # Is timing active for the current command?
     timing = Bool( False )
 
+    # Should the Python code in a command be executed on a background thread
+    # (so that the shell remains responsive while the command executes)? Code
+    # executed in the background must not touch any UI objects (including
+    # facets of objects being displayed by a view), since the UI keeps running
+    # on the UI thread while the code executes:
+    background = Bool( False )
+
+    # Is a command currently being executed on a background thread?
+    running = Bool( False )
+
+    # Event fired (on the background thread) with a tuple of the form:
+    # ( step, result ) when a step of the command executing in the background
+    # has completed:
+    step_completed = Event
+
+    # The lock used to prevent a step of the command executing in the
+    # background from being cancelled once it has completed:
+    cancel_lock = Any
+
+    # Event fired when the command executing on a background thread should be
+    # cancelled:
+    cancel = Button( '@icons2:StopBox' )
+
+    # The maximum number of characters of output retained for each block of
+    # Python code executed:
+    max_output = Int( OutputLimit,
+        facet_value = True,
+        editor      = RangeEditor( low = 10000, high = 10000000,
+                                   body_style = 25 )
+    )
+
     # Is profiling active for the current command?
     profiling = Bool( False )
 
@@ -1446,6 +1633,12 @@ class vipShellEditor ( UIEditor ):
     # A mapping from command ids to command text (used for tracebacks):
     id_map = Any( {} ) # { id: command_text }
 
+    # The name of the persistent history store for this shell:
+    history_log = Str
+
+    # The persistent history store for this shell:
+    history_store = Instance( HistoryStore )
+
     # The shell item toolbars:
     left_toolbar   = Instance( ShellItemToolbar )
     middle_toolbar = Instance( ShellItemToolbar )
@@ -1527,6 +1720,23 @@ class vipShellEditor ( UIEditor ):
                                     'create new items instead)'
                   )
             ),
+            Item( 'background',
+                  editor = ThemedCheckboxEditor(
+                      image       = '@icons2:Gear?H98l18S58',
+                      off_image   = '@icons2:Gear?L16s',
+                      on_tooltip  = 'Commands are executed in the background '
+                                    '(click to execute them in the '
+                                    'foreground)',
+                      off_tooltip = 'Commands are executed in the foreground '
+                                    '(click to execute them in the '
+                                    'background)'
+                  )
+            ),
+            Item( 'cancel',
+                  enabled_when = 'running',
+                  tooltip      = 'Click to cancel the command executing in '
+                                 'the background'
+            ),
             Item( 'code_delete',
                   tooltip = 'Click to clear the contents of the code editor'
             ),
@@ -1665,11 +1875,12 @@ class vipShellEditor ( UIEditor ):
         self.sync_value( self.factory.send,     'send',     'to'   )
         self.sync_value( self.factory.receive,  'receive',  'from' )
 
-        # Set up the 'debug' event listeners:
+        # Set up the 'debug' event listeners (which may be triggered by code
+        # executing on a background thread):
         dofs = self.debug.on_facet_set
-        dofs( self._debug_object_modified, 'object' )
-        dofs( self._debug_stack_modified,  'stack'  )
-        dofs( self._debug_caller_modified, 'caller' )
+        dofs( self._debug_object_modified, 'object', dispatch = 'ui' )
+        dofs( self._debug_stack_modified,  'stack',  dispatch = 'ui' )
+        dofs( self._debug_caller_modified, 'caller', dispatch = 'ui' )
 
         # Attempt to set up a facet notification handler:
         try:
@@ -1716,6 +1927,13 @@ class vipShellEditor ( UIEditor ):
     def dispose ( self ):
         """ Disposes of the contents of an editor.
         """
+        # Abandon any command executing in the background:
+        if self._steps is not None:
+            self.cancel_command()
+            self._steps.close()
+            self._pending_code = None
+            self._end_command( False )
+
         for item in self.history:
             item.dispose()
 
@@ -1739,19 +1957,31 @@ class vipShellEditor ( UIEditor ):
         del self.history[:]
         del self.code_items[:]
 
+        if self.history_store is not None:
+            self.history_store.close()
+            self.history_store = None
+
     #-- UI preference save/restore interface -----------------------------------
 
     def restore_prefs ( self, prefs ):
         """ Restores any saved user preference information associated with the
             editor.
         """
-        pget         = prefs.get
-        toolbar_info = self.toolbar_info
-        items        = pget( 'shell_history' )
-        if items is not None:
-            hif          = self.history_item_for
-            self.history = [ hif( PersistedCommandItem, item )
-                             for item in items ]
+        pget             = prefs.get
+        toolbar_info     = self.toolbar_info
+        self.history_log = pget( 'shell_history_log', '' )
+        store            = self._history_store()
+
+        # Move any history saved by an older version of the shell into the
+        # history store:
+        items = pget( 'shell_history' )
+        if (items is not None) and (len( store ) == 0):
+            for item in items:
+                store.append( item )
+
+            store.save_index()
+
+        self.history = self._persisted_items( store.recent( HistoryWindow ) )
 
         color_tables = pget( 'shell_color_tables' )
         if color_tables is not None:
@@ -1776,12 +2006,14 @@ class vipShellEditor ( UIEditor ):
         self.show_value            = pget( 'shell_show_value',          False )
         self.code_locked           = pget( 'shell_code_locked',         False )
         self.log_all               = pget( 'shell_log_all',             True  )
+        self.background            = pget( 'shell_background',          False )
         self.theme                 = pget( 'shell_theme',           'default' )
         self.font                  = pget( 'shell_font',
                                            'Consolas Bold 9, Courier Bold 9')
         self.threshold             = pget( 'shell_threshold',              21 )
         self.max_items             = pget( 'shell_max_items',             100 )
         self.context               = pget( 'shell_context',                 7 )
+        self.max_output            = pget( 'shell_max_output',    OutputLimit )
         self.expander_zone         = pget( 'shell_expander_zone',   ( 0, 60 ) )
         self.initialize            = pget( 'shell_initialize',             '' )
         self.cwd                   = pget( 'shell_cwd',                    '' )
@@ -1828,10 +2060,11 @@ class vipShellEditor ( UIEditor ):
             if value[1] not in ( None, '' )
         ]
 
+        self._save_history()
+
         debug = self.debug
         result.update( dict(
-            shell_history             = [ item.item
-                                          for item in self.item_at( 'c' ) ],
+            shell_history_log         = self.history_log,
             shell_debug_enabled       = debug.debug_enabled,
             shell_info_enabled        = debug.info_enabled,
             shell_warning_enabled     = debug.warning_enabled,
@@ -1850,12 +2083,14 @@ class vipShellEditor ( UIEditor ):
             shell_show_value          = self.show_value,
             shell_code_locked         = self.code_locked,
             shell_log_all             = self.log_all,
+            shell_background          = self.background,
             shell_theme               = self.theme,
             shell_color_tables        = self.color_tables,
             shell_font                = str( self.font ),
             shell_threshold           = self.threshold,
             shell_max_items           = self.max_items,
             shell_context             = self.context,
+            shell_max_output          = self.max_output,
             shell_expander_zone       = self.expander_zone,
             shell_initialize          = self.initialize,
             shell_cwd                 = self.cwd,
@@ -1984,8 +2219,11 @@ class vipShellEditor ( UIEditor ):
         self.profiling     = True
 
 
-    def execute_file ( self, file_name ):
-        """ Executes the Python source file specified by *file_name*.
+    def execute_file ( self, file_name, deferred = False ):
+        """ Executes the Python source file specified by *file_name*. If
+            *deferred* is True and the shell command calling this method is
+            part of a command executing in the background, the file is executed
+            in the background after the shell command returns.
         """
         # Update the 'most recently used' executed files list:
         file_name  = abspath( file_name )
@@ -1997,19 +2235,38 @@ class vipShellEditor ( UIEditor ):
 
         file_names.insert( 0, file_name )
 
+        if deferred and (self._steps is not None):
+            self._deferred = file_name
+
+            return
+
         # Now execute the file:
-        now = time()
-        self.exec_file_name = file_name
-        try:
-            if self.profiling:
-                profiler.profile( execfile, file_name, self.locals )
-            else:
-                execfile( file_name, self.locals )
-        finally:
-            self.exec_file_name = ''
+        value, error, wall, cpu = self._execute( self._execfile, file_name )
+        if error is not None:
+            raise error[0], error[1], error[2]
+
+        self._executed_file( file_name, wall, cpu )
+
+
+    def cancel_command ( self ):
+        """ Cancels the command currently executing in the background (if
+            any).
+        """
+        if self._steps is None:
+            return
+
+        # Skip any remaining parts of the command, and interrupt the code the
+        # background thread is executing (if any, and if it has not already
+        # completed):
+        self._cancelled = True
+        with self.cancel_lock:
+            worker = self._worker
+            if (worker is not None) and worker.isAlive():
+                pythonapi.PyThreadState_SetAsyncExc(
+                    c_long( worker.ident ), py_object( KeyboardInterrupt )
+                )
 
-        self.status = 'Executed:  %s  in: %.2f seconds.' % (
-                      basename( file_name ), time() - now )
+        self.status = 'Cancelling command [%d]...' % self.last_command.id
 
 
     def execute_from ( self, item ):
@@ -2092,12 +2349,14 @@ class vipShellEditor ( UIEditor ):
         if not self.log_all:
             command_item = self.last_command
 
-        success = self.do_command( self.code, command_item )
-        if self.code_item.file_name == '':
-            if success and (not self.code_locked):
-                do_later( self.clear_code )
-            else:
-                do_later( self._trim_code )
+        code    = self.code
+        success = self.do_command( code, command_item )
+        if success is None:
+            # The command is executing in the background, so wait until it
+            # completes before clearing the code (if it has not been edited):
+            self._pending_code = ( self.code_item, code )
+        else:
+            self._code_executed( success )
 
 
     def do_command ( self, command, command_item = None, update = True ):
@@ -2880,6 +3139,10 @@ class vipShellEditor ( UIEditor ):
     def _color_tables_default ( self ):
         return theme_color_tables.copy()
 
+
+    def _cancel_lock_default ( self ):
+        return Lock()
+
     #-- Facet Event Handlers ---------------------------------------------------
 
     def _command_set ( self, command ):
@@ -2888,6 +3151,38 @@ class vipShellEditor ( UIEditor ):
         self.do_command( command )
 
 
+    @on_facet_set( 'filter:text' )
+    def _filter_text_modified ( self ):
+        """ Handles the history filter text being changed by adding any older
+            persisted commands matching the new filter text to the history (and
+            removing those added for the previous filter text).
+        """
+        store = self.history_store
+        if store is None:
+            return
+
+        text    = self.filter.text.strip()
+        records = set()
+        if text != '':
+            records = set( store.search( text, HistoryMatches ) )
+
+        matched = [ item for item in self._matched or []
+                    if item.record in records ]
+        removed = set( self._matched or [] ).difference( matched )
+        history = [ item for item in self.history if item not in removed ]
+        for item in removed:
+            self._records.discard( item.record )
+            item.dispose()
+
+        for item in history:
+            records.discard( getattr( item, 'record', -1 ) )
+
+        added         = self._persisted_items( sorted( records ) )
+        self._matched = matched + added
+        if (len( added ) > 0) or (len( removed ) > 0):
+            self.history = self._merge_persisted( history, added )
+
+
     def _receive_set ( self, item ):
         """ Handles a ShellItem being passed in externally.
         """
@@ -3115,6 +3410,22 @@ class vipShellEditor ( UIEditor ):
         )[ log_all ]
 
 
+    def _background_set ( self, background ):
+        """ Handles the 'background' facet being modified.
+        """
+        self.status = (
+            'Commands will be executed in the foreground.',
+            'Commands will be executed in the background (they must not '
+            'modify any UI objects).'
+        )[ background ]
+
+
+    def _cancel_set ( self ):
+        """ Handles the 'cancel' event being fired.
+        """
+        self.cancel_command()
+
+
     def _code_delete_set ( self ):
         """ Handles the 'code_delete' event being fired.
         """
@@ -3146,6 +3457,89 @@ class vipShellEditor ( UIEditor ):
 
     #-- Private Methods --------------------------------------------------------
 
+    def _history_store ( self ):
+        """ Returns the persistent history store for the shell, opening it if
+            necessary.
+        """
+        if self.history_store is None:
+            if self.history_log == '':
+                self.history_log = DefaultHistoryLog
+
+            self.history_store = HistoryStore(
+                facet_db.db( self.history_log )
+            )
+
+        return self.history_store
+
+
+    def _persisted_items ( self, records ):
+        """ Returns a list of new PersistedCommandItems for the persistent
+            history store commands whose indices are specified by *records*.
+        """
+        if self._records is None:
+            self._records = set()
+
+        self._records.update( records )
+        get = self.history_store.get
+        hif = self.history_item_for
+
+        return [ hif( PersistedCommandItem, get( record ), record = record )
+                 for record in records ]
+
+
+    def _merge_persisted ( self, history, items ):
+        """ Returns the result of inserting the list of PersistedCommandItems
+            specified by *items* into the list of *history* items, so that all
+            persisted commands remain in the same order as in the persistent
+            history store.
+        """
+        result = []
+        items  = items[:]
+        items.reverse()
+        last   = 0
+        for item in history:
+            record = getattr( item, 'record', -1 )
+            if record >= 0:
+                while (len( items ) > 0) and (items[-1].record < record):
+                    result.append( items.pop() )
+
+                last = len( result ) + 1
+
+            result.append( item )
+
+        items.reverse()
+        result[ last: last ] = items
+
+        return result
+
+
+    def _save_history ( self ):
+        """ Saves any changes to the commands in the history to the persistent
+            history store.
+        """
+        store    = self._history_store()
+        commands = self.item_at( 'c' )
+        live     = set( [ item.record for item in commands ] )
+        for record in self._records or ():
+            if (record not in live) and (not store.is_deleted( record )):
+                store.delete( record )
+
+        for item in commands:
+            record = item.record
+            if record >= 0:
+                if store.is_deleted( record ):
+                    record = -1
+                elif store.get( record ) != item.item:
+                    store.delete( record )
+                    record = -1
+
+            if record < 0:
+                item.record = store.append( item.item )
+
+        self._records = set( [ item.record for item in commands ] )
+        store.save_index()
+
+
     def _next_id ( self ):
         """ Returns the next available shell item id.
         """
@@ -3166,6 +3560,47 @@ class vipShellEditor ( UIEditor ):
             created using *command* as its content. The new command item is then
             added to the history along with any items created as a result of
             executing the command.
+
+            Returns whether all parts of the command succeeded. However, if
+            the 'background' facet is True, the Python code in the command is
+            executed on a background thread, and None is returned immediately
+            (the items created by the command are added to the history as they
+            are produced). Such code must not touch any UI objects, and only
+            the output it writes on its own thread is captured.
+        """
+        if self._steps is not None:
+            self.status = ('Command [%d] is still executing (wait for it to '
+                           'complete or cancel it).' % self.active_command.id)
+
+            return False
+
+        steps = self._command_steps( command, command_item, update )
+        if self.background:
+            self._steps  = steps
+            self._step   = None
+            self.running = True
+            self._resume_command( None, None )
+
+            return None
+
+        result = None
+        while True:
+            step = steps.send( result )
+            if isinstance( step, bool ):
+                return step
+
+            result = self._execute( *step )
+
+
+    def _command_steps ( self, command, command_item, update ):
+        """ Returns a generator which processes the command specified by
+            *command* (see '_do_command' for a description of the arguments).
+
+            Each time some Python code in the command needs to be executed, the
+            generator yields a tuple of the form: ( function, arg, ... ), and
+            expects to be sent back the result of calling '_execute' with it.
+            Once the command has been processed, the generator yields a boolean
+            indicating whether all parts of the command succeeded.
         """
         lines = remove_color( command ).split( '\n' )
         lod   = 1
@@ -3182,8 +3617,10 @@ class vipShellEditor ( UIEditor ):
         elif update:
             command_item.item = content
 
+        background        = self.background
         items             = [ command_item ]
-        failed            = executed = False
+        shown             = 0
+        failed            = executed = streamed = False
         callbacks         = []
         result            = Undefined
         start_time        = time()
@@ -3193,18 +3630,33 @@ class vipShellEditor ( UIEditor ):
         # Set a reference to the currently executing command:
         self.active_command = self.last_command = command_item
 
+        # When executing in the background, show the command immediately:
+        if background and new_command:
+            self.history.append( command_item )
+            shown = 1
+
         # Process each shell command and Python code chunk in the command:
         command_index = 0
         for is_shell_command, command_text in commands:
+            if self._cancelled:
+                # Skip the rest of a cancelled command:
+                failed = True
+                break
+
             command_index += 1
             command_text   = remove_color( command_text )
 
             # Create stdout/stderr interceptors for the next command:
-            stdout = StdFile( type = 'stdout' )
-            stderr = StdFile( type = 'stderr' )
+            stdout = StdFile( type = 'stdout', limit = self.max_output )
+            stderr = StdFile( type = 'stderr', limit = self.max_output )
+            if background:
+                self._std_files = ( stdout, stderr )
+                for std_file in self._std_files:
+                    std_file.on_facet_set( self._output_written, 'has_data',
+                                           dispatch = 'ui' )
 
             # Initialize command execution time:
-            delta = 0.0
+            delta = cpu = 0.0
 
             if is_shell_command:
                 # Process a shell command:
@@ -3220,23 +3672,48 @@ class vipShellEditor ( UIEditor ):
                 except Exception:
                     failed = True
                     items.append( self._exception() )
+
+                # Execute any Python source file the command deferred:
+                file_name, self._deferred = self._deferred, None
+                if file_name is not None:
+                    value, error, delta, cpu = yield ( self._execfile,
+                                                       file_name )
+                    executed = True
+                    if error is None:
+                        self._executed_file( file_name, delta, cpu )
+                    else:
+                        failed = True
+                        items.append( self._exception_for( *error ) )
             else:
                 # Process normal Python code:
                 module = '<shell:%d>' % command_item.id
+                code   = None
                 try:
-                    # Attempt to execute the command (and save its result):
-                    code = compile( command_text, module, 'eval' )
-                    now  = time()
-                    if self.profiling:
-                        value = profiler.profile( eval, code, self.locals )
-                    else:
-                        value = eval( code, self.locals )
+                    try:
+                        # Attempt to compile the command as an expression (so
+                        # that its result can be saved):
+                        code = compile( command_text, module, 'eval' )
+                        mode = 'eval'
+                    except SyntaxError:
+                        code = compile( command_text + '\n', module, 'exec' )
+                        mode = 'exec'
+                except Exception:
+                    failed = True
+                    items.append( self._exception( command_item ) )
 
-                    delta    = time() - now
+                if code is not None:
+                    value, error, delta, cpu = yield ( eval, code,
+                                                       self.locals )
                     executed = True
-
-                    # Add the result (if any) to the list of history items:
-                    if value is not None:
+                    if error is not None:
+                        type, value, tb_entry = error
+                        failed = True
+                        items.append( self._exception_for(
+                            type, value, tb_entry, command_item ) )
+                    elif mode == 'exec':
+                        self.id_map[ command_item.id ] = command_text
+                    elif value is not None:
+                        # Add the result to the list of history items:
                         if isinstance( value, ShellItem ):
                             items.append( value )
                         elif self._all_shell_items( value ):
@@ -3245,36 +3722,23 @@ class vipShellEditor ( UIEditor ):
                             result = value
                             items.append( self.history_item_for(
                                               ResultItem, result, lod = 1 ) )
-                except SyntaxError:
-                    try:
-                        code = compile( command_text + '\n', module, 'exec' )
-                        now  = time()
-                        if self.profiling:
-                            profiler.profile( eval, code, self.locals )
-                        else:
-                            exec code in self.locals
-
-                        self.id_map[ command_item.id ] = command_text
-                        delta    = time() - now
-                        executed = True
-                    except SyntaxError:
-                        failed = True
-                        items.append( self._exception( command_item ) )
-                    except Exception:
-                        executed = failed = True
-                        items.append( self._exception( command_item ) )
-                except Exception:
-                    executed = failed = True
-                    items.append( self._exception( command_item ) )
 
             # Add the contents of stdout/stderr (if any) to the list of history
             # items:
             items.extend( self._output( stdout ) )
             items.extend( self._output( stderr ) )
+            streamed |= ((stdout.item is not None) or
+                         (stderr.item is not None))
 
             # Log the execution time (if requested and necessary):
             if self.timing and (delta >= 0.001):
-                items.append( self._log_time( command_index, delta ) )
+                items.append( self._log_time( command_index, delta, cpu ) )
+
+            # When executing in the background, show the items created so far:
+            if background and (len( items ) > shown):
+                self.append_items( [ self._shell_item( item, command_item )
+                                     for item in items[ shown: ] ] )
+                shown = len( items )
 
         # Indicate no command is currently executing:
         self.active_command = None
@@ -3322,18 +3786,21 @@ class vipShellEditor ( UIEditor ):
         if new_command:
             # Add the new command and the items it created to the end of the
             # history:
-            self.history.extend( items )
+            if shown > 0:
+                self.append_items( items[ shown: ] )
+            else:
+                self.history.extend( items )
 
             # Save the last id for later arrow key retrieval by the user:
             self.scroll_id = items[-1].id + 1
             self.selected  = None
-        elif len( items ) == 1:
+        elif (len( items ) == 1) and (not streamed):
             # When re-executing an existing command which does not produce any
             # new items, supress the command and re-use its id:
             self.id -= 1
         else:
             # Otherwise, add all new items to the end of the existing command:
-            self.append_items( items[ 1: ] )
+            self.append_items( items[ max( shown, 1 ): ] )
 
         # If there are any post history item processing callbacks, do them now:
         items = []
@@ -3361,8 +3828,169 @@ class vipShellEditor ( UIEditor ):
             self.status = ('Executed command [%d] in %.2f seconds.' %
                            ( command_item.id, time() - start_time ))
 
-        # Return whether all commands succeeded or any caused an exception:
-        return ((not failed) and self.clear_buffer)
+        # Yield whether all commands succeeded or any caused an exception:
+        yield ((not failed) and self.clear_buffer)
+
+
+    def _execute ( self, function, *args ):
+        """ Calls *function* with the specified *args* on the current thread
+            (profiling the call if requested), and returns a tuple of the form:
+            ( value, error, wall, cpu ), where *value* is the value returned,
+            *error* is the 'exc_info' tuple for any exception raised (or None),
+            and *wall* and *cpu* are the elapsed and CPU time (in seconds) used
+            by the call.
+        """
+        value    = error = None
+        now, cpu = time(), cpu_time()
+        try:
+            if self.profiling:
+                value = profiler.profile( function, *args )
+            else:
+                value = function( *args )
+        except ( Exception, KeyboardInterrupt ):
+            error = exc_info()
+
+        return ( value, error, time() - now, cpu_time() - cpu )
+
+
+    def _execute_in_background ( self, step ):
+        """ Executes the *step* of the command currently executing in the
+            background (on a background thread), then resumes the command with
+            the result.
+        """
+        result = None
+        while True:
+            try:
+                if result is None:
+                    result = self._execute( *step )
+
+                # Prevent the step from being cancelled from now on, and
+                # discard any cancellation which has not been raised yet:
+                with self.cancel_lock:
+                    self._worker = None
+                    pythonapi.PyThreadState_SetAsyncExc(
+                        c_long( current_thread().ident ), None
+                    )
+
+                break
+            except:
+                # The command was cancelled after the code being executed had
+                # already completed:
+                if result is None:
+                    result = ( None, exc_info(), 0.0, 0.0 )
+
+        self.step_completed = ( step, result )
+
+
+    @on_facet_set( 'step_completed', dispatch = 'ui' )
+    def _step_completed_modified ( self, completed ):
+        """ Handles a step of the command executing in the background being
+            completed.
+        """
+        self._resume_command( *completed )
+
+
+    def _resume_command ( self, step, result ):
+        """ Resumes processing the command executing in the background, after
+            its *step* (a tuple yielded by '_command_steps') has been executed
+            with the specified *result*.
+        """
+        # Ignore a step which has already been completed (which can only
+        # happen if the step was cancelled just as it completed):
+        if (self._steps is None) or (step is not self._step):
+            return
+
+        try:
+            step = self._steps.send( result )
+        except:
+            self._end_command( False )
+
+            raise
+
+        if isinstance( step, bool ):
+            self._end_command( step )
+        else:
+            self._step = step
+            with self.cancel_lock:
+                self._worker = worker = Thread(
+                    target = self._execute_in_background, args = ( step, )
+                )
+
+            worker.setDaemon( True )
+
+            # Only capture the output written by the step's own thread:
+            for std_file in self._std_files:
+                std_file.thread = worker
+
+            worker.start()
+
+
+    def _end_command ( self, success ):
+        """ Ends the command executing in the background, where *success*
+            indicates whether all parts of the command succeeded.
+        """
+        self._steps     = self._step = self._worker = self._std_files = None
+        self._cancelled = self.running = False
+        if self._pending_code is not None:
+            code_item, code    = self._pending_code
+            self._pending_code = None
+            if (code_item is self.code_item) and (code == self.code):
+                self._code_executed( success )
+
+
+    def _code_executed ( self, success ):
+        """ Clears or trims the code buffer after the code in it has been
+            executed, depending upon whether it executed successfully or not.
+        """
+        if self.code_item.file_name == '':
+            if success and (not self.code_locked):
+                do_later( self.clear_code )
+            else:
+                do_later( self._trim_code )
+
+
+    def _output_written ( self, object, has_data ):
+        """ Handles some code executing in the background writing to the
+            StdFile *object* by updating the history item displaying its
+            output.
+        """
+        if has_data and (not object.closed):
+            object.has_data = False
+            text            = object.text()
+            if text == '':
+                return
+
+            if object.item is not None:
+                object.item.item = text
+            else:
+                klass = OutputItem
+                if object.type == 'stderr':
+                    klass = ErrorItem
+
+                object.item = item = self.history_item_for( klass, text,
+                                                            lod = 1 )
+                self.append_items( self._shell_item( item,
+                                                     self.active_command ) )
+
+
+    def _execfile ( self, file_name ):
+        """ Executes the Python source file specified by *file_name* using the
+            shell's locals.
+        """
+        self.exec_file_name = file_name
+        try:
+            execfile( file_name, self.locals )
+        finally:
+            self.exec_file_name = ''
+
+
+    def _executed_file ( self, file_name, wall, cpu ):
+        """ Updates the shell status to show that the Python source file
+            *file_name* was executed in *wall* seconds, using *cpu* seconds of
+            CPU time.
+        """
+        self.status = ('Executed:  %s  in: %.2f seconds (CPU: %.2f seconds).' %
+                       ( basename( file_name ), wall, cpu ))
 
 
     def _exception ( self, command_item = None ):
@@ -3411,6 +4039,13 @@ class vipShellEditor ( UIEditor ):
         """
         # Get the content of the file:
         text = std_file()
+        if std_file.item is not None:
+            # Update the item already displaying the output written while the
+            # code was executing in the background:
+            std_file.item.item = text
+
+            return []
+
         if text == '':
             # Return nothing if the file was empty:
             return []
@@ -3513,14 +4148,15 @@ class vipShellEditor ( UIEditor ):
         )
 
 
-    def _log_time ( self, index, time ):
+    def _log_time ( self, index, time, cpu ):
         """ Returns a history item for the time it took to execute some code,
-            where *index* is the command index, and *time* is the time it took
-            to execute the command (in seconds).
+            where *index* is the command index, *time* is the time it took to
+            execute the command (in seconds), and *cpu* is the CPU time used
+            while executing it (in seconds).
         """
         return self.history_item_for( ErrorItem,
-            '\x001Executed command \x00B#%d\x001 in: \x00B%.3f\x001 seconds' %
-            ( index, time )
+            '\x001Executed command \x00B#%d\x001 in: \x00B%.3f\x001 seconds '
+            '(CPU: \x00B%.3f\x001 seconds)' % ( index, time, cpu )
         )
 
 
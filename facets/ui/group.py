@@ -186,6 +186,13 @@ class Group ( ViewSubElement ):
     # for its Item, and the default spacing determined by the toolkit.
     padding = Padding
 
+    # Should the pages of a 'tabbed' or 'fold' layout group only be created the
+    # first time they are displayed? The pages of such a group can also be
+    # discarded while they are not displayed (see UI.release_pages), and are
+    # then re-created the next time they are displayed. If the layout of the
+    # group is not 'tabbed' or 'fold', this attribute is ignored.
+    lazy = Bool( False )
+
     #-- Public Methods ---------------------------------------------------------
 
     def __init__ ( self, *values, **facets ):
@@ -656,6 +663,9 @@ class ShadowGroup ( Group ):
     # The alignment of the toolbar controls along the non-layout axis:
     alignment = ShadowDelegate
 
+    # Should the group's pages be created lazily?
+    lazy = ShadowDelegate
+
     #-- Public Methods ---------------------------------------------------------
 
     def get_content ( self, allow_groups = True ):
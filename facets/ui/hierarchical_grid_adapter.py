@@ -2,6 +2,12 @@
 Defines the HierarchicalGridAdapter class, a subclass of the GridAdapter class
 that supports hierarchical data (i.e. items that may or may not have child
 items).
+
+Rather than maintaining a flattened list of all visible items, each level of
+the hierarchy keeps a SpanIndex (a Fenwick tree) of the number of visible rows
+spanned by each of its items. Mapping a row number to its HierarchyItem is then
+O(log n) per hierarchy level, and expanding, collapsing or editing the children
+of an item only updates the spans of the item's ancestors.
 """
 
 #-------------------------------------------------------------------------------
@@ -26,6 +32,71 @@ from grid_adapter \
 # The number of pixels/hierarchy level:
 INDENT = 15
 
+#-------------------------------------------------------------------------------
+#  'SpanIndex' class:
+#-------------------------------------------------------------------------------
+
+class SpanIndex ( object ):
+    """ A Fenwick (binary indexed) tree over the number of visible rows spanned
+        by each item in a list of sibling HierarchyItems. It supports updating
+        the span of an item and finding the item containing a given row in
+        O(log n) time.
+    """
+
+    __slots__ = ( 'tree', 'total', 'step' )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, spans ):
+        """ Initializes the index from the list of item *spans* in O(n) time.
+        """
+        n    = len( spans )
+        tree = [ 0 ] + spans
+        for i in xrange( 1, n + 1 ):
+            j = i + (i & -i)
+            if j <= n:
+                tree[ j ] += tree[ i ]
+
+        step = 1
+        while (step << 1) <= n:
+            step <<= 1
+
+        self.tree  = tree
+        self.total = sum( spans )
+        self.step  = step
+
+
+    def add ( self, index, delta ):
+        """ Adds *delta* to the span of the item at the specified *index*.
+        """
+        tree        = self.tree
+        n           = len( tree ) - 1
+        index      += 1
+        self.total += delta
+        while index <= n:
+            tree[ index ] += delta
+            index         += (index & -index)
+
+
+    def find ( self, row ):
+        """ Returns a tuple of the form: ( index, offset ), where *index* is the
+            index of the item whose span contains *row* and *offset* is the
+            offset of *row* within that span.
+        """
+        tree  = self.tree
+        n     = len( tree ) - 1
+        index = 0
+        step  = self.step
+        while step > 0:
+            next = index + step
+            if (next <= n) and (tree[ next ] <= row):
+                index  = next
+                row   -= tree[ next ]
+
+            step >>= 1
+
+        return ( index, row )
+
 #-------------------------------------------------------------------------------
 #  'HierarchyItem' class:
 #-------------------------------------------------------------------------------
@@ -55,6 +126,19 @@ class HierarchyItem ( HasPrivateFacets ):
     # The grid adapter this item is associated with:
     grid_adapter = Any # Instance( HierarchicalGridAdapter )
 
+    # The item's parent item (None for a root level item):
+    parent = Any # Instance( HierarchyItem )
+
+    # The index of the item within its parent's list of children:
+    index = Int
+
+    # The number of visible rows spanned by the item (i.e. the item itself plus
+    # all of its visible descendants):
+    span = Property
+
+    # The SpanIndex for the item's children:
+    spans = Any # SpanIndex
+
     #-- Facet Default Values ---------------------------------------------------
 
     def _is_open_default ( self ):
@@ -79,6 +163,13 @@ class HierarchyItem ( HasPrivateFacets ):
 
         return visible
 
+
+    def _get_span ( self ):
+        if self.is_open:
+            return (1 + self.spans.total)
+
+        return 1
+
     #-- Facet Event Handlers ---------------------------------------------------
 
     def _is_open_set ( self, is_open ):
@@ -87,6 +178,10 @@ class HierarchyItem ( HasPrivateFacets ):
         if is_open and (self.children is None):
             self._init_children()
 
+        if self.spans is not None:
+            total = self.spans.total
+            self._span_modified( total if is_open else -total )
+
         self.grid_adapter.is_open( self.item, is_open )
         self.grid_adapter.changed = True
 
@@ -98,14 +193,17 @@ class HierarchyItem ( HasPrivateFacets ):
         items        = []
         level        = self.level + 1
         grid_adapter = self.grid_adapter
-        for item in self.grid_adapter.children( self.item ):
+        for i, item in enumerate( self.grid_adapter.children( self.item ) ):
             hitem = current.get( item )
             if hitem is None:
                 hitem = HierarchyItem( item         = item,
                                        grid_adapter = grid_adapter,
-                                       level        = level )
+                                       level        = level,
+                                       parent       = self,
+                                       index        = i )
             else:
                 del current[ item ]
+                hitem.index = i
 
             items.append( hitem )
 
@@ -113,7 +211,12 @@ class HierarchyItem ( HasPrivateFacets ):
         for hitem in current.itervalues():
             hitem.dispose()
 
+        total         = self.spans.total
         self.children = items
+        self.spans    = SpanIndex( [ hitem.span for hitem in items ] )
+        if self.is_open:
+            self._span_modified( self.spans.total - total )
+
         self.grid_adapter.changed = True
 
     #-- Public Methods ---------------------------------------------------------
@@ -122,12 +225,21 @@ class HierarchyItem ( HasPrivateFacets ):
         """ Disposes of the object when it is no longer needed.
         """
         if self.children is not None:
-            self.children = None
+            self.children = self.spans = None
             self.grid_adapter.on_children_changed(
                 self.item, self._children_modified, True
             )
 
-        self.grid_adapter = None
+        self.grid_adapter = self.parent = None
+
+
+    def child_span_modified ( self, index, delta ):
+        """ Handles the span of the child item at the specified *index*
+            changing by *delta* rows.
+        """
+        self.spans.add( index, delta )
+        if self.is_open:
+            self._span_modified( delta )
 
     #-- Private Methods --------------------------------------------------------
 
@@ -136,16 +248,30 @@ class HierarchyItem ( HasPrivateFacets ):
         """
         grid_adapter  = self.grid_adapter
         level         = self.level + 1
-        self.children = [
+        self.children = children = [
             HierarchyItem( item         = child,
                            grid_adapter = grid_adapter,
-                           level        = level )
-            for child in grid_adapter.children( self.item )
+                           level        = level,
+                           parent       = self,
+                           index        = i )
+            for i, child in enumerate( grid_adapter.children( self.item ) )
         ]
+        self.spans = SpanIndex( [ child.span for child in children ] )
         grid_adapter.on_children_changed(
             self.item, self._children_modified, False
         )
 
+
+    def _span_modified ( self, delta ):
+        """ Propagates a change of *delta* rows in the span of this item to its
+            parent (or to the grid adapter for a root level item).
+        """
+        if delta != 0:
+            if self.parent is not None:
+                self.parent.child_span_modified( self.index, delta )
+            elif self.grid_adapter is not None:
+                self.grid_adapter.root_span_modified( self.index, delta )
+
 #-------------------------------------------------------------------------------
 #  'HierarchicalGridAdapter' class:
 #-------------------------------------------------------------------------------
@@ -172,6 +298,9 @@ class HierarchicalGridAdapter ( GridAdapter ):
     # The current flattened, visible portion of the object hierarchy:
     visible_items = Property
 
+    # The SpanIndex for the root level items of the hierarchy:
+    spans = Any # SpanIndex
+
     #-- Public Methods (must be overridden by subclasses) ----------------------
 
     def is_open ( self, object, is_open = None ):
@@ -213,8 +342,13 @@ class HierarchicalGridAdapter ( GridAdapter ):
     def _all_items_default ( self ):
         self.object.on_facet_set( self._root_modified, self.name + '[]' )
 
-        return [ HierarchyItem( item = item, grid_adapter = self )
-                 for item in getattr( self.object, self.name ) ]
+        items = [
+            HierarchyItem( item = item, grid_adapter = self, index = i )
+            for i, item in enumerate( getattr( self.object, self.name ) )
+        ]
+        self.spans = SpanIndex( [ item.span for item in items ] )
+
+        return items
 
     #-- Property Implementations -----------------------------------------------
 
@@ -234,12 +368,15 @@ class HierarchicalGridAdapter ( GridAdapter ):
         """
         current = dict( [ ( item.item, item ) for item in self.all_items ] )
         items   = []
-        for item in getattr( self.object, self.name ):
+        for i, item in enumerate( getattr( self.object, self.name ) ):
             hitem = current.get( item )
             if hitem is None:
-                hitem = HierarchyItem( item = item, grid_adapter = self )
+                hitem = HierarchyItem( item         = item,
+                                       grid_adapter = self,
+                                       index        = i )
             else:
                 del current[ item ]
+                hitem.index = i
 
             items.append( hitem )
 
@@ -248,15 +385,42 @@ class HierarchicalGridAdapter ( GridAdapter ):
             hitem.dispose()
 
         self.all_items = items
+        self.spans     = SpanIndex( [ item.span for item in items ] )
         self.changed   = True
 
+    #-- Public Methods ---------------------------------------------------------
+
+    def root_span_modified ( self, index, delta ):
+        """ Handles the span of the root level item at the specified *index*
+            changing by *delta* rows.
+        """
+        if self.spans is not None:
+            self.spans.add( index, delta )
+
+
+    def visible_item ( self, row ):
+        """ Returns the HierarchyItem displayed in the specified *row*.
+        """
+        if (row < 0) or (row >= self.len()):
+            raise IndexError( row )
+
+        spans, items = self.spans, self.all_items
+        while True:
+            index, row = spans.find( row )
+            item       = items[ index ]
+            if row == 0:
+                return item
+
+            row         -= 1
+            spans, items = item.spans, item.children
+
     #-- Private Methods --------------------------------------------------------
 
     def get_item ( self, row ):
         """ Returns the value of the specified row item.
         """
         try:
-            return self.visible_items[ row ].item
+            return self.visible_item( row ).item
         except:
             return None
 
@@ -264,7 +428,11 @@ class HierarchicalGridAdapter ( GridAdapter ):
     def len ( self ):
         """ Returns the number of items in the associated facet value.
         """
-        return len( self.visible_items )
+        # Make sure the hierarchy (and its span index) has been initialized:
+        if self.spans is None:
+            self.all_items
+
+        return self.spans.total
 
 
     def get_indent ( self, row, column ):
@@ -275,7 +443,7 @@ class HierarchicalGridAdapter ( GridAdapter ):
             return super( HierarchicalGridAdapter, self ).get_indent( row,
                                                                       column )
 
-        return (self.visible_items[ row ].level * INDENT)
+        return (self.visible_item( row ).level * INDENT)
 
 
     def get_image ( self, row, column ):
@@ -288,7 +456,7 @@ class HierarchicalGridAdapter ( GridAdapter ):
             return super( HierarchicalGridAdapter, self ).get_image( row,
                                                                      column )
 
-        item = self.visible_items[ row ]
+        item = self.visible_item( row )
         if not item.has_children:
             return None
 
@@ -306,7 +474,7 @@ class HierarchicalGridAdapter ( GridAdapter ):
             return super( HierarchicalGridAdapter, self ).get_clicked( row,
                                                                        column )
 
-        item = self.visible_items[ row ]
+        item = self.visible_item( row )
         if item.has_children:
             item.is_open = not item.is_open
 
@@ -337,10 +505,9 @@ class HierarchicalGridAdapter ( GridAdapter ):
         if not sort_ascending:
             matches.reverse()
 
-        visible_items = self.visible_items
-        result        = []
+        result = []
         for index, item_item in matches:
-            item = visible_items[ index ]
+            item = self.visible_item( index )
             result.append( ( index, item_item ) )
             if item.is_open:
                 result.extend(
@@ -0,0 +1,463 @@
+"""
+Defines the concrete 'null' toolkit implementation of the Control class.
+
+The null toolkit has no real controls, so each NullControl adapts a NullWidget,
+a plain Python object which records the state assigned to it (its parent,
+children, layout, value, size and so on). This allows complete Facets user
+interfaces to be created, updated and disposed of without a GUI (e.g. for
+benchmarking or testing purposes).
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See section (A) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+from facets.ui.adapters.control \
+    import Control
+
+from facets.ui.null.pyface.image_resource \
+    import bitmap_size
+
+from layout \
+    import adapted_layout
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def adapted_control ( control ):
+    """ Returns a correctly adapted version of the specified control.
+    """
+    if control is None:
+        return None
+
+    return control_adapter( control )
+
+
+def control_adapter ( control ):
+    """ Returns the control adapter associated with the specified control.
+    """
+    adapter = getattr( control, 'adapter', None )
+    if adapter is None:
+        adapter = NullControl( control )
+
+    return adapter
+
+#-------------------------------------------------------------------------------
+#  'NullWidget' class:
+#-------------------------------------------------------------------------------
+
+class NullWidget ( object ):
+    """ The 'null' toolkit equivalent of a GUI toolkit control.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, parent = None, kind = 'control', value = None ):
+        """ Initializes the object.
+        """
+        self.kind     = kind
+        self.parent   = None
+        self.children = []
+        self.layout   = None
+        self.value    = value
+        self.items    = []
+        self.visible  = True
+        self.enabled  = True
+        self.size     = ( 0, 0 )
+        self.position = ( 0, 0 )
+        self.handlers = {}
+        self.set_parent( parent )
+
+
+    def set_parent ( self, parent ):
+        """ Makes the widget a child of the specified *parent* widget.
+        """
+        if parent is not self.parent:
+            if self.parent is not None:
+                self.parent.children.remove( self )
+
+            self.parent = parent
+            if parent is not None:
+                parent.children.append( self )
+
+
+    def destroy ( self ):
+        """ Destroys the widget and all of its children.
+        """
+        for child in self.children[:]:
+            child.destroy()
+
+        self.set_parent( None )
+        self.layout = None
+
+#-------------------------------------------------------------------------------
+#  'NullControl' class:
+#-------------------------------------------------------------------------------
+
+class NullControl ( Control ):
+    """ Defines the concrete 'null' toolkit implementation of the Control
+        class.
+    """
+
+    #-- Concrete Methods -------------------------------------------------------
+
+    def refresh ( self, x = None, y = None, dx = None, dy = None ):
+        pass
+
+
+    def update ( self ):
+        pass
+
+
+    def set_focus ( self ):
+        pass
+
+
+    def set_mouse_focus ( self ):
+        pass
+
+
+    def popup_menu ( self, menu, x, y ):
+        pass
+
+
+    def bitmap_size ( self, bitmap ):
+        return bitmap_size( bitmap )
+
+
+    def text_size ( self, text ):
+        """ Returns the size (dx,dy) of the specified text string, assuming a
+            fixed size font.
+        """
+        lines = text.split( '\n' )
+        dx    = max( [ len( line ) for line in lines ] )
+
+        return ( 7 * dx, 14 * len( lines ) )
+
+
+    def set_event_handler ( self, **handlers ):
+        self.control.handlers.update( handlers )
+
+
+    def unset_event_handler ( self, **handlers ):
+        for name in handlers.iterkeys():
+            self.control.handlers.pop( name, None )
+
+
+    def tab ( self, forward = True ):
+        pass
+
+
+    def scroll_to ( self, x = None, y = None ):
+        pass
+
+
+    def scroll_by ( self, x = 0, y = 0 ):
+        pass
+
+
+    def destroy ( self ):
+        self.control.destroy()
+
+
+    def clear ( self ):
+        del self.control.items[:]
+
+
+    def close ( self ):
+        handler = self.control.handlers.get( 'close' )
+        if handler is not None:
+            handler( None )
+
+
+    def get_item ( self, index ):
+        return self.control.items[ index ]
+
+
+    def remove_item ( self, index ):
+        del self.control.items[ index ]
+
+
+    def add_item ( self, value ):
+        self.control.items.append( value )
+
+
+    def find_item ( self, value ):
+        try:
+            return self.control.items.index( value )
+        except ValueError:
+            return -1
+
+
+    def find_control ( self, x, y ):
+        return None
+
+
+    def add_page ( self, name, control ):
+        self.control.items.append( ( name, control ) )
+
+
+    def shrink_wrap ( self ):
+        pass
+
+
+    def drag ( self, data, type = None, request = 'copy', image = None ):
+        return 'ignore'
+
+
+    def activate ( self ):
+        pass
+
+    #-- Control Property Implementations --------------------------------------
+
+    def _get_position ( self ):
+        return self.control.position
+
+    def _set_position ( self, x_y ):
+        self.control.position = x_y
+
+
+    def _get_size ( self ):
+        return self.control.size
+
+    def _set_size ( self, dx_dy ):
+        self.control.size = dx_dy
+
+
+    def _get_virtual_size ( self ):
+        return self.control.size
+
+    def _set_virtual_size ( self, dx_dy ):
+        pass
+
+
+    def _get_bounds ( self ):
+        return self.control.position + self.control.size
+
+    def _set_bounds ( self, x_y_dx_dy ):
+        x, y, dx, dy = x_y_dx_dy
+        self.control.position = ( x, y )
+        self.control.size     = ( dx, dy )
+
+
+    def _get_frame_bounds ( self ):
+        return self.bounds
+
+
+    def _get_visible_bounds ( self ):
+        return ( 0, 0 ) + self.control.size
+
+
+    def _get_client_size ( self ):
+        return self.control.size
+
+    def _set_client_size ( self, dx_dy ):
+        self.control.size = dx_dy
+
+
+    def _get_best_size ( self ):
+        return self.control.size
+
+
+    def _get_min_size ( self ):
+        return ( 0, 0 )
+
+    def _set_min_size ( self, dx_dy ):
+        pass
+
+
+    def _get_screen_position ( self ):
+        return self.control.position
+
+
+    def _get_mouse_position ( self ):
+        return ( 0, 0 )
+
+
+    def _get_visible ( self ):
+        return self.control.visible
+
+    def _set_visible ( self, is_visible ):
+        self.control.visible = is_visible
+
+
+    def _get_maximized ( self ):
+        return False
+
+    def _set_maximized ( self, maximized ):
+        pass
+
+
+    def _get_enabled ( self ):
+        return self.control.enabled
+
+    def _set_enabled ( self, enabled ):
+        self.control.enabled = enabled
+
+
+    def _get_checked ( self ):
+        return bool( self.control.value )
+
+    def _set_checked ( self, checked ):
+        self.control.value = checked
+
+
+    def _get_drop_target ( self ):
+        return None
+
+    def _set_drop_target ( self, is_drop_target ):
+        pass
+
+
+    def _get_layout ( self ):
+        return adapted_layout( self.control.layout )
+
+    def _set_layout ( self, layout ):
+        if layout is not None:
+            layout = layout()
+            layout.attach( self.control )
+
+        self.control.layout = layout
+
+
+    def _get_parent_layout ( self ):
+        parent = self.control.parent
+        if parent is None:
+            return None
+
+        return adapted_layout( parent.layout )
+
+
+    def _get_parent ( self ):
+        return adapted_control( self.control.parent )
+
+
+    def _get_content ( self ):
+        return adapted_control( ( self.control.children + [ None ] )[0] )
+
+    def _set_content ( self, content ):
+        content().set_parent( self.control )
+
+
+    def _get_root_parent ( self ):
+        control = self.control
+        while control.parent is not None:
+            control = control.parent
+
+        return adapted_control( control )
+
+
+    def _get_children ( self ):
+        return [ control_adapter( child ) for child in self.control.children ]
+
+
+    def _get_value ( self ):
+        return self.control.value
+
+    def _set_value ( self, value ):
+        self.control.value = value
+
+
+    def _get_count ( self ):
+        return len( self.control.items )
+
+
+    def _get_selection ( self ):
+        return ( 0, 0 )
+
+    def _set_selection ( self, selection ):
+        pass
+
+
+    def _get_font ( self ):
+        return None
+
+    def _set_font ( self, font ):
+        pass
+
+
+    def _get_graphics ( self ):
+        return None
+
+
+    def _get_graphics_buffer ( self ):
+        return None
+
+
+    def _get_temp_graphics ( self ):
+        return None
+
+
+    def _get_screen_graphics ( self ):
+        return None
+
+    def _set_screen_graphics ( self, value ):
+        pass
+
+
+    def _get_image ( self ):
+        return None
+
+
+    def _set_tooltip ( self, tooltip ):
+        pass
+
+
+    def _get_mouse_capture ( self ):
+        return False
+
+    def _set_mouse_capture ( self, is_captured ):
+        pass
+
+
+    def _get_foreground_color ( self ):
+        return ( 0, 0, 0 )
+
+    def _set_foreground_color ( self, color ):
+        pass
+
+
+    def _get_background_color ( self ):
+        return ( 255, 255, 255 )
+
+    def _set_background_color ( self, color ):
+        pass
+
+
+    def _set_cursor ( self, cursor ):
+        pass
+
+
+    def _set_icon ( self, icon ):
+        pass
+
+
+    def _set_menubar ( self, menubar ):
+        pass
+
+
+    def _set_toolbar ( self, toolbar ):
+        pass
+
+
+    def _set_frozen ( self, is_frozen ):
+        pass
+
+
+    def _get_is_panel ( self ):
+        return (self.control.kind == 'panel')
+
+
+    def _set_scroll_vertical ( self, can_scroll ):
+        pass
+
+
+    def _set_scroll_horizontal ( self, can_scroll ):
+        pass
+
+#-- EOF ------------------------------------------------------------------------
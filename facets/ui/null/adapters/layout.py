@@ -0,0 +1,201 @@
+"""
+Defines the concrete 'null' toolkit implementations of the Layout and
+LayoutItem classes.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See section (A) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+from facets.core_api \
+    import Int
+
+from facets.ui.adapters.layout \
+    import Layout
+
+from facets.ui.adapters.layout_item \
+    import LayoutItem
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def adapted_layout ( layout ):
+    """ Returns a correctly adapted version of the specified layout manager.
+    """
+    if layout is None:
+        return None
+
+    return layout_adapter( layout )
+
+
+def layout_adapter ( layout, is_vertical = False, columns = 0 ):
+    """ Returns the layout adapter associated with the specified layout manager.
+    """
+    adapter = getattr( layout, 'adapter', None )
+    if adapter is not None:
+        return adapter
+
+    return NullLayout( layout, is_vertical = is_vertical, columns = columns )
+
+#-------------------------------------------------------------------------------
+#  'NullLayoutManager' class:
+#-------------------------------------------------------------------------------
+
+class NullLayoutManager ( object ):
+    """ The 'null' toolkit equivalent of a GUI toolkit layout manager. Each
+        item it contains is either a NullWidget, a NullLayoutManager or a
+        spacer tuple.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, owner = None ):
+        """ Initializes the object.
+        """
+        self.owner = owner
+        self.items = []
+
+
+    def attach ( self, widget ):
+        """ Attaches the layout manager (and all of the items it contains) to
+            the specified *widget*.
+        """
+        self.owner = widget
+        for item in self.items:
+            self.attach_item( item )
+
+
+    def attach_item ( self, item ):
+        """ Attaches the specified *item* to the widget that owns the layout
+            manager (if any).
+        """
+        owner = self.owner
+        if owner is not None:
+            if isinstance( item, NullLayoutManager ):
+                item.attach( owner )
+            elif not isinstance( item, tuple ):
+                item.set_parent( owner )
+
+#-------------------------------------------------------------------------------
+#  'NullLayoutItem' class:
+#-------------------------------------------------------------------------------
+
+class NullLayoutItem ( LayoutItem ):
+    """ Defines the concrete 'null' toolkit implementation of the LayoutItem
+        class.
+    """
+
+    #-- Property Implementations -----------------------------------------------
+
+    def _get_control ( self ):
+        from control import NullWidget, control_adapter
+
+        item = self.layout_item.item
+        if isinstance( item, NullWidget ):
+            return control_adapter( item )
+
+        return None
+
+
+    def _get_layout ( self ):
+        item = self.layout_item.item
+        if isinstance( item, NullLayoutManager ):
+            return layout_adapter( item )
+
+        return None
+
+#-------------------------------------------------------------------------------
+#  'NullLayout' class:
+#-------------------------------------------------------------------------------
+
+class NullLayout ( Layout ):
+    """ Defines the concrete 'null' toolkit implementation of the Layout class.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The numbers of columns in a grid layout:
+    columns = Int
+
+    #-- Concrete Methods -------------------------------------------------------
+
+    def do_layout ( self ):
+        pass
+
+
+    def clear ( self ):
+        del self.layout.items[:]
+
+
+    def add ( self, item, left = 0, right = 0, top = 0, bottom = 0,
+                          stretch = 0, fill = True, align = '' ):
+        """ Adds a specified item to the layout manager.
+        """
+        if not isinstance( item, tuple ):
+            item = item()
+
+        self.layout.items.append( item )
+        self.layout.attach_item( item )
+
+
+    def add_separator ( self, parent = None ):
+        self.add( ( 0, 0 ) )
+
+
+    def remove ( self, item ):
+        item = item()
+        if item in self.layout.items:
+            self.layout.items.remove( item )
+
+
+    def set_stretchable_column ( self, column ):
+        pass
+
+
+    def set_stretchable_row ( self, row ):
+        pass
+
+
+    def create_generic_layout ( self, layout ):
+        return NullLayoutManager()
+
+    #-- Layout Property Implementations ----------------------------------------
+
+    def _get_children ( self ):
+        return [ NullLayoutItem( _Item( item ) ) for item in self.layout.items
+                 if not isinstance( item, tuple ) ]
+
+
+    def _get_size ( self ):
+        owner = self.layout.owner
+        if owner is None:
+            return ( 0, 0 )
+
+        return owner.size
+
+    def _set_size ( self, dx_dy ):
+        pass
+
+
+    def _get_bounds ( self ):
+        return ( 0, 0 ) + self.size
+
+#-------------------------------------------------------------------------------
+#  '_Item' class:
+#-------------------------------------------------------------------------------
+
+class _Item ( object ):
+    """ Wraps a layout manager item so that it can be adapted by a
+        NullLayoutItem (which sets the 'adapter' attribute of the object it
+        adapts).
+    """
+
+    def __init__ ( self, item ):
+        self.item = item
+
+#-- EOF ------------------------------------------------------------------------
@@ -18,15 +18,25 @@ from facets.api \
 #-------------------------------------------------------------------------------
 
 def convert_to_color ( object, name, value ):
-    """ Converts a number into a wxColour object.
+    """ Converts a number or an ( r, g, b [, a] ) tuple into an integer of
+        the form 0xRRGGBB.
     """
     if type( value ) is int:
         return value & 0xFFFFFF
 
+    if (type( value ) is tuple) and (3 <= len( value ) <= 4):
+        try:
+            r, g, b = [ int( c ) & 0xFF for c in value[:3] ]
+
+            return (r << 16) | (g << 8) | b
+        except:
+            pass
+
     raise FacetError
 
 convert_to_color.info = ( 'an integer which in hex is of the form 0xRRGGBB, '
-                         'where RR is red, GG is green, and BB is blue' )
+                         'where RR is red, GG is green, and BB is blue, or '
+                         'an (r,g,b) or (r,g,b,a) tuple' )
 
 #-------------------------------------------------------------------------------
 #  Standard colors:
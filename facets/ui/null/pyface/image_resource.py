@@ -13,12 +13,35 @@ Null toolkit implementation of an ImageResource.
 from os.path \
     import abspath
 
+from struct \
+    import unpack
+
+from numpy \
+    import zeros, uint8
+
 from facets.core_api \
     import Any, cached_property
 
 from facets.ui.pyface.i_image_resource \
     import MImageResource
 
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def bitmap_size ( bitmap ):
+    """ Returns the ( width, height ) of a null toolkit bitmap, which is either
+        a NullBitmap or a string containing PNG image data.
+    """
+    size = getattr( bitmap, 'size', None )
+    if size is not None:
+        return size
+
+    if isinstance( bitmap, str ) and (bitmap[ 12: 16 ] == 'IHDR'):
+        return unpack( '>II', bitmap[ 16: 24 ] )
+
+    return ( 0, 0 )
+
 #-------------------------------------------------------------------------------
 #  'ImageResource' class:
 #-------------------------------------------------------------------------------
@@ -42,6 +65,51 @@ class ImageResource ( MImageResource ):
     def create_icon ( self, size = None ):
         return self.create_image( size )
 
+
+    def create_icon_from_pixels ( self ):
+        return self.create_image_from_pixels()
+
+
+    def save ( self, file_name ):
+        """ Saves the image to the specified *file_name* (only PNG image data
+            loaded from a file can be saved).
+        """
+        data = self.bitmap
+        if not isinstance( data, str ):
+            raise NotImplementedError
+
+        fh = open( file_name, 'wb' )
+        try:
+            fh.write( data )
+        finally:
+            fh.close()
+
+    #-- Property Implementations -----------------------------------------------
+
+    def _get_width ( self ):
+        return self._image_size()[0]
+
+
+    def _get_height ( self ):
+        return self._image_size()[1]
+
+
+    def _get_graphics ( self ):
+        return None
+
+
+    @cached_property
+    def _get_pixels ( self ):
+        # The null toolkit does not decode image data, so the pixels of an
+        # image are always initially transparent:
+        width, height = self._image_size()
+
+        return zeros( ( height, width, 4 ), uint8 )
+
+
+    def _get_mono_bitmap ( self ):
+        return self.bitmap
+
     #-- Private Interface ------------------------------------------------------
 
     @cached_property
@@ -55,4 +123,10 @@ class ImageResource ( MImageResource ):
 
         return self._get_image_not_found().absolute_path
 
+
+    def _image_size ( self ):
+        """ Returns the ( width, height ) of the image.
+        """
+        return bitmap_size( self.bitmap )
+
 #-- EOF ------------------------------------------------------------------------
\ No newline at end of file
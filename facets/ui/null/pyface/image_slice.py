@@ -0,0 +1,49 @@
+"""
+The 'null' toolkit specific implementation extensions of the ImageSlice class.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See section (A) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+from numpy \
+    import zeros, uint8
+
+from facets.core_api \
+    import Category
+
+from facets.ui.pyface.image_slice \
+    import ImageSlice
+
+from image_resource \
+    import bitmap_size
+
+#-------------------------------------------------------------------------------
+#  'ImageSliceX' class:
+#-------------------------------------------------------------------------------
+
+class ImageSliceX ( Category, ImageSlice ):
+
+    #-- Extension Methods ------------------------------------------------------
+
+    def x_bitmap_opaque ( self, bitmap ):
+        """ Returns a version of the specified bitmap with no transparency.
+        """
+        return bitmap
+
+
+    def x_bitmap_data ( self, bitmap ):
+        """ Returns the image data associated with the specified bitmap in a
+            form that can easily be analyzed (since the null toolkit does not
+            decode image data, this is always a uniform image of the correct
+            size).
+        """
+        width, height = bitmap_size( bitmap )
+
+        return zeros( ( height, width, 3 ), uint8 )
+
+#-- EOF ------------------------------------------------------------------------
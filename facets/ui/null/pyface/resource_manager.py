@@ -27,7 +27,7 @@ class PyfaceResourceFactory ( ResourceFactory ):
 
         return data
 
-    def image_from_data ( self, data ):
+    def image_from_data ( self, data, filename = None ):
         """ Creates an image from the specified data. """
         return data
 
@@ -0,0 +1,55 @@
+"""
+Defines the 'null' toolkit DoLaterTimer class.
+
+Since the null toolkit has no event loop, calls requested using 'do_later' or
+'do_after' are queued until the 'DoLaterTimer.flush' class method is called.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  'DoLaterTimer' class:
+#-------------------------------------------------------------------------------
+
+class DoLaterTimer ( object ):
+
+    #-- Class Variables --------------------------------------------------------
+
+    # List of currently active (i.e. queued) timers:
+    active_timers = []
+
+    #-- Class Methods ----------------------------------------------------------
+
+    @classmethod
+    def flush ( cls ):
+        """ Performs all queued calls (including any queued while performing
+            them).
+        """
+        while len( cls.active_timers ) > 0:
+            cls.active_timers.pop( 0 ).Notify()
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, interval, callable, args, kw_args ):
+        """ Initializes the object.
+        """
+        for timer in self.active_timers:
+            if ((timer.callable == callable) and
+                (timer.args     == args)     and
+                (timer.kw_args  == kw_args)):
+                return
+
+        self.active_timers.append( self )
+        self.callable = callable
+        self.args     = args
+        self.kw_args  = kw_args
+
+
+    def Notify ( self ):
+        """ Performs the queued call.
+        """
+        self.callable( *self.args, **self.kw_args )
+
+#-- EOF ------------------------------------------------------------------------
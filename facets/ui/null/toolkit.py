@@ -11,6 +11,9 @@ Defines the concrete implementations of the facets Toolkit interface for
 #  Imports:
 #-------------------------------------------------------------------------------
 
+from facets.core.facet_notifiers \
+    import set_ui_handler
+
 from facets.ui.toolkit \
     import Toolkit
 
@@ -32,6 +35,20 @@ def null_editor_factory ( ):
 
     return the_null_editor_factory
 
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def ui_handler ( handler, *args ):
+    """ Handles UI notification handler requests that occur on a thread other
+        than the UI thread. Since the null toolkit has no event loop, the
+        handler is simply called immediately.
+    """
+    handler( *args )
+
+# Tell the facets notification handlers to use this UI handler
+set_ui_handler( ui_handler )
+
 #-------------------------------------------------------------------------------
 #  'GUIToolkit' class:
 #-------------------------------------------------------------------------------
@@ -76,6 +93,14 @@ class GUIToolkit ( Toolkit ):
         return ( 0, 0 )
 
 
+    def screen_info ( self ):
+        """ Returns a list of tuples of the form: ( x, y, dx, dy ), which
+            describe the available screen area for all of the system's
+            displays.
+        """
+        return [ ( 0, 0 ) + self.screen_size() ]
+
+
     def scrollbar_size ( self ):
         """ Returns a tuple of the form (width,height) containing the standard
             width of a vertical scrollbar, and the standard height of a
@@ -97,6 +122,176 @@ class GUIToolkit ( Toolkit ):
         """
         app_info.ui = DummyUI()
 
+
+    def as_toolkit_adapter ( self, control ):
+        """ Returns the GUI toolkit specific control adapter associated with
+            *control*.
+        """
+        from facets.ui.adapters.control import Control
+        from facets.ui.null.adapters.control import control_adapter
+
+        if (control is None) or isinstance( control, Control ):
+            return control
+
+        return control_adapter( control )
+
+
+    def hook_events ( self, ui, control, events = None, handler = None ):
+        """ Hooks all specified events for all controls in a UI so that they
+            can be routed to the correct event handler.
+        """
+        pass
+
+
+    def key_event_to_name ( self, event ):
+        """ Converts a keystroke event into a corresponding key name.
+        """
+        return ''
+
+
+    def image_size ( self, image ):
+        """ Returns a ( width, height ) tuple containing the size of a
+            specified toolkit image.
+        """
+        from facets.ui.null.pyface.image_resource import bitmap_size
+
+        return bitmap_size( image )
+
+    #-- Create GUI Toolkit Neutral Common Controls -----------------------------
+
+    def create_control ( self, parent, tab_stop = False, handle_keys = False ):
+        """ Returns an adapted null control.
+        """
+        return self._create( parent )
+
+
+    def create_frame ( self, parent, style, title = '' ):
+        """ Returns an adapted null top-level window.
+        """
+        return self._create( parent, 'frame', title )
+
+
+    def create_panel ( self, parent ):
+        """ Returns an adapted null panel.
+        """
+        return self._create( parent, 'panel' )
+
+
+    def create_scrolled_panel ( self, parent ):
+        """ Returns an adapted null scrolled panel.
+        """
+        return self._create( parent, 'panel' )
+
+
+    def create_label ( self, parent, label = '', align = 'left' ):
+        """ Returns an adapted null label.
+        """
+        return self._create( parent, 'label', label )
+
+
+    def create_text_input ( self, parent, read_only = False, password = False,
+                                  handle_enter = False, multi_line = False,
+                                  align = 'left' ):
+        """ Returns an adapted null text input field.
+        """
+        return self._create( parent, 'text', '' )
+
+
+    def create_button ( self, parent, label = '' ):
+        """ Returns an adapted null push button.
+        """
+        return self._create( parent, 'button', label )
+
+
+    def create_checkbox ( self, parent, label = '' ):
+        """ Returns an adapted null check box.
+        """
+        return self._create( parent, 'checkbox', False )
+
+
+    def create_combobox ( self, parent, editable = False ):
+        """ Returns an adapted null combo box.
+        """
+        return self._create( parent, 'combobox', '' )
+
+
+    def create_separator ( self, parent, is_vertical = True ):
+        """ Returns an adapted null separator.
+        """
+        return self._create( parent, 'separator' )
+
+    #-- Create GUI Toolkit Neutral Common Layout Managers ----------------------
+
+    def create_box_layout ( self, is_vertical = True, align = '' ):
+        """ Returns a new GUI toolkit neutral 'box' layout manager.
+        """
+        return self._layout( is_vertical )
+
+
+    def create_groupbox_layout ( self, is_vertical, parent, label, owner ):
+        """ Returns a new GUI toolkit neutral vertical layout manager for a
+            groupbox.
+        """
+        return self._layout( is_vertical )
+
+
+    def create_flow_layout ( self, is_vertical ):
+        """ Returns a new GUI toolkit neutral 'flow' layout manager.
+        """
+        return self._layout( is_vertical )
+
+
+    def create_grid_layout ( self, rows = 0, columns = 1, v_margin = 0,
+                                   h_margin = 0 ):
+        """ Returns a new GUI toolkit neutral grid layout manager.
+        """
+        return self._layout( False, columns )
+
+    #-- Create GUI Toolkit Neutral Miscellaneous Objects -----------------------
+
+    def create_bitmap ( self, buffer, width, height ):
+        """ Returns a null bitmap of the specified width and height.
+        """
+        return NullBitmap( ( width, height ) )
+
+
+    def create_timer ( self, milliseconds, handler ):
+        """ Returns a timer which never fires (since the null toolkit has no
+            event loop), but which can still be cancelled by calling it.
+        """
+        return lambda: None
+
+    #-- GUI Toolkit Neutral Adapter Methods ------------------------------------
+
+    def adapter_for ( self, item ):
+        """ Returns the correct type of adapter (control or layout) for the
+            specified item.
+        """
+        from facets.ui.null.adapters.control import NullWidget
+
+        if isinstance( item, NullWidget ):
+            return self.control_adapter_for( item )
+
+        return self.layout_adapter_for( item )
+
+
+    def control_adapter_for ( self, control ):
+        """ Returns the GUI toolkit neutral adapter for the specified GUI
+            toolkit specific control.
+        """
+        from facets.ui.null.adapters.control import adapted_control
+
+        return adapted_control( control )
+
+
+    def layout_adapter_for ( self, layout ):
+        """ Returns the GUI toolkit neutral adapter for the specified GUI
+            toolkit specific layout manager.
+        """
+        from facets.ui.null.adapters.layout import adapted_layout
+
+        return adapted_layout( layout )
+
     #-- 'EditorFactory' Factory Methods ----------------------------------------
 
     def __getattribute__ ( self, attr ):
@@ -111,6 +306,40 @@ class GUIToolkit ( Toolkit ):
         else:
             return super( GUIToolkit, self ).__getattribute__( attr )
 
+    #-- Private Methods --------------------------------------------------------
+
+    def _create ( self, parent, kind = 'control', value = None ):
+        """ Returns a new adapted NullWidget of the specified *kind*.
+        """
+        from facets.ui.adapters.control import as_toolkit_control
+        from facets.ui.null.adapters.control import NullWidget, control_adapter
+
+        return control_adapter(
+            NullWidget( as_toolkit_control( parent ), kind, value )
+        )
+
+
+    def _layout ( self, is_vertical, columns = 0 ):
+        """ Returns a new adapted NullLayoutManager.
+        """
+        from facets.ui.null.adapters.layout import NullLayoutManager, \
+                                                   layout_adapter
+
+        return layout_adapter( NullLayoutManager(), is_vertical, columns )
+
+#-------------------------------------------------------------------------------
+#  'NullBitmap' class:
+#-------------------------------------------------------------------------------
+
+class NullBitmap ( object ):
+    """ Simulates a GUI toolkit bitmap of a specified size.
+    """
+
+    def __init__ ( self, size ):
+        """ Initializes the object.
+        """
+        self.size = size
+
 #-------------------------------------------------------------------------------
 #  'DummyUI' class:
 #-------------------------------------------------------------------------------
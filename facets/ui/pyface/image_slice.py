@@ -2,6 +2,14 @@
 GUI toolkit neutral class to aid in automatically computing the 'slice' points
 for a specified ImageResource and then drawing it so that it can be 'stretched'
 to fit a larger region than the original image.
+
+Drawing a sliced image requires up to 25 separate (stretch) blits, so the fully
+composed background bitmaps for the most recently drawn sizes of each image
+slice are kept in a shared, least recently used BitmapCache with a memory
+budget. A size is only added to the cache the second time it is drawn (so that
+the many transient sizes produced while resizing a window do not flush the
+sizes which are drawn repeatedly, such as those of the cells of a grid). Once
+cached, each repeated fill at the same size is a single blit.
 """
 
 #-------------------------------------------------------------------------------
@@ -15,11 +23,15 @@ to fit a larger region than the original image.
 from colorsys \
     import rgb_to_hls
 
+from collections \
+    import OrderedDict
+
 from numpy \
     import maximum, minimum
 
 from facets.core_api \
-    import HasPrivateFacets, Instance, Int, List, Enum, Bool, Any
+    import HasPrivateFacets, Instance, Int, List, Enum, Bool, Any, Property, \
+           cached_property
 
 from i_image_resource \
     import AnImageResource
@@ -33,6 +45,12 @@ BLACK = ( 0, 0, 0 )
 WHITE = ( 255, 255, 255 )
 RED   = ( 255, 0, 0 )
 
+# The default memory budget (in bytes) for cached background bitmaps:
+MaxCacheBytes = 16 * 1024 * 1024
+
+# The number of recently drawn, but not yet cached, bitmap keys remembered:
+MaxCandidates = 256
+
 #-------------------------------------------------------------------------------
 #  Helper functions:
 #-------------------------------------------------------------------------------
@@ -58,6 +76,128 @@ def paint_parent ( g, window ):
 
     return slice
 
+#-------------------------------------------------------------------------------
+#  'BitmapCache' class:
+#-------------------------------------------------------------------------------
+
+class BitmapCache ( object ):
+    """ A least recently used cache of composed bitmaps with a memory budget.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, max_bytes = MaxCacheBytes ):
+        """ Initializes the object.
+        """
+        self.max_bytes   = max_bytes
+        self.bytes       = 0
+        self.hits        = 0
+        self.misses      = 0
+        self._bitmaps    = OrderedDict()
+        self._candidates = OrderedDict()
+
+
+    def __len__ ( self ):
+        """ Returns the number of bitmaps in the cache.
+        """
+        return len( self._bitmaps )
+
+
+    @property
+    def hit_rate ( self ):
+        """ Returns the fraction of lookups which have found a cached bitmap.
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+
+        return (float( self.hits ) / lookups)
+
+
+    def get ( self, key ):
+        """ Returns the cached bitmap for *key*, or None if there is none.
+        """
+        item = self._bitmaps.pop( key, None )
+        if item is None:
+            self.misses += 1
+
+            return None
+
+        self.hits            += 1
+        self._bitmaps[ key ]  = item
+
+        return item[0]
+
+
+    def admit ( self, key, bytes ):
+        """ Returns True if a bitmap of *bytes* bytes for *key* should be
+            added to the cache (i.e. it will fit, and *key* has been requested
+            recently).
+        """
+        if (bytes * 4) > self.max_bytes:
+            return False
+
+        candidates = self._candidates
+        if candidates.pop( key, None ) is not None:
+            return True
+
+        candidates[ key ] = True
+        if len( candidates ) > MaxCandidates:
+            candidates.popitem( False )
+
+        return False
+
+
+    def add ( self, key, bitmap, bytes ):
+        """ Adds the *bitmap* for *key*, which uses *bytes* bytes, to the
+            cache, discarding the least recently used bitmaps as necessary.
+        """
+        bitmaps = self._bitmaps
+        old     = bitmaps.pop( key, None )
+        if old is not None:
+            self.bytes -= old[1]
+
+        bitmaps[ key ] = ( bitmap, bytes )
+        self.bytes    += bytes
+        while self.bytes > self.max_bytes:
+            self.bytes -= bitmaps.popitem( False )[1][1]
+
+
+    def discard ( self, slice ):
+        """ Discards all cached bitmaps for the specified image *slice*.
+        """
+        bitmaps = self._bitmaps
+        for key in bitmaps.keys():
+            if key[0] is slice:
+                self.bytes -= bitmaps.pop( key )[1]
+
+        candidates = self._candidates
+        for key in candidates.keys():
+            if key[0] is slice:
+                del candidates[ key ]
+
+
+    def clear ( self ):
+        """ Discards all cached bitmaps and resets the cache statistics.
+        """
+        self._bitmaps.clear()
+        self._candidates.clear()
+        self.bytes = self.hits = self.misses = 0
+
+
+    def statistics ( self ):
+        """ Returns a dictionary describing the current state of the cache.
+        """
+        return { 'bitmaps':   len( self._bitmaps ),
+                 'bytes':     self.bytes,
+                 'max_bytes': self.max_bytes,
+                 'hits':      self.hits,
+                 'misses':    self.misses,
+                 'hit_rate':  self.hit_rate }
+
+# The cache of composed background bitmaps shared by all image slices:
+background_cache = BitmapCache()
+
 #-------------------------------------------------------------------------------
 #  'ImageSlice' class:
 #-------------------------------------------------------------------------------
@@ -101,6 +241,10 @@ class ImageSlice ( HasPrivateFacets ):
     # Should debugging slice lines be drawn?
     debug = Bool( False )
 
+    # Is the image completely opaque (so that a transparent fill can be
+    # composed into an off-screen bitmap)?
+    is_opaque = Property( depends_on = 'image' )
+
     #-- Private Facets ---------------------------------------------------------
 
     # The current image's opaque bitmap:
@@ -124,6 +268,85 @@ class ImageSlice ( HasPrivateFacets ):
         """ 'Stretch fill' the specified region of a device context with the
             sliced image.
         """
+        bitmap = None
+        if ((self.image is not None) and (dx > 0) and (dy > 0) and
+            ((not transparent) or self.is_opaque)):
+            key    = ( self, dx, dy, transparent )
+            bitmap = background_cache.get( key )
+            if (bitmap is None) and background_cache.admit( key, dx * dy * 4 ):
+                bitmap = self._compose( g, dx, dy, transparent )
+                if bitmap is not None:
+                    background_cache.add( key, bitmap, dx * dy * 4 )
+
+        if bitmap is not None:
+            g.blit( x, y, dx, dy, bitmap )
+        else:
+            self._draw( g, x, y, dx, dy, transparent )
+
+        if self.debug:
+            last_x, last_y = x + dx, y + dy
+            g.pen = RED
+            g.draw_line( x, y + self.top, last_x, y + self.top )
+            g.draw_line( x, last_y - self.bottom - 1,
+                         last_x, last_y - self.bottom - 1 )
+            g.draw_line( x + self.left, y, x + self.left, last_y )
+            g.draw_line( last_x - self.right - 1, y,
+                         last_x - self.right - 1, last_y )
+
+    #-- Property Implementations -----------------------------------------------
+
+    @cached_property
+    def _get_is_opaque ( self ):
+        try:
+            return bool( (self.image.a == 255).all() )
+        except:
+            return False
+
+    #-- Event Handlers ---------------------------------------------------------
+
+    def _image_set ( self, image ):
+        """ Handles the 'image' facet being changed.
+        """
+        background_cache.discard( self )
+
+        bitmap = image.bitmap
+
+        # Save the bitmap size information:
+        self.dx, self.dy = image.width, image.height
+
+        # Create the opaque version of the bitmap:
+        self.opaque_bitmap = self.x_bitmap_opaque( bitmap )
+
+        # Finally, analyze the image to find out its characteristics:
+        self._analyze_bitmap()
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _compose ( self, g, dx, dy, transparent ):
+        """ Returns a new bitmap of size (dx,dy) containing the sliced image
+            drawn into it (or None if the graphics object *g* does not
+            support off-screen drawing).
+        """
+        try:
+            bg = g.graphics_buffer( dx, dy )
+        except NotImplementedError:
+            return None
+
+        bitmap = bg.bitmap
+        if bitmap is not None:
+            self._draw( bg, 0, 0, dx, dy, transparent )
+
+        # Release the off-screen graphics object, so that its bitmap can be
+        # drawn elsewhere:
+        del bg
+
+        return bitmap
+
+
+    def _draw ( self, g, x, y, dx, dy, transparent ):
+        """ Draws the sliced image into the specified region of a device
+            context.
+        """
         # Create the source image graphics object:
         if transparent:
             bitmap = self.image.bitmap
@@ -133,7 +356,7 @@ class ImageSlice ( HasPrivateFacets ):
         ig = g.graphics_bitmap( bitmap )
 
         # Set up the drawing parameters:
-        sdx, sdy = self.dx, self.dx
+        sdx, sdy = self.dx, self.dy
         dxs, dys = self.dxs, self.dys
         tdx, tdy = dx - self.fdx, dy - self.fdy
 
@@ -185,32 +408,6 @@ class ImageSlice ( HasPrivateFacets ):
                 y0 += wdy
             iy0 += idy
 
-        if self.debug:
-            g.pen = RED
-            g.draw_line( x, y + self.top, last_x, y + self.top )
-            g.draw_line( x, last_y - self.bottom - 1,
-                         last_x, last_y - self.bottom - 1 )
-            g.draw_line( x + self.left, y, x + self.left, last_y )
-            g.draw_line( last_x - self.right - 1, y,
-                         last_x - self.right - 1, last_y )
-
-    #-- Event Handlers ---------------------------------------------------------
-
-    def _image_set ( self, image ):
-        """ Handles the 'image' facet being changed.
-        """
-        bitmap = image.bitmap
-
-        # Save the bitmap size information:
-        self.dx, self.dy = image.width, image.height
-
-        # Create the opaque version of the bitmap:
-        self.opaque_bitmap = self.x_bitmap_opaque( bitmap )
-
-        # Finally, analyze the image to find out its characteristics:
-        self._analyze_bitmap()
-
-    #-- Private Methods --------------------------------------------------------
 
     def _analyze_bitmap ( self ):
         """ Analyzes the bitmap.
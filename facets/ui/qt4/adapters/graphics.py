@@ -11,8 +11,11 @@ providing GUI toolkit neutral graphics support.
 #  Imports:
 #-------------------------------------------------------------------------------
 
+from numpy \
+    import array
+
 from PyQt4.QtCore \
-    import Qt, QPoint, QPointF
+    import Qt, QPoint, QPointF, QLineF, QRectF
 
 from PyQt4.QtGui \
     import QColor, QPainter, QPen, QBrush, QPixmap, QFontMetrics, QPolygonF
@@ -75,7 +78,7 @@ def points_for ( points ):
     # Process a Polygon object:
     if points._cached is None:
         points._cached = QPolygonF(
-            [ point_for( point ) for point in points.points ]
+            [ QPointF( x, y ) for x, y in points.xy.tolist() ]
         )
 
     return points._cached
@@ -241,6 +244,31 @@ class QtGraphics ( Graphics ):
         self.graphics.drawLine( x1, y1, x2, y2 )
 
 
+    def draw_lines ( self, lines ):
+        """ Draws each of the lines specified by *lines*, a sequence (or n x 4
+            array) of (x1,y1,x2,y2) values, using a single call.
+        """
+        lines = array( lines, float ).reshape( -1, 4 )
+        if len( lines ) > 0:
+            self.graphics.drawLines(
+                [ QLineF( *line ) for line in lines.tolist() ]
+            )
+
+
+    def draw_rectangles ( self, rectangles ):
+        """ Draws each of the rectangles specified by *rectangles*, a sequence
+            (or n x 4 array) of (x,y,dx,dy) values, using a single call.
+        """
+        rectangles = array( rectangles, float ).reshape( -1, 4 )
+        if len( rectangles ) > 0:
+            if not self._no_pen:
+                rectangles[ :, 2: ] -= 1.0
+
+            self.graphics.drawRects(
+                [ QRectF( *rectangle ) for rectangle in rectangles.tolist() ]
+            )
+
+
     def draw_polygon ( self, points ):
         """ Draws the closed polygon specified by *points*. *points* can either
             be a list of Point objects or a Polygon object.
@@ -25,8 +25,8 @@ from facets.ui.pyface.resource_manager \
 
 from facets.api                                                                \
     import HasFacets, Any, Dict, Enum, Bool, Int, List, Instance, Str, Event,  \
-           TreeNode, ObjectTreeNode, MultiTreeNode, Editor, EditorFactory,     \
-           ATheme, Theme, Image, toolkit
+           Property, TreeNode, ObjectTreeNode, Editor, EditorFactory, ATheme,  \
+           Theme, Image, toolkit, cached_property
 
 from facets.core.facet_base \
     import SequenceTypes
@@ -38,7 +38,7 @@ from facets.ui.ui_facets \
     import image_for
 
 from facets.ui.tree_node \
-    import ITreeNodeAdapterBridge, COLLAPSED, CLOSED, EXPANDED
+    import TreeNodeResolver, COLLAPSED, CLOSED, EXPANDED
 
 from facets.ui.menu \
     import Menu, Action, Separator
@@ -117,6 +117,9 @@ class TreeEditor ( EditorFactory ):
     # Mapping from TreeNode tuples to MultiTreeNodes:
     multi_nodes = Dict
 
+    # The resolver used to find the TreeNode for each object in the tree:
+    resolver = Property( depends_on = 'nodes.node_for' )
+
     # Are the individual nodes editable?
     editable = Bool( True )
 
@@ -197,6 +200,12 @@ class TreeEditor ( EditorFactory ):
     # Note: This facet is ignored for Qt.
     lines_mode = Enum ( 'appearance', 'on', 'off' )
 
+    #-- Property Implementations -----------------------------------------------
+
+    @cached_property
+    def _get_resolver ( self ):
+        return TreeNodeResolver( self.nodes, self.multi_nodes )
+
     #-- 'Editor' Factory Methods -----------------------------------------------
 
     def simple_editor ( self, ui, object, name, description ):
@@ -745,78 +754,19 @@ class SimpleEditor ( Editor ):
     def _node_for ( self, object ):
         """ Returns the TreeNode associated with a specified object.
         """
-        if ((type( object ) is tuple) and
-            (len( object ) == 2)      and
-            isinstance( object[1], TreeNode )):
-            return object
-
-        # Select all nodes which understand this object:
-        factory = self.factory
-        nodes   = [ node for node in factory.nodes
-                    if node.is_node_for( object ) ]
-
-        # If only one found, we're done, return it:
-        if len( nodes ) == 1:
-            return ( object, nodes[0] )
-
-        # If none found, give up:
-        if len( nodes ) == 0:
-            return ( object, ITreeNodeAdapterBridge( adapter = object ) )
-
-        # Use all selected nodes that have the same 'node_for' list as the
-        # first selected node:
-        base  = nodes[0].node_for
-        nodes = [ node for node in nodes if base == node.node_for ]
-
-        # If only one left, then return that node:
-        if len( nodes ) == 1:
-            return ( object, nodes[0] )
-
-        # Otherwise, return a MultiTreeNode based on all selected nodes...
-
-        # Use the node with no specified children as the root node. If not
-        # found, just use the first selected node as the 'root node':
-        root_node = None
-        for i, node in enumerate( nodes ):
-            if node.get_children_id( object ) == '':
-                root_node = node
-                del nodes[i]
-                break
-        else:
-            root_node = nodes[0]
-
-        # If we have a matching MultiTreeNode already cached, return it:
-        key = ( root_node, ) + tuple( nodes )
-        if key in factory.multi_nodes:
-            return ( object, factory.multi_nodes[ key ] )
-
-        # Otherwise create one, cache it, and return it:
-        factory.multi_nodes[ key ] = multi_node = MultiTreeNode(
-                                                       root_node = root_node,
-                                                       nodes     = nodes )
-
-        return ( object, multi_node )
+        return self.factory.resolver.node_for( object )
 
 
     def _node_for_class ( self, klass ):
         """ Returns the TreeNode associated with a specified class.
         """
-        for node in self.factory.nodes:
-            if issubclass( klass, tuple( node.node_for ) ):
-                return node
-
-        return None
+        return self.factory.resolver.node_for_class( klass )
 
 
     def _node_for_class_name ( self, class_name ):
         """ Returns the node and class associated with a specified class name.
         """
-        for node in self.factory.nodes:
-            for klass in node.node_for:
-                if class_name == klass.__name__:
-                    return ( node, klass )
-
-        return ( None, None )
+        return self.factory.resolver.node_for_class_name( class_name )
 
 
     def _update_icon ( self, nid ):
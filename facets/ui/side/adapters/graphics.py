@@ -11,8 +11,11 @@ providing GUI toolkit neutral graphics support.
 #  Imports:
 #-------------------------------------------------------------------------------
 
+from numpy \
+    import array
+
 from PySide.QtCore \
-    import Qt, QPoint
+    import Qt, QPoint, QLineF, QRectF
 
 from PySide.QtGui \
     import QColor, QPainter, QPen, QBrush, QPixmap, QFontMetrics
@@ -211,6 +214,31 @@ class QtGraphics ( Graphics ):
         self.graphics.drawLine( x1, y1, x2, y2 )
 
 
+    def draw_lines ( self, lines ):
+        """ Draws each of the lines specified by *lines*, a sequence (or n x 4
+            array) of (x1,y1,x2,y2) values, using a single call.
+        """
+        lines = array( lines, float ).reshape( -1, 4 )
+        if len( lines ) > 0:
+            self.graphics.drawLines(
+                [ QLineF( *line ) for line in lines.tolist() ]
+            )
+
+
+    def draw_rectangles ( self, rectangles ):
+        """ Draws each of the rectangles specified by *rectangles*, a sequence
+            (or n x 4 array) of (x,y,dx,dy) values, using a single call.
+        """
+        rectangles = array( rectangles, float ).reshape( -1, 4 )
+        if len( rectangles ) > 0:
+            if not self._no_pen:
+                rectangles[ :, 2: ] -= 1.0
+
+            self.graphics.drawRects(
+                [ QRectF( *rectangle ) for rectangle in rectangles.tolist() ]
+            )
+
+
     def draw_bitmap ( self, bitmap, x, y ):
         """ Draws a specified bitmap at the specified location.
         """
@@ -39,6 +39,22 @@ COLLAPSED = 0    # Never opened
 CLOSED    = 1    # Closed after previously being open
 EXPANDED  = 2    # Currently open
 
+#-------------------------------------------------------------------------------
+#  Helper functions:
+#-------------------------------------------------------------------------------
+
+def overrides ( klass, base, *names ):
+    """ Returns whether class *klass* overrides any of the methods called
+        *names* defined by its base class *base*.
+    """
+    for name in names:
+        method = getattr( klass, name, None )
+        if (getattr( method, 'im_func', method ) is not
+            getattr( base, name ).im_func):
+            return True
+
+    return False
+
 #-------------------------------------------------------------------------------
 #  'TreeNode' class:
 #-------------------------------------------------------------------------------
@@ -100,6 +116,12 @@ class TreeNode ( HasPrivateFacets ):
     # List of object classes and/or interfaces that the node applies to:
     node_for = List( Any )
 
+    # Do the results of 'is_node_for' and 'get_children_id' depend only on the
+    # class of the object (allowing tree editors to cache the node used for
+    # each object class)? If None, this is determined automatically based on
+    # whether or not either method has been overridden:
+    cacheable = Any
+
     # Tuple of object classes that the node applies to:
     node_for_class = Property( depends_on = 'node_for' )
 
@@ -412,6 +434,18 @@ class TreeNode ( HasPrivateFacets ):
                 object.has_facets_interface( *self.node_for_interface ))
 
 
+    def is_cacheable_for ( self, klass ):
+        """ Returns whether the results of 'is_node_for' and 'get_children_id'
+            for any object of class *klass* depend only on the class (and not
+            on the object instance).
+        """
+        if self.cacheable is not None:
+            return self.cacheable
+
+        return (not overrides( self.__class__, TreeNode, 'is_node_for',
+                                                         'get_children_id' ))
+
+
     def can_add ( self, object, add_object ):
         """ Returns whether a given object is droppable/pasteable on the node.
         """
@@ -1529,6 +1563,21 @@ class ObjectTreeNode ( TreeNode ):
         return False
 
 
+    def is_cacheable_for ( self, klass ):
+        """ Returns whether the results of 'is_node_for' and 'get_children_id'
+            for any object of class *klass* depend only on the class (and not
+            on the object instance).
+        """
+        if self.cacheable is not None:
+            return self.cacheable
+
+        return (not (overrides( self.__class__, ObjectTreeNode, 'is_node_for',
+                                'get_children_id' ) or
+                     (issubclass( klass, TreeNodeObject ) and
+                      overrides( klass, TreeNodeObject, 'tno_is_node_for',
+                                 'tno_get_children_id' ))))
+
+
     def can_add ( self, object, add_object ):
         """ Returns whether a given object is droppable/pasteable on the node.
         """
@@ -2167,4 +2216,160 @@ class MultiTreeNode ( TreeNode ):
         """
         return self.root_node.node_expanded( object, expanded )
 
+#-------------------------------------------------------------------------------
+#  'TreeNodeResolver' class:
+#-------------------------------------------------------------------------------
+
+class TreeNodeResolver ( object ):
+    """ Determines the TreeNode (or MultiTreeNode) that handles each object
+        displayed by a tree editor, caching the result for each object class.
+
+        The result for an object class is only cached if the 'is_cacheable_for'
+        method of every tree node returns True for the class. Otherwise, only
+        the list of nodes which might handle objects of the class is cached,
+        and each object is then checked against each node in the list.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, nodes, multi_nodes = None ):
+        """ Initializes the object using the list of TreeNodes *nodes* and the
+            (optional) dictionary used to cache MultiTreeNodes (keyed by a
+            tuple of the TreeNodes they combine).
+        """
+        if multi_nodes is None:
+            multi_nodes = {}
+
+        self.nodes       = nodes
+        self.multi_nodes = multi_nodes
+        self._nodes_for  = {}
+
+
+    def node_for ( self, object ):
+        """ Returns an ( object, node ) tuple containing the specified object
+            and the TreeNode associated with it.
+        """
+        if ((type( object ) is tuple) and
+            (len( object ) == 2)      and
+            isinstance( object[1], TreeNode )):
+            return object
+
+        klass = object.__class__
+        nodes = self._nodes_for.get( klass, self )
+        if nodes is self:
+            nodes = self._nodes_for_class( object, klass )
+
+        if isinstance( nodes, list ):
+            # The candidate nodes must be checked for each object:
+            node = self._node_for( object,
+                                   [ node for node in nodes
+                                          if node.is_node_for( object ) ] )
+        else:
+            node = nodes
+
+        if node is None:
+            # If none found, try to create an adapted node for the object:
+            node = ITreeNodeAdapterBridge( adapter = object )
+
+        return ( object, node )
+
+
+    def node_for_class ( self, klass ):
+        """ Returns the TreeNode associated with a specified class.
+        """
+        for node in self.nodes:
+            if issubclass( klass, tuple( node.node_for ) ):
+                return node
+
+        return None
+
+
+    def node_for_class_name ( self, class_name ):
+        """ Returns the node and class associated with a specified class name.
+        """
+        for node in self.nodes:
+            for klass in node.node_for:
+                if class_name == klass.__name__:
+                    return ( node, klass )
+
+        return ( None, None )
+
+
+    def reset ( self ):
+        """ Discards all cached results (e.g. after a change to the tree nodes
+            that affects the objects they apply to).
+        """
+        self._nodes_for = {}
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _nodes_for_class ( self, object, klass ):
+        """ Determines and caches the nodes for the objects of class *klass*
+            using *object* as a representative instance. The result is either
+            the node itself (or None if no node applies) if the result can be
+            cached for the class, or a list of the candidate nodes that must be
+            checked for each object of the class otherwise.
+        """
+        nodes = []
+        fixed = True
+        for node in self.nodes:
+            if not node.is_cacheable_for( klass ):
+                fixed = False
+                nodes.append( node )
+            elif node.is_node_for( object ):
+                nodes.append( node )
+
+        if fixed:
+            nodes = self._node_for( object, nodes )
+
+        self._nodes_for[ klass ] = nodes
+
+        return nodes
+
+
+    def _node_for ( self, object, nodes ):
+        """ Returns the node for *object*, given the list of all nodes that
+            handle it (or None if there are none).
+        """
+        # If only one found, we're done, return it:
+        if len( nodes ) == 1:
+            return nodes[0]
+
+        # If none found, give up:
+        if len( nodes ) == 0:
+            return None
+
+        # Use all selected nodes that have the same 'node_for' list as the
+        # first selected node:
+        base  = nodes[0].node_for
+        nodes = [ node for node in nodes if base == node.node_for ]
+
+        # If only one left, then return that node:
+        if len( nodes ) == 1:
+            return nodes[0]
+
+        # Otherwise, return a MultiTreeNode based on all selected nodes...
+
+        # Use the node with no specified children as the root node. If not
+        # found, just use the first selected node as the 'root node':
+        root_node = None
+        for i, node in enumerate( nodes ):
+            if node.get_children_id( object ) == '':
+                root_node = node
+                del nodes[i]
+                break
+        else:
+            root_node = nodes[0]
+
+        # If we have a matching MultiTreeNode already cached, return it:
+        key        = ( root_node, ) + tuple( nodes )
+        multi_node = self.multi_nodes.get( key )
+        if multi_node is None:
+            # Otherwise create one and cache it:
+            self.multi_nodes[ key ] = multi_node = MultiTreeNode(
+                                            root_node = root_node,
+                                            nodes     = nodes )
+
+        return multi_node
+
 #-- EOF ------------------------------------------------------------------------
@@ -10,6 +10,12 @@ Defines the UI class used to represent an active facets-based user interface.
 #  Imports:
 #-------------------------------------------------------------------------------
 
+import ast
+import __builtin__
+
+from types \
+    import CodeType
+
 from traceback \
     import print_exc
 
@@ -22,7 +28,7 @@ from facets.core.facet_base \
     import is_str
 
 from facets.ui.pyface.timer.api \
-    import do_later
+    import do_later, do_after
 
 from ui_facets \
     import AKind
@@ -52,6 +58,59 @@ from helper \
 # List of **kind** types for views that must have a **parent** window specified
 kind_must_have_parent = ( 'panel', 'subpanel' )
 
+# The editor facets controlled by 'visible_when', 'enabled_when' and
+# 'checked_when' expressions (in the order they are evaluated):
+when_facets = ( 'visible', 'enabled', 'checked' )
+
+# The names of the functions whose result depends only on their arguments,
+# which can be called by a 'when' expression without the expression having to
+# be re-evaluated after every facet change:
+when_functions = set( [
+    'len', 'bool', 'int', 'long', 'float', 'str', 'unicode', 'abs', 'min',
+    'max', 'isinstance', 'issubclass', 'hasattr', 'getattr', 'any', 'all',
+    'sum', 'tuple', 'list', 'set', 'sorted', 'round', 'repr', 'type'
+] )
+
+# The facet types which do not generate change notifications:
+when_silent_types = ( 'python', 'constant' )
+
+#-------------------------------------------------------------------------------
+#  Helper functions:
+#-------------------------------------------------------------------------------
+
+def when_code ( when ):
+    """ Compiles the 'when' expression *when* and returns a tuple of the form:
+        ( code, names ), where *code* is the compiled expression and *names* is
+        the set of names (including attribute names) referenced by it, or None
+        if the value of the expression may depend upon state other than the
+        facets named (e.g. because it calls an object method).
+    """
+    tree = ast.parse( when.strip(), '<string>', 'eval' )
+    code = compile( tree, '<string>', 'eval' )
+    for node in ast.walk( tree ):
+        if (isinstance( node, ast.Call ) and
+            ((not isinstance( node.func, ast.Name )) or
+             (node.func.id not in when_functions))):
+            return ( code, None )
+
+    return ( code, code_names( code ) )
+
+
+def code_names ( code, names = None ):
+    """ Returns the set of all global and attribute names referenced by the
+        specified code object (and any code objects nested within it).
+    """
+    if names is None:
+        names = set()
+
+    names.update( code.co_names )
+    names.update( code.co_freevars )
+    for item in code.co_consts:
+        if isinstance( item, CodeType ):
+            code_names( item, names )
+
+    return names
+
 #-------------------------------------------------------------------------------
 #  'UI' class:
 #-------------------------------------------------------------------------------
@@ -148,6 +207,32 @@ class UI ( HasPrivateFacets ):
     # List of (checked_when,Editor) pairs:
     _checked = List
 
+    # Mapping from facet names to the list of (facet,when,Editor) tuples for
+    # the 'when' expressions that reference them:
+    _when_names = DictStrAny
+
+    # List of (facet,when,Editor) tuples for the 'when' expressions that must
+    # be evaluated after any context facet changes:
+    _when_always = List
+
+    # The set of (facet,when,Editor) tuples waiting to be evaluated (or None if
+    # no evaluation is pending):
+    _when_pending = Any
+
+    # Have the context objects been hooked up to evaluate 'when' expressions?
+    _when_hooked = Bool( False )
+
+    # The types of the objects in the context while the user interface is
+    # unbound and its context has been cleared (see 'unbind'):
+    _context_types = Any
+
+    # List of lazily created pages (see ui_panel.LazyPage):
+    _pages = List
+
+    # The most recently restored user preferences (used to restore and save the
+    # preferences of editors on lazily created pages):
+    _prefs = Any
+
     # Search stack used while building a user interface:
     _search = List
 
@@ -186,15 +271,17 @@ class UI ( HasPrivateFacets ):
     # (i.e. rebuilt):
     recyclable_facets = [
         '_context', '_revert', '_defined', '_visible', '_enabled', '_checked',
-        '_search', '_dispatchers', '_editors', '_names', '_active_group',
-        '_undoable', '_rebuild', '_groups_cache', 'dock_window'
+        '_when_names', '_when_always', '_when_pending', '_when_hooked',
+        '_pages', '_prefs', '_search', '_dispatchers', '_editors', '_names',
+        '_active_group', '_undoable', '_rebuild', '_groups_cache',
+        'dock_window'
     ]
 
     # List of additional facets that are discarded when a user interface is
     # disposed:
     disposable_facets = [
         'view_elements', 'info', 'handler', 'context', 'view', 'history',
-        'key_bindings', 'icon', 'rebuild',
+        'key_bindings', 'icon', 'rebuild', '_context_types'
     ]
 
     #-- Public Methods ---------------------------------------------------------
@@ -276,8 +363,10 @@ class UI ( HasPrivateFacets ):
             # Reset the contents of the user interface:
             self.reset( destroy = False )
 
-            # Notify the handler that the view has been closed:
-            self.handler.closed( self.info, self.result )
+            # Notify the handler that the view has been closed (unless it was
+            # already notified when the view was released to a UIPool):
+            if self._context_types is None:
+                self.handler.closed( self.info, self.result )
 
             # Clear the back-link from the UIInfo object to us:
             self.info.ui = None
@@ -408,46 +497,117 @@ class UI ( HasPrivateFacets ):
         if handler.init( info ) == False:
             raise FacetError( 'User interface creation aborted' )
 
-        # For each Handler method whose name is of the form
-        # 'object_name_changed', where 'object' is the name of an object in the
-        # UI's 'context', create a facet notification handler that will call
-        # the method whenever 'object's 'name' facet changes. Also invoke the
-        # method immediately so initial user interface state can be correctly
-        # set:
-        context = self.context
-        for name in self._each_facet_method( handler ):
-            if name[-8:] == '_changed':
-                prefix = name[:-8]
-                col    = prefix.find( '_', 1 )
-                if col >= 0:
-                    object = context.get( prefix[ : col ] )
-                    if object is not None:
-                        method     = getattr( handler, name )
-                        facet_name = prefix[ col + 1: ]
-                        self._dispatchers.append( Dispatcher(
-                             method, info, object, facet_name ) )
-                        if object.base_facet( facet_name ).type != 'event':
-                            method( info )
+        # Connect all 'object_name_changed' style Handler methods:
+        self._hook_dispatchers()
 
         # If there are any Editor object's whose 'visible', 'enabled' or
         # 'checked' state is controlled by a 'visible_when', 'enabled_when' or
         # 'checked_when' expression, set up an 'anyfacet' changed notification
         # handler on each object in the 'context' that will cause the 'visible',
-        # 'enabled' or 'checked' state of each affected Editor to be set. Also
-        # trigger the evaluation immediately, so the visible, enabled or checked
-        # state of each Editor can be correctly initialized:
-        if (len( self._visible ) +
-            len( self._enabled ) +
-            len( self._checked )) > 0:
-            for object in context.values():
-                object.on_facet_set( self._evaluate_when, dispatch = 'ui' )
-
-            self._evaluate_when()
+        # 'enabled' or 'checked' state of each Editor affected by the changed
+        # facet to be set. Also trigger the evaluation immediately, so the
+        # visible, enabled or checked state of each Editor can be correctly
+        # initialized:
+        self._init_when()
 
         # Indicate that the user interface has been initialized:
         info.initialized = True
 
 
+    def can_rebind ( self, context ):
+        """ Returns whether or not the user interface can be rebound to the
+            objects contained in the specified *context* dictionary (see
+            'rebind').
+        """
+        if (self.control is None) or (self.info.ui is not self):
+            return False
+
+        current = self._context_types
+        if current is None:
+            current = dict( [ ( name, type( object ) )
+                              for name, object in self.context.iteritems() ] )
+
+        if ((context.get( 'handler', self.handler ) is not self.handler) or
+            (len( context ) != len( current ))):
+            return False
+
+        for name, object in context.iteritems():
+            if current.get( name ) is not type( object ):
+                return False
+
+        for editor in self._editors:
+            if not editor.can_rebind():
+                return False
+
+        return True
+
+
+    def unbind ( self, clear = False ):
+        """ Disconnects the user interface from the objects in its context
+            without destroying any of its editors or controls, so that it can
+            later be rebound to a different set of objects using 'rebind'. If
+            *clear* is True, all references to the context objects are
+            released as well (only their types are retained).
+        """
+        for editor in self._editors:
+            editor.unbind( clear )
+
+        for dispatcher in self._dispatchers:
+            dispatcher.remove()
+
+        del self._dispatchers[:]
+
+        if self._when_hooked:
+            self._when_hooked = False
+            for object in self.context.values():
+                object.on_facet_set( self._when_facet_set, remove = True )
+
+        self._when_pending = None
+
+        if clear and (self._context_types is None):
+            self._context_types = dict( [
+                ( name, type( object ) )
+                for name, object in self.context.iteritems()
+            ] )
+            self.context         = {}
+            self.control._object = None
+            self.info.unbind_context()
+
+
+    def rebind ( self, context ):
+        """ Rebinds the user interface to the objects contained in the
+            specified *context* dictionary, which must contain objects of the
+            same types as the current context (and the same handler). All
+            existing editors and controls are reused, which is much faster
+            than creating a new user interface. Returns True if the user
+            interface was rebound, and False if it cannot be rebound (in which
+            case it is unchanged).
+        """
+        context.setdefault( 'handler', self.handler )
+        if not self.can_rebind( context ):
+            return False
+
+        self.unbind()
+        self.context         = context
+        self._context_types  = None
+        self.control._object = context.get( 'object' )
+        info                 = self.info
+        info.rebind_context()
+
+        for editor in self._editors:
+            editor.rebind()
+
+        # Invoke the handler's 'init' method for the new context, and abort if
+        # it indicates failure:
+        if self.handler.init( info ) == False:
+            raise FacetError( 'User interface rebinding aborted' )
+
+        self._hook_dispatchers()
+        self._init_when()
+
+        return True
+
+
     def sync_view ( self ):
         """ Synchronize context object facets with view editor facets.
         """
@@ -527,7 +687,8 @@ class UI ( HasPrivateFacets ):
         """ Sets the values of user preferences for the UI.
         """
         if isinstance( prefs, dict ):
-            info = self.info
+            self._prefs = prefs
+            info        = self.info
             for name in self._names:
                 editor = getattr( info, name, None )
                 if isinstance( editor, Editor ) and (editor.ui is self):
@@ -575,6 +736,14 @@ class UI ( HasPrivateFacets ):
                 if prefs != None:
                     ui_prefs[ name ] = prefs
 
+        # Preserve the preferences of any editors on lazily created pages which
+        # do not currently exist:
+        if self._prefs is not None:
+            names = set( self._names )
+            for name, prefs in self._prefs.iteritems():
+                if (name not in names) and (name not in ( '', '$' )):
+                    ui_prefs.setdefault( name, prefs )
+
         return ui_prefs
 
 
@@ -604,33 +773,131 @@ class UI ( HasPrivateFacets ):
         """ Adds a conditionally enabled Editor object to the list of monitored
             'visible_when' objects.
         """
-        try:
-            self._visible.append( ( compile( visible_when, '<string>', 'eval' ),
-                                    editor ) )
-        except:
-            print_exc()
+        self._add_when( self._visible, 'visible', visible_when, editor )
 
 
     def add_enabled ( self, enabled_when, editor ):
         """ Adds a conditionally enabled Editor object to the list of monitored
             'enabled_when' objects.
         """
-        try:
-            self._enabled.append( ( compile( enabled_when, '<string>', 'eval' ),
-                                    editor ) )
-        except:
-            print_exc()
+        self._add_when( self._enabled, 'enabled', enabled_when, editor )
 
 
     def add_checked ( self, checked_when, editor ):
         """ Adds a conditionally enabled (menu) Editor object to the list of
             monitored 'checked_when' objects.
         """
-        try:
-            self._checked.append( ( compile( checked_when, '<string>', 'eval' ),
-                                    editor ) )
-        except:
-            print_exc()
+        self._add_when( self._checked, 'checked', checked_when, editor )
+
+
+    def page_mark ( self ):
+        """ Returns a marker describing the current contents of the user
+            interface, for use with a subsequent call to 'page_created'.
+        """
+        return ( len( self._editors ), len( self._names ), len( self._visible ),
+                 len( self._enabled ), len( self._checked ) )
+
+
+    def page_created ( self, mark ):
+        """ Completes the initialization of the editors created for a lazily
+            created page since *mark* (returned by 'page_mark') was obtained,
+            and returns a description of the page's contents that can later be
+            passed to 'page_released'.
+        """
+        editors, names, visible, enabled, checked = mark
+        contents = ( self._editors[ editors: ], self._names[ names: ],
+                     self._visible[ visible: ], self._enabled[ enabled: ],
+                     self._checked[ checked: ] )
+
+        # Pages created while the user interface is being built are completely
+        # handled by 'prepare_ui':
+        info = self.info
+        if not info.initialized:
+            return contents
+
+        for method in self._defined:
+            method( info )
+
+        del self._defined[:]
+
+        prefs = self._prefs
+        if prefs is not None:
+            for name in contents[1]:
+                editor = getattr( info, name, None )
+                if isinstance( editor, Editor ) and (editor.ui is self):
+                    editor_prefs = prefs.get( name )
+                    if editor_prefs is not None:
+                        editor.restore_prefs( editor_prefs )
+
+        if (len( contents[2] ) + len( contents[3] ) + len( contents[4] )) > 0:
+            self._hook_when()
+            context = self._get_context()
+            for facet, conditions in zip( when_facets, contents[2:] ):
+                self._evaluate_condition( conditions, facet, context )
+
+        return contents
+
+
+    def page_released ( self, contents ):
+        """ Disposes of the editors for a lazily created page described by
+            *contents* (returned by 'page_created'), saving their user
+            preferences so they can be restored if the page is re-created.
+        """
+        editors, names, visible, enabled, checked = contents
+        info = self.info
+        if self._prefs is None:
+            self._prefs = {}
+
+        for name in names:
+            editor = getattr( info, name, None )
+            if isinstance( editor, Editor ) and (editor.ui is self):
+                prefs = editor.save_prefs()
+                if prefs is not None:
+                    self._prefs[ name ] = prefs
+
+            info.remove_facet( name )
+            self._names.remove( name )
+
+        released = set( editors )
+        for editor in editors:
+            editor.dispose()
+            editor.control = None
+
+        self._editors[:] = [ editor for editor in self._editors
+                             if editor not in released ]
+
+        for conditions, removed in ( ( self._visible, visible ),
+                                     ( self._enabled, enabled ),
+                                     ( self._checked, checked ) ):
+            removed = set( removed )
+            conditions[:] = [ condition for condition in conditions
+                              if condition not in removed ]
+            released.update( [ editor for when, editor in removed ] )
+
+        self._when_always = [ item for item in self._when_always
+                              if item[2] not in released ]
+        for name, items in self._when_names.items():
+            items = [ item for item in items if item[2] not in released ]
+            if len( items ) > 0:
+                self._when_names[ name ] = items
+            else:
+                del self._when_names[ name ]
+
+        # Don't evaluate any pending 'when' expressions for the released
+        # editors:
+        pending = self._when_pending
+        if pending is not None:
+            pending.difference_update( [ item for item in pending
+                                         if item[2] in released ] )
+
+
+    def release_pages ( self ):
+        """ Releases the editors and controls of all lazily created pages which
+            are not currently displayed (e.g. in response to a low memory
+            condition). The pages are re-created the next time they are
+            displayed. Returns the number of pages released.
+        """
+        return len( [ page for page in self._pages if page.release() ] )
 
 
     def do_undoable ( self, action, *args, **kw ):
@@ -808,6 +1075,55 @@ class UI ( HasPrivateFacets ):
 
     #-- Private Methods --------------------------------------------------------
 
+    def _add_when ( self, conditions, facet, when, editor ):
+        """ Adds the Editor *editor*, whose *facet* facet is controlled by the
+            'when' expression *when*, to the list of monitored *conditions*,
+            and records the names of the facets the expression depends upon.
+        """
+        try:
+            code, names = when_code( when )
+        except:
+            print_exc()
+
+            return
+
+        conditions.append( ( code, editor ) )
+        item = ( facet, code, editor )
+        if (names is None) or (not self._when_notifies( names )):
+            self._when_always.append( item )
+        else:
+            when_names = self._when_names
+            for name in names:
+                when_names.setdefault( name, [] ).append( item )
+
+
+    def _when_notifies ( self, names ):
+        """ Returns True if each of the *names* referenced by a 'when'
+            expression which is not a context object or builtin name is a facet
+            of some context object which generates change notifications (and
+            False if the expression must be re-evaluated after every change,
+            e.g. because it refers to a plain attribute or a Property with no
+            'depends_on' metadata).
+        """
+        context = self.context
+        for name in names:
+            if ((name in context) or (name == 'ui') or
+                hasattr( __builtin__, name )):
+                continue
+
+            for object in context.itervalues():
+                facet = object.facet( name )
+                if ((facet is not None)                      and
+                    (facet.type not in when_silent_types)    and
+                    ((facet.type != 'property') or
+                     (facet.depends_on is not None))):
+                    break
+            else:
+                return False
+
+        return True
+
+
     def _get_context ( self, context = None ):
         """ Gets the context to use for evaluating an expression.
         """
@@ -835,6 +1151,43 @@ class UI ( HasPrivateFacets ):
         return context2
 
 
+    def _hook_dispatchers ( self ):
+        """ For each Handler method whose name is of the form
+            'object_name_changed', where 'object' is the name of an object in
+            the UI's 'context', creates a facet notification handler that will
+            call the method whenever 'object's 'name' facet changes. Also
+            invokes the method immediately so initial user interface state can
+            be correctly set.
+        """
+        info    = self.info
+        handler = self.handler
+        context = self.context
+        for name in self._each_facet_method( handler ):
+            if name[-8:] == '_changed':
+                prefix = name[:-8]
+                col    = prefix.find( '_', 1 )
+                if col >= 0:
+                    object = context.get( prefix[ : col ] )
+                    if object is not None:
+                        method     = getattr( handler, name )
+                        facet_name = prefix[ col + 1: ]
+                        self._dispatchers.append( Dispatcher(
+                             method, info, object, facet_name ) )
+                        if object.base_facet( facet_name ).type != 'event':
+                            method( info )
+
+
+    def _init_when ( self ):
+        """ Hooks up and evaluates all 'visible_when', 'enabled_when' and
+            'checked_when' expressions (if there are any).
+        """
+        if (len( self._visible ) +
+            len( self._enabled ) +
+            len( self._checked )) > 0:
+            self._hook_when()
+            self._evaluate_when()
+
+
     def _evaluate_when ( self ):
         """ Sets the 'visible', 'enabled', and 'checked' states for all Editors
             controlled by a 'visible_when', 'enabled_when' or 'checked_when'
@@ -846,6 +1199,67 @@ class UI ( HasPrivateFacets ):
         self._evaluate_condition( self._checked, 'checked', context )
 
 
+    def _hook_when ( self ):
+        """ Sets up an 'anyfacet' changed notification handler on each object
+            in the 'context' that evaluates the 'when' expressions affected by
+            the change (if it has not already been set up).
+        """
+        if not self._when_hooked:
+            self._when_hooked = True
+            for object in self.context.values():
+                object.on_facet_set( self._when_facet_set, dispatch = 'ui' )
+
+
+    def _when_facet_set ( self, facet ):
+        """ Handles a facet called *facet* being changed on any context object
+            by scheduling the evaluation of each 'when' expression that
+            depends upon it. All of the changes made before the pending
+            evaluations are performed are handled by a single evaluation pass.
+        """
+        if facet[-6:] == '_items':
+            facet = facet[:-6]
+
+        items = self._when_names.get( facet )
+        if (items is None) and (len( self._when_always ) == 0):
+            return
+
+        pending  = self._when_pending
+        schedule = (pending is None)
+        if schedule:
+            self._when_pending = pending = set()
+
+        if items is not None:
+            pending.update( items )
+
+        pending.update( self._when_always )
+
+        if schedule:
+            # Evaluate immediately if there is no event loop to defer to:
+            if toolkit().is_application_running():
+                do_after( 0, self._evaluate_pending )
+            else:
+                self._evaluate_pending()
+
+
+    def _evaluate_pending ( self ):
+        """ Evaluates all pending 'when' expressions.
+        """
+        pending = self._when_pending
+        if pending is None:
+            return
+
+        self._when_pending = None
+        info               = self.info
+        if (info is None) or (info.ui is None):
+            return
+
+        context = self._get_context()
+        for facet in when_facets:
+            self._evaluate_condition(
+                [ ( when, editor ) for facet2, when, editor in pending
+                                   if facet2 == facet ], facet, context )
+
+
     def _evaluate_condition ( self, conditions, facet, context ):
         """ Evaluates a list of (eval,editor) pairs and sets a specified facet
             on each editor to reflect the Boolean value of the expression.
@@ -41,6 +41,28 @@ class UIInfo ( HasPrivateFacets ):
             self.bind( name, value )
 
 
+    def unbind_context ( self ):
+        """ Releases the associated context objects bound as facets of the
+            object while the user interface is unbound (see 'rebind_context').
+        """
+        for name in self.ui._context_types.iterkeys():
+            if hasattr( self, name ):
+                self.remove_facet( name )
+                self.add_facet( name, Constant( None ) )
+
+
+    def rebind_context ( self ):
+        """ Rebinds all of the associated context objects as facets of the
+            object after the context has been changed.
+        """
+        for name, value in self.ui.context.items():
+            if hasattr( self, name ):
+                self.remove_facet( name )
+                self.add_facet( name, Constant( value ) )
+            else:
+                self.bind( name, value )
+
+
     def bind ( self, name, value, id = None ):
         """ Binds a name to a value if it is not already bound.
         """
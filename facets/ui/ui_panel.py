@@ -327,15 +327,38 @@ def create_notebook_for_items ( content, ui, parent, group,
     pages     = []
     count     = 0
     has_theme = ((group is not None) and (group.group_theme is not None))
+    lazy      = is_lazy( group )
 
-    # Create a notebook page for each group or item in the content:
+    # Determine the initially active page:
     active = 0
     for index, item in enumerate( content ):
-        if isinstance( item, Group ):
-            # Create the group as a nested DockWindow item:
-            if item.selected:
-                active = index
+        if isinstance( item, Group ) and item.selected:
+            active = index
 
+    # Create a notebook page for each group or item in the content:
+    for index, item in enumerate( content ):
+        if (lazy                      and
+            isinstance( item, Group ) and
+            (item.layout not in dock_window_layouts)):
+            # Create a placeholder page whose contents are created the first
+            # time the page is displayed:
+            page = LazyPage( ui, item, toolkit().create_panel( nb ),
+                             create_lazy_group )
+            pages.append( LazyDockControl(
+                name     = item.get_label( ui ),
+                image    = item.image,
+                id       = item.get_id(),
+                style    = item.dock,
+                dockable = DockableViewElement( ui = ui, element = item ),
+                export   = item.export,
+                control  = page.panel,
+                page     = page
+            ) )
+
+            if index == active:
+                page.show()
+        elif isinstance( item, Group ):
+            # Create the group as a nested DockWindow item:
             contents = GroupPanel( nb, item, ui, suppress_label = True,
                                    is_dock_window = True ).dock_contents
 
@@ -390,6 +413,20 @@ def create_notebook_for_items ( content, ui, parent, group,
     return nb
 
 
+def is_lazy ( group ):
+    """ Returns whether the pages of the specified group should be created
+        lazily.
+    """
+    return ((group is not None) and (group.lazy or facets_env.lazy))
+
+
+def create_lazy_group ( page ):
+    """ Creates the contents of a lazily created page containing a Group.
+    """
+    return GroupPanel( page.panel, page.item, page.ui, suppress_label = True,
+                       create_panel = True ).control
+
+
 def add_image_panel ( window, group ):
     """ Creates a themed ImagePanel for the specified group and parent window.
     """
@@ -624,7 +661,7 @@ class GroupPanel ( object ):
             elif layout == 'fold':
                 self.resizable = True
                 self.get_layout().add(
-                    self.create_fold_for_items( panel, content ), stretch = 1
+                    self.create_fold_for_items( parent, content ), stretch = 1
                 )
 
             elif is_toolbar:
@@ -800,14 +837,27 @@ class GroupPanel ( object ):
         nb     = VerticalNotebook( scrollable = True, multiple_open = True )
         result = nb.create_control( window )
 
+        # If the pages are created lazily, only open the selected pages (or the
+        # first page if none are selected), since the others are not created
+        # until they are opened:
+        is_open = [ True ] * len( content )
+        lazy    = is_lazy( self.group )
+        if lazy:
+            is_open = [ isinstance( item, Group ) and item.selected
+                        for item in content ]
+            if True not in is_open:
+                is_open[0] = True
+
         # Create the notebook pages:
-        nb.pages = [ self.create_fold_for_item( nb, item ) for item in content ]
+        nb.pages = [ self.create_fold_for_item( nb, item, lazy, is_open[i] )
+                     for i, item in enumerate( content ) ]
 
         # Return the notebook we created:
         return result
 
 
-    def create_fold_for_item ( self, notebook, item ):
+    def create_fold_for_item ( self, notebook, item, lazy = False,
+                                                     is_open = True ):
         """ Adds a single group or item to a vertical notebook.
         """
         # fixme: Does this need to be changed to work with the abstraction
@@ -818,7 +868,15 @@ class GroupPanel ( object ):
         page = notebook.create_page()
 
         # Create the page contents:
-        if isinstance( item, Group ):
+        if lazy and isinstance( item, Group ):
+            # Create a placeholder whose contents are created the first time
+            # the page is opened:
+            lazy_page = LazyPage( self.ui, item,
+                                  toolkit().create_panel( page.parent ),
+                                  create_lazy_group )
+            page.on_facet_set( lazy_page.show, 'is_open' )
+            panel = lazy_page.panel
+        elif isinstance( item, Group ):
             panel = GroupPanel( page.parent, item, self.ui,
                         suppress_label = True, create_panel = True ).control
         else:
@@ -830,7 +888,7 @@ class GroupPanel ( object ):
         # Set the page name and control:
         page.name    = item.get_label( self.ui )
         page.control = panel
-        page.is_open = True
+        page.is_open = is_open
 
         # Return the new notebook page:
         return page
@@ -1394,6 +1452,87 @@ class GroupPanel ( object ):
         for child in control.children:
             self._set_owner( child, owner )
 
+#-------------------------------------------------------------------------------
+#  'LazyPage' class:
+#-------------------------------------------------------------------------------
+
+class LazyPage ( object ):
+    """ A notebook, fold or DockWindow page whose contents are only created the
+        first time the page is displayed, and which can be released again
+        while the page is not displayed.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, ui, item, panel, create ):
+        """ Initializes the object. *panel* is the placeholder panel the page
+            contents are added to, and *create* is a function that is called
+            with the page as its argument to create the page contents.
+        """
+        self.ui       = ui
+        self.item     = item
+        self.panel    = panel
+        self.create   = create
+        self.visible  = False
+        self.control  = None
+        self.contents = None
+
+        panel.layout = toolkit().create_box_layout()
+        ui._pages.append( self )
+
+
+    def show ( self, visible = True ):
+        """ Handles the page being shown or hidden, creating the contents of
+            the page if necessary.
+        """
+        self.visible = visible
+        if visible and (self.control is None):
+            ui            = self.ui
+            mark          = ui.page_mark()
+            self.control  = control = self.create( self )
+            self.panel.layout.add( control, stretch = 1 )
+            self.contents = ui.page_created( mark )
+            self.panel.update()
+
+
+    def release ( self ):
+        """ Releases the contents of the page if it has been created and is not
+            currently visible. Returns True if the contents were released, and
+            False otherwise.
+        """
+        if self.visible or (self.control is None):
+            return False
+
+        self.ui.page_released( self.contents )
+        self.control.destroy()
+        self.control = self.contents = None
+
+        return True
+
+#-------------------------------------------------------------------------------
+#  'LazyDockControl' class:
+#-------------------------------------------------------------------------------
+
+class LazyDockControl ( DockControl ):
+    """ A DockControl for a DockWindow notebook page whose contents are created
+        lazily.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The LazyPage the DockControl displays:
+    page = Any
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def set_visibility ( self, visible ):
+        """ Sets the visibility of the control.
+        """
+        if self.page is not None:
+            self.page.show( visible )
+
+        super( LazyDockControl, self ).set_visibility( visible )
+
 #-------------------------------------------------------------------------------
 #  'GroupEditor' class:
 #-------------------------------------------------------------------------------
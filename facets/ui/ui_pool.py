@@ -0,0 +1,233 @@
+"""
+Defines the UIPool class, which keeps a pool of idle user interfaces which can
+be reused to edit other objects of the same type using the same View.
+
+Tools which repeatedly display the same View for a series of different objects
+(e.g. an object inspector) normally create a new UI, along with all of its
+editors and toolkit controls, each time the object changes, and dispose of it
+again when the next object is displayed. Using a UIPool, the UI for the
+previous object is instead hidden and kept in the pool when it is released.
+When the same View is next requested for an object of the same class, the
+pooled UI is rebound to the new object (see 'UI.rebind') and shown again,
+which is much faster than building a new UI.
+
+Idle user interfaces are keyed by ( View id, object class, kind ) and are only
+reused with the same parent control. A UIPool is therefore normally owned by
+the object that owns the parent control, which must call the pool's 'clear'
+method before the parent control is destroyed. For example:
+
+    pool = UIPool( size = 4 )
+    ...
+    ui = pool.ui( view, object, parent, 'subpanel' )
+    ...
+    pool.dispose( ui )
+    ...
+    pool.clear()
+
+Only the embedded kinds of user interface ('panel', 'subpanel' and 'editor')
+whose editors all support being rebound (see 'Editor.rebindable') are pooled.
+Any other user interface is simply created and disposed of as usual.
+
+The handler of a pooled UI sees the same life cycle as for a UI which is
+created and disposed of each time: its 'closed' method is called when the UI
+is released to the pool, and its 'init' method when the UI is rebound to a new
+context. An idle UI does not keep any reference to the objects it was editing.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See sections (A) and (B) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+from facets.core_api \
+    import HasPrivateFacets, Int, List
+
+from facets.core.facets_env \
+    import facets_env
+
+from facets.ui.adapters.control \
+    import Control, as_toolkit_control
+
+from handler \
+    import Handler, default_handler
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The kinds of user interface which can be pooled:
+PooledKinds = set( [ 'panel', 'subpanel', 'editor' ] )
+
+#-------------------------------------------------------------------------------
+#  'UIPool' class:
+#-------------------------------------------------------------------------------
+
+class UIPool ( HasPrivateFacets ):
+    """ A pool of idle user interfaces which can be reused to edit other
+        objects of the same type using the same View.
+    """
+
+    #-- Facet Definitions ------------------------------------------------------
+
+    # The maximum number of idle user interfaces kept in the pool (a value of 0
+    # disables pooling):
+    size = Int
+
+    # The number of user interfaces obtained from the pool:
+    hits = Int
+
+    # The number of user interfaces which had to be created:
+    misses = Int
+
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The idle user interfaces, as ( key, UI ) tuples, ordered from least to
+    # most recently released:
+    _idle = List
+
+    #-- Facet Default Values ---------------------------------------------------
+
+    def _size_default ( self ):
+        return facets_env.pool
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def ui ( self, view, context, parent = None, kind = None,
+                   view_elements = None, handler = None, id = '',
+                   scrollable = None, args = None ):
+        """ Returns a UI for the specified *view* and *context*, reusing an
+            idle pooled UI if possible. The arguments are the same as for the
+            View 'ui' method.
+        """
+        if not isinstance( context, dict ):
+            context = context.facet_context()
+
+        if kind is None:
+            kind = view.kind
+
+        if args is None:
+            ui = self._acquire( view, context, parent, kind, handler )
+            if ui is not None:
+                self.hits += 1
+
+                return ui
+
+        self.misses += 1
+
+        return view.ui( context, parent, kind, view_elements, handler, id,
+                        scrollable, args )
+
+
+    def dispose ( self, ui, result = None, abort = False ):
+        """ Releases the specified *ui* to the pool if it can be reused, or
+            disposes of it otherwise.
+        """
+        if not self.release( ui, result, abort ):
+            ui.dispose( result, abort )
+
+
+    def release ( self, ui, result = None, abort = False ):
+        """ Attempts to release the specified *ui* to the pool for later reuse.
+            Returns True if the UI was added to the pool, and False otherwise
+            (in which case the caller is still responsible for disposing of
+            it).
+        """
+        if (self.size <= 0) or (not isinstance( ui.control, Control )):
+            return False
+
+        key = self._key_for( ui.view, ui.context, ui.kind )
+        if (key is None) or (not ui.can_rebind( ui.context )):
+            return False
+
+        if result is not None:
+            ui.result = result
+
+        if not abort:
+            ui.save_prefs()
+
+        # Notify the handler that the view has been closed (it will be
+        # re-initialized when the view is rebound), and release all references
+        # to the objects it was editing while it is idle:
+        ui.handler.closed( ui.info, ui.result )
+        ui.unbind( clear = True )
+        ui.control.visible = False
+
+        idle = self._idle
+        idle.append( ( key, ui ) )
+        while len( idle ) > self.size:
+            idle.pop( 0 )[1].finish()
+
+        return True
+
+
+    def clear ( self ):
+        """ Disposes of all idle user interfaces contained in the pool.
+        """
+        idle       = self._idle
+        self._idle = []
+        for key, ui in idle:
+            ui.finish()
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _key_for ( self, view, context, kind ):
+        """ Returns the pool key for the specified *view*, *context* and
+            *kind*, or None if a user interface of that kind can not be pooled.
+        """
+        object = context.get( 'object' )
+        if ((kind not in PooledKinds) or (object is None) or
+            (view.model_view is not None)):
+            return None
+
+        return ( view.id or view, object.__class__, kind )
+
+
+    def _acquire ( self, view, context, parent, kind, handler ):
+        """ Returns an idle user interface from the pool rebound to the
+            specified *context*, or None if there is no suitable idle user
+            interface.
+        """
+        key = self._key_for( view, context, kind )
+        if key is None:
+            return None
+
+        # Determine the handler the same way View.ui does, but only allow
+        # handler instances (since a handler class creates a new handler each
+        # time):
+        handler = handler or view.handler or default_handler()
+        if not isinstance( handler, Handler ):
+            return None
+
+        context.setdefault( 'handler', handler )
+        parent = as_toolkit_control( parent )
+        idle   = self._idle
+        for i in xrange( len( idle ) - 1, -1, -1 ):
+            key2, ui = idle[ i ]
+            if ((key2 == key) and (ui.view is view) and
+                (as_toolkit_control( ui.control._parent ) is parent)):
+                del idle[ i ]
+
+                # Make sure a user interface whose handler aborts rebinding
+                # does not leak (it is no longer in the pool):
+                try:
+                    rebound = ui.rebind( context )
+                except:
+                    ui.finish()
+
+                    raise
+
+                if rebound:
+                    ui.control.visible = True
+
+                    return ui
+
+                # Dispose of the user interface that could not be rebound, and
+                # try any other idle user interfaces for the same view:
+                ui.finish()
+
+        return None
+
+#-- EOF ------------------------------------------------------------------------
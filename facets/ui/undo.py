@@ -1,6 +1,18 @@
 """
 Defines the manager for Undo and Redo history for Facets user interface
 support.
+
+To keep the memory used by the history bounded, an UndoItem whose old and new
+values are strings, lists or NumPy arrays is compacted once it has been added
+to the history: instead of complete copies of both values, it keeps only a
+delta describing the difference between them (the span of characters or items
+replaced, the set of list indices changed, or the array elements patched). The
+old and new values are recreated on demand from the current value of the facet
+(which is checked against a signature of the value the delta applies to).
+
+An UndoHistory also has a memory budget ('max_bytes'). When the estimated size
+of all of its undo items exceeds the budget, the oldest entries are discarded
+until it no longer does (although the most recent entry is always kept).
 """
 
 #-------------------------------------------------------------------------------
@@ -11,12 +23,17 @@ support.
 #  Imports:
 #-------------------------------------------------------------------------------
 
+import sys
+
 from operator \
     import isSequenceType
 
+from sys \
+    import getsizeof
+
 from facets.core_api \
     import HasStrictFacets, HasPrivateFacets, HasFacets, Instance, List, Int, \
-           Str, Event, Property
+           Str, Event, Property, Any
 
 #-------------------------------------------------------------------------------
 #  Constants:
@@ -25,6 +42,419 @@ from facets.core_api \
 NumericTypes = ( int, long, float, complex )
 SimpleTypes  = ( str, unicode, int, long, float, complex )
 
+# The default memory budget (in bytes) for an UndoHistory:
+MaxUndoBytes = 32 * 1024 * 1024
+
+# The size of the blocks compared when looking for the common prefix/suffix of
+# two strings:
+BlockSize = 1 << 12
+
+#-------------------------------------------------------------------------------
+#  Helper Functions:
+#-------------------------------------------------------------------------------
+
+def ndarray_type ( ):
+    """ Returns the NumPy array type if NumPy is in use, and None otherwise.
+    """
+    numpy = sys.modules.get( 'numpy' )
+    if numpy is None:
+        return None
+
+    return numpy.ndarray
+
+
+def value_size ( value ):
+    """ Returns an estimate of the number of bytes used by *value* (including
+        the items it contains, if it is a list, tuple or dictionary).
+    """
+    try:
+        ndarray = ndarray_type()
+        if (ndarray is not None) and isinstance( value, ndarray ):
+            return value.nbytes
+
+        size = getsizeof( value )
+        if isinstance( value, ( list, tuple ) ):
+            size += sum( [ getsizeof( item ) for item in value ] )
+        elif isinstance( value, dict ):
+            size += sum( [ getsizeof( key ) + getsizeof( item )
+                           for key, item in value.iteritems() ] )
+
+        return size
+    except:
+        return 0
+
+
+def common_affixes ( a, b ):
+    """ Returns a tuple of the form: ( prefix, suffix ) containing the lengths
+        of the longest common prefix and (non-overlapping) suffix of the
+        sequences *a* and *b*. String items are compared by value, and all
+        other items by identity.
+    """
+    n = min( len( a ), len( b ) )
+    if isinstance( a, basestring ):
+        prefix = _string_prefix( a, b, n )
+        suffix = _string_suffix( a, b, n - prefix )
+    else:
+        prefix = 0
+        while (prefix < n) and (a[ prefix ] is b[ prefix ]):
+            prefix += 1
+
+        suffix = 0
+        while ((suffix < (n - prefix)) and
+               (a[ -1 - suffix ] is b[ -1 - suffix ])):
+            suffix += 1
+
+    return ( prefix, suffix )
+
+
+def _string_prefix ( a, b, n ):
+    """ Returns the length of the longest common prefix of the first *n*
+        characters of strings *a* and *b*.
+    """
+    i = 0
+    while (i < n) and (a[ i: i + BlockSize ] == b[ i: i + BlockSize ]):
+        i += BlockSize
+
+    if i >= n:
+        return n
+
+    # Binary search within the first mismatched block:
+    lo, hi = i, min( i + BlockSize, n )
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[ lo: mid ] == b[ lo: mid ]:
+            lo = mid
+        else:
+            hi = mid - 1
+
+    return lo
+
+
+def _string_suffix ( a, b, limit ):
+    """ Returns the length of the longest common suffix of strings *a* and
+        *b*, up to a maximum of *limit* characters.
+    """
+    na, nb = len( a ), len( b )
+    i      = 0
+    while ((i < limit) and
+           (a[ max( na - i - BlockSize, na - limit ): na - i ] ==
+            b[ max( nb - i - BlockSize, nb - limit ): nb - i ])):
+        i += BlockSize
+
+    if i >= limit:
+        return limit
+
+    lo, hi = i, min( i + BlockSize, limit )
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[ na - mid: na - lo ] == b[ nb - mid: nb - lo ]:
+            lo = mid
+        else:
+            hi = mid - 1
+
+    return lo
+
+
+def delta_for ( old, new ):
+    """ Returns a delta object describing how to change *old* into *new* (and
+        back again), or None if the values are not of a type (or are not
+        similar enough) for a delta to save memory.
+    """
+    if type( old ) is not type( new ):
+        return None
+
+    if isinstance( old, ( basestring, list, tuple ) ):
+        if isinstance( old, list ) and (len( old ) == len( new )):
+            delta = IndexDelta.for_values( old, new )
+            if delta is not None:
+                return delta
+
+        return SpliceDelta( old, new )
+
+    ndarray = ndarray_type()
+    if (ndarray is not None) and isinstance( old, ndarray ):
+        return ArrayDelta.for_values( old, new )
+
+    return None
+
+#-------------------------------------------------------------------------------
+#  'SpliceDelta' class:
+#-------------------------------------------------------------------------------
+
+class SpliceDelta ( object ):
+    """ Describes the difference between two strings, lists or tuples as the
+        replacement of a single span of characters or items.
+    """
+
+    __slots__ = ( 'start', 'removed', 'added', 'new_length', 'new_check',
+                  'old_check' )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, old, new ):
+        """ Initializes the object.
+        """
+        prefix, suffix  = common_affixes( old, new )
+        self.start      = prefix
+        self.removed    = old[ prefix: len( old ) - suffix ]
+        self.added      = new[ prefix: len( new ) - suffix ]
+        self.new_length = len( new )
+        self.new_check  = self._check( new )
+        self.old_check  = self._check( old )
+
+
+    def old_from ( self, new ):
+        """ Returns the old value, given the *new* value.
+        """
+        start = self.start
+
+        return (new[ : start ] + self.removed +
+                new[ start + len( self.added ): ])
+
+
+    def new_from ( self, old ):
+        """ Returns the new value, given the *old* value.
+        """
+        start = self.start
+
+        return (old[ : start ] + self.added +
+                old[ start + len( self.removed ): ])
+
+
+    def is_new ( self, value ):
+        """ Returns True if *value* appears to be the new value.
+        """
+        return ((len( value ) == self.new_length) and
+                (self._check( value ) == self.new_check) and
+                self._contains( value, self.added ))
+
+
+    def is_old ( self, value ):
+        """ Returns True if *value* appears to be the old value.
+        """
+        return ((len( value ) == (self.new_length + len( self.removed ) -
+                                  len( self.added ))) and
+                (self._check( value ) == self.old_check) and
+                self._contains( value, self.removed ))
+
+
+    def size ( self ):
+        """ Returns an estimate of the number of bytes used by the delta.
+        """
+        return (getsizeof( self ) + value_size( self.removed ) +
+                value_size( self.added ))
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _check ( self, value ):
+        """ Returns the check value for *value* (its hash for a string, since
+            a string caches its hash, and None otherwise).
+        """
+        if isinstance( value, basestring ):
+            return hash( value )
+
+        return None
+
+
+    def _contains ( self, value, items ):
+        """ Returns True if *value* contains *items* at the start of the
+            delta's span.
+        """
+        start = self.start
+        span  = value[ start: start + len( items ) ]
+        if isinstance( value, basestring ):
+            return (span == items)
+
+        return ((len( span ) == len( items )) and
+                (len( [ item for i, item in enumerate( items )
+                        if item is not span[ i ] ] ) == 0))
+
+#-------------------------------------------------------------------------------
+#  'IndexDelta' class:
+#-------------------------------------------------------------------------------
+
+class IndexDelta ( object ):
+    """ Describes the difference between two lists of the same length as the
+        set of indices whose items have changed.
+    """
+
+    __slots__ = ( 'length', 'indices', 'removed', 'added' )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    @classmethod
+    def for_values ( cls, old, new ):
+        """ Returns the delta between lists *old* and *new*, or None if the
+            changed items are not scattered enough for a set of indices to be
+            smaller than the span of items containing them.
+        """
+        indices = [ i for i, item in enumerate( old ) if item is not new[ i ] ]
+        if (len( indices ) < 2) or (
+            (2 * len( indices )) > (indices[-1] - indices[0] + 1)):
+            return None
+
+        delta         = cls()
+        delta.length  = len( old )
+        delta.indices = indices
+        delta.removed = [ old[ i ] for i in indices ]
+        delta.added   = [ new[ i ] for i in indices ]
+
+        return delta
+
+
+    def old_from ( self, new ):
+        """ Returns the old value, given the *new* value.
+        """
+        return self._patch( new, self.removed )
+
+
+    def new_from ( self, old ):
+        """ Returns the new value, given the *old* value.
+        """
+        return self._patch( old, self.added )
+
+
+    def is_new ( self, value ):
+        """ Returns True if *value* appears to be the new value.
+        """
+        return self._contains( value, self.added )
+
+
+    def is_old ( self, value ):
+        """ Returns True if *value* appears to be the old value.
+        """
+        return self._contains( value, self.removed )
+
+
+    def size ( self ):
+        """ Returns an estimate of the number of bytes used by the delta.
+        """
+        return (getsizeof( self ) + value_size( self.indices ) +
+                value_size( self.removed ) + value_size( self.added ))
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _patch ( self, value, items ):
+        """ Returns a copy of the list *value* with the items at the delta's
+            indices replaced by *items*.
+        """
+        result = list( value )
+        for i, item in zip( self.indices, items ):
+            result[ i ] = item
+
+        return result
+
+
+    def _contains ( self, value, items ):
+        """ Returns True if *value* contains *items* at the delta's indices.
+        """
+        if len( value ) != self.length:
+            return False
+
+        for i, item in zip( self.indices, items ):
+            if value[ i ] is not item:
+                return False
+
+        return True
+
+#-------------------------------------------------------------------------------
+#  'ArrayDelta' class:
+#-------------------------------------------------------------------------------
+
+class ArrayDelta ( object ):
+    """ Describes the difference between two NumPy arrays of the same shape
+        and type as the set of elements which have changed.
+    """
+
+    __slots__ = ( 'shape', 'dtype', 'indices', 'removed', 'added' )
+
+    #-- Public Methods ---------------------------------------------------------
+
+    @classmethod
+    def for_values ( cls, old, new ):
+        """ Returns the delta between arrays *old* and *new*, or None if they
+            differ in shape or type, or too many elements have changed for a
+            delta to be smaller than a copy of the array.
+        """
+        if (old.shape != new.shape) or (old.dtype != new.dtype):
+            return None
+
+        changed = (old != new)
+        if not isinstance( changed, ndarray_type() ):
+            return None
+
+        # Don't treat NaN elements as having changed:
+        if old.dtype.kind in 'fc':
+            changed &= ~((old != old) & (new != new))
+
+        indices = changed.ravel().nonzero()[0]
+        if (3 * indices.nbytes) > old.nbytes:
+            return None
+
+        delta         = cls()
+        delta.shape   = old.shape
+        delta.dtype   = old.dtype
+        delta.indices = indices
+        delta.removed = old.ravel()[ indices ]
+        delta.added   = new.ravel()[ indices ]
+
+        return delta
+
+
+    def old_from ( self, new ):
+        """ Returns the old value, given the *new* value.
+        """
+        return self._patch( new, self.removed )
+
+
+    def new_from ( self, old ):
+        """ Returns the new value, given the *old* value.
+        """
+        return self._patch( old, self.added )
+
+
+    def is_new ( self, value ):
+        """ Returns True if *value* appears to be the new value.
+        """
+        return self._contains( value, self.added )
+
+
+    def is_old ( self, value ):
+        """ Returns True if *value* appears to be the old value.
+        """
+        return self._contains( value, self.removed )
+
+
+    def size ( self ):
+        """ Returns an estimate of the number of bytes used by the delta.
+        """
+        return (getsizeof( self ) + self.indices.nbytes +
+                self.removed.nbytes + self.added.nbytes)
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _patch ( self, value, items ):
+        """ Returns a copy of the array *value* with the delta's elements
+            replaced by *items*.
+        """
+        result = value.copy()
+        result.ravel()[ self.indices ] = items
+
+        return result
+
+
+    def _contains ( self, value, items ):
+        """ Returns True if *value* contains *items* at the delta's element
+            indices.
+        """
+        if (value.shape != self.shape) or (value.dtype != self.dtype):
+            return False
+
+        values = value.ravel()[ self.indices ]
+
+        return bool( ((values == items) | ((values != values) &
+                                           (items  != items))).all() )
+
 #-------------------------------------------------------------------------------
 #  'AbstractUndoItem' class:
 #-------------------------------------------------------------------------------
@@ -53,6 +483,20 @@ class AbstractUndoItem ( HasPrivateFacets ):
         """
         return False
 
+
+    def compact ( self ):
+        """ Reduces the memory used by the undo item (if possible). Called
+            once the item has been added to an undo history (and any merge
+            has been attempted).
+        """
+        pass
+
+
+    def size ( self ):
+        """ Returns an estimate of the number of bytes used by the undo item.
+        """
+        return getsizeof( self )
+
 #-------------------------------------------------------------------------------
 #  'UndoItem' class:
 #-------------------------------------------------------------------------------
@@ -75,23 +519,55 @@ class UndoItem ( AbstractUndoItem ):
     # New value of the changed facet
     new_value = Property
 
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The delta between the old and new values (if the item has been
+    # compacted):
+    _delta = Any
+
     #-- Property Implementations -----------------------------------------------
 
     def _get_old_value ( self ):
-        return self._old_value
+        delta = self._delta
+        if delta is None:
+            return self._old_value
+
+        value = self._current_value()
+        if delta.is_new( value ):
+            return delta.old_from( value )
+
+        if delta.is_old( value ):
+            return value
+
+        raise ValueError( 'The old value of %s cannot be recreated.' %
+                          self.name )
 
     def _set_old_value ( self, value ):
         if isinstance( value, list ):
             value = value[ : ]
+        self._expand()
         self._old_value = value
 
 
     def _get_new_value ( self ):
-        return self._new_value
+        delta = self._delta
+        if delta is None:
+            return self._new_value
+
+        value = self._current_value()
+        if delta.is_new( value ):
+            return value
+
+        if delta.is_old( value ):
+            return delta.new_from( value )
+
+        raise ValueError( 'The new value of %s cannot be recreated.' %
+                          self.name )
 
     def _set_new_value ( self, value ):
         if isinstance( value, list ):
             value = value[ : ]
+        self._expand()
         self._new_value = value
 
     #-- Public Methods ---------------------------------------------------------
@@ -122,23 +598,25 @@ class UndoItem ( AbstractUndoItem ):
         if (isinstance( undo_item, self.__class__ ) and
            (self.object is undo_item.object) and
            (self.name == undo_item.name)):
+            if self._delta is not None:
+                # The new value of a compacted item is normally the old value
+                # of the item that follows it:
+                if not self._delta.is_new( undo_item.old_value ):
+                    return False
+
+                self._expand( undo_item.old_value )
+
             v1 = self.new_value
             v2 = undo_item.new_value
             t1 = type( v1 )
             if t1 is type( v2 ):
-                if isinstance( t1, basestring ):
+                if issubclass( t1, basestring ):
                     # Merge two undo items if they have new values which are
                     # strings which only differ by one character (corresponding
                     # to a single character insertion, deletion or replacement
                     # operation in a text editor):
-                    n1 = len( v1 )
-                    n2 = len( v2 )
-                    n  = min( n1, n2 )
-                    i  = 0
-                    while ( i < n ) and ( v1[ i ] == v2[ i ] ):
-                        i += 1
-
-                    if v1[ i + ( n2 <= n1 ): ] == v2[ i + ( n2 >= n1 ): ]:
+                    prefix, suffix = common_affixes( v1, v2 )
+                    if (max( len( v1 ), len( v2 ) ) - prefix - suffix) <= 1:
                         self.new_value = v2
 
                         return True
@@ -183,6 +661,29 @@ class UndoItem ( AbstractUndoItem ):
         return False
 
 
+    def compact ( self ):
+        """ Replaces the old and new values by the delta between them (if
+            possible).
+        """
+        if self._delta is None:
+            old_value, new_value = self._old_value, self._new_value
+            delta                = delta_for( old_value, new_value )
+            if ((delta is not None) and (delta.size() <
+                (value_size( old_value ) + value_size( new_value )))):
+                self._delta     = delta
+                self._old_value = self._new_value = None
+
+
+    def size ( self ):
+        """ Returns an estimate of the number of bytes used by the undo item.
+        """
+        if self._delta is not None:
+            return getsizeof( self ) + self._delta.size()
+
+        return (getsizeof( self ) + value_size( self._old_value ) +
+                value_size( self._new_value ))
+
+
     def __repr__ ( self ):
         """ Returns a "pretty print" form of the object.
         """
@@ -192,6 +693,27 @@ class UndoItem ( AbstractUndoItem ):
         return 'undo( %s.%s = %s )\nredo( %s.%s = %s )' % (
                       cn, n, self.old_value, cn, n, self.new_value )
 
+    #-- Private Methods --------------------------------------------------------
+
+    def _current_value ( self ):
+        """ Returns the current value of the object facet.
+        """
+        return getattr( self.object, self.name )
+
+
+    def _expand ( self, new_value = None ):
+        """ Replaces the delta (if any) by the old and new values, using
+            *new_value* (if specified) as the new value.
+        """
+        delta = self._delta
+        if delta is not None:
+            if new_value is None:
+                new_value = self.new_value
+
+            self._old_value = delta.old_from( new_value )
+            self._new_value = new_value
+            self._delta     = None
+
 #-------------------------------------------------------------------------------
 #  'ListUndoItem' class:
 #-------------------------------------------------------------------------------
@@ -268,6 +790,13 @@ class ListUndoItem ( AbstractUndoItem ):
         return False
 
 
+    def size ( self ):
+        """ Returns an estimate of the number of bytes used by the undo item.
+        """
+        return (getsizeof( self ) + value_size( self.added ) +
+                value_size( self.removed ))
+
+
     def __repr__ ( self ):
         """ Returns a 'pretty print' form of the object.
         """
@@ -288,9 +817,22 @@ class UndoHistory ( HasStrictFacets ):
     # List of accumulated undo changes:
     history = List
 
-    # The current position in the list:
+    # The current position in the history (counting any entries which have
+    # been discarded from the start of the 'history' list):
     now = Int
 
+    # The number of (oldest) entries discarded from the start of the history
+    # to keep it within its memory budget:
+    evicted = Int
+
+    # The maximum number of bytes the undo items in the history should use
+    # (0 = no limit):
+    max_bytes = Int( MaxUndoBytes )
+
+    # The estimated number of bytes currently used by the undo items in the
+    # history:
+    bytes = Property
+
     # Fired when state changes to undoable:
     undoable = Event( False )
 
@@ -303,6 +845,11 @@ class UndoHistory ( HasStrictFacets ):
     # Can an action be redone?
     can_redo = Property
 
+    #-- Private Facet Definitions ----------------------------------------------
+
+    # The estimated number of bytes used by each entry in the history:
+    _sizes = List
+
     #-- Public Methods ---------------------------------------------------------
 
     def add ( self, undo_item, extend = False ):
@@ -313,22 +860,33 @@ class UndoHistory ( HasStrictFacets ):
             return
 
         # Try to merge the new undo item with the previous item if allowed:
-        now = self.now
-        if now > 0:
-            previous = self.history[ now - 1 ]
-            if (len( previous ) == 1) and previous[0].merge_undo( undo_item ):
-                self.history[ now: ] = []
-                return
-
+        index = self.now - self.evicted
+        if index > 0:
+            previous = self.history[ index - 1 ]
+            if len( previous ) == 1:
+                merged = previous[0].merge_undo( undo_item )
+                previous[0].compact()
+                if merged:
+                    self.history[ index: ] = []
+                    self._sizes[ index: ]  = []
+                    self._sizes[ -1 ]      = self._size_of( previous )
+                    self._evict()
+
+                    return
+
+        undo_item.compact()
         old_len = len( self.history )
-        self.history[ now: ] = [ [ undo_item ] ]
+        self.history[ index: ] = [ [ undo_item ] ]
+        self._sizes[ index: ]  = [ undo_item.size() ]
         self.now += 1
-        if self.now == 1:
+        if index == 0:
             self.undoable = True
 
-        if self.now <= old_len:
+        if index < old_len:
             self.redoable = False
 
+        self._evict()
+
 
     def extend ( self, undo_item ):
         """ Extends the undo history.
@@ -336,25 +894,33 @@ class UndoHistory ( HasStrictFacets ):
             If possible the method merges the new UndoItem with the last item in
             the history; otherwise, it appends the new item.
         """
-        if self.now > 0:
-            undo_list =  self.history[ self.now - 1 ]
-            if not undo_list[ -1 ].merge_undo( undo_item ):
+        index = self.now - self.evicted
+        if index > 0:
+            undo_list = self.history[ index - 1 ]
+            merged    = undo_list[ -1 ].merge_undo( undo_item )
+            undo_list[ -1 ].compact()
+            if not merged:
+                undo_item.compact()
                 undo_list.append( undo_item )
 
+            self._sizes[ index - 1 ] = self._size_of( undo_list )
+            self._evict()
+
 
     def undo ( self ):
         """ Undoes an operation.
         """
         if self.can_undo:
             self.now -= 1
-            items = self.history[ self.now ]
+            index = self.now - self.evicted
+            items = self.history[ index ]
             for i in range( len( items ) - 1, -1, -1 ):
                 items[ i ].undo()
 
-            if self.now == 0:
+            if index == 0:
                 self.undoable = False
 
-            if self.now == ( len( self.history ) - 1 ):
+            if index == ( len( self.history ) - 1 ):
                 self.redoable = True
 
 
@@ -363,20 +929,21 @@ class UndoHistory ( HasStrictFacets ):
         """
         if self.can_redo:
             self.now += 1
-            for item in self.history[ self.now - 1 ]:
+            index = self.now - self.evicted
+            for item in self.history[ index - 1 ]:
                 item.redo()
 
-            if self.now == 1:
+            if index == 1:
                 self.undoable = True
 
-            if self.now == len( self.history ):
+            if index == len( self.history ):
                 self.redoable = False
 
 
     def revert ( self ):
         """ Reverts all changes made so far and clears the history.
         """
-        history = self.history[ : self.now ]
+        history = self.history[ : self.now - self.evicted ]
         self.clear()
         for i in range( len( history ) - 1, -1, -1 ):
             items = history[ i ]
@@ -387,14 +954,16 @@ class UndoHistory ( HasStrictFacets ):
     def clear ( self ):
         """ Clears the undo history.
         """
-        old_len  = len( self.history )
-        old_now  = self.now
-        self.now = 0
+        old_len      = len( self.history )
+        old_index    = self.now - self.evicted
+        self.now     = 0
+        self.evicted = 0
         del self.history[:]
-        if old_now > 0:
+        del self._sizes[:]
+        if old_index > 0:
             self.undoable = False
 
-        if old_now < old_len:
+        if old_index < old_len:
             self.redoable = False
 
     #-- Private Methods --------------------------------------------------------
@@ -402,13 +971,45 @@ class UndoHistory ( HasStrictFacets ):
     def _get_can_undo ( self ):
         """ Are there any undoable operations?
         """
-        return self.now > 0
+        return self.now > self.evicted
 
 
     def _get_can_redo ( self ):
         """ Are there any redoable operations?
         """
-        return self.now < len( self.history )
+        return (self.now - self.evicted) < len( self.history )
+
+
+    def _get_bytes ( self ):
+        """ Returns the estimated number of bytes used by the history.
+        """
+        return sum( self._sizes )
+
+
+    def _size_of ( self, undo_list ):
+        """ Returns the estimated number of bytes used by the undo items in
+            *undo_list*.
+        """
+        return sum( [ item.size() for item in undo_list ] )
+
+
+    def _evict ( self ):
+        """ Discards the oldest entries in the history until it is within its
+            memory budget (always keeping the most recent entry).
+        """
+        max_bytes = self.max_bytes
+        if max_bytes > 0:
+            sizes = self._sizes
+            total = sum( sizes )
+            n     = 0
+            while (total > max_bytes) and (n < (self.now - self.evicted - 1)):
+                total -= sizes[ n ]
+                n     += 1
+
+            if n > 0:
+                del self.history[ : n ]
+                del sizes[ : n ]
+                self.evicted += n
 
 #-------------------------------------------------------------------------------
 #  'UndoHistoryUndoItem' class:
@@ -429,7 +1030,7 @@ class UndoHistoryUndoItem ( AbstractUndoItem ):
         """ Undoes the change.
         """
         history = self.history
-        for i in range( history.now - 1, -1, -1 ):
+        for i in range( history.now - history.evicted - 1, -1, -1 ):
             items = history.history[ i ]
             for j in range( len( items ) - 1, -1, -1 ):
                 items[ j ].undo()
@@ -439,7 +1040,7 @@ class UndoHistoryUndoItem ( AbstractUndoItem ):
         """ Re-does the change.
         """
         history = self.history
-        for i in range( 0, history.now ):
+        for i in range( 0, history.now - history.evicted ):
             for item in history.history[ i ]:
                 item.redo()
 
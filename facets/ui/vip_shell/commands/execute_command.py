@@ -59,6 +59,6 @@ class ExecuteCommand ( ShellCommand ):
             if not isfile( py_file ):
                 raise ValueError( 'Invalid Python source file name.' )
 
-        self.shell.execute_file( py_file )
+        self.shell.execute_file( py_file, True )
 
 #-- EOF ------------------------------------------------------------------------
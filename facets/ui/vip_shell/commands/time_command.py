@@ -24,7 +24,8 @@ Turns on execution timing for the remainder of the command execution. This
 command should proceed one or more Python expression or code blocks to be timed.
 
 When the command is completed, the execution time for each separate block of
-Python code executed is displayed. You can use the 'no-op' command ([[/#]]) to
+Python code executed is displayed, both as elapsed (wall clock) time and as the
+CPU time used by the process. You can use the 'no-op' command ([[/#]]) to
 separate several blocks of Python code if desired.
 """[1:-1]
 
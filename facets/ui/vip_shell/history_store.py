@@ -0,0 +1,441 @@
+"""
+Defines the HistoryStore class used by the VIP Shell to persist the commands in
+its history across shell sessions.
+
+The commands are kept in an append-only log file, containing one record for
+each command added to the history, and one record for each command deleted
+from it (commands are never removed from the log itself, except when the log
+is compacted while being opened, once most of its records have been deleted).
+Adding or deleting a command only appends a few bytes to the log, rather than
+rewriting the entire history.
+
+Alongside the log, the store keeps an index file, containing the offset of each
+command's record in the log, which commands have been deleted, and a full-text
+index mapping each (case folded) word appearing in any command to the sorted
+array of the commands containing it. When the store is opened, only the part of
+the log written after the index was last saved needs to be read, so opening a
+long history takes time proportional to the number of new commands, and a
+command is only read from the log when it is actually needed (e.g. when the
+shell displays it).
+
+A history search is answered using the word index: only the commands
+containing a word which contains each word of the search string are read from
+the log to check whether they actually contain the search string.
+
+Several stores (e.g. those of different shells) may share the same log. Each
+store locks the log while appending to it (where file locking is available),
+and first adds any records written by the other stores to its own index, so
+that all stores agree on the index of each command.
+"""
+
+#-------------------------------------------------------------------------------
+#  License: See section (A) of the .../facets/LICENSE.txt file.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import re
+
+from array \
+    import array
+
+from cPickle \
+    import dump, load
+
+from os \
+    import remove, rename
+
+from os.path \
+    import exists, getsize
+
+from struct \
+    import Struct
+
+try:
+    from fcntl \
+        import flock, LOCK_EX
+except ImportError:
+    # File locking is not available on this platform (e.g. Windows):
+    flock = None
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# The version of the saved index format:
+IndexVersion = 1
+
+# The kinds of log records:
+AddStr     = 0
+AddUnicode = 1
+Delete     = 2
+
+# The header of each log record (its kind and the length of its data):
+Header = Struct( '<BI' )
+
+# The data for a 'Delete' record (the index of the deleted command):
+DeleteData = Struct( '<I' )
+
+# The minimum number of deleted commands before a log is compacted:
+CompactThreshold = 1000
+
+# The regular expression used to split a command into words:
+words_in = re.compile( r'\w+', re.UNICODE ).findall
+
+#-------------------------------------------------------------------------------
+#  'HistoryStore' class:
+#-------------------------------------------------------------------------------
+
+class HistoryStore ( object ):
+    """ An append-only, indexed store of the commands in a shell's history.
+    """
+
+    #-- Public Methods ---------------------------------------------------------
+
+    def __init__ ( self, file_name ):
+        """ Initializes the object from the *file_name* (without extension) of
+            the store's log and index files, which are created if they do not
+            exist yet.
+        """
+        self.log_file_name   = file_name + '.log'
+        self.index_file_name = file_name + '.idx'
+        self._reader         = None
+        self._modified       = False
+
+        if not self._load_index():
+            self._reset()
+
+        self._update_index()
+        if ((self._deleted_count >= CompactThreshold) and
+            (self._deleted_count >= (len( self ) - self._deleted_count))):
+            self._compact()
+
+
+    def __len__ ( self ):
+        """ Returns the number of commands in the store (including deleted
+            ones).
+        """
+        return len( self.offsets )
+
+
+    def is_deleted ( self, index ):
+        """ Returns True if the command with the specified *index* has been
+            deleted.
+        """
+        return (self.deleted[ index ] != 0)
+
+
+    def recent ( self, count ):
+        """ Returns the (ascending) list of the indices of the *count* most
+            recent commands which have not been deleted.
+        """
+        deleted = self.deleted
+        result  = []
+        for index in xrange( len( self ) - 1, -1, -1 ):
+            if len( result ) >= count:
+                break
+
+            if deleted[ index ] == 0:
+                result.append( index )
+
+        result.reverse()
+
+        return result
+
+
+    def get ( self, index ):
+        """ Returns the text of the command with the specified *index*.
+        """
+        reader = self._reader
+        if reader is None:
+            self._reader = reader = open( self.log_file_name, 'rb' )
+
+        reader.seek( self.offsets[ index ] )
+        kind, length = Header.unpack( reader.read( Header.size ) )
+        text         = reader.read( length )
+        if kind == AddUnicode:
+            return text.decode( 'utf-8' )
+
+        return text
+
+
+    def append ( self, text ):
+        """ Adds the command *text* to the end of the store, and returns its
+            index.
+        """
+        kind = AddStr
+        if isinstance( text, unicode ):
+            kind, text = AddUnicode, text.encode( 'utf-8' )
+
+        offset = self._write( Header.pack( kind, len( text ) ) + text )
+        index  = len( self )
+        self._add( index, kind, text, offset )
+
+        return index
+
+
+    def delete ( self, index ):
+        """ Deletes the command with the specified *index* from the store.
+        """
+        if self.deleted[ index ] == 0:
+            self._write( Header.pack( Delete, DeleteData.size ) +
+                         DeleteData.pack( index ) )
+            self._delete( index )
+
+
+    def search ( self, text, limit = None ):
+        """ Returns the (ascending) list of the indices of the (at most *limit*
+            most recent) commands which have not been deleted and which contain
+            *text* (ignoring case).
+        """
+        text = text.strip().lower()
+        if text == '':
+            return []
+
+        deleted    = self.deleted
+        candidates = None
+        for word in set( words_in( text ) ):
+            matches = set()
+            for key, indices in self.words.iteritems():
+                if word in key:
+                    matches.update( indices )
+
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates &= matches
+
+            if len( candidates ) == 0:
+                return []
+
+        if candidates is None:
+            # The search text does not contain any words, so every command has
+            # to be checked:
+            candidates = xrange( len( self ) )
+
+        result = []
+        get    = self.get
+        for index in sorted( candidates, reverse = True ):
+            if ((deleted[ index ] == 0) and
+                (get( index ).lower().find( text ) >= 0)):
+                result.append( index )
+                if len( result ) == limit:
+                    break
+
+        result.reverse()
+
+        return result
+
+
+    def save_index ( self ):
+        """ Saves the index for the store (if it has changed since it was last
+            saved).
+        """
+        if self._modified:
+            fh = open( self.index_file_name, 'wb' )
+            try:
+                dump( ( IndexVersion, self.size, self.offsets.tostring(),
+                        self.deleted.tostring(),
+                        dict( [ ( word, indices.tostring() )
+                                for word, indices in self.words.iteritems() ] )
+                      ), fh, -1 )
+            finally:
+                fh.close()
+
+            self._modified = False
+
+
+    def close ( self ):
+        """ Saves the index for the store and closes any open files.
+        """
+        self.save_index()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    #-- Private Methods --------------------------------------------------------
+
+    def _reset ( self ):
+        """ Resets the index to describe an empty log.
+        """
+        self.size           = 0
+        self.offsets        = array( 'l' )
+        self.deleted        = array( 'B' )
+        self.words          = {}
+        self._deleted_count = 0
+        self._modified      = True
+
+
+    def _load_index ( self ):
+        """ Loads the saved index for the store. Returns True if the index was
+            loaded successfully, and False otherwise.
+        """
+        try:
+            fh = open( self.index_file_name, 'rb' )
+        except IOError:
+            return False
+
+        try:
+            try:
+                version, size, offsets, deleted, words = load( fh )
+            except:
+                return False
+        finally:
+            fh.close()
+
+        if ((version != IndexVersion) or (not exists( self.log_file_name )) or
+            (getsize( self.log_file_name ) < size)):
+            return False
+
+        self.size    = size
+        self.offsets = array( 'l' )
+        self.offsets.fromstring( offsets )
+        self.deleted = array( 'B' )
+        self.deleted.fromstring( deleted )
+        self.words   = {}
+        for word, indices in words.iteritems():
+            self.words[ word ] = postings = array( 'l' )
+            postings.fromstring( indices )
+
+        self._deleted_count = self.deleted.count( 1 )
+
+        return True
+
+
+    def _update_index ( self ):
+        """ Adds the records written to the log since the index was last saved
+            to the index.
+        """
+        try:
+            fh = open( self.log_file_name, 'rb' )
+        except IOError:
+            return
+
+        try:
+            fh.seek( 0, 2 )
+            if fh.tell() < self.size:
+                # The log has been compacted by another store, so re-read it
+                # from the beginning:
+                self._reset()
+                if self._reader is not None:
+                    self._reader.close()
+                    self._reader = None
+
+            fh.seek( self.size )
+            data = fh.read()
+        finally:
+            fh.close()
+
+        offset = 0
+        n      = len( data )
+        while (offset + Header.size) <= n:
+            kind, length = Header.unpack_from( data, offset )
+            start        = offset + Header.size
+            if (start + length) > n:
+                break
+
+            if kind == Delete:
+                self._delete( DeleteData.unpack_from( data, start )[0] )
+            else:
+                self._add( len( self ), kind, data[ start: start + length ],
+                           self.size + offset )
+
+            offset = start + length
+
+        self.size += offset
+        if offset < n:
+            # Discard the partially written record at the end of the log (e.g.
+            # because the process writing it was terminated):
+            fh = open( self.log_file_name, 'r+b' )
+            try:
+                fh.truncate( self.size )
+            finally:
+                fh.close()
+
+
+    def _add ( self, index, kind, text, offset ):
+        """ Adds the command *text* with the specified *index*, whose log record
+            is at *offset*, to the index.
+        """
+        self.offsets.append( offset )
+        self.deleted.append( 0 )
+        if kind == AddUnicode:
+            text = text.decode( 'utf-8' )
+
+        words = self.words
+        for word in set( words_in( text.lower() ) ):
+            indices = words.get( word )
+            if indices is None:
+                words[ word ] = indices = array( 'l' )
+
+            indices.append( index )
+
+        self._modified = True
+
+
+    def _delete ( self, index ):
+        """ Marks the command with the specified *index* as deleted.
+        """
+        if (index < len( self )) and (self.deleted[ index ] == 0):
+            self.deleted[ index ] = 1
+            self._deleted_count  += 1
+            self._modified        = True
+
+
+    def _write ( self, data ):
+        """ Appends *data* to the log, and returns the offset it was written
+            at. The log is locked while writing to it, and any records written
+            to it by other stores sharing the log are added to the index first.
+        """
+        fh = open( self.log_file_name, 'ab' )
+        try:
+            if flock is not None:
+                flock( fh.fileno(), LOCK_EX )
+
+            self._update_index()
+            fh.seek( 0, 2 )
+            offset = fh.tell()
+            fh.write( data )
+        finally:
+            # Closing the file also releases the lock:
+            fh.close()
+
+        self.size = offset + len( data )
+
+        return offset
+
+
+    def _compact ( self ):
+        """ Rewrites the log so that it only contains the commands which have
+            not been deleted.
+        """
+        records = []
+        for index in xrange( len( self ) ):
+            if self.deleted[ index ] == 0:
+                text = self.get( index )
+                kind = AddStr
+                if isinstance( text, unicode ):
+                    kind, text = AddUnicode, text.encode( 'utf-8' )
+
+                records.append( Header.pack( kind, len( text ) ) + text )
+
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+        temp_file_name = self.log_file_name + '.tmp'
+        fh             = open( temp_file_name, 'wb' )
+        try:
+            fh.write( ''.join( records ) )
+        finally:
+            fh.close()
+
+        remove( self.log_file_name )
+        rename( temp_file_name, self.log_file_name )
+        self._reset()
+        self._update_index()
+        self.save_index()
+
+#-- EOF ------------------------------------------------------------------------
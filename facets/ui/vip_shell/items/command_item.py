@@ -11,6 +11,9 @@ shell commands.
 #  Imports:
 #-------------------------------------------------------------------------------
 
+from facets.api \
+    import Int
+
 from facets.ui.vip_shell.helper \
     import remove_color
 
@@ -32,6 +35,10 @@ class CommandItem ( ShellItem ):
     color_code = '\x00E'
     file_ext   = 'py'
 
+    # The index of the command in the shell's persistent history store (if it
+    # has been saved there):
+    record = Int( -1 )
+
     #-- Public Methods ---------------------------------------------------------
 
     def can_execute ( self ):
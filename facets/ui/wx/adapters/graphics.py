@@ -13,6 +13,9 @@ providing GUI toolkit neutral graphics support.
 
 import wx
 
+from numpy \
+    import array, where
+
 from facets.ui.adapters.graphics \
     import Graphics
 
@@ -192,6 +195,31 @@ class WxGraphics ( Graphics ):
         self.graphics.DrawLine( x1, y1, x2, y2 )
 
 
+    def draw_lines ( self, lines ):
+        """ Draws each of the lines specified by *lines*, a sequence (or n x 4
+            array) of (x1,y1,x2,y2) values, using a single call.
+        """
+        lines = array( lines, int ).reshape( -1, 4 )
+        if len( lines ) > 0:
+            # Extend horizontal and vertical lines to include their end point
+            # (the same as 'draw_line'):
+            x1, y1, x2, y2 = lines.T
+            horizontal     = (y1 == y2)
+            vertical       = (x1 == x2) & (~horizontal)
+            x2            += where( horizontal, where( x2 > x1, 1, -1 ), 0 )
+            y2            += where( vertical,   where( y2 > y1, 1, -1 ), 0 )
+            self.graphics.DrawLineList( lines.tolist() )
+
+
+    def draw_rectangles ( self, rectangles ):
+        """ Draws each of the rectangles specified by *rectangles*, a sequence
+            (or n x 4 array) of (x,y,dx,dy) values, using a single call.
+        """
+        rectangles = array( rectangles, int ).reshape( -1, 4 )
+        if len( rectangles ) > 0:
+            self.graphics.DrawRectangleList( rectangles.tolist() )
+
+
     def draw_bitmap ( self, bitmap, x, y ):
         """ Draws a specified bitmap at the specified location.
         """